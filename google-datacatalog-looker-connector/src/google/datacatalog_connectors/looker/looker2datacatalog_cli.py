@@ -47,17 +47,60 @@ class Looker2DataCatalogCli:
         parser.add_argument('--looker-credentials-file',
                             help='Looker credentials file',
                             required=True)
+        parser.add_argument('--looker-query-workers',
+                            help='Maximum number of queries scraped'
+                            ' concurrently',
+                            type=int,
+                            default=1)
+        parser.add_argument('--looker-requests-per-second',
+                            help='Maximum number of requests per second sent'
+                            ' to each Looker API endpoint used to scrape'
+                            ' queries',
+                            type=float)
+        parser.add_argument('--looker-cache-file',
+                            help='SQLite file in which LookML explores,'
+                            ' connections and generated SQL are cached'
+                            ' across runs')
+        parser.add_argument('--looker-cache-ttl-hours',
+                            help='Maximum age, in hours, of the cached'
+                            ' metadata not bound to a LookML deployed commit',
+                            type=float,
+                            default=24)
+        parser.add_argument('--looker-search-page-size',
+                            help='Number of dashboards, folders or looks'
+                            ' requested per page (default: 1000)',
+                            type=int)
+        parser.add_argument('--looker-lookml-workers',
+                            help='Maximum number of concurrent requests sent'
+                            ' to crawl the LookML folder',
+                            type=int,
+                            default=1)
+        parser.add_argument('--looker-state-file',
+                            help='File in which the state of the last'
+                            ' synchronization is kept, so only the entries'
+                            ' changed since then are ingested')
 
         parser.set_defaults(func=cls.__run_synchronizer)
 
-        return parser.parse_args(argv)
+        args = parser.parse_args(argv)
+        if args.looker_cache_ttl_hours < 0:
+            parser.error('--looker-cache-ttl-hours must not be negative')
+
+        return args
 
     @classmethod
     def __run_synchronizer(cls, args):
         sync.MetadataSynchronizer(
             datacatalog_project_id=args.datacatalog_project_id,
             datacatalog_location_id=cls.__DATACATALOG_LOCATION_ID,
-            looker_credentials_file=args.looker_credentials_file).run()
+            looker_credentials_file=args.looker_credentials_file,
+            query_workers=args.looker_query_workers,
+            requests_per_second=args.looker_requests_per_second,
+            cache_file=args.looker_cache_file,
+            cache_ttl_hours=args.looker_cache_ttl_hours,
+            search_page_size=args.looker_search_page_size,
+            lookml_workers=args.looker_lookml_workers,
+            state_file=args.looker_state_file).run()
 
 
 def main():
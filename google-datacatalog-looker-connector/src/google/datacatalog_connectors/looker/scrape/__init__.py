@@ -14,6 +14,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .folder_hierarchy_assembler import FolderHierarchyAssembler
+from .lookml_folder_crawler import LookMLFolderCrawler
 from .metadata_scraper import MetadataScraper
+from .query_metadata_scraper import QueryMetadataScraper
+from .sqlite_metadata_cache import SQLiteMetadataCache
 
-__all__ = ['MetadataScraper']
+__all__ = [
+    'FolderHierarchyAssembler', 'LookMLFolderCrawler', 'MetadataScraper',
+    'QueryMetadataScraper', 'SQLiteMetadataCache'
+]
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import defaultdict
+
+
+class FolderHierarchyAssembler:
+    """
+    Assemble folder hierarchies from the flat lists of folders, dashboards,
+    and looks returned by the Looker search APIs.
+
+    The lists are indexed once, grouping dashboards and looks by their folder
+    IDs and folders by their parent IDs, so assembling all hierarchies takes
+    linear time. The hierarchies are walked iteratively, so deep ones do not
+    hit the recursion limit.
+    """
+
+    def __init__(self, all_folders, all_dashboards, all_looks):
+        self.__child_folders = self.__group_by(all_folders,
+                                               lambda folder: folder.parent_id)
+        self.__folder_dashboards = self.__group_by(
+            all_dashboards, lambda dashboard: dashboard.space.id)
+        self.__folder_looks = self.__group_by(all_looks,
+                                              lambda look: look.space.id)
+
+    def assemble(self, folder):
+        """
+        Add the nested dashboards and looks to the given folder and all of
+        its descendants.
+
+        :return: A ``list`` with the given folder and its descendants in a
+            depth-first order, in which siblings keep the order of the flat
+            folders list.
+        """
+        folders = []
+        visited_folder_ids = set()
+
+        pending_folders = [folder]
+        while pending_folders:
+            folder = pending_folders.pop()
+            # Guards against cycles in inconsistent parent IDs.
+            if folder.id in visited_folder_ids:
+                continue
+            visited_folder_ids.add(folder.id)
+
+            if folder.dashboards is None:
+                folder.dashboards = []
+            folder.dashboards.extend(
+                self.__folder_dashboards.get(folder.id, []))
+
+            if folder.looks is None:
+                folder.looks = []
+            folder.looks.extend(self.__folder_looks.get(folder.id, []))
+
+            folders.append(folder)
+
+            # The stack is last in, first out, so children are pushed in
+            # reverse order to be visited in the original one.
+            pending_folders.extend(
+                reversed(self.__child_folders.get(folder.id, [])))
+
+        return folders
+
+    @classmethod
+    def __group_by(cls, items, get_key):
+        groups = defaultdict(list)
+        for item in items:
+            groups[get_key(item)].append(item)
+
+        return groups
@@ -0,0 +1,125 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+
+from looker_sdk import error
+
+
+class LookMLFolderCrawler:
+    """
+    Crawl a folder hierarchy, such as the special ``lookml`` folder, that is
+    not returned by the Looker search APIs and needs one request per object.
+
+    The hierarchy is crawled breadth-first using a bounded pool of worker
+    threads: the children of each folder are requested as soon as the folder
+    is found, while its dashboards and looks are requested at the same time.
+    Each dashboard and look is requested only once, even if it is referenced
+    by several folders.
+    """
+
+    def __init__(self, metadata_scraper, max_workers=1):
+        """
+        :param metadata_scraper: The ``MetadataScraper`` used to send the
+            requests.
+        :param max_workers: The maximum number of concurrent requests.
+        """
+        self.__metadata_scraper = metadata_scraper
+        self.__max_workers = max(1, max_workers)
+
+    def crawl(self, folder):
+        """
+        Add the dashboards and looks to the given folder and all of its
+        descendants.
+
+        :return: A ``list`` with the given folder and its descendants in a
+            depth-first order.
+        """
+        child_folders = {}
+        dashboards = {}
+        looks = {}
+
+        with futures.ThreadPoolExecutor(self.__max_workers) as executor:
+            visited_folder_ids = {folder.id}
+            pending_children = {
+                self.__submit_folder(executor, folder, dashboards, looks):
+                    folder
+            }
+            while pending_children:
+                done, _ = futures.wait(pending_children,
+                                       return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    parent_folder = pending_children.pop(future)
+                    children = [
+                        child for child in future.result() or []
+                        if child.id not in visited_folder_ids
+                    ]
+                    child_folders[parent_folder.id] = children
+                    for child in children:
+                        visited_folder_ids.add(child.id)
+                        pending_children[self.__submit_folder(
+                            executor, child, dashboards, looks)] = child
+
+        return self.__assemble(folder, child_folders, dashboards, looks)
+
+    def __submit_folder(self, executor, folder, dashboards, looks):
+        """
+        Request the dashboards and looks of the given folder that were not
+        requested yet.
+
+        :return: The ``Future`` of the folder's children request.
+        """
+        for dashboard in folder.dashboards or []:
+            if dashboard.id not in dashboards:
+                dashboards[dashboard.id] = executor.submit(
+                    self.__metadata_scraper.scrape_dashboard, dashboard.id)
+
+        for look in folder.looks or []:
+            if look.id not in looks:
+                looks[look.id] = executor.submit(
+                    self.__metadata_scraper.scrape_look, look.id)
+
+        return executor.submit(self.__metadata_scraper.scrape_child_folders,
+                               folder)
+
+    @classmethod
+    def __assemble(cls, folder, child_folders, dashboards, looks):
+        folders = []
+
+        pending_folders = [folder]
+        while pending_folders:
+            folder = pending_folders.pop()
+
+            dashboards_ids = [
+                dashboard.id for dashboard in folder.dashboards or []
+            ]
+            folder.dashboards = []
+            for dashboard_id in dashboards_ids:
+                try:
+                    folder.dashboards.append(dashboards[dashboard_id].result())
+                except error.SDKError:
+                    pass
+
+            looks_ids = [look.id for look in folder.looks or []]
+            folder.looks = [looks[look_id].result() for look_id in looks_ids]
+
+            folders.append(folder)
+
+            # The stack is last in, first out, so children are pushed in
+            # reverse order to be visited in the original one.
+            pending_folders.extend(reversed(child_folders.get(folder.id, [])))
+
+        return folders
@@ -17,7 +17,8 @@
 from functools import lru_cache
 import logging
 
-from looker_sdk import error, init31
+from looker_sdk import error, init31, models
+from looker_sdk.rtl import serialize
 
 
 class MetadataScraper:
@@ -30,17 +31,44 @@ class MetadataScraper:
                     'public,user_id,last_updater_id,query_id,url,short_url,' \
                     'public_url,excel_file_url,google_spreadsheet_formula,' \
                     'view_count,favorite_count,last_accessed_at,' \
-                    'last_viewed_at,deleted,deleter_id'
-
-    def __init__(self, looker_credentials_file):
+                    'last_viewed_at,deleted,deleted_at,deleter_id'
+
+    DEFAULT_SEARCH_PAGE_SIZE = 1000
+
+    # Namespaces of the persistent cache.
+    __CONNECTIONS = 'connections'
+    __EXPLORES = 'explores'
+    __GENERATED_SQL = 'generated_sql'
+
+    def __init__(self,
+                 looker_credentials_file,
+                 cache=None,
+                 cache_ttl=None,
+                 search_page_size=None):
+        """
+        :param cache: An optional persistent cache, such as a
+            ``SQLiteMetadataCache``, used to keep LookML explores,
+            connections, and generated SQL across runs.
+        :param cache_ttl: The maximum age, in seconds, of cached values that
+            are not bound to a LookML deployed commit. ``None`` means such
+            values never expire.
+        :param search_page_size: The number of objects requested per page
+            when scraping all dashboards, folders, or looks. Defaults to
+            ``DEFAULT_SEARCH_PAGE_SIZE``.
+        """
         self.__sdk = init31(looker_credentials_file)
+        self.__cache = cache
+        self.__cache_ttl = cache_ttl
+        self.__search_page_size = \
+            search_page_size or self.DEFAULT_SEARCH_PAGE_SIZE
 
     def scrape_dashboard(self, dashboard_id):
         self.__log_scrape_start('Scraping dashboard by id: %s...',
                                 dashboard_id)
 
         try:
-            dashboard = self.__sdk.dashboard(dashboard_id=dashboard_id)
+            dashboard = self.__sdk.dashboard(dashboard_id=dashboard_id,
+                                             fields=self.__DASHBOARD_FIELDS)
             self.__log_single_object_scrape_result(dashboard)
         except error.SDKError as e:
             logging.info('API call failed...')
@@ -50,6 +78,9 @@ class MetadataScraper:
         return dashboard
 
     def scrape_all_dashboards(self):
+        """
+        :return: A generator that lazily yields the dashboards, page by page.
+        """
         self.__log_scrape_start('Scraping all dashboards...')
 
         # The all_dashboards method response does not include all fields the
@@ -57,15 +88,15 @@ class MetadataScraper:
         #
         # Please notice "lookml" dashboards are not included in
         # search_dashboards response and need a special handling.
-        dashboards = self.__sdk.search_dashboards(
-            fields=self.__DASHBOARD_FIELDS)
-
-        logging.info('%s dashboards found:', len(dashboards))
-        for dashboard in dashboards:
+        dashboards_count = 0
+        for dashboard in self.__search(self.__sdk.search_dashboards,
+                                       fields=self.__DASHBOARD_FIELDS):
             logging.info('%s/%s [%s]', dashboard.space.name, dashboard.title,
                          dashboard.id)
+            dashboards_count += 1
+            yield dashboard
 
-        return dashboards
+        logging.info('%s dashboards found.', dashboards_count)
 
     def scrape_dashboards_from_folder(self, folder):
         self.__log_scrape_start('Scraping "%s" folder dashboards...',
@@ -88,19 +119,23 @@ class MetadataScraper:
         return folder
 
     def scrape_all_folders(self):
+        """
+        :return: A generator that lazily yields the folders, page by page.
+        """
         self.__log_scrape_start('Scraping all folders...')
 
         # The all_folders method response does not include all fields the
         # connector actually needs, so search_folders is used here.
         #
         # Also, empty folders are not included in all_folders response.
-        folders = self.__sdk.search_folders(fields=self.__FOLDER_FIELDS)
-
-        logging.info('%s folders found:', len(folders))
-        for folder in folders:
+        folders_count = 0
+        for folder in self.__search(self.__sdk.search_folders,
+                                    fields=self.__FOLDER_FIELDS):
             logging.info('%s [%s]', folder.name, folder.id)
+            folders_count += 1
+            yield folder
 
-        return folders
+        logging.info('%s folders found.', folders_count)
 
     def scrape_top_level_folders(self):
         self.__log_scrape_start('Scraping top-level folders...')
@@ -128,22 +163,26 @@ class MetadataScraper:
 
     def scrape_look(self, look_id):
         self.__log_scrape_start('Scraping look by id: %s...', look_id)
-        look = self.__sdk.look(look_id=look_id)
+        look = self.__sdk.look(look_id=look_id, fields=self.__LOOK_FIELDS)
         self.__log_single_object_scrape_result(look)
         return look
 
     def scrape_all_looks(self):
+        """
+        :return: A generator that lazily yields the looks, page by page.
+        """
         self.__log_scrape_start('Scraping all looks...')
 
         # The all_looks method response does not include all fields the
         # connector actually needs, so search_looks is used here.
-        looks = self.__sdk.search_looks(fields=self.__LOOK_FIELDS)
-
-        logging.info('%s looks found:', len(looks))
-        for look in looks:
+        looks_count = 0
+        for look in self.__search(self.__sdk.search_looks,
+                                  fields=self.__LOOK_FIELDS):
             logging.info('%s/%s [%s]', look.space.name, look.title, look.id)
+            looks_count += 1
+            yield look
 
-        return looks
+        logging.info('%s looks found.', looks_count)
 
     def scrape_looks_from_folder(self, folder):
         self.__log_scrape_start('Scraping "%s" folder looks...', folder.name)
@@ -164,10 +203,18 @@ class MetadataScraper:
         return query
 
     @lru_cache(maxsize=1024)
-    def scrape_query_generated_sql(self, query_id):
+    def scrape_query_generated_sql(self, query_id, lookml_model_name=None):
         self.__log_scrape_start('Scraping generated SQL by query id: %s...',
                                 query_id)
-        sql = self.__sdk.run_query(query_id=query_id, result_format='sql')
+
+        # Queries are immutable, but the SQL they generate depends on the
+        # LookML model, so the cached SQL is bound to the model version.
+        version = self.__get_lookml_model_version(lookml_model_name)
+        sql = self.__get_cached(self.__GENERATED_SQL, query_id, version)
+        if sql is None:
+            sql = self.__sdk.run_query(query_id=query_id, result_format='sql')
+            self.__set_cached(self.__GENERATED_SQL, query_id, sql, version)
+
         self.__log_single_object_scrape_result(sql)
         return sql
 
@@ -177,6 +224,15 @@ class MetadataScraper:
             'Scraping LookML model explore by name: %s/%s...', model_name,
             explore_name)
 
+        cache_key = f'{model_name}/{explore_name}'
+        version = self.__get_lookml_model_version(model_name)
+        cached_model = self.__get_cached(self.__EXPLORES, cache_key, version)
+        if cached_model is not None:
+            model = serialize.deserialize31(
+                data=cached_model, structure=models.LookmlModelExplore)
+            self.__log_single_object_scrape_result(model)
+            return model
+
         try:
             model = self.__sdk.lookml_model_explore(
                 lookml_model_name=model_name, explore_name=explore_name)
@@ -185,6 +241,9 @@ class MetadataScraper:
             logging.info(e)
             raise
 
+        self.__set_cached(self.__EXPLORES, cache_key,
+                          serialize.serialize(model).decode(), version)
+
         self.__log_single_object_scrape_result(model)
         return model
 
@@ -192,10 +251,74 @@ class MetadataScraper:
     def scrape_connection(self, connection_name):
         self.__log_scrape_start('Scraping connection by name: %s...',
                                 connection_name)
-        connection = self.__sdk.connection(connection_name=connection_name)
+
+        cached_connection = self.__get_cached(self.__CONNECTIONS,
+                                              connection_name)
+        if cached_connection is not None:
+            connection = serialize.deserialize31(data=cached_connection,
+                                                 structure=models.DBConnection)
+        else:
+            connection = self.__sdk.connection(connection_name=connection_name)
+            self.__set_cached(self.__CONNECTIONS, connection_name,
+                              serialize.serialize(connection).decode())
+
         self.__log_single_object_scrape_result(connection)
         return connection
 
+    def __search(self, search_method, **kwargs):
+        """
+        Page through the results of a search method, so the server never has
+        to build a single huge response.
+
+        Results are sorted by ID to keep the pages consistent with each
+        other.
+        """
+        offset = 0
+        while True:
+            page = search_method(limit=self.__search_page_size,
+                                 offset=offset,
+                                 sorts='id',
+                                 **kwargs)
+            yield from page
+
+            if len(page) < self.__search_page_size:
+                return
+            offset += len(page)
+
+    @lru_cache(maxsize=128)
+    def __get_lookml_model_version(self, model_name):
+        """
+        :return: The commit the LookML project of the given model is deployed
+            from, or ``None`` if it cannot be determined.
+        """
+        if not (self.__cache and model_name):
+            return None
+
+        try:
+            model = self.__sdk.lookml_model(lookml_model_name=model_name,
+                                            fields='project_name')
+            workspace = self.__sdk.project_workspace(
+                project_id=model.project_name, fields='git_head')
+        except error.SDKError as e:
+            logging.info('Unable to get the "%s" LookML model version: %s',
+                         model_name, e)
+            return None
+
+        return workspace.git_head
+
+    def __get_cached(self, namespace, key, version=None):
+        if not self.__cache:
+            return None
+
+        # Values bound to a version are invalidated by the version itself;
+        # the other ones may change at any time, so they expire.
+        max_age = None if version else self.__cache_ttl
+        return self.__cache.get(namespace, key, version, max_age)
+
+    def __set_cached(self, namespace, key, value, version=None):
+        if self.__cache and value is not None:
+            self.__cache.set(namespace, key, value, version)
+
     @classmethod
     def __log_scrape_start(cls, message, *args):
         logging.info('')
@@ -0,0 +1,155 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+import threading
+
+from looker_sdk import error
+
+from google.datacatalog_connectors.looker import entities
+from google.datacatalog_connectors.looker.scrape import rate_limiter
+
+
+class QueryMetadataScraper:
+    """
+    Scrape the metadata related to Looker queries using a bounded pool of
+    worker threads.
+
+    Each query requires up to four API calls: ``query``,
+    ``lookml_model_explore``, ``connection``, and
+    ``run_query(result_format='sql')``. Many queries share the same explore
+    and connection, so the requests are deduplicated: a request that is
+    already in flight, or done, is not sent again, and its result (or error)
+    is shared by all the queries that need it. The requests sent to each
+    endpoint may also be rate limited.
+
+    The scraper is meant to be used for a whole synchronization run: it works
+    as a registry in which each query is scraped only once, and the same
+    ``entities.AssembledQueryMetadata`` is returned whenever it is requested.
+    """
+    # Endpoints that can be rate limited.
+    QUERY = 'query'
+    LOOKML_MODEL_EXPLORE = 'lookml_model_explore'
+    CONNECTION = 'connection'
+    RUN_QUERY = 'run_query'
+    ENDPOINTS = (QUERY, LOOKML_MODEL_EXPLORE, CONNECTION, RUN_QUERY)
+
+    # Key used to register the assembled queries metadata.
+    ASSEMBLED_QUERY = 'assembled_query'
+
+    def __init__(self, metadata_scraper, max_workers=1, rate_limits=None):
+        """
+        :param metadata_scraper: The ``MetadataScraper`` used to send the
+            requests.
+        :param max_workers: The maximum number of queries scraped
+            concurrently.
+        :param rate_limits: A ``dict`` in which keys are endpoints and values
+            are the maximum number of requests per second sent to them.
+            Endpoints not in the ``dict`` are not rate limited.
+        """
+        self.__metadata_scraper = metadata_scraper
+        self.__max_workers = max(1, max_workers)
+        self.__rate_limiters = {
+            endpoint: rate_limiter.RateLimiter(calls_per_second)
+            for endpoint, calls_per_second in (rate_limits or {}).items()
+        }
+
+        self.__requests = {}
+        self.__requests_lock = threading.Lock()
+        # How many times each endpoint was needed, and how many of them were
+        # served by the registry instead of sending a request.
+        self.__lookups_count = {}
+        self.__hits_count = {}
+
+    def scrape_queries(self, query_ids):
+        """
+        :return: A ``list`` of ``entities.AssembledQueryMetadata``, in the
+            same order as the given query IDs.
+        """
+        with futures.ThreadPoolExecutor(self.__max_workers) as executor:
+            return list(executor.map(self.__scrape_query, query_ids))
+
+    def get_stats(self):
+        """
+        :return: A ``dict`` in which keys are endpoints and values are
+            ``tuple`` objects with the number of lookups and the number of
+            them served by the registry, without sending a request.
+        """
+        with self.__requests_lock:
+            return {
+                endpoint: (self.__lookups_count.get(endpoint, 0),
+                           self.__hits_count.get(endpoint, 0))
+                for endpoint in (self.ASSEMBLED_QUERY, *self.ENDPOINTS)
+            }
+
+    def __scrape_query(self, query_id):
+        return self.__request(self.ASSEMBLED_QUERY, self.__assemble_query,
+                              query_id)
+
+    def __assemble_query(self, query_id):
+        query = self.__request(self.QUERY,
+                               self.__metadata_scraper.scrape_query, query_id)
+
+        model_explore = None
+        connection = None
+        generated_sql = None
+
+        try:
+            model_explore = self.__request(
+                self.LOOKML_MODEL_EXPLORE,
+                self.__metadata_scraper.scrape_lookml_model_explore,
+                query.model, query.view)
+            connection = self.__request(
+                self.CONNECTION, self.__metadata_scraper.scrape_connection,
+                model_explore.connection_name)
+            generated_sql = self.__request(
+                self.RUN_QUERY,
+                self.__metadata_scraper.scrape_query_generated_sql, query_id,
+                query.model)
+        except error.SDKError:
+            pass
+
+        return entities.AssembledQueryMetadata(query, generated_sql,
+                                               model_explore, connection)
+
+    def __request(self, endpoint, scrape_method, *args):
+        """
+        Send a request, unless an equal one was already sent, in which case
+        wait for its result.
+        """
+        key = (endpoint, *args)
+        with self.__requests_lock:
+            request = self.__requests.get(key)
+            is_new_request = request is None
+            if is_new_request:
+                request = futures.Future()
+                self.__requests[key] = request
+            else:
+                self.__hits_count[endpoint] = \
+                    self.__hits_count.get(endpoint, 0) + 1
+            self.__lookups_count[endpoint] = \
+                self.__lookups_count.get(endpoint, 0) + 1
+
+        if is_new_request:
+            limiter = self.__rate_limiters.get(endpoint)
+            if limiter:
+                limiter.acquire()
+            try:
+                request.set_result(scrape_method(*args))
+            except Exception as e:
+                request.set_exception(e)
+
+        return request.result()
@@ -0,0 +1,43 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Spaces out calls made from any number of threads, so that no more than a
+    given number of them start per second.
+    """
+
+    def __init__(self, calls_per_second):
+        self.__interval = 1 / calls_per_second
+        self.__next_call_time = 0
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block the calling thread until the next call is allowed to start.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            call_time = max(now, self.__next_call_time)
+            self.__next_call_time = call_time + self.__interval
+
+        delay = call_time - now
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+import threading
+import time
+
+
+class SQLiteMetadataCache:
+    """
+    Persist scraped metadata across runs in a SQLite database file.
+
+    Values are strings, stored by namespace and key along with an optional
+    version, e.g. the commit a LookML project was deployed from, and the time
+    they were stored. A value is only returned if its version matches the
+    requested one and it is not older than the requested maximum age.
+
+    ``MetadataScraper`` only relies on the ``get`` and ``set`` methods, so
+    other storages can be plugged in by implementing them.
+    """
+
+    def __init__(self, file_path):
+        self.__file_path = file_path
+        # The cache is shared by the threads that scrape queries, so access
+        # to the connection is serialized.
+        self.__connection = None
+        self.__lock = threading.Lock()
+
+    def get(self, namespace, key, version=None, max_age=None):
+        """
+        :param max_age: The maximum age, in seconds, of the returned value.
+            ``None`` means values never expire.
+        :return: The stored value, or ``None`` if it is missing, stale, or
+            stored for another version.
+        """
+        with self.__lock:
+            row = self.__get_connection().execute(
+                'SELECT value, version, stored_at FROM metadata'
+                ' WHERE namespace = ? AND key = ?',
+                (namespace, str(key))).fetchone()
+
+        if not row:
+            return None
+
+        value, stored_version, stored_at = row
+        if stored_version != version:
+            return None
+        if max_age is not None and time.time() - stored_at > max_age:
+            return None
+
+        return value
+
+    def set(self, namespace, key, value, version=None):
+        with self.__lock:
+            self.__get_connection().execute(
+                'INSERT OR REPLACE INTO metadata'
+                ' (namespace, key, version, value, stored_at)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                (namespace, str(key), version, value, time.time()))
+
+    def close(self):
+        """
+        Close the connection, if open. It is opened again if the cache is
+        used afterwards.
+        """
+        with self.__lock:
+            if self.__connection:
+                self.__connection.close()
+                self.__connection = None
+
+    def __get_connection(self):
+        """
+        Open the connection on first use, or after ``close`` was called, so
+        the cache can be reused across synchronization runs.
+
+        Must be called with the lock held.
+        """
+        if self.__connection:
+            return self.__connection
+
+        self.__connection = sqlite3.connect(self.__file_path,
+                                            check_same_thread=False,
+                                            isolation_level=None)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS metadata ('
+                                  ' namespace TEXT NOT NULL,'
+                                  ' key TEXT NOT NULL,'
+                                  ' version TEXT,'
+                                  ' value TEXT NOT NULL,'
+                                  ' stored_at REAL NOT NULL,'
+                                  ' PRIMARY KEY (namespace, key))')
+        return self.__connection
@@ -18,25 +18,61 @@ import configparser
 import logging
 from urllib.parse import urlparse
 
-from google.datacatalog_connectors.commons import cleanup, ingest
-from looker_sdk import error
+from google.api_core import exceptions
+from google.cloud import datacatalog
+from google.datacatalog_connectors.commons import \
+    cleanup, datacatalog_facade, ingest
 
-from google.datacatalog_connectors.looker import entities, prepare, scrape
+from google.datacatalog_connectors.looker import prepare, scrape
 from google.datacatalog_connectors.looker.prepare import constants
+from google.datacatalog_connectors.looker.sync import sync_state
 
 
 class MetadataSynchronizer:
     __ENTRY_GROUP_ID = 'looker'
     __SPECIFIED_SYSTEM = 'looker'
 
-    def __init__(self, datacatalog_project_id, datacatalog_location_id,
-                 looker_credentials_file):
+    def __init__(self,
+                 datacatalog_project_id,
+                 datacatalog_location_id,
+                 looker_credentials_file,
+                 query_workers=1,
+                 requests_per_second=None,
+                 cache_file=None,
+                 cache_ttl_hours=None,
+                 search_page_size=None,
+                 lookml_workers=1,
+                 state_file=None):
 
         self.__project_id = datacatalog_project_id
         self.__location_id = datacatalog_location_id
 
+        # The cache connection is closed at the end of each run, and opened
+        # again when the cache is used by the next one.
+        self.__cache = scrape.SQLiteMetadataCache(
+            cache_file) if cache_file else None
+        # A zero TTL means cached values always expire, unlike None.
+        cache_ttl = cache_ttl_hours * 3600 \
+            if cache_ttl_hours is not None else None
         self.__metadata_scraper = scrape.MetadataScraper(
-            looker_credentials_file)
+            looker_credentials_file,
+            cache=self.__cache,
+            cache_ttl=cache_ttl,
+            search_page_size=search_page_size)
+
+        # The same rate limit, if any, applies to each of the endpoints used
+        # to scrape the queries metadata.
+        rate_limits = {
+            endpoint: requests_per_second
+            for endpoint in scrape.QueryMetadataScraper.ENDPOINTS
+        } if requests_per_second else None
+        self.__query_metadata_scraper = scrape.QueryMetadataScraper(
+            self.__metadata_scraper, query_workers, rate_limits)
+        self.__lookml_folder_crawler = scrape.LookMLFolderCrawler(
+            self.__metadata_scraper, lookml_workers)
+
+        self.__sync_state = sync_state.SyncState(
+            state_file) if state_file else None
 
         self.__tag_template_factory = prepare.DataCatalogTagTemplateFactory(
             project_id=datacatalog_project_id,
@@ -63,18 +99,34 @@ class MetadataSynchronizer:
         return f'{parsed_uri.scheme}://{parsed_uri.hostname}'
 
     def run(self):
-        """Coordinates a full scrape > prepare > ingest process."""
+        """
+        Coordinates a full scrape > prepare > ingest process.
+
+        When a state file is set, only the entries that changed since the
+        previous run are ingested. All queries are still assembled, so their
+        tags keep up with LookML deployments and connection changes: set a
+        cache file as well to serve them from the cache when nothing changed
+        upstream.
+        """
+        tag_templates_dict = self.__make_tag_templates_dict()
+        if self.__sync_state:
+            self.__sync_state.start(tag_templates_dict)
 
         # Scrape metadata from Looker server.
         logging.info('')
         logging.info('===> Scraping Looker metadata...')
 
-        logging.info('Folders...')
-        folders_dict = self.__scrape_folders()
+        try:
+            logging.info('Folders...')
+            folders_dict = self.__scrape_folders()
 
-        logging.info('')
-        logging.info('Queries...')
-        queries_dict = self.__scrape_queries(folders_dict)
+            logging.info('')
+            logging.info('Queries...')
+            queries_dict = self.__scrape_queries(folders_dict)
+        finally:
+            # The cache is only used to scrape metadata.
+            if self.__cache:
+                self.__cache.close()
         logging.info('==== DONE ========================================')
 
         # Prepare: convert Looker metadata into Data Catalog entities model.
@@ -82,8 +134,6 @@ class MetadataSynchronizer:
         logging.info('===> Converting Looker metadata'
                      ' into Data Catalog entities model...')
 
-        tag_templates_dict = self.__make_tag_templates_dict()
-
         assembled_entries_dict = self.__make_assembled_entries_dict(
             folders_dict, queries_dict, tag_templates_dict)
         logging.info('==== DONE ========================================')
@@ -106,7 +156,14 @@ class MetadataSynchronizer:
         logging.info('')
         logging.info('===> Synchronizing Looker :: Data Catalog metadata...')
 
+        if self.__sync_state:
+            assembled_entries_dict = self.__get_changed_entries(
+                assembled_entries_dict)
+
         self.__ingest_metadata(tag_templates_dict, assembled_entries_dict)
+
+        if self.__sync_state:
+            self.__sync_state.save()
         logging.info('==== DONE ========================================')
 
     def __scrape_folders(self):
@@ -119,7 +176,9 @@ class MetadataSynchronizer:
             and values are lists containing all metadata gathered from that
             folders in a deep-first hierarchy.
         """
-        all_folders = self.__metadata_scraper.scrape_all_folders()
+        # Folders are iterated twice, while dashboards and looks are streamed
+        # straight into the hierarchy assembler.
+        all_folders = list(self.__metadata_scraper.scrape_all_folders())
         all_dashboards = self.__metadata_scraper.scrape_all_dashboards()
         all_looks = self.__metadata_scraper.scrape_all_looks()
 
@@ -129,10 +188,12 @@ class MetadataSynchronizer:
                 folder.parent_id == 'None')
         ]
 
+        hierarchy_assembler = scrape.FolderHierarchyAssembler(
+            all_folders, all_dashboards, all_looks)
+
         folders_dict = {}
         for folder in top_level_folders:
-            folders_dict[folder.id] = self.__scrape_folder_from_flat_lists(
-                folder, all_folders, all_dashboards, all_looks)
+            folders_dict[folder.id] = hierarchy_assembler.assemble(folder)
 
         # Explict "lookml" folder handling.
         # This special folder is not included in search_folders response
@@ -145,83 +206,12 @@ class MetadataSynchronizer:
         lookml_folder = self.__metadata_scraper.scrape_folder(lookml_folder_id)
         if lookml_folder:
             folders_dict[lookml_folder_id] = \
-                self.__scrape_folder_by_recursive_requests(lookml_folder)
+                self.__lookml_folder_crawler.crawl(lookml_folder)
 
         self.__log_folders_related_scraping_results(folders_dict)
 
         return folders_dict
 
-    def __scrape_folder_from_flat_lists(self, folder, all_folders,
-                                        all_dashboards, all_looks):
-        """
-        Retrieve folders metadata from the given flat asset lists.
-        """
-        if folder.dashboards is None:
-            folder.dashboards = []
-
-        folder.dashboards.extend([
-            dashboard for dashboard in all_dashboards
-            if dashboard.space.id == folder.id
-        ])
-
-        if folder.looks is None:
-            folder.looks = []
-
-        folder.looks.extend(
-            [look for look in all_looks if look.space.id == folder.id])
-
-        folders = [folder]
-
-        child_folders = [
-            child_folder for child_folder in all_folders
-            if child_folder.parent_id == folder.id
-        ]
-
-        # TODO Check whether the already used folders, dashboards, and looks
-        #  can be removed from the given lists to improve next iterations
-        #  performance and memory usage.
-
-        for folder in child_folders:
-            folders.extend(
-                self.__scrape_folder_from_flat_lists(folder, all_folders,
-                                                     all_dashboards,
-                                                     all_looks))
-
-        return folders
-
-    def __scrape_folder_by_recursive_requests(self, folder):
-        """
-        Scrape the given folder metadata and do the same for all of its
-        children by recursively requesting their information.
-        """
-        if folder.dashboards is None:
-            folder.dashboards = []
-
-        dashboards_ids = [dashboard.id for dashboard in folder.dashboards]
-        folder.dashboards.clear()
-        for dashboard_id in dashboards_ids:
-            try:
-                folder.dashboards.append(
-                    self.__metadata_scraper.scrape_dashboard(dashboard_id))
-            except error.SDKError:
-                pass
-
-        if folder.looks is None:
-            folder.looks = []
-
-        looks_ids = [look.id for look in folder.looks]
-        folder.looks.clear()
-        for look_id in looks_ids:
-            folder.looks.append(self.__metadata_scraper.scrape_look(look_id))
-
-        folders = [folder]
-
-        child_folders = self.__metadata_scraper.scrape_child_folders(folder)
-        for folder in child_folders:
-            folders.extend(self.__scrape_folder_by_recursive_requests(folder))
-
-        return folders
-
     @classmethod
     def __log_folders_related_scraping_results(cls, folders_dict):
         folders_count = 0
@@ -262,18 +252,48 @@ class MetadataSynchronizer:
         assets. A query metadata set includes its generated SQL statement,
         related LookML explore, and connection.
 
+        The same query may be referenced by assets from several top-level
+        folders, e.g. when a tile is copied, but it is scraped only once, and
+        listed only under the first folder that references it, so a single
+        entry is made for it. The assets from other folders refer to that
+        entry.
+
         :return: A ``dict`` in which keys are equals to the folders_dict keys
             and values are lists of ``entities.AssembledQueryMetadata``
             containing queries metadata gathered from assets nested to each
             of the "key" folders.
         """
-        queries_dict = {}
+        folders_query_ids = {}
+        registered_query_ids = set()
+        references_count = 0
         for folder_id, folders in folders_dict.items():
             query_ids = self.__get_folders_related_query_ids(folders)
+            references_count += len(query_ids)
+            folders_query_ids[folder_id] = [
+                query_id for query_id in query_ids
+                if query_id not in registered_query_ids
+            ]
+            registered_query_ids.update(query_ids)
+
+        # The queries of all folders are scraped at once, so they can be
+        # handled concurrently.
+        unique_query_ids = [
+            query_id for query_ids in folders_query_ids.values()
+            for query_id in query_ids
+        ]
+        queries = dict(
+            zip(unique_query_ids,
+                self.__query_metadata_scraper.scrape_queries(
+                    unique_query_ids)))
+
+        queries_dict = {}
+        for folder_id, query_ids in folders_query_ids.items():
             queries_dict[folder_id] = \
-                [self.__scrape_query(query_id) for query_id in query_ids]
+                [queries[query_id] for query_id in query_ids]
 
-        self.__log_queries_related_scraping_results(queries_dict)
+        self.__log_queries_related_scraping_results(
+            references_count, len(unique_query_ids),
+            self.__query_metadata_scraper.get_stats())
 
         return queries_dict
 
@@ -314,43 +334,32 @@ class MetadataSynchronizer:
 
         return query_ids
 
-    def __scrape_query(self, query_id):
-        query = self.__metadata_scraper.scrape_query(query_id)
-
-        model_explore = None
-        connection = None
-        generated_sql = None
-
-        try:
-            model_explore = self.__metadata_scraper\
-                .scrape_lookml_model_explore(query.model, query.view)
-            connection = self.__metadata_scraper.scrape_connection(
-                model_explore.connection_name)
-            generated_sql = \
-                self.__metadata_scraper.scrape_query_generated_sql(query_id)
-        except error.SDKError:
-            pass
-
-        return entities.AssembledQueryMetadata(query, generated_sql,
-                                               model_explore, connection)
-
     @classmethod
-    def __log_queries_related_scraping_results(cls, queries_dict):
-        assets_count = sum([len(queries) for queries in queries_dict.values()])
-        assets_count_str_len = len(str(assets_count))
+    def __log_queries_related_scraping_results(cls, references_count,
+                                               unique_ids_count,
+                                               requests_stats):
+        references_count_str_len = len(str(references_count))
 
-        unique_ids_count = len(
-            set([
-                assembled.query.id
-                for queries in queries_dict.values()
-                for assembled in queries
-            ]))
+        logging.info('')
+        logging.info('==== %s query references found!', references_count)
+        spaces_count = references_count_str_len - len(str(unique_ids_count))
+        logging.info(
+            '   > %s%s unique queries scraped (%s hit rate)',
+            " " * spaces_count, unique_ids_count,
+            cls.__format_hit_rate(references_count,
+                                  references_count - unique_ids_count))
 
         logging.info('')
-        logging.info('==== %s queries scraped!', assets_count)
-        spaces_count = assets_count_str_len - len(str(unique_ids_count))
-        logging.info('   > %s%s are unique', " " * spaces_count,
-                     unique_ids_count)
+        logging.info('==== Query-related requests:')
+        for endpoint in scrape.QueryMetadataScraper.ENDPOINTS:
+            lookups_count, hits_count = requests_stats[endpoint]
+            logging.info('   > %s: %s lookups, %s requests sent (%s hit rate)',
+                         endpoint, lookups_count, lookups_count - hits_count,
+                         cls.__format_hit_rate(lookups_count, hits_count))
+
+    @classmethod
+    def __format_hit_rate(cls, lookups_count, hits_count):
+        return f'{hits_count / lookups_count:.1%}' if lookups_count else 'n/a'
 
     def __make_tag_templates_dict(self):
         return {
@@ -407,6 +416,33 @@ class MetadataSynchronizer:
                 f'system={self.__SPECIFIED_SYSTEM}'
                 f' tag:instance_url:{self.__instance_url}')
 
+    def __get_changed_entries(self, assembled_entries_dict):
+        """
+        Skip the entries that did not change since the last synchronization.
+        Obsolete entries were already deleted based on all scraped entries.
+
+        :return: A ``dict`` with the folders_dict keys that still have
+            entries to be ingested, in which values are lists of the changed
+            assembled entries.
+        """
+        changed_entries_dict = self.__sync_state.get_changed_entries(
+            assembled_entries_dict)
+
+        entries_count = sum(
+            len(entries) for entries in assembled_entries_dict.values())
+        changed_entries_count = sum(
+            len(entries) for entries in changed_entries_dict.values())
+        logging.info(
+            '==== %d of %d entries changed since the last synchronization'
+            ' (%s).', changed_entries_count, entries_count,
+            self.__sync_state.synced_at or 'none')
+
+        return {
+            folder_id: entries
+            for folder_id, entries in changed_entries_dict.items()
+            if entries
+        }
+
     def __ingest_metadata(self, tag_templates_dict, assembled_entries_dict):
         metadata_ingestor = ingest.DataCatalogMetadataIngestor(
             self.__project_id, self.__location_id, self.__ENTRY_GROUP_ID)
@@ -415,6 +451,14 @@ class MetadataSynchronizer:
             len(entries) for entries in assembled_entries_dict.values())
         logging.info('==== %d entries to be synchronized!', entries_count)
 
+        # The Tag Templates and the Entry Group are ingested only once when
+        # the entries are upserted one by one.
+        datacatalog_facade_ = None
+        if self.__sync_state and entries_count:
+            metadata_ingestor.ingest_metadata([], tag_templates_dict)
+            datacatalog_facade_ = datacatalog_facade.DataCatalogFacade(
+                self.__project_id)
+
         synced_entries_count = 0
         for folder_id, assembled_entries in assembled_entries_dict.items():
             folder_entries_count = len(assembled_entries)
@@ -422,10 +466,47 @@ class MetadataSynchronizer:
             logging.info('')
             logging.info('==== The Folder identified by %s has %d entries.',
                          folder_id, folder_entries_count)
-            metadata_ingestor.ingest_metadata(assembled_entries,
-                                              tag_templates_dict)
+            if datacatalog_facade_:
+                folder_entries_count = self.__upsert_entries(
+                    datacatalog_facade_, assembled_entries)
+            else:
+                metadata_ingestor.ingest_metadata(assembled_entries,
+                                                  tag_templates_dict)
             synced_entries_count = synced_entries_count + folder_entries_count
 
         logging.info('')
         logging.info('==== %d of %d entries successfully synchronized!',
                      synced_entries_count, entries_count)
+
+    def __upsert_entries(self, datacatalog_facade_, assembled_entries):
+        """
+        Upsert the given entries and their tags one by one, recording each
+        entry in the synchronization state once it succeeds. The entries that
+        fail are retried by the next run: ``DataCatalogMetadataIngestor``
+        only logs such failures, so it cannot be used to tell them apart.
+
+        :return: The number of entries successfully upserted.
+        """
+        entry_group_name = datacatalog.DataCatalogClient.entry_group_path(
+            self.__project_id, self.__location_id, self.__ENTRY_GROUP_ID)
+
+        upserted_entries_count = 0
+        for assembled_entry in assembled_entries:
+            try:
+                entry = datacatalog_facade_.upsert_entry(
+                    entry_group_name, assembled_entry.entry_id,
+                    assembled_entry.entry)
+                datacatalog_facade_.upsert_tags(entry, assembled_entry.tags)
+            except (exceptions.FailedPrecondition,
+                    exceptions.PermissionDenied):
+                logging.warning(
+                    'Entry not synchronized, to be retried by the next run:'
+                    ' %s',
+                    assembled_entry.entry.name,
+                    exc_info=True)
+                continue
+
+            self.__sync_state.mark_synced(assembled_entry)
+            upserted_entries_count += 1
+
+        return upserted_entries_count
@@ -0,0 +1,160 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+import os
+
+
+class SyncState:
+    """
+    Keep track of the metadata ingested by the previous synchronizations, so
+    the entries that did not change since then are not ingested again.
+
+    The state is stored in a JSON file with the time the last successful
+    synchronization started and fingerprints of the tag templates and of each
+    entry along with its tags. An entry fingerprint is only recorded once the
+    entry is successfully ingested, so the entries that failed are retried by
+    the next synchronization. All entries are considered changed if there is
+    no previous state or if the tag templates changed.
+
+    Deleted assets are not tracked by the state: obsolete entries are still
+    found by comparing all the scraped entries with the ones in Data Catalog.
+    """
+    __VERSION = 1
+
+    def __init__(self, file_path):
+        self.__file_path = file_path
+        self.__previous_state = self.__load(file_path)
+        self.__synced_fingerprints = {}
+        self.__pending_fingerprints = {}
+        self.__current_state = None
+        self.__started_at = None
+
+    @property
+    def synced_at(self):
+        """
+        :return: The ISO 8601 time the last successful synchronization
+            started, or ``None`` if there is no previous state.
+        """
+        return self.__previous_state.get('synced_at')
+
+    def start(self, tag_templates_dict):
+        """
+        Start a synchronization. The fingerprints of the previous state are
+        only taken into account if the tag templates did not change.
+        """
+        self.__started_at = datetime.now(timezone.utc)
+
+        tag_templates_fingerprint = self.__make_fingerprint(*[
+            tag_templates_dict[template_id]
+            for template_id in sorted(tag_templates_dict)
+        ])
+        is_previous_state_valid = tag_templates_fingerprint == \
+            self.__previous_state.get('tag_templates')
+        self.__synced_fingerprints = dict(
+            self.__previous_state.get('entries', {})) \
+            if is_previous_state_valid else {}
+        self.__pending_fingerprints = {}
+
+        self.__current_state = {
+            'version': self.__VERSION,
+            'tag_templates': tag_templates_fingerprint,
+            'entries': {},
+        }
+
+    def get_changed_entries(self, assembled_entries_dict):
+        """
+        Compare the given metadata with the previous state. The fingerprints
+        of the unchanged entries are kept as the current state, to be saved
+        once the changed entries are ingested.
+
+        :return: A ``dict`` with the same keys as assembled_entries_dict, in
+            which values are lists containing only the assembled entries
+            that are new or changed since the last synchronization.
+        """
+        entries_fingerprints = self.__current_state['entries']
+
+        changed_entries_dict = {}
+        for key, assembled_entries in assembled_entries_dict.items():
+            changed_entries_dict[key] = []
+            for assembled_entry in assembled_entries:
+                entry_name = assembled_entry.entry.name
+                fingerprint = self.__make_fingerprint(
+                    assembled_entry.entry, *(assembled_entry.tags or []))
+                if self.__synced_fingerprints.get(entry_name) == fingerprint:
+                    entries_fingerprints[entry_name] = fingerprint
+                else:
+                    self.__pending_fingerprints[entry_name] = fingerprint
+                    changed_entries_dict[key].append(assembled_entry)
+
+        return changed_entries_dict
+
+    def mark_synced(self, assembled_entry):
+        """Record a changed entry as successfully ingested."""
+        entry_name = assembled_entry.entry.name
+        fingerprint = self.__pending_fingerprints.pop(entry_name, None)
+        if fingerprint:
+            self.__current_state['entries'][entry_name] = fingerprint
+
+    def save(self):
+        """Write the current state, replacing the previous one."""
+        if not self.__current_state:
+            return
+
+        state = dict(self.__current_state,
+                     synced_at=self.__started_at.isoformat())
+
+        # Write to a temporary file first, so an interrupted run does not
+        # leave a corrupted state behind.
+        temp_file_path = f'{self.__file_path}.tmp'
+        with open(temp_file_path, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_file_path, self.__file_path)
+
+        self.__previous_state = state
+
+    @classmethod
+    def __load(cls, file_path):
+        try:
+            with open(file_path) as state_file:
+                state = json.load(state_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning('Ignoring the invalid synchronization state: %s',
+                            file_path)
+            return {}
+
+        if not isinstance(state, dict) or \
+                state.get('version') != cls.__VERSION:
+            logging.warning(
+                'Ignoring the synchronization state of another version: %s',
+                file_path)
+            return {}
+
+        return state
+
+    @classmethod
+    def __make_fingerprint(cls, *messages):
+        digest = hashlib.sha256()
+        for message in messages:
+            digest.update(
+                json.dumps(type(message).to_dict(message),
+                           sort_keys=True).encode())
+        return digest.hexdigest()
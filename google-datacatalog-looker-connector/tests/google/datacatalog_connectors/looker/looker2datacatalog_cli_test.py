@@ -35,6 +35,15 @@ class Looker2DataCatalogCliTest(unittest.TestCase):
             looker2datacatalog_cli.Looker2DataCatalogCli._parse_args,
             ['--datacatalog-project-id', 'dc-project_id'])
 
+    def test_parse_args_negative_cache_ttl_should_raise_system_exit(self):
+        self.assertRaises(
+            SystemExit,
+            looker2datacatalog_cli.Looker2DataCatalogCli._parse_args, [
+                '--datacatalog-project-id', 'dc-project_id',
+                '--looker-credentials-file', 'a-file-path',
+                '--looker-cache-ttl-hours', '-1'
+            ])
+
     @mock.patch('google.datacatalog_connectors.looker.sync'
                 '.MetadataSynchronizer')
     def test_run_should_call_synchronizer(self, mock_metadata_synchonizer):
@@ -46,7 +55,14 @@ class Looker2DataCatalogCliTest(unittest.TestCase):
         mock_metadata_synchonizer.assert_called_once_with(
             datacatalog_project_id='dc-project_id',
             datacatalog_location_id='us-central1',
-            looker_credentials_file='a-file-path')
+            looker_credentials_file='a-file-path',
+            query_workers=1,
+            requests_per_second=None,
+            cache_file=None,
+            cache_ttl_hours=24,
+            search_page_size=None,
+            lookml_workers=1,
+            state_file=None)
 
         synchonizer = mock_metadata_synchonizer.return_value
         synchonizer.run.assert_called_once()
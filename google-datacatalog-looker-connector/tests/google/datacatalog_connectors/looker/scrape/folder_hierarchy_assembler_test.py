@@ -0,0 +1,119 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+
+from looker_sdk import models
+from looker_sdk.rtl import serialize
+
+from google.datacatalog_connectors.looker import scrape
+
+
+class FolderHierarchyAssemblerTest(unittest.TestCase):
+
+    def test_assemble_should_return_folders_depth_first(self):
+        root = self.__make_fake_folder('root')
+        child_a = self.__make_fake_folder('child_a', 'root')
+        child_b = self.__make_fake_folder('child_b', 'root')
+        grandchild = self.__make_fake_folder('grandchild', 'child_a')
+        other_root = self.__make_fake_folder('other_root')
+
+        assembler = scrape.FolderHierarchyAssembler(
+            [root, child_a, child_b, grandchild, other_root], [], [])
+
+        folders = assembler.assemble(root)
+
+        self.assertEqual(['root', 'child_a', 'grandchild', 'child_b'],
+                         [folder.id for folder in folders])
+
+    def test_assemble_should_add_nested_dashboards_and_looks(self):
+        root = self.__make_fake_folder('root')
+        child = self.__make_fake_folder('child', 'root')
+        dashboards = [
+            self.__make_fake_dashboard('dashboard_1', child),
+            self.__make_fake_dashboard('dashboard_2', root),
+            self.__make_fake_dashboard('dashboard_3', child),
+        ]
+        looks = [self.__make_fake_look(1, root)]
+
+        assembler = scrape.FolderHierarchyAssembler([root, child], dashboards,
+                                                    looks)
+
+        assembler.assemble(root)
+
+        self.assertEqual(['dashboard_2'],
+                         [dashboard.id for dashboard in root.dashboards])
+        self.assertEqual([1], [look.id for look in root.looks])
+        self.assertEqual(['dashboard_1', 'dashboard_3'],
+                         [dashboard.id for dashboard in child.dashboards])
+        self.assertEqual([], child.looks)
+
+    def test_assemble_should_handle_deep_hierarchies(self):
+        folders = [self.__make_fake_folder('folder_0')]
+        for index in range(1, 5000):
+            folders.append(
+                self.__make_fake_folder(f'folder_{index}',
+                                        f'folder_{index - 1}'))
+
+        assembler = scrape.FolderHierarchyAssembler(folders, [], [])
+
+        self.assertEqual(5000, len(assembler.assemble(folders[0])))
+
+    def test_assemble_should_not_loop_on_parent_cycles(self):
+        folder_a = self.__make_fake_folder('folder_a', 'folder_b')
+        folder_b = self.__make_fake_folder('folder_b', 'folder_a')
+
+        assembler = scrape.FolderHierarchyAssembler([folder_a, folder_b], [],
+                                                    [])
+
+        self.assertEqual(
+            ['folder_a', 'folder_b'],
+            [folder.id for folder in assembler.assemble(folder_a)])
+
+    @classmethod
+    def __make_fake_folder(cls, folder_id, parent_id=''):
+        folder_data = {
+            'id': folder_id,
+            'name': folder_id,
+            'parent_id': parent_id,
+        }
+        return serialize.deserialize31(data=json.dumps(folder_data),
+                                       structure=models.Folder)
+
+    @classmethod
+    def __make_fake_dashboard(cls, dashboard_id, folder):
+        dashboard_data = {
+            'id': dashboard_id,
+            'space': {
+                'id': folder.id,
+                'name': folder.name,
+            },
+        }
+        return serialize.deserialize31(data=json.dumps(dashboard_data),
+                                       structure=models.Dashboard)
+
+    @classmethod
+    def __make_fake_look(cls, look_id, folder):
+        look_data = {
+            'id': look_id,
+            'space': {
+                'id': folder.id,
+                'name': folder.name,
+            },
+        }
+        return serialize.deserialize31(data=json.dumps(look_data),
+                                       structure=models.Look)
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+from unittest import mock
+
+from looker_sdk import error, models
+from looker_sdk.rtl import serialize
+
+from google.datacatalog_connectors.looker import scrape
+
+
+class LookMLFolderCrawlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__metadata_scraper = mock.MagicMock()
+        self.__metadata_scraper.scrape_dashboard.side_effect = \
+            lambda dashboard_id: self.__make_fake_dashboard(
+                dashboard_id, 'scraped')
+        self.__metadata_scraper.scrape_look.side_effect = \
+            lambda look_id: self.__make_fake_look(look_id, 'scraped')
+
+    def test_crawl_should_return_folders_depth_first(self):
+        root = self.__make_fake_folder('lookml')
+        child_a = self.__make_fake_folder('child_a')
+        child_b = self.__make_fake_folder('child_b')
+        grandchild = self.__make_fake_folder('grandchild')
+        self.__set_child_folders({
+            'lookml': [child_a, child_b],
+            'child_a': [grandchild],
+        })
+
+        crawler = scrape.LookMLFolderCrawler(self.__metadata_scraper, 4)
+        folders = crawler.crawl(root)
+
+        self.assertEqual(['lookml', 'child_a', 'grandchild', 'child_b'],
+                         [folder.id for folder in folders])
+        self.assertEqual(
+            4, self.__metadata_scraper.scrape_child_folders.call_count)
+
+    def test_crawl_should_replace_dashboards_and_looks(self):
+        root = self.__make_fake_folder('lookml')
+        root.dashboards = [
+            self.__make_fake_dashboard('model::dashboard_1'),
+            self.__make_fake_dashboard('model::dashboard_2'),
+        ]
+        root.looks = [self.__make_fake_look(1)]
+        self.__set_child_folders({})
+
+        crawler = scrape.LookMLFolderCrawler(self.__metadata_scraper, 4)
+        crawler.crawl(root)
+
+        self.assertEqual(['model::dashboard_1', 'model::dashboard_2'],
+                         [dashboard.id for dashboard in root.dashboards])
+        self.assertEqual(['scraped', 'scraped'],
+                         [dashboard.title for dashboard in root.dashboards])
+        self.assertEqual(['scraped'], [look.title for look in root.looks])
+
+    def test_crawl_should_scrape_shared_objects_once(self):
+        root = self.__make_fake_folder('lookml')
+        child = self.__make_fake_folder('child')
+        root.dashboards = [self.__make_fake_dashboard('model::dashboard')]
+        child.dashboards = [self.__make_fake_dashboard('model::dashboard')]
+        root.looks = [self.__make_fake_look(1)]
+        child.looks = [self.__make_fake_look(1)]
+        self.__set_child_folders({'lookml': [child], 'child': [root]})
+
+        crawler = scrape.LookMLFolderCrawler(self.__metadata_scraper, 4)
+        folders = crawler.crawl(root)
+
+        self.assertEqual(['lookml', 'child'],
+                         [folder.id for folder in folders])
+        self.__metadata_scraper.scrape_dashboard.assert_called_once_with(
+            'model::dashboard')
+        self.__metadata_scraper.scrape_look.assert_called_once_with(1)
+        self.assertIs(root.dashboards[0], child.dashboards[0])
+        self.assertIs(root.looks[0], child.looks[0])
+
+    def test_crawl_should_skip_dashboards_on_sdk_error(self):
+        root = self.__make_fake_folder('lookml')
+        root.dashboards = [self.__make_fake_dashboard('model::dashboard')]
+        self.__metadata_scraper.scrape_dashboard.side_effect = \
+            error.SDKError('SDK error')
+        self.__set_child_folders({})
+
+        crawler = scrape.LookMLFolderCrawler(self.__metadata_scraper)
+        crawler.crawl(root)
+
+        self.assertEqual([], root.dashboards)
+
+    def test_crawl_should_raise_looks_sdk_error(self):
+        root = self.__make_fake_folder('lookml')
+        root.looks = [self.__make_fake_look(1)]
+        self.__metadata_scraper.scrape_look.side_effect = \
+            error.SDKError('SDK error')
+        self.__set_child_folders({})
+
+        crawler = scrape.LookMLFolderCrawler(self.__metadata_scraper)
+
+        self.assertRaises(error.SDKError, crawler.crawl, root)
+
+    def __set_child_folders(self, child_folders):
+        self.__metadata_scraper.scrape_child_folders.side_effect = \
+            lambda folder: child_folders.get(folder.id, [])
+
+    @classmethod
+    def __make_fake_folder(cls, folder_id):
+        folder_data = {
+            'id': folder_id,
+            'name': folder_id,
+        }
+        return serialize.deserialize31(data=json.dumps(folder_data),
+                                       structure=models.Folder)
+
+    @classmethod
+    def __make_fake_dashboard(cls, dashboard_id, title=''):
+        dashboard_data = {
+            'id': dashboard_id,
+            'title': title,
+        }
+        return serialize.deserialize31(data=json.dumps(dashboard_data),
+                                       structure=models.Dashboard)
+
+    @classmethod
+    def __make_fake_look(cls, look_id, title=''):
+        look_data = {
+            'id': look_id,
+            'title': title,
+        }
+        return serialize.deserialize31(data=json.dumps(look_data),
+                                       structure=models.Look)
@@ -21,7 +21,9 @@ from unittest import mock
 from looker_sdk import error, models
 from looker_sdk.rtl import serialize
 
-from google.datacatalog_connectors.looker import scrape
+from google.datacatalog_connectors.looker import prepare, scrape
+from google.datacatalog_connectors.looker.prepare import \
+    datacatalog_entry_factory, datacatalog_tag_factory
 
 
 class MetadataScraperTest(unittest.TestCase):
@@ -48,7 +50,11 @@ class MetadataScraperTest(unittest.TestCase):
 
         self.assertEqual('dashboard-id', dashboard.id)
         sdk.dashboard.assert_called_once()
-        sdk.dashboard.assert_called_with(dashboard_id='dashboard-id')
+        sdk.dashboard.assert_called_with(
+            dashboard_id='dashboard-id',
+            fields='id,title,created_at,description,space,hidden,user_id,'
+            'view_count,favorite_count,last_accessed_at,last_viewed_at,'
+            'deleted,deleted_at,deleter_id,dashboard_elements')
 
     def test_scrape_dashboard_should_raise_sdk_error_on_failure(self):
         sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
@@ -57,7 +63,11 @@ class MetadataScraperTest(unittest.TestCase):
         self.assertRaises(error.SDKError, self.__scraper.scrape_dashboard,
                           'dashboard-id')
         sdk.dashboard.assert_called_once()
-        sdk.dashboard.assert_called_with(dashboard_id='dashboard-id')
+        sdk.dashboard.assert_called_with(
+            dashboard_id='dashboard-id',
+            fields='id,title,created_at,description,space,hidden,user_id,'
+            'view_count,favorite_count,last_accessed_at,last_viewed_at,'
+            'deleted,deleted_at,deleter_id,dashboard_elements')
 
     def test_scrape_all_dashboards_should_return_list(self):
         sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
@@ -76,12 +86,15 @@ class MetadataScraperTest(unittest.TestCase):
                                     structure=models.Dashboard)
         ]
 
-        dashboards = self.__scraper.scrape_all_dashboards()
+        dashboards = list(self.__scraper.scrape_all_dashboards())
 
         self.assertEqual(1, len(dashboards))
         self.assertEqual('dashboard-id', dashboards[0].id)
         sdk.search_dashboards.assert_called_once()
         sdk.search_dashboards.assert_called_with(
+            limit=1000,
+            offset=0,
+            sorts='id',
             fields='id,title,created_at,description,space,hidden,user_id,'
             'view_count,favorite_count,last_accessed_at,last_viewed_at,'
             'deleted,deleted_at,deleter_id,dashboard_elements')
@@ -152,14 +165,65 @@ class MetadataScraperTest(unittest.TestCase):
                                     structure=models.Folder)
         ]
 
-        folders = self.__scraper.scrape_all_folders()
+        folders = list(self.__scraper.scrape_all_folders())
 
         self.assertEqual(1, len(folders))
         self.assertEqual('folder-id', folders[0].id)
         sdk.search_folders.assert_called_once()
         sdk.search_folders.assert_called_with(
+            limit=1000,
+            offset=0,
+            sorts='id',
             fields='id,name,parent_id,child_count,creator_id')
 
+    @mock.patch('google.datacatalog_connectors.looker.scrape'
+                '.metadata_scraper.init31')
+    def test_scrape_all_folders_should_page_through_results(
+            self, mock_client):  # noqa: E125
+
+        scraper = scrape.MetadataScraper('looker-credentials-file.ini',
+                                         search_page_size=2)
+        sdk = scraper.__dict__['_MetadataScraper__sdk']
+
+        folders = [
+            serialize.deserialize31(data=json.dumps({
+                'id': str(i),
+                'name': f'Folder {i}'
+            }),
+                                    structure=models.Folder) for i in range(5)
+        ]
+        sdk.search_folders.side_effect = [
+            folders[:2], folders[2:4], folders[4:]
+        ]
+
+        folders_generator = scraper.scrape_all_folders()
+        sdk.search_folders.assert_not_called()
+
+        self.assertEqual(['0', '1', '2', '3', '4'],
+                         [folder.id for folder in folders_generator])
+        self.assertEqual(
+            [0, 2, 4],
+            [call[1]['offset'] for call in sdk.search_folders.call_args_list])
+
+    @mock.patch('google.datacatalog_connectors.looker.scrape'
+                '.metadata_scraper.init31')
+    def test_scrape_all_folders_should_stop_on_empty_page(
+            self, mock_client):  # noqa: E125
+
+        scraper = scrape.MetadataScraper('looker-credentials-file.ini',
+                                         search_page_size=1)
+        sdk = scraper.__dict__['_MetadataScraper__sdk']
+
+        folder = serialize.deserialize31(data=json.dumps({
+            'id': '1',
+            'name': 'Folder'
+        }),
+                                         structure=models.Folder)
+        sdk.search_folders.side_effect = [[folder], []]
+
+        self.assertEqual(1, len(list(scraper.scrape_all_folders())))
+        self.assertEqual(2, sdk.search_folders.call_count)
+
     def test_scrape_top_level_folders_should_return_list(self):
         sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
 
@@ -228,7 +292,41 @@ class MetadataScraperTest(unittest.TestCase):
 
         self.assertEqual(123, look.id)
         sdk.look.assert_called_once()
-        sdk.look.assert_called_with(look_id=123)
+        sdk.look.assert_called_with(
+            look_id=123,
+            fields='id,title,created_at,updated_at,description,space,public,'
+            'user_id,last_updater_id,query_id,url,short_url,public_url,'
+            'excel_file_url,google_spreadsheet_formula,view_count,'
+            'favorite_count,last_accessed_at,last_viewed_at,deleted,'
+            'deleted_at,deleter_id')
+
+    def test_scrape_look_fields_should_include_all_prepared_attributes(self):
+        sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
+
+        look_data = {
+            'id': 123,
+            'title': 'Test look',
+            'created_at': '2020-01-01T00:00:00.000000+0000',
+            'space': {
+                'id': 'folder-id',
+                'name': 'Test folder',
+            },
+        }
+        sdk.look.return_value = serialize.deserialize31(
+            data=json.dumps(look_data), structure=models.Look)
+
+        look = _AttributeRecorder(self.__scraper.scrape_look(123))
+
+        tag_template = prepare.DataCatalogTagTemplateFactory(
+            'test-project', 'test-location').make_tag_template_for_look()
+        datacatalog_entry_factory.DataCatalogEntryFactory(
+            'test-project', 'test-location', 'test-entry-group', 'test-system',
+            'https://test.server.com').make_entry_for_look(look)
+        datacatalog_tag_factory.DataCatalogTagFactory(
+            'https://test.server.com').make_tag_for_look(tag_template, look)
+
+        requested_fields = sdk.look.call_args[1]['fields'].split(',')
+        self.assertEqual(set(), look.read_attributes - set(requested_fields))
 
     def test_scrape_all_looks_should_return_list(self):
         sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
@@ -247,17 +345,20 @@ class MetadataScraperTest(unittest.TestCase):
                                     structure=models.Look)
         ]
 
-        looks = self.__scraper.scrape_all_looks()
+        looks = list(self.__scraper.scrape_all_looks())
 
         self.assertEqual(1, len(looks))
         self.assertEqual(123, looks[0].id)
         sdk.search_looks.assert_called_once()
         sdk.search_looks.assert_called_with(
+            limit=1000,
+            offset=0,
+            sorts='id',
             fields='id,title,created_at,updated_at,description,space,public,'
             'user_id,last_updater_id,query_id,url,short_url,public_url,'
             'excel_file_url,google_spreadsheet_formula,view_count,'
             'favorite_count,last_accessed_at,last_viewed_at,deleted,'
-            'deleter_id')
+            'deleted_at,deleter_id')
 
     def test_scrape_looks_from_folder_should_return_list(self):
         sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
@@ -290,7 +391,7 @@ class MetadataScraperTest(unittest.TestCase):
             'user_id,last_updater_id,query_id,url,short_url,public_url,'
             'excel_file_url,google_spreadsheet_formula,view_count,'
             'favorite_count,last_accessed_at,last_viewed_at,deleted,'
-            'deleter_id')
+            'deleted_at,deleter_id')
 
     def test_scrape_query_should_return_object(self):
         sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
@@ -366,3 +467,126 @@ class MetadataScraperTest(unittest.TestCase):
         self.assertEqual('test-connection', connection.name)
         sdk.connection.assert_called_once()
         sdk.connection.assert_called_with(connection_name='test-connection')
+
+
+class MetadataScraperCacheTest(unittest.TestCase):
+
+    @mock.patch('google.datacatalog_connectors.looker.scrape'
+                '.metadata_scraper.init31')
+    def setUp(self, mock_client):
+        self.__cache = scrape.SQLiteMetadataCache(':memory:')
+        self.__scraper = scrape.MetadataScraper('looker-credentials-file.ini',
+                                                cache=self.__cache,
+                                                cache_ttl=3600)
+
+        self.__sdk = self.__scraper.__dict__['_MetadataScraper__sdk']
+        self.__sdk.lookml_model.return_value.project_name = 'test-project'
+        self.__sdk.project_workspace.return_value.git_head = 'abc123'
+
+    def tearDown(self):
+        self.__cache.close()
+
+    def test_scrape_model_explore_should_store_object_by_commit(self):
+        self.__sdk.lookml_model_explore.return_value = \
+            self.__make_fake_explore()
+
+        self.__scraper.scrape_lookml_model_explore('test-model', 'test-view')
+
+        self.assertIsNotNone(
+            self.__cache.get('explores', 'test-model/test-view', 'abc123'))
+        self.__sdk.lookml_model.assert_called_once_with(
+            lookml_model_name='test-model', fields='project_name')
+        self.__sdk.project_workspace.assert_called_once_with(
+            project_id='test-project', fields='git_head')
+
+    def test_scrape_model_explore_should_return_cached_object(self):
+        self.__cache.set(
+            'explores', 'test-model/test-view',
+            serialize.serialize(self.__make_fake_explore()).decode(), 'abc123')
+
+        model = self.__scraper.scrape_lookml_model_explore(
+            'test-model', 'test-view')
+
+        self.assertEqual('test-connection', model.connection_name)
+        self.__sdk.lookml_model_explore.assert_not_called()
+
+    def test_scrape_model_explore_should_skip_object_of_other_commit(self):
+        self.__cache.set(
+            'explores', 'test-model/test-view',
+            serialize.serialize(self.__make_fake_explore()).decode(),
+            'old-commit')
+        self.__sdk.lookml_model_explore.return_value = \
+            self.__make_fake_explore()
+
+        self.__scraper.scrape_lookml_model_explore('test-model', 'test-view')
+
+        self.__sdk.lookml_model_explore.assert_called_once()
+
+    @mock.patch('google.datacatalog_connectors.looker.scrape'
+                '.sqlite_metadata_cache.time.time')
+    def test_scrape_model_explore_should_expire_object_of_unknown_commit(
+            self, mock_time):
+
+        self.__sdk.project_workspace.side_effect = error.SDKError('SDK error')
+        self.__sdk.lookml_model_explore.return_value = \
+            self.__make_fake_explore()
+
+        mock_time.return_value = 1000
+        self.__scraper.scrape_lookml_model_explore('test-model', 'test-view')
+        self.__scraper.scrape_lookml_model_explore.cache_clear()
+        self.__scraper.scrape_lookml_model_explore('test-model', 'test-view')
+        self.assertEqual(1, self.__sdk.lookml_model_explore.call_count)
+
+        mock_time.return_value = 1000 + 3600 + 1
+        self.__scraper.scrape_lookml_model_explore.cache_clear()
+        self.__scraper.scrape_lookml_model_explore('test-model', 'test-view')
+        self.assertEqual(2, self.__sdk.lookml_model_explore.call_count)
+
+    def test_scrape_connection_should_return_cached_object(self):
+        connection = serialize.deserialize31(data=json.dumps(
+            {'name': 'test-connection'}),
+                                             structure=models.DBConnection)
+        self.__sdk.connection.return_value = connection
+
+        self.__scraper.scrape_connection('test-connection')
+        self.__scraper.scrape_connection.cache_clear()
+        cached_connection = self.__scraper.scrape_connection('test-connection')
+
+        self.assertEqual('test-connection', cached_connection.name)
+        self.__sdk.connection.assert_called_once()
+
+    def test_scrape_query_generated_sql_should_return_cached_string(self):
+        self.__cache.set('generated_sql', 123, 'select *', 'abc123')
+
+        sql = self.__scraper.scrape_query_generated_sql(123, 'test-model')
+
+        self.assertEqual('select *', sql)
+        self.__sdk.run_query.assert_not_called()
+
+    def test_scrape_query_generated_sql_should_store_string_by_commit(self):
+        self.__sdk.run_query.return_value = 'select *'
+
+        self.__scraper.scrape_query_generated_sql(123, 'test-model')
+
+        self.assertEqual('select *',
+                         self.__cache.get('generated_sql', 123, 'abc123'))
+
+    @classmethod
+    def __make_fake_explore(cls):
+        return serialize.deserialize31(data=json.dumps({
+            'project_name': 'test-project',
+            'connection_name': 'test-connection',
+        }),
+                                       structure=models.LookmlModelExplore)
+
+
+class _AttributeRecorder:
+    """Record the attributes read from the wrapped object."""
+
+    def __init__(self, wrapped):
+        self.__wrapped = wrapped
+        self.read_attributes = set()
+
+    def __getattr__(self, name):
+        self.read_attributes.add(name)
+        return getattr(self.__wrapped, name)
@@ -0,0 +1,159 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+from unittest import mock
+
+from looker_sdk import error
+
+from google.datacatalog_connectors.looker import scrape
+
+_SCRAPE_PACKAGE = 'google.datacatalog_connectors.looker.scrape'
+
+
+class QueryMetadataScraperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__metadata_scraper = mock.MagicMock()
+        self.__metadata_scraper.scrape_query.side_effect = \
+            self.__make_fake_query
+        self.__metadata_scraper.scrape_lookml_model_explore.side_effect = \
+            lambda model, view: mock.MagicMock(
+                connection_name=f'{model}-connection')
+        self.__metadata_scraper.scrape_connection.side_effect = \
+            lambda connection_name: f'{connection_name}-object'
+        self.__metadata_scraper.scrape_query_generated_sql.side_effect = \
+            lambda query_id, model_name: f'SELECT {query_id}'
+
+    def test_scrape_queries_should_keep_query_ids_order(self):
+        query_scraper = scrape.QueryMetadataScraper(self.__metadata_scraper,
+                                                    max_workers=4)
+
+        queries = query_scraper.scrape_queries([3, 1, 2])
+
+        self.assertEqual([3, 1, 2], [query.query.id for query in queries])
+        self.assertEqual('SELECT 1', queries[1].generated_sql)
+        self.assertEqual('model-1-connection-object', queries[1].connection)
+        self.assertEqual('model-1-connection',
+                         queries[1].model_explore.connection_name)
+
+    def test_scrape_queries_should_dedupe_in_flight_requests(self):
+        all_queries_scraped = threading.Event()
+        scraped_query_ids = []
+
+        def scrape_query(query_id):
+            scraped_query_ids.append(query_id)
+            if len(scraped_query_ids) == 4:
+                all_queries_scraped.set()
+            return self.__make_fake_query(query_id, model_id=1)
+
+        def scrape_lookml_model_explore(model, view):
+            # The explore is held until all the queries are in flight.
+            all_queries_scraped.wait(5)
+            return mock.MagicMock(connection_name='connection')
+
+        self.__metadata_scraper.scrape_query.side_effect = scrape_query
+        self.__metadata_scraper.scrape_lookml_model_explore.side_effect = \
+            scrape_lookml_model_explore
+
+        query_scraper = scrape.QueryMetadataScraper(self.__metadata_scraper,
+                                                    max_workers=4)
+
+        queries = query_scraper.scrape_queries([1, 2, 3, 4])
+
+        self.assertTrue(all_queries_scraped.is_set())
+        self.assertEqual(4, len(queries))
+        self.__metadata_scraper.scrape_lookml_model_explore\
+            .assert_called_once_with('model-1', 'view')
+        self.__metadata_scraper.scrape_connection.assert_called_once_with(
+            'connection')
+        self.assertEqual(
+            4, self.__metadata_scraper.scrape_query_generated_sql.call_count)
+        self.assertTrue(
+            all(query.model_explore is queries[0].model_explore
+                for query in queries))
+
+    def test_scrape_queries_should_share_sdk_errors(self):
+        self.__metadata_scraper.scrape_lookml_model_explore.side_effect = \
+            error.SDKError('SDK error')
+        self.__metadata_scraper.scrape_query.side_effect = \
+            lambda query_id: self.__make_fake_query(query_id, model_id=1)
+
+        query_scraper = scrape.QueryMetadataScraper(self.__metadata_scraper)
+
+        queries = query_scraper.scrape_queries([1, 2])
+
+        self.assertEqual(2, len(queries))
+        self.assertIsNone(queries[1].model_explore)
+        self.assertIsNone(queries[1].connection)
+        self.assertIsNone(queries[1].generated_sql)
+        self.__metadata_scraper.scrape_lookml_model_explore\
+            .assert_called_once()
+
+    def test_scrape_queries_should_register_assembled_queries(self):
+        query_scraper = scrape.QueryMetadataScraper(self.__metadata_scraper)
+
+        first_queries = query_scraper.scrape_queries([1, 2])
+        second_queries = query_scraper.scrape_queries([2, 3])
+
+        self.assertIs(first_queries[1], second_queries[0])
+        self.assertEqual(3, self.__metadata_scraper.scrape_query.call_count)
+
+    def test_get_stats_should_count_lookups_and_hits(self):
+        self.__metadata_scraper.scrape_query.side_effect = \
+            lambda query_id: self.__make_fake_query(query_id, model_id=1)
+
+        query_scraper = scrape.QueryMetadataScraper(self.__metadata_scraper)
+        query_scraper.scrape_queries([1, 2, 3])
+        query_scraper.scrape_queries([3])
+
+        self.assertEqual(
+            {
+                scrape.QueryMetadataScraper.ASSEMBLED_QUERY: (4, 1),
+                scrape.QueryMetadataScraper.QUERY: (3, 0),
+                scrape.QueryMetadataScraper.LOOKML_MODEL_EXPLORE: (3, 2),
+                scrape.QueryMetadataScraper.CONNECTION: (3, 2),
+                scrape.QueryMetadataScraper.RUN_QUERY: (3, 0),
+            }, query_scraper.get_stats())
+
+    def test_scrape_queries_should_propagate_query_errors(self):
+        self.__metadata_scraper.scrape_query.side_effect = \
+            error.SDKError('SDK error')
+
+        query_scraper = scrape.QueryMetadataScraper(self.__metadata_scraper)
+
+        self.assertRaises(error.SDKError, query_scraper.scrape_queries, [1])
+
+    @mock.patch(f'{_SCRAPE_PACKAGE}.query_metadata_scraper.rate_limiter'
+                f'.RateLimiter')
+    def test_scrape_queries_should_rate_limit_given_endpoints(
+            self, mock_rate_limiter):
+
+        query_scraper = scrape.QueryMetadataScraper(
+            self.__metadata_scraper,
+            rate_limits={scrape.QueryMetadataScraper.RUN_QUERY: 10})
+
+        query_scraper.scrape_queries([1, 2])
+
+        mock_rate_limiter.assert_called_once_with(10)
+        self.assertEqual(2, mock_rate_limiter.return_value.acquire.call_count)
+
+    @classmethod
+    def __make_fake_query(cls, query_id, model_id=None):
+        return mock.MagicMock(id=query_id,
+                              model=f'model-{model_id or query_id}',
+                              view='view')
@@ -0,0 +1,51 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.looker.scrape import rate_limiter
+
+_RATE_LIMITER_MODULE = 'google.datacatalog_connectors.looker.scrape' \
+                       '.rate_limiter'
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    @mock.patch(f'{_RATE_LIMITER_MODULE}.time.sleep')
+    @mock.patch(f'{_RATE_LIMITER_MODULE}.time.monotonic')
+    def test_acquire_should_space_out_calls(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100
+        limiter = rate_limiter.RateLimiter(4)
+
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+
+        self.assertEqual([mock.call(0.25), mock.call(0.5)],
+                         mock_sleep.call_args_list)
+
+    @mock.patch(f'{_RATE_LIMITER_MODULE}.time.sleep')
+    @mock.patch(f'{_RATE_LIMITER_MODULE}.time.monotonic')
+    def test_acquire_should_not_wait_after_interval(self, mock_monotonic,
+                                                    mock_sleep):
+        mock_monotonic.side_effect = [100, 101]
+        limiter = rate_limiter.RateLimiter(4)
+
+        limiter.acquire()
+        limiter.acquire()
+
+        mock_sleep.assert_not_called()
@@ -0,0 +1,91 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.looker import scrape
+
+_CACHE_MODULE = 'google.datacatalog_connectors.looker.scrape' \
+                '.sqlite_metadata_cache'
+
+
+class SQLiteMetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__file_path = os.path.join(self.__temp_dir.name, 'cache.db')
+        self.__cache = scrape.SQLiteMetadataCache(self.__file_path)
+
+    def tearDown(self):
+        self.__cache.close()
+        self.__temp_dir.cleanup()
+
+    def test_get_should_return_stored_value(self):
+        self.__cache.set('namespace', 'key', 'value')
+
+        self.assertEqual('value', self.__cache.get('namespace', 'key'))
+
+    def test_get_missing_value_should_return_none(self):
+        self.__cache.set('namespace', 'key', 'value')
+
+        self.assertIsNone(self.__cache.get('namespace', 'other-key'))
+        self.assertIsNone(self.__cache.get('other-namespace', 'key'))
+
+    def test_get_should_return_value_of_requested_version(self):
+        self.__cache.set('namespace', 'key', 'value', 'v1')
+
+        self.assertEqual('value', self.__cache.get('namespace', 'key', 'v1'))
+        self.assertIsNone(self.__cache.get('namespace', 'key', 'v2'))
+        self.assertIsNone(self.__cache.get('namespace', 'key'))
+
+    @mock.patch(f'{_CACHE_MODULE}.time.time')
+    def test_get_should_skip_stale_value(self, mock_time):
+        mock_time.return_value = 1000
+        self.__cache.set('namespace', 'key', 'value')
+
+        mock_time.return_value = 1060
+        self.assertEqual('value',
+                         self.__cache.get('namespace', 'key', max_age=60))
+        self.assertIsNone(self.__cache.get('namespace', 'key', max_age=59))
+        self.assertEqual('value', self.__cache.get('namespace', 'key'))
+
+    def test_set_should_replace_stored_value(self):
+        self.__cache.set('namespace', 'key', 'value', 'v1')
+        self.__cache.set('namespace', 'key', 'new-value', 'v2')
+
+        self.assertEqual('new-value', self.__cache.get('namespace', 'key',
+                                                       'v2'))
+
+    def test_values_should_persist_across_instances(self):
+        self.__cache.set('namespace', 'key', 'value')
+        self.__cache.close()
+
+        self.__cache = scrape.SQLiteMetadataCache(self.__file_path)
+
+        self.assertEqual('value', self.__cache.get('namespace', 'key'))
+
+    def test_get_after_close_should_reopen_connection(self):
+        self.__cache.set('namespace', 'key', 'value')
+        self.__cache.close()
+
+        self.assertEqual('value', self.__cache.get('namespace', 'key'))
+
+    def test_close_twice_should_not_fail(self):
+        self.__cache.close()
+        self.__cache.close()
@@ -16,15 +16,21 @@
 
 import io
 import json
+import os
+import tempfile
 import unittest
 from unittest import mock
 
+from google.api_core import exceptions
+from google.cloud import datacatalog
+from google.datacatalog_connectors.commons import prepare
 from looker_sdk import error, models
 from looker_sdk.rtl import serialize
 
 from google.datacatalog_connectors.looker import sync
 
 _PREPARE_PACKAGE = 'google.datacatalog_connectors.looker.prepare'
+_SCRAPE_PACKAGE = 'google.datacatalog_connectors.looker.scrape'
 __SYNC_PACKAGE = 'google.datacatalog_connectors.looker.sync'
 _SYNC_MODULE = '{}.metadata_synchronizer'.format(__SYNC_PACKAGE)
 
@@ -63,6 +69,148 @@ class MetadataSynchronizerTest(unittest.TestCase):
         self.assertIsNotNone(
             attrs['_MetadataSynchronizer__assembled_entry_factory'])
 
+    @mock.patch(f'{_SYNC_MODULE}.configparser.open',
+                new_callable=mock.mock_open())
+    @mock.patch(f'{_SYNC_MODULE}.scrape.SQLiteMetadataCache')
+    @mock.patch(f'{_SYNC_MODULE}.scrape.MetadataScraper')
+    def test_run_cache_file_should_close_cache(self, mock_scraper, mock_cache,
+                                               mock_open, mock_mapper,
+                                               mock_cleaner,
+                                               mock_ingestor):  # noqa: E125
+
+        mock_open.return_value = io.StringIO(
+            '[Looker]\n'
+            'base_url=https://test-instance.com:123\n')
+        mock_scraper.return_value.scrape_folder.return_value = None
+
+        synchronizer = sync.MetadataSynchronizer('test-project',
+                                                 'test-location',
+                                                 'looker-credentials.ini',
+                                                 cache_file='cache.db',
+                                                 cache_ttl_hours=2)
+        synchronizer.run()
+
+        mock_cache.assert_called_once_with('cache.db')
+        mock_scraper.assert_called_once_with('looker-credentials.ini',
+                                             cache=mock_cache.return_value,
+                                             cache_ttl=7200,
+                                             search_page_size=None)
+        mock_cache.return_value.close.assert_called_once()
+
+    @mock.patch(f'{_SYNC_MODULE}.configparser.open',
+                new_callable=mock.mock_open())
+    @mock.patch(f'{_SYNC_MODULE}.scrape.SQLiteMetadataCache')
+    @mock.patch(f'{_SYNC_MODULE}.scrape.MetadataScraper')
+    def test_constructor_zero_cache_ttl_should_expire_cached_values(
+            self, mock_scraper, mock_cache, mock_open, mock_mapper,
+            mock_cleaner, mock_ingestor):  # noqa: E125
+
+        mock_open.return_value = io.StringIO(
+            '[Looker]\n'
+            'base_url=https://test-instance.com:123\n')
+
+        sync.MetadataSynchronizer('test-project',
+                                  'test-location',
+                                  'looker-credentials.ini',
+                                  cache_file='cache.db',
+                                  cache_ttl_hours=0)
+
+        mock_scraper.assert_called_once_with('looker-credentials.ini',
+                                             cache=mock_cache.return_value,
+                                             cache_ttl=0,
+                                             search_page_size=None)
+
+    @mock.patch(f'{_SYNC_MODULE}.datacatalog_facade.DataCatalogFacade')
+    @mock.patch(f'{_SYNC_MODULE}.prepare.AssembledEntryFactory')
+    @mock.patch(f'{_SYNC_MODULE}.configparser.open',
+                new_callable=mock.mock_open())
+    @mock.patch(f'{_SYNC_MODULE}.sync_state.SyncState')
+    @mock.patch(f'{_SYNC_MODULE}.scrape.MetadataScraper')
+    def test_run_state_file_should_ingest_changed_entries(
+            self, mock_scraper, mock_state, mock_open,
+            mock_assembled_entry_factory, mock_facade, mock_mapper,
+            mock_cleaner, mock_ingestor):  # noqa: E125
+
+        mock_open.return_value = io.StringIO(
+            '[Looker]\n'
+            'base_url=https://test-instance.com:123\n')
+        scraper = mock_scraper.return_value
+        scraper.scrape_all_folders.return_value = [self.__make_fake_folder()]
+        scraper.scrape_folder.return_value = None  # LookML folder
+
+        unchanged_entry = mock.MagicMock()
+        changed_entry = mock.MagicMock()
+        factory = mock_assembled_entry_factory.return_value
+        factory.make_assembled_entries_list.return_value = [
+            unchanged_entry, changed_entry
+        ]
+        state = mock_state.return_value
+        state.get_changed_entries.side_effect = \
+            lambda assembled_entries_dict: {
+                folder_id: [changed_entry]
+                for folder_id in assembled_entries_dict
+            }
+
+        synchronizer = sync.MetadataSynchronizer('test-project',
+                                                 'test-location',
+                                                 'looker-credentials.ini',
+                                                 state_file='state.json')
+        synchronizer.run()
+
+        mock_state.assert_called_once_with('state.json')
+
+        cleaner = mock_cleaner.return_value
+        self.assertEqual([unchanged_entry, changed_entry],
+                         cleaner.delete_obsolete_metadata.call_args[0][0])
+
+        # Only the Tag Templates and the Entry Group are ingested in bulk.
+        ingestor = mock_ingestor.return_value
+        ingestor.ingest_metadata.assert_called_once()
+        self.assertEqual([], ingestor.ingest_metadata.call_args[0][0])
+
+        facade = mock_facade.return_value
+        facade.upsert_entry.assert_called_once_with(
+            'projects/test-project/locations/test-location/'
+            'entryGroups/looker', changed_entry.entry_id, changed_entry.entry)
+        facade.upsert_tags.assert_called_once_with(
+            facade.upsert_entry.return_value, changed_entry.tags)
+        state.mark_synced.assert_called_once_with(changed_entry)
+        state.save.assert_called_once()
+
+    @mock.patch(f'{_SYNC_MODULE}.configparser.open',
+                new_callable=mock.mock_open())
+    @mock.patch(f'{_SYNC_MODULE}.sync_state.SyncState')
+    @mock.patch(f'{_SYNC_MODULE}.scrape.MetadataScraper')
+    def test_run_state_file_no_changes_should_skip_ingestion(
+            self, mock_scraper, mock_state, mock_open, mock_mapper,
+            mock_cleaner, mock_ingestor):  # noqa: E125
+
+        mock_open.return_value = io.StringIO(
+            '[Looker]\n'
+            'base_url=https://test-instance.com:123\n')
+        scraper = mock_scraper.return_value
+        scraper.scrape_all_folders.return_value = [self.__make_fake_folder()]
+        scraper.scrape_folder.return_value = None  # LookML folder
+
+        state = mock_state.return_value
+        state.get_changed_entries.side_effect = \
+            lambda assembled_entries_dict: {
+                folder_id: [] for folder_id in assembled_entries_dict
+            }
+
+        synchronizer = sync.MetadataSynchronizer('test-project',
+                                                 'test-location',
+                                                 'looker-credentials.ini',
+                                                 state_file='state.json')
+        synchronizer.run()
+
+        cleaner = mock_cleaner.return_value
+        cleaner.delete_obsolete_metadata.assert_called_once()
+
+        ingestor = mock_ingestor.return_value
+        ingestor.ingest_metadata.assert_not_called()
+        state.save.assert_called_once()
+
     def test_run_no_metadata_should_succeed(self, mock_mapper, mock_cleaner,
                                             mock_ingestor):
         scraper = self.__synchronizer.__dict__[
@@ -270,6 +418,200 @@ class MetadataSynchronizerTest(unittest.TestCase):
         ingestor = mock_ingestor.return_value
         ingestor.ingest_metadata.assert_called_once()
 
+    def test_run_shared_query_should_be_scraped_once(self, mock_mapper,
+                                                     mock_cleaner,
+                                                     mock_ingestor):
+
+        scraper = self.__synchronizer.__dict__[
+            '_MetadataSynchronizer__metadata_scraper']
+
+        top_level_folder = self.__make_fake_folder()
+        look = self.__make_fake_look(top_level_folder)
+        look.query_id = 10
+        scraper.scrape_all_folders.return_value = [top_level_folder]
+        scraper.scrape_all_looks.return_value = [look]
+
+        lookml_folder = self.__make_fake_folder()
+        lookml_folder.looks = [self.__make_fake_look(lookml_folder)]
+        lookml_folder.looks[0].query_id = 10
+        scraper.scrape_folder.return_value = lookml_folder
+        scraper.scrape_look.return_value = lookml_folder.looks[0]
+
+        self.__synchronizer.run()
+
+        scraper.scrape_query.assert_called_once_with(10)
+        scraper.scrape_query_generated_sql.assert_called_once_with(
+            10, scraper.scrape_query.return_value.model)
+
+        factory = self.__synchronizer.__dict__[
+            '_MetadataSynchronizer__assembled_entry_factory']
+        folders_queries = [
+            call[0][1]
+            for call in factory.make_assembled_entries_list.call_args_list
+        ]
+        # The query is listed only under the first folder that references
+        # it, so a single entry is made for it.
+        self.assertEqual(2, len(folders_queries))
+        self.assertEqual(1, len(folders_queries[0]))
+        self.assertEqual(scraper.scrape_query_generated_sql.return_value,
+                         folders_queries[0][0].generated_sql)
+        self.assertEqual([], folders_queries[1])
+
+    @mock.patch(f'{_SYNC_MODULE}.datacatalog_facade.DataCatalogFacade')
+    @mock.patch(f'{_SYNC_MODULE}.prepare.AssembledEntryFactory')
+    @mock.patch(f'{_SYNC_MODULE}.configparser.open',
+                new_callable=mock.mock_open())
+    @mock.patch(f'{_SCRAPE_PACKAGE}.metadata_scraper.init31')
+    def test_run_state_and_cache_files_should_refresh_changed_queries(
+            self, mock_sdk, mock_open, mock_assembled_entry_factory,
+            mock_facade, mock_mapper, mock_cleaner,
+            mock_ingestor):  # noqa: E125
+
+        sdk = self.__set_up_incremental_run(mock_sdk, mock_open,
+                                            mock_assembled_entry_factory)
+        facade = mock_facade.return_value
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.__make_synchronizer(temp_dir).run()
+
+            sdk.run_query.assert_called_once()
+            sdk.lookml_model_explore.assert_called_once()
+            sdk.connection.assert_called_once()
+            self.assertEqual(2, facade.upsert_entry.call_count)
+
+            # Nothing changed upstream: the query is assembled from the
+            # cache, and nothing is ingested.
+            facade.upsert_entry.reset_mock()
+            self.__make_synchronizer(temp_dir).run()
+
+            sdk.run_query.assert_called_once()
+            sdk.lookml_model_explore.assert_called_once()
+            sdk.connection.assert_called_once()
+            facade.upsert_entry.assert_not_called()
+
+            # A new LookML deployment refreshes the query.
+            sdk.project_workspace.return_value.git_head = 'commit-2'
+            sdk.run_query.return_value = 'SELECT 2'
+            self.__make_synchronizer(temp_dir).run()
+
+        self.assertEqual(2, sdk.run_query.call_count)
+        self.assertEqual(2, sdk.lookml_model_explore.call_count)
+        facade.upsert_entry.assert_called_once()
+        self.assertEqual('entries/query_10',
+                         facade.upsert_entry.call_args[0][2].name)
+        self.assertEqual(
+            'SELECT 2',
+            facade.upsert_tags.call_args[0][1][0].fields['sql'].string_value)
+
+    @mock.patch(f'{_SYNC_MODULE}.datacatalog_facade.DataCatalogFacade')
+    @mock.patch(f'{_SYNC_MODULE}.prepare.AssembledEntryFactory')
+    @mock.patch(f'{_SYNC_MODULE}.configparser.open',
+                new_callable=mock.mock_open())
+    @mock.patch(f'{_SCRAPE_PACKAGE}.metadata_scraper.init31')
+    def test_run_state_file_should_retry_failed_entries_on_next_run(
+            self, mock_sdk, mock_open, mock_assembled_entry_factory,
+            mock_facade, mock_mapper, mock_cleaner,
+            mock_ingestor):  # noqa: E125
+
+        self.__set_up_incremental_run(mock_sdk, mock_open,
+                                      mock_assembled_entry_factory)
+
+        facade = mock_facade.return_value
+        facade.upsert_entry.side_effect = \
+            lambda entry_group_name, entry_id, entry: \
+            self.__fail_upsert(entry, 'entries/query_10')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.__make_synchronizer(temp_dir).run()
+
+            facade.upsert_entry.reset_mock()
+            facade.upsert_entry.side_effect = None
+            self.__make_synchronizer(temp_dir).run()
+
+        facade.upsert_entry.assert_called_once()
+        self.assertEqual('entries/query_10',
+                         facade.upsert_entry.call_args[0][2].name)
+
+    @classmethod
+    def __set_up_incremental_run(cls, mock_sdk, mock_open,
+                                 mock_assembled_entry_factory):
+        """
+        Set up a folder with a look and its query, which are scraped by the
+        Looker SDK, and entries that carry the query generated SQL.
+        """
+        mock_open.side_effect = lambda *args, **kwargs: io.StringIO(
+            '[Looker]\n'
+            'base_url=https://test-instance.com:123\n')
+
+        folder = cls.__make_fake_folder()
+        look = cls.__make_fake_look(folder)
+        look.query_id = 10
+
+        sdk = mock_sdk.return_value
+        # Looks are added to the folders by each run.
+        sdk.search_folders.side_effect = \
+            lambda **kwargs: [cls.__make_fake_folder()]
+        sdk.search_dashboards.return_value = []
+        sdk.search_looks.return_value = [look]
+        sdk.folder.return_value = None  # LookML folder
+        sdk.query.return_value = serialize.deserialize31(
+            data=json.dumps({
+                'id': 10,
+                'model': 'test-model',
+                'view': 'test-view',
+            }),
+            structure=models.Query)
+        sdk.lookml_model_explore.return_value = serialize.deserialize31(
+            data=json.dumps({'connection_name': 'test-connection'}),
+            structure=models.LookmlModelExplore)
+        sdk.connection.return_value = serialize.deserialize31(
+            data=json.dumps({'name': 'test-connection'}),
+            structure=models.DBConnection)
+        sdk.project_workspace.return_value.git_head = 'commit-1'
+        sdk.run_query.return_value = 'SELECT 1'
+
+        factory = mock_assembled_entry_factory.return_value
+        factory.make_assembled_entries_list.side_effect = \
+            lambda folders, queries, tag_templates_dict: [
+                cls.__make_assembled_entry(f'look_{look.id}')
+                for folder in folders
+                for look in folder.looks
+            ] + [
+                cls.__make_assembled_entry(f'query_{query.query.id}',
+                                           query.generated_sql)
+                for query in queries
+            ]
+
+        return sdk
+
+    @classmethod
+    def __make_synchronizer(cls, temp_dir):
+        return sync.MetadataSynchronizer(
+            'test-project',
+            'test-location',
+            'looker-credentials.ini',
+            cache_file=os.path.join(temp_dir, 'cache.db'),
+            state_file=os.path.join(temp_dir, 'state.json'))
+
+    @classmethod
+    def __fail_upsert(cls, entry, failing_entry_name):
+        if entry.name == failing_entry_name:
+            raise exceptions.PermissionDenied('Permission denied')
+        return entry
+
+    @classmethod
+    def __make_assembled_entry(cls, entry_id, sql=None):
+        entry = datacatalog.Entry()
+        entry.name = f'entries/{entry_id}'
+
+        tags = []
+        if sql:
+            tag = datacatalog.Tag()
+            tag.fields['sql'] = datacatalog.TagField(string_value=sql)
+            tags.append(tag)
+
+        return prepare.AssembledEntryData(entry_id, entry, tags)
+
     @classmethod
     def __make_fake_folder(cls, parent=None):
         parent_data = json.loads(
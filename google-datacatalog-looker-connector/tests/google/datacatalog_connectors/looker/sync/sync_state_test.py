@@ -0,0 +1,155 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from google.cloud import datacatalog
+from google.datacatalog_connectors.commons import prepare
+
+from google.datacatalog_connectors.looker.sync import sync_state
+
+
+class SyncStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__file_path = os.path.join(self.__temp_dir.name, 'state.json')
+        self.__tag_templates_dict = {
+            'looker_dashboard_metadata':
+                datacatalog.TagTemplate(display_name='Dashboard'),
+        }
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def test_constructor_missing_file_should_set_empty_state(self):
+        state = sync_state.SyncState(self.__file_path)
+
+        self.assertIsNone(state.synced_at)
+
+    def test_get_changed_entries_no_previous_state_should_return_all(self):
+        entries_dict = {'folder': [self.__make_assembled_entry('entry')]}
+
+        state = sync_state.SyncState(self.__file_path)
+        state.start(self.__tag_templates_dict)
+
+        self.assertEqual(entries_dict, state.get_changed_entries(entries_dict))
+
+    def test_get_changed_entries_should_skip_unchanged_entries(self):
+        self.__save_state({
+            'folder': [
+                self.__make_assembled_entry('entry_1'),
+                self.__make_assembled_entry('entry_2', 'Old value'),
+            ]
+        })
+
+        changed_entry = self.__make_assembled_entry('entry_2', 'New value')
+        new_entry = self.__make_assembled_entry('entry_3')
+        state = sync_state.SyncState(self.__file_path)
+        state.start(self.__tag_templates_dict)
+        changed_entries_dict = state.get_changed_entries({
+            'folder': [
+                self.__make_assembled_entry('entry_1'), changed_entry,
+                new_entry
+            ]
+        })
+
+        self.assertIsNotNone(state.synced_at)
+        self.assertEqual({'folder': [changed_entry, new_entry]},
+                         changed_entries_dict)
+
+    def test_get_changed_entries_changed_templates_should_return_all(self):
+        self.__save_state({'folder': [self.__make_assembled_entry('entry')]})
+
+        self.__tag_templates_dict['looker_look_metadata'] = \
+            datacatalog.TagTemplate(display_name='Look')
+        entries_dict = {'folder': [self.__make_assembled_entry('entry')]}
+        state = sync_state.SyncState(self.__file_path)
+        state.start(self.__tag_templates_dict)
+
+        self.assertEqual(entries_dict, state.get_changed_entries(entries_dict))
+
+    def test_save_should_only_keep_current_entries(self):
+        self.__save_state({
+            'folder': [
+                self.__make_assembled_entry('entry_1'),
+                self.__make_assembled_entry('entry_2'),
+            ]
+        })
+        self.__save_state({'folder': [self.__make_assembled_entry('entry_1')]})
+
+        with open(self.__file_path) as state_file:
+            saved_state = json.load(state_file)
+
+        self.assertEqual(['entries/entry_1'], list(saved_state['entries']))
+        self.assertFalse(os.path.exists(f'{self.__file_path}.tmp'))
+
+    def test_save_should_skip_entries_not_marked_synced(self):
+        state = sync_state.SyncState(self.__file_path)
+        state.start(self.__tag_templates_dict)
+        synced_entry = self.__make_assembled_entry('entry_1')
+        state.get_changed_entries(
+            {'folder': [synced_entry,
+                        self.__make_assembled_entry('entry_2')]})
+        state.mark_synced(synced_entry)
+        state.save()
+
+        with open(self.__file_path) as state_file:
+            saved_state = json.load(state_file)
+
+        self.assertEqual(['entries/entry_1'], list(saved_state['entries']))
+
+    def test_save_without_start_should_not_write(self):
+        sync_state.SyncState(self.__file_path).save()
+
+        self.assertFalse(os.path.exists(self.__file_path))
+
+    def test_constructor_invalid_file_should_set_empty_state(self):
+        with open(self.__file_path, 'w') as state_file:
+            state_file.write('{invalid')
+
+        self.assertIsNone(sync_state.SyncState(self.__file_path).synced_at)
+
+    def test_constructor_other_version_should_set_empty_state(self):
+        with open(self.__file_path, 'w') as state_file:
+            json.dump({'version': 0, 'synced_at': 'time'}, state_file)
+
+        self.assertIsNone(sync_state.SyncState(self.__file_path).synced_at)
+
+    def __save_state(self, assembled_entries_dict):
+        state = sync_state.SyncState(self.__file_path)
+        state.start(self.__tag_templates_dict)
+        changed_entries_dict = state.get_changed_entries(
+            assembled_entries_dict)
+        for assembled_entries in changed_entries_dict.values():
+            for assembled_entry in assembled_entries:
+                state.mark_synced(assembled_entry)
+        state.save()
+
+    @classmethod
+    def __make_assembled_entry(cls, entry_id, tag_value='Value'):
+        entry = datacatalog.Entry()
+        entry.name = f'entries/{entry_id}'
+        entry.display_name = entry_id
+
+        tag = datacatalog.Tag()
+        tag.template = 'looker_dashboard_metadata'
+        tag.fields['title'] = datacatalog.TagField(string_value=tag_value)
+
+        return prepare.AssembledEntryData(entry_id, entry, [tag])
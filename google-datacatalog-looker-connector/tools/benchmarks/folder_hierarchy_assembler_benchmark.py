@@ -0,0 +1,192 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Assembles synthetic folder hierarchies of increasing size, to check the
+cost of the scrape stage folder assembly grows linearly with the number of
+folders, dashboards, and looks.
+
+The synthetic instance is made of top-level folders with nested folders up
+to a given depth, and a fixed number of dashboards and looks per folder. The
+former per-folder list scans can be run as a baseline on the smaller
+hierarchies, as they take quadratic time.
+
+Usage:
+    python folder_hierarchy_assembler_benchmark.py [--folders 12000]
+        [--steps 4] [--dashboards-per-folder 5] [--looks-per-folder 7.5]
+        [--baseline-max-folders 3000]
+"""
+
+import argparse
+import time
+
+from looker_sdk import models
+
+from google.datacatalog_connectors.looker import scrape
+
+__DEFAULT_FOLDERS_COUNT = 12000
+__DEFAULT_STEPS = 4
+__DEFAULT_DASHBOARDS_PER_FOLDER = 5
+__DEFAULT_LOOKS_PER_FOLDER = 7.5
+__DEFAULT_BASELINE_MAX_FOLDERS = 3000
+
+__CHILDREN_PER_FOLDER = 4
+__TOP_LEVEL_FOLDERS_COUNT = 20
+
+
+def __make_instance(folders_count, dashboards_per_folder, looks_per_folder):
+    folders = []
+    for index in range(folders_count):
+        # Folders are laid out as complete trees, one per top-level folder.
+        tree_index = index % __TOP_LEVEL_FOLDERS_COUNT
+        tree_position = index // __TOP_LEVEL_FOLDERS_COUNT
+        parent_position = (tree_position - 1) // __CHILDREN_PER_FOLDER
+        parent_id = '' if not tree_position else \
+            str(parent_position * __TOP_LEVEL_FOLDERS_COUNT + tree_index)
+        folders.append(
+            models.Folder(name=f'Folder {index}',
+                          id=str(index),
+                          parent_id=parent_id))
+
+    dashboards = [
+        models.Dashboard(id=str(index),
+                         space=__make_space(folders, index,
+                                            dashboards_per_folder))
+        for index in range(int(folders_count * dashboards_per_folder))
+    ]
+    looks = [
+        models.Look(id=index,
+                    space=__make_space(folders, index, looks_per_folder))
+        for index in range(int(folders_count * looks_per_folder))
+    ]
+
+    return folders, dashboards, looks
+
+
+def __make_space(folders, asset_index, assets_per_folder):
+    folder = folders[int(asset_index / assets_per_folder)]
+    return models.SpaceBase(name=folder.name, id=folder.id)
+
+
+def __assemble_indexed(folders, dashboards, looks):
+    assembler = scrape.FolderHierarchyAssembler(folders, dashboards, looks)
+    return [
+        assembler.assemble(folder)
+        for folder in folders
+        if not folder.parent_id
+    ]
+
+
+def __assemble_by_scans(folders, dashboards, looks):
+    return [
+        __assemble_folder_by_scans(folder, folders, dashboards, looks)
+        for folder in folders
+        if not folder.parent_id
+    ]
+
+
+def __assemble_folder_by_scans(folder, all_folders, all_dashboards, all_looks):
+    """The former assembly, which scans the flat lists for each folder."""
+    folder.dashboards = [
+        dashboard for dashboard in all_dashboards
+        if dashboard.space.id == folder.id
+    ]
+    folder.looks = [look for look in all_looks if look.space.id == folder.id]
+
+    folders = [folder]
+    for child_folder in [
+            child_folder for child_folder in all_folders
+            if child_folder.parent_id == folder.id
+    ]:
+        folders.extend(
+            __assemble_folder_by_scans(child_folder, all_folders,
+                                       all_dashboards, all_looks))
+
+    return folders
+
+
+def __time_assembly(assemble, instance):
+    folders, dashboards, looks = instance
+    for folder in folders:
+        folder.dashboards = None
+        folder.looks = None
+
+    start = time.perf_counter()
+    hierarchies = assemble(folders, dashboards, looks)
+    elapsed = time.perf_counter() - start
+
+    # Spot check: all the folders and their assets are assembled.
+    assert sum(len(hierarchy) for hierarchy in hierarchies) == len(folders)
+    assert sum(len(folder.looks) for folder in folders) == len(looks)
+
+    return elapsed
+
+
+def __run(folders_count, steps, dashboards_per_folder, looks_per_folder,
+          baseline_max_folders):
+
+    print(f'{"folders":>10} {"assets":>10} {"indexed s":>10}'
+          f' {"scans s":>10}')
+    for step in reversed(range(steps)):
+        step_folders_count = folders_count // 2**step
+        instance = __make_instance(step_folders_count, dashboards_per_folder,
+                                   looks_per_folder)
+        assets_count = sum(len(assets) for assets in instance)
+
+        indexed_elapsed = __time_assembly(__assemble_indexed, instance)
+        scans_elapsed = __time_assembly(__assemble_by_scans, instance) \
+            if step_folders_count <= baseline_max_folders else None
+
+        scans_elapsed_str = f'{scans_elapsed:>10.3f}' \
+            if scans_elapsed is not None else f'{"-":>10}'
+        print(f'{step_folders_count:>10} {assets_count:>10}'
+              f' {indexed_elapsed:>10.3f} {scans_elapsed_str}')
+
+
+def __parse_args():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark for the folder hierarchy assembly.'
+        ' The indexed assembly time is expected to grow linearly with the'
+        ' number of assets.')
+
+    parser.add_argument('--folders',
+                        help='Number of folders of the largest instance',
+                        type=int,
+                        default=__DEFAULT_FOLDERS_COUNT)
+    parser.add_argument('--steps',
+                        help='Number of instances to assemble, each one'
+                        ' twice as large as the previous one',
+                        type=int,
+                        default=__DEFAULT_STEPS)
+    parser.add_argument('--dashboards-per-folder',
+                        help='Average number of dashboards in each folder',
+                        type=float,
+                        default=__DEFAULT_DASHBOARDS_PER_FOLDER)
+    parser.add_argument('--looks-per-folder',
+                        help='Average number of looks in each folder',
+                        type=float,
+                        default=__DEFAULT_LOOKS_PER_FOLDER)
+    parser.add_argument('--baseline-max-folders',
+                        help='Largest number of folders for which the former'
+                        ' per-folder list scans are also timed',
+                        type=int,
+                        default=__DEFAULT_BASELINE_MAX_FOLDERS)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = __parse_args()
+    __run(args.folders, args.steps, args.dashboards_per_folder,
+          args.looks_per_folder, args.baseline_max_folders)
@@ -43,6 +43,9 @@ setuptools.setup(
         'requests_ntlm ~= 1.1.0',
         'websockets ~= 8.1',
     ),
+    extras_require={
+        'fast-json': ('orjson',),
+    },
     setup_requires=('pytest-runner',),
     tests_require=(
         'pytest-cov',
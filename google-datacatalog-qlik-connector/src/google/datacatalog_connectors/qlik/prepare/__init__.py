@@ -16,12 +16,14 @@
 
 from . import constants
 from .assembled_entry_factory import AssembledEntryFactory
+from .assembled_entry_process_pool import AssembledEntryProcessPool
 from .datacatalog_tag_template_factory import DataCatalogTagTemplateFactory
 from .entry_relationship_mapper import EntryRelationshipMapper
 
 __all__ = (
     'constants',
     'AssembledEntryFactory',
+    'AssembledEntryProcessPool',
     'DataCatalogTagTemplateFactory',
     'EntryRelationshipMapper',
 )
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+
+from google.cloud import datacatalog
+from google.datacatalog_connectors.commons import prepare
+
+from google.datacatalog_connectors.qlik.prepare import assembled_entry_factory
+
+
+class AssembledEntryProcessPool:
+    """Makes the assembled entries of Streams in a pool of worker processes.
+
+    Building the Entries and Tags of large sites is CPU bound, so it does
+    not benefit from threads. Each worker holds its own
+    ``AssembledEntryFactory``, and the Entries and Tags are sent back as
+    serialized protobuf messages, which are much cheaper to parse than to
+    build field by field. The results keep the order of the given Streams, so
+    the output is identical to the one of the serial factory.
+
+    The pool is a context manager: the worker processes are started on enter
+    and stopped on exit.
+
+    Attributes:
+        __workers: The number of worker processes.
+        __factory_args: The arguments used to build the factory of each
+            worker.
+        __serialized_tag_templates: The Tag Templates available to the
+            workers, serialized once for all of them.
+        __pool: The ``multiprocessing.Pool`` while the context is active.
+    """
+    # The factory and Tag Templates of each worker process, set up by the
+    # pool initializer.
+    _worker_factory = None
+    _worker_tag_templates_dict = None
+
+    def __init__(self, workers, tag_templates_dict, project_id, location_id,
+                 entry_group_id, user_specified_system, site_url):
+
+        self.__workers = workers
+        self.__factory_args = (project_id, location_id, entry_group_id,
+                               user_specified_system, site_url)
+        self.__serialized_tag_templates = {
+            template_id: datacatalog.TagTemplate.serialize(tag_template)
+            for template_id, tag_template in tag_templates_dict.items()
+        }
+        self.__pool = None
+
+    def __enter__(self):
+        self.__pool = multiprocessing.Pool(
+            self.__workers,
+            initializer=self._init_worker,
+            initargs=(self.__factory_args, self.__serialized_tag_templates))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.__pool.terminate()
+        else:
+            self.__pool.close()
+        self.__pool.join()
+        self.__pool = None
+
+    def make_assembled_entries_for_streams(self, streams_metadata):
+        """Makes the assembled entries of several Streams concurrently.
+
+        Returns:
+            An iterator of lists of assembled entries, one per Stream, in the
+            order of the given Streams.
+        """
+        # Streams vary a lot in size, so they are sent one by one to keep the
+        # workers equally busy.
+        serialized_results = self.__pool.imap(
+            self._make_serialized_assembled_entries,
+            streams_metadata,
+            chunksize=1)
+        for serialized_assembled_entries in serialized_results:
+            yield self.__deserialize_assembled_entries(
+                serialized_assembled_entries)
+
+    def submit_assembled_entries_for_stream(self, stream_metadata):
+        """Starts making the assembled entries of a Stream in a worker,
+        without waiting for them, so several Streams are handled at the same
+        time when submitted one after the other.
+
+        Returns:
+            A ``multiprocessing.pool.AsyncResult``, to be passed to
+            ``get_assembled_entries``.
+        """
+        return self.__pool.apply_async(self._make_serialized_assembled_entries,
+                                       (stream_metadata,))
+
+    def get_assembled_entries(self, async_result):
+        """Waits for the assembled entries of a submitted Stream.
+
+        Returns:
+            A list of assembled entries.
+        """
+        return self.__deserialize_assembled_entries(async_result.get())
+
+    @classmethod
+    def _init_worker(cls, factory_args, serialized_tag_templates):
+        cls._worker_factory = \
+            assembled_entry_factory.AssembledEntryFactory(*factory_args)
+        cls._worker_tag_templates_dict = {
+            template_id: datacatalog.TagTemplate.deserialize(tag_template)
+            for template_id, tag_template in serialized_tag_templates.items()
+        }
+
+    @classmethod
+    def _make_serialized_assembled_entries(cls, stream_metadata):
+        assembled_entries = \
+            cls._worker_factory.make_assembled_entries_for_stream(
+                stream_metadata, cls._worker_tag_templates_dict)
+
+        return [
+            (assembled_entry.entry_id,
+             datacatalog.Entry.serialize(assembled_entry.entry),
+             [datacatalog.Tag.serialize(tag)
+              for tag in assembled_entry.tags])
+            for assembled_entry in assembled_entries
+        ]
+
+    @classmethod
+    def __deserialize_assembled_entries(cls, serialized_assembled_entries):
+        return [
+            prepare.AssembledEntryData(
+                entry_id, datacatalog.Entry.deserialize(entry),
+                [datacatalog.Tag.deserialize(tag)
+                 for tag in tags])
+            for entry_id, entry, tags in serialized_assembled_entries
+        ]
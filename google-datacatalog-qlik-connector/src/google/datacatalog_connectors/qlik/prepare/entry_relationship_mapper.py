@@ -20,6 +20,13 @@ from google.datacatalog_connectors.qlik.prepare import constants
 
 
 class EntryRelationshipMapper(prepare.BaseEntryRelationshipMapper):
+    """Fulfills the Tag fields that link Qlik assets to their related
+    Entries, e.g. the App Entry of each Sheet.
+
+    The id-to-Entry index is built once by the base class, and all the
+    relationship kinds are resolved in a single pass over the Entries,
+    dispatched by their types.
+    """
     __APP = constants.USER_SPECIFIED_TYPE_APP
     __CUSTOM_PROPERTY_DEFINITION = \
         constants.USER_SPECIFIED_TYPE_CUSTOM_PROPERTY_DEFINITION
@@ -29,82 +36,34 @@ class EntryRelationshipMapper(prepare.BaseEntryRelationshipMapper):
     __SHEET = constants.USER_SPECIFIED_TYPE_SHEET
     __STREAM = constants.USER_SPECIFIED_TYPE_STREAM
 
-    def fulfill_tag_fields(self, assembled_entries):
-        resolvers = (
-            self.__resolve_app_mappings,
-            self.__resolve_dimension_mappings,
-            self.__resolve_measure_mappings,
-            self.__resolve_sheet_mappings,
-            self.__resolve_stream_mappings,
-            self.__resolve_visualization_mappings,
-        )
-
-        self._fulfill_tag_fields(assembled_entries, resolvers)
-
-    @classmethod
-    def __resolve_app_mappings(cls, assembled_entries, id_name_pairs):
-        app_assembled_entries = [
-            assembled_entry for assembled_entry in assembled_entries
-            if assembled_entry.entry.user_specified_type == cls.__APP
-        ]
-        for assembled_entry in app_assembled_entries:
-            cls._map_related_entry(assembled_entry,
-                                   cls.__CUSTOM_PROPERTY_DEFINITION,
-                                   'property_definition_id',
-                                   'property_definition_entry', id_name_pairs)
-            cls._map_related_entry(assembled_entry, cls.__STREAM, 'stream_id',
-                                   'stream_entry', id_name_pairs)
-
-    @classmethod
-    def __resolve_dimension_mappings(cls, assembled_entries, id_name_pairs):
-        dimension_assembled_entries = [
-            assembled_entry for assembled_entry in assembled_entries
-            if assembled_entry.entry.user_specified_type == cls.__DIMENSION
-        ]
-        for assembled_entry in dimension_assembled_entries:
-            cls._map_related_entry(assembled_entry, cls.__APP, 'app_id',
-                                   'app_entry', id_name_pairs)
-
-    @classmethod
-    def __resolve_measure_mappings(cls, assembled_entries, id_name_pairs):
-        measure_assembled_entries = [
-            assembled_entry for assembled_entry in assembled_entries
-            if assembled_entry.entry.user_specified_type == cls.__MEASURE
-        ]
-        for assembled_entry in measure_assembled_entries:
-            cls._map_related_entry(assembled_entry, cls.__APP, 'app_id',
-                                   'app_entry', id_name_pairs)
-
-    @classmethod
-    def __resolve_sheet_mappings(cls, assembled_entries, id_name_pairs):
-        sheet_assembled_entries = [
-            assembled_entry for assembled_entry in assembled_entries
-            if assembled_entry.entry.user_specified_type == cls.__SHEET
-        ]
-        for assembled_entry in sheet_assembled_entries:
-            cls._map_related_entry(assembled_entry, cls.__APP, 'app_id',
-                                   'app_entry', id_name_pairs)
+    # Maps the Entry types to the relationships to be resolved for them,
+    # represented as (related Entry type, source field, target field) tuples.
+    __APP_RELATIONSHIP = (__APP, 'app_id', 'app_entry')
+    __PROPERTY_DEFINITION_RELATIONSHIP = (__CUSTOM_PROPERTY_DEFINITION,
+                                          'property_definition_id',
+                                          'property_definition_entry')
+    __RELATIONSHIPS = {
+        __APP: (
+            __PROPERTY_DEFINITION_RELATIONSHIP,
+            (__STREAM, 'stream_id', 'stream_entry'),
+        ),
+        __DIMENSION: (__APP_RELATIONSHIP,),
+        __MEASURE: (__APP_RELATIONSHIP,),
+        __SHEET: (__APP_RELATIONSHIP,),
+        __STREAM: (__PROPERTY_DEFINITION_RELATIONSHIP,),
+        __VISUALIZATION: (__APP_RELATIONSHIP,),
+    }
 
-    @classmethod
-    def __resolve_stream_mappings(cls, assembled_entries, id_name_pairs):
-        stream_assembled_entries = [
-            assembled_entry for assembled_entry in assembled_entries
-            if assembled_entry.entry.user_specified_type == cls.__STREAM
-        ]
-        for assembled_entry in stream_assembled_entries:
-            cls._map_related_entry(assembled_entry,
-                                   cls.__CUSTOM_PROPERTY_DEFINITION,
-                                   'property_definition_id',
-                                   'property_definition_entry', id_name_pairs)
+    def fulfill_tag_fields(self, assembled_entries):
+        self._fulfill_tag_fields(assembled_entries, (self.__resolve_mappings,))
 
     @classmethod
-    def __resolve_visualization_mappings(cls, assembled_entries,
-                                         id_name_pairs):
-
-        viz_assembled_entries = [
-            assembled_entry for assembled_entry in assembled_entries
-            if assembled_entry.entry.user_specified_type == cls.__VISUALIZATION
-        ]
-        for assembled_entry in viz_assembled_entries:
-            cls._map_related_entry(assembled_entry, cls.__APP, 'app_id',
-                                   'app_entry', id_name_pairs)
+    def __resolve_mappings(cls, assembled_entries, id_name_pairs):
+        for assembled_entry in assembled_entries:
+            relationships = cls.__RELATIONSHIPS.get(
+                assembled_entry.entry.user_specified_type, ())
+            for related_type, source_field_id, target_field_id \
+                    in relationships:
+                cls._map_related_entry(assembled_entry, related_type,
+                                       source_field_id, target_field_id,
+                                       id_name_pairs)
@@ -18,7 +18,7 @@ import argparse
 import logging
 import sys
 
-from google.datacatalog_connectors.qlik import sync
+from google.datacatalog_connectors.qlik import scrape, sync
 
 
 class Qlik2DataCatalogCli:
@@ -52,6 +52,60 @@ class Qlik2DataCatalogCli:
         parser.add_argument('--qlik-password',
                             help='Qlik password',
                             required=True)
+        parser.add_argument(
+            '--qlik-max-sessions',
+            help='Maximum number of Qlik Engine API sessions'
+            ' to be held concurrently while scraping Apps',
+            type=int,
+            default=scrape.MetadataScraper.DEFAULT_MAX_SESSIONS)
+        parser.add_argument('--qlik-cookie-cache-file',
+                            help='Path to a file used to cache the Qlik'
+                            ' session cookie across runs, so the user is'
+                            ' not authenticated again while it is valid')
+        parser.add_argument('--state-file',
+                            help='Path to a JSON file used to keep state'
+                            ' across runs, so the Apps that did not change'
+                            ' since the last run are not scraped again')
+        parser.add_argument('--pipelined',
+                            help='Prepare and ingest each Stream while the'
+                            ' next ones are scraped, deleting obsolete'
+                            ' metadata at the end',
+                            action='store_true')
+        parser.add_argument('--metrics-file',
+                            help='Path to a JSON file the Qlik API request'
+                            ' metrics are written to at the end of the run')
+        parser.add_argument('--prometheus-textfile',
+                            help='Path to a file the Qlik API request metrics'
+                            ' are written to at the end of the run, in the'
+                            ' Prometheus text-based format')
+        parser.add_argument('--tag-template-cache-file',
+                            help='Path to a JSON file used to keep the'
+                            ' content hashes of the Tag Templates across'
+                            ' runs, so the unchanged ones are not ingested'
+                            ' again')
+        parser.add_argument('--prepare-workers',
+                            help='Number of worker processes used to convert'
+                            ' the Streams into Data Catalog entries and tags',
+                            type=int)
+        parser.add_argument('--shard-count',
+                            help='Number of connector processes the Streams'
+                            ' are split among',
+                            type=int,
+                            default=1)
+        parser.add_argument('--shard-index',
+                            help='Index of the subset of Streams synchronized'
+                            ' by this process, from 0 to shard count - 1',
+                            type=int,
+                            default=0)
+        parser.add_argument('--shard-manifest-dir',
+                            help='Path to a directory shared by the shards'
+                            ' and the coordinator, where each shard lists'
+                            ' the entries it synchronized')
+        parser.add_argument('--shard-coordinator',
+                            help='Run once all the shards are done: ingest'
+                            ' Tag Templates and Custom Property Definitions,'
+                            ' and delete obsolete metadata',
+                            action='store_true')
         parser.add_argument('--datacatalog-project-id',
                             help='Google Cloud Project ID',
                             required=True)
@@ -62,7 +116,18 @@ class Qlik2DataCatalogCli:
 
         parser.set_defaults(func=cls.__run_synchronizer)
 
-        return parser.parse_args(argv)
+        args = parser.parse_args(argv)
+        if args.prepare_workers is not None and args.prepare_workers < 1:
+            parser.error('--prepare-workers must be greater than 0')
+        if not 0 <= args.shard_index < args.shard_count:
+            parser.error('--shard-index must be between 0 and'
+                         ' --shard-count - 1')
+        if (args.shard_count > 1 or args.shard_coordinator) \
+                and not args.shard_manifest_dir:
+            parser.error('--shard-manifest-dir is required to run sharded'
+                         ' synchronizations')
+
+        return args
 
     @classmethod
     def __run_synchronizer(cls, args):
@@ -72,7 +137,19 @@ class Qlik2DataCatalogCli:
             qlik_username=args.qlik_username,
             qlik_password=args.qlik_password,
             datacatalog_project_id=args.datacatalog_project_id,
-            datacatalog_location_id=args.datacatalog_location_id).run()
+            datacatalog_location_id=args.datacatalog_location_id,
+            qlik_max_sessions=args.qlik_max_sessions,
+            state_file=args.state_file,
+            qlik_cookie_cache_file=args.qlik_cookie_cache_file,
+            pipelined=args.pipelined,
+            metrics_file=args.metrics_file,
+            prometheus_textfile=args.prometheus_textfile,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+            shard_manifest_dir=args.shard_manifest_dir,
+            shard_coordinator=args.shard_coordinator,
+            tag_template_cache_file=args.tag_template_cache_file,
+            prepare_workers=args.prepare_workers).run()
 
 
 def main():
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .api_metrics import APIMetrics
 from .metadata_scraper import MetadataScraper
 
-__all__ = ('MetadataScraper',)
+__all__ = ('APIMetrics', 'MetadataScraper')
@@ -0,0 +1,211 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import logging
+import threading
+import time
+
+
+class APIMetrics:
+    """Records the volume and latency of the requests sent to the Qlik APIs.
+
+    The requests are tagged by API, method, and App id, so it is possible to
+    tell which Apps and which methods dominate a run. Requests that are not
+    bound to an App, such as the QRS ones, are tagged with an empty App id.
+    The metrics are recorded from several threads, e.g. the Engine API event
+    loop and the main thread, so all the operations are thread-safe.
+
+    Attributes:
+        __series: A ``dict`` containing the recorded values, represented as
+            ``(api, method, app-id): values`` items.
+    """
+    ENGINE_API = 'engine'
+    QRS_API = 'qrs'
+
+    # Upper bounds, in seconds, of the round-trip latency histogram buckets.
+    # An implicit +Inf bucket holds the slower requests.
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                       30, 60)
+
+    __COUNTERS = ('requests', 'errors', 'timeouts', 'retries', 'reply_bytes',
+                  'latency_sum')
+
+    def __init__(self):
+        self.__series = {}
+        self.__lock = threading.Lock()
+
+    def record_request(self,
+                       api,
+                       method,
+                       latency,
+                       reply_bytes=0,
+                       app_id=None,
+                       error=False):
+        """Records a request that got a reply.
+
+        Args:
+            api: The API the request was sent to, e.g. ``ENGINE_API``.
+            method: The Engine API method or the QRS resource path.
+            latency: The round-trip time, in seconds.
+            reply_bytes: The size of the reply.
+            app_id: The App the request refers to, if any.
+            error: Whether the reply is an error.
+        """
+        bucket_index = bisect.bisect_left(self.LATENCY_BUCKETS, latency)
+        with self.__lock:
+            values = self.__get_series_values(api, method, app_id)
+            values['requests'] += 1
+            values['errors'] += 1 if error else 0
+            values['reply_bytes'] += reply_bytes
+            values['latency_sum'] += latency
+            values['latency_buckets'][bucket_index] += 1
+
+    def record_timeout(self, api, method, app_id=None):
+        """Records a request that did not get a reply in time."""
+        with self.__lock:
+            self.__get_series_values(api, method, app_id)['timeouts'] += 1
+
+    def record_retry(self, api, method, app_id=None):
+        """Records a request that is sent again after a failure."""
+        with self.__lock:
+            self.__get_series_values(api, method, app_id)['retries'] += 1
+
+    def start_engine_session(self, app_id):
+        return EngineSessionMetrics(self, app_id)
+
+    def get_series(self):
+        """Gets a snapshot of the recorded values.
+
+        Returns:
+            A ``list`` of ``dict`` objects sorted by API, method, and App id.
+            Each one holds the tags and the values of a series. The latency
+            histogram is represented as ``[upper-bound, count]`` pairs with
+            cumulative counts, the last one having a ``'+Inf'`` upper bound.
+        """
+        with self.__lock:
+            series = [
+                (key, dict(values)) for key, values in self.__series.items()
+            ]
+
+        snapshot = []
+        for (api, method, app_id), values in sorted(series):
+            cumulative_counts = []
+            count = 0
+            for bucket_count in values['latency_buckets']:
+                count += bucket_count
+                cumulative_counts.append(count)
+            values['latency_buckets'] = [[
+                upper_bound, count
+            ] for upper_bound, count in zip(self.LATENCY_BUCKETS +
+                                            ('+Inf',), cumulative_counts)]
+            snapshot.append({
+                'api': api,
+                'method': method,
+                'app_id': app_id,
+                **values
+            })
+        return snapshot
+
+    def log_summary(self, slowest_apps_count=5):
+        """Logs the recorded values aggregated by API and method, followed by
+        the Apps that took the longest cumulative round-trip time.
+        """
+        methods = {}
+        apps = {}
+        for series in self.get_series():
+            method_key = (series['api'], series['method'])
+            method_values = methods.setdefault(
+                method_key, dict.fromkeys(self.__COUNTERS, 0))
+            for key in method_values:
+                method_values[key] += series[key]
+
+            if series['app_id']:
+                app_values = apps.setdefault(series['app_id'], [0, 0])
+                app_values[0] += series['latency_sum']
+                app_values[1] += series['requests']
+
+        logging.info('')
+        logging.info('Qlik API requests:')
+        logging.info('  %-6s %-32s %9s %7s %8s %7s %10s %10s', 'api', 'method',
+                     'requests', 'errors', 'timeouts', 'retries', 'KiB',
+                     'avg ms')
+        for (api, method), values in sorted(methods.items()):
+            requests_count = values['requests']
+            average_latency = values['latency_sum'] / requests_count \
+                if requests_count else 0
+            logging.info('  %-6s %-32s %9d %7d %8d %7d %10.1f %10.1f', api,
+                         method, requests_count, values['errors'],
+                         values['timeouts'], values['retries'],
+                         values['reply_bytes'] / 1024, average_latency * 1000)
+
+        if not apps:
+            return
+
+        logging.info('Slowest Apps (cumulative round-trip time):')
+        slowest_apps = sorted(apps.items(),
+                              key=lambda item: item[1][0],
+                              reverse=True)[:slowest_apps_count]
+        for app_id, (latency_sum, requests_count) in slowest_apps:
+            logging.info('  - %s: %.1f s, %d requests', app_id, latency_sum,
+                         requests_count)
+
+    def __get_series_values(self, api, method, app_id):
+        key = (api, method, app_id or '')
+        values = self.__series.get(key)
+        if not values:
+            values = dict.fromkeys(self.__COUNTERS, 0)
+            values['latency_buckets'] = [0] * (len(self.LATENCY_BUCKETS) + 1)
+            self.__series[key] = values
+        return values
+
+
+class EngineSessionMetrics:
+    """Tracks the round trips of an Engine API communication session, which
+    is bound to an App, and records them in an ``APIMetrics`` instance.
+
+    Attributes:
+        __sent_messages: A ``dict`` containing the messages waiting for
+            replies, represented as ``message-id: (method, sent-time)`` items.
+    """
+
+    def __init__(self, metrics, app_id):
+        self.__metrics = metrics
+        self.__app_id = app_id
+        self.__sent_messages = {}
+
+    def message_sent(self, message_id, method):
+        self.__sent_messages[message_id] = (method, time.perf_counter())
+
+    def reply_received(self, message_id, reply_bytes, error=False):
+        sent_message = self.__sent_messages.pop(message_id, None)
+        if not sent_message:
+            return
+
+        method, sent_time = sent_message
+        self.__metrics.record_request(APIMetrics.ENGINE_API,
+                                      method,
+                                      time.perf_counter() - sent_time,
+                                      reply_bytes=reply_bytes,
+                                      app_id=self.__app_id,
+                                      error=error)
+
+    def timed_out(self):
+        """Records a timeout for each message still waiting for a reply."""
+        for method, _ in self.__sent_messages.values():
+            self.__metrics.record_timeout(APIMetrics.ENGINE_API, method,
+                                          self.__app_id)
+        self.__sent_messages.clear()
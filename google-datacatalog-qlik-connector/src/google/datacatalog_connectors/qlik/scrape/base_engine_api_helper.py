@@ -16,15 +16,16 @@
 
 import abc
 import asyncio
-import json
 import logging
 import threading
+import time
 
-import jmespath
 from urllib.parse import urlparse
+import jmespath
 import websockets
 
-from google.datacatalog_connectors.qlik.scrape import constants
+from google.datacatalog_connectors.qlik.scrape import \
+    constants, engine_api_errors, json_codec
 
 
 class BaseEngineAPIHelper(abc.ABC):
@@ -32,19 +33,51 @@ class BaseEngineAPIHelper(abc.ABC):
 
     # Methods to be used in the requests.
     _GET_ALL_INFOS = 'GetAllInfos'
+    _GET_OBJECTS = 'GetObjects'
     _OPEN_DOC = 'OpenDoc'
 
-    def __init__(self, server_address, auth_cookie):
+    # Expression used to extract the Sheets from the Get Objects replies. The
+    # Sheets that are not published are work in progress, so they are dropped,
+    # and only the properties consumed by the prepare stage are kept. Both the
+    # filter and the projection run on the client, after each reply is
+    # received and decoded, so they do not make the replies smaller: they only
+    # reduce what is kept in memory and in the state file.
+    _SHEETS_RESULT_PATH = jmespath.compile(
+        'result.qList[?qMeta.published].{'
+        'qInfo: qInfo.{qId: qId, qType: qType},'
+        ' qMeta: qMeta.{title: title, description: description,'
+        ' createdDate: createdDate, modifiedDate: modifiedDate,'
+        ' owner: owner.{userDirectory: userDirectory, userId: userId,'
+        ' name: name}, published: published, publishTime: publishTime,'
+        ' approved: approved, sourceObject: sourceObject,'
+        ' draftObject: draftObject}}')
+
+    def __init__(self,
+                 server_address,
+                 auth_cookie,
+                 event_loop=None,
+                 metrics=None):
         # The server address starts with an http/https scheme. The below
-        # statement replaces the original scheme with 'wss', which is used for
-        # secure websockets communication.
-        self.__base_api_endpoint = f'wss://{urlparse(server_address).hostname}'
+        # statements replace the original scheme with 'wss', which is used for
+        # secure websockets communication, or with 'ws' for plain http
+        # addresses, e.g. local test servers. The port, if any, is kept.
+        parsed_address = urlparse(server_address)
+        scheme = 'ws' if parsed_address.scheme == 'http' else 'wss'
+        port = f':{parsed_address.port}' if parsed_address.port else ''
+        self.__base_api_endpoint = \
+            f'{scheme}://{parsed_address.hostname}{port}'
         self.__auth_cookie = auth_cookie
         self.__common_headers = {
             constants.XRFKEY_HEADER_NAME: constants.XRFKEY,
         }
         self.__messages_counter = 0
         self.__messages_counter_thread_lock = threading.Lock()
+        # An optional EngineAPIEventLoop shared by all the helpers of a scrape
+        # run. A new event loop is created on each call when it is not set.
+        self.__event_loop = event_loop
+        # An optional APIMetrics that records the round trips of the
+        # communication sessions.
+        self.__metrics = metrics
 
     def _connect_websocket(self, app_id):
         """Opens a websocket connection.
@@ -70,8 +103,14 @@ class BaseEngineAPIHelper(abc.ABC):
 
         return websockets.connect(uri=uri, extra_headers=headers)
 
+    def _run_until_complete(self, future):
+        if self.__event_loop:
+            return self.__event_loop.run_until_complete(future)
+
+        return self.__run_in_new_event_loop(future)
+
     @classmethod
-    def _run_until_complete(cls, future):
+    def __run_in_new_event_loop(cls, future):
         event_loop = asyncio.new_event_loop()
         try:
             return event_loop.run_until_complete(future)
@@ -86,12 +125,16 @@ class BaseEngineAPIHelper(abc.ABC):
     @classmethod
     def __cancel_all_tasks(cls, event_loop):
         logging.info('All tasks will be canceled...')
-        for task in asyncio.Task.all_tasks(loop=event_loop):
+        for task in asyncio.all_tasks(event_loop):
             task.cancel()
 
     async def _start_websocket_communication(self, websocket, app_id,
                                              replies_helper):
 
+        if self.__metrics:
+            replies_helper.set_session_metrics(
+                self.__metrics.start_engine_session(app_id))
+
         request_id = \
             await self.__send_open_doc_message(websocket, app_id)
         replies_helper.add_pending_id(request_id, self._OPEN_DOC)
@@ -108,32 +151,101 @@ class BaseEngineAPIHelper(abc.ABC):
         Returns:
             The result of the receiver.
         """
-        # The ``results`` list is expected to have two elements. The first one
-        # stores the message sender's result and can be ignored. The second one
-        # stores the receiver's result, which means the object to be returned
-        # on successful execution.
-        results = await asyncio.gather(*[msg_sender, msg_receiver])
+        sender_task = asyncio.ensure_future(msg_sender)
+        receiver_task = asyncio.ensure_future(msg_receiver)
+        try:
+            # The ``results`` list is expected to have two elements. The first
+            # one stores the message sender's result and can be ignored. The
+            # second one stores the receiver's result, which means the object
+            # to be returned on successful execution.
+            results = await asyncio.gather(sender_task, receiver_task)
+        except Exception:
+            # When one of the awaitables fails, the other one would keep
+            # running in the event loop, possibly waiting for replies that
+            # will never come. It must be canceled, as the event loop may be
+            # shared by other communication sessions.
+            sender_task.cancel()
+            receiver_task.cancel()
+            raise
+
         return results[1]
 
+    @classmethod
+    async def _wait_for_websocket_communication(cls,
+                                                msg_sender,
+                                                msg_receiver,
+                                                replies_helper,
+                                                idle_timeout,
+                                                deadline=None):
+        """Holds a websocket communication session until the awaitable message
+        sender and receiver are done, the session goes idle, or the deadline
+        is reached.
+
+        The idle timeout is reset by each reply, so sessions of big Apps that
+        keep streaming replies are not cut off, while stalled ones fail fast.
+
+        Args:
+            msg_sender: A coroutine or future that sends messages.
+            msg_receiver: A coroutine or future that receives messages.
+            replies_helper: The replies helper of the communication session.
+            idle_timeout: How long, in seconds, the session may go without
+              receiving any reply.
+            deadline: An optional ``time.monotonic`` value after which the
+              session is interrupted even if replies are still arriving.
+
+        Returns:
+            The result of the receiver.
+
+        Raises:
+            asyncio.TimeoutError: If the session goes idle or the deadline is
+              reached. The messages still waiting for replies are recorded as
+              timed out.
+        """
+        communication = asyncio.ensure_future(
+            cls._hold_websocket_communication(msg_sender, msg_receiver))
+        try:
+            while True:
+                now = time.monotonic()
+                wait_time = replies_helper.get_last_activity_time() \
+                    + idle_timeout - now
+                if deadline is not None:
+                    wait_time = min(wait_time, deadline - now)
+                if wait_time <= 0:
+                    break
+
+                done, _ = await asyncio.wait([communication],
+                                             timeout=wait_time)
+                if done:
+                    return communication.result()
+        except asyncio.CancelledError:
+            communication.cancel()
+            raise
+
+        communication.cancel()
+        # Gives the session the chance to cancel its sender and receiver.
+        await asyncio.wait([communication])
+        replies_helper.record_timeout()
+        raise asyncio.TimeoutError()
+
     @classmethod
     async def _receive_messages(cls, websocket, replies_helper, result_method,
                                 result_path):
 
         results = []
         async for message in websocket:
-            message_json = json.loads(message)
+            message_json = json_codec.default_codec.loads(message)
             message_id = message_json.get('id')
             if not message_id:
                 cls.__handle_generic_api_message(message_json)
                 continue
 
             logging.debug('Reply received: %d', message_id)
+            # Text frames are mostly ASCII, so their length is a cheap and
+            # close approximation of their size in bytes.
+            replies_helper.record_reply(message_id, len(message), 'error'
+                                        in message_json)
             if replies_helper.is_pending(message_id, result_method):
-                result = jmespath.search(result_path, message_json)
-                if isinstance(result, list):
-                    results.extend(result)
-                else:
-                    results.append(result)
+                cls.__add_result(results, result_path.search(message_json))
             else:
                 replies_helper.add_unhandled(message_json)
 
@@ -142,6 +254,65 @@ class BaseEngineAPIHelper(abc.ABC):
 
         return results
 
+    @classmethod
+    async def _receive_grouped_messages(cls,
+                                        websocket,
+                                        replies_helper,
+                                        result_paths,
+                                        results=None):
+        """Receives messages and groups their results by the result keys
+        assigned to the pending ids.
+
+        It allows a single communication session to gather results of
+        different kinds, e.g. Dimensions and Measures, even when they are
+        retrieved through the same method. Error replies carry no results, so
+        they are left to the message sender.
+
+        Args:
+            websocket: The websocket to receive messages from.
+            replies_helper: The replies helper of the communication session.
+            result_paths: A ``dict`` in which keys are the methods whose
+              replies carry results and values are the compiled JMESPath
+              expressions used to extract them, see ``jmespath.compile``.
+            results: An optional ``dict`` to which the results are added as
+              they arrive, so they are kept even if the session is
+              interrupted.
+
+        Returns:
+            A ``dict`` in which keys are result keys and values are lists.
+        """
+        results = {} if results is None else results
+        async for message in websocket:
+            message_json = json_codec.default_codec.loads(message)
+            message_id = message_json.get('id')
+            if not message_id:
+                cls.__handle_generic_api_message(message_json)
+                continue
+
+            logging.debug('Reply received: %d', message_id)
+            replies_helper.record_reply(message_id, len(message), 'error'
+                                        in message_json)
+            method = replies_helper.get_method(message_id)
+            if method in result_paths and not message_json.get('error') \
+                    and replies_helper.is_pending(message_id, method):
+                result_key = replies_helper.get_result_key(message_id)
+                cls.__add_result(results.setdefault(result_key, []),
+                                 result_paths[method].search(message_json))
+            else:
+                replies_helper.add_unhandled(message_json)
+
+            replies_helper.remove_pending_id(message_id)
+            replies_helper.notify_new_reply()
+
+        return results
+
+    @classmethod
+    def __add_result(cls, results, result):
+        if isinstance(result, list):
+            results.extend(result)
+        else:
+            results.append(result)
+
     @classmethod
     def __handle_generic_api_message(cls, message):
         cls.__handle_error_api_message(message)
@@ -152,20 +323,28 @@ class BaseEngineAPIHelper(abc.ABC):
         if 'OnMaxParallelSessionsExceeded' == method:
             error_message = message.get('params').get('message')
             logging.warning(error_message)
-            raise Exception(error_message)
+            raise engine_api_errors.MaxParallelSessionsExceededError(
+                error_message)
 
     @classmethod
     async def _send_messages(cls, websocket, replies_helper, sender):
         while not replies_helper.were_all_processed():
             if not replies_helper.is_there_reply_notification():
                 await replies_helper.wait_for_replies()
-                replies_helper.clear_reply_notifications()
+            # The notification must be cleared even when it was already set,
+            # otherwise the loop would spin without awaiting anything while
+            # replies are still pending, starving the receiver.
+            replies_helper.clear_reply_notifications()
             for reply in replies_helper.get_all_unhandled():
                 await sender(websocket, replies_helper, reply)
 
         # Closes the websocket when there are no more replies to be processed.
         await websocket.close()
 
+    @classmethod
+    async def _send_message(cls, websocket, message):
+        await websocket.send(json_codec.default_codec.dumps(message))
+
     async def __send_open_doc_message(self, websocket, app_id):
         """Sends a Open Doc (aka App) Interface message.
 
@@ -173,13 +352,13 @@ class BaseEngineAPIHelper(abc.ABC):
             The message id.
         """
         message_id = self._generate_message_id()
-        await websocket.send(
-            json.dumps({
+        await self._send_message(
+            websocket, {
                 'handle': -1,
                 'method': self._OPEN_DOC,
                 'params': [app_id],
                 'id': message_id
-            }))
+            })
 
         logging.debug('Open Doc Interface message sent: %d', message_id)
         return message_id
@@ -191,17 +370,43 @@ class BaseEngineAPIHelper(abc.ABC):
             The message id.
         """
         message_id = self._generate_message_id()
-        await websocket.send(
-            json.dumps({
+        await self._send_message(
+            websocket, {
                 'handle': doc_handle,
                 'method': self._GET_ALL_INFOS,
                 'params': {},
                 'id': message_id,
-            }))
+            })
 
         logging.debug('Get All Infos message sent: %d', message_id)
         return message_id
 
+    async def _send_get_sheets_message(self, websocket, doc_handle):
+        """Sends a Get Objects message for the sheet type.
+
+        Get Objects cannot filter on qMeta, nor leave out qMeta properties,
+        so the published filter and the field projection are applied on the
+        client through ``_SHEETS_RESULT_PATH``.
+
+        Returns:
+            The message id.
+        """
+        message_id = self._generate_message_id()
+        await self._send_message(
+            websocket, {
+                'handle': doc_handle,
+                'method': self._GET_OBJECTS,
+                'params': {
+                    'qOptions': {
+                        'qTypes': ['sheet'],
+                    },
+                },
+                'id': message_id,
+            })
+
+        logging.debug('Get Objects (type=sheet) message sent: %d', message_id)
+        return message_id
+
     def _generate_message_id(self):
         with self.__messages_counter_thread_lock:
             self.__messages_counter += 1
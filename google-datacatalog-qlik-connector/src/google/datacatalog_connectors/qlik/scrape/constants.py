@@ -26,6 +26,10 @@ QPS_SESSION_COOKIE_PREFIX = 'X-Qlik-Session'
 
 WINDOWS_USER_AGENT = 'Windows'
 
+# HTTP status codes returned when a QPS session cookie is missing, expired, or
+# no longer valid, meaning the user needs to authenticate again.
+AUTH_ERROR_STATUS_CODES = (401, 403)
+
 # XRFKEY is an arbitrary 16-char-length string composed of letters and digits.
 # The below code generates a unique string per connector execution just avoid
 # hardcoded values.
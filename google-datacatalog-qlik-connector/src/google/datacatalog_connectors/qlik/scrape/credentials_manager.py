@@ -0,0 +1,183 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests import cookies, sessions
+
+from google.datacatalog_connectors.qlik.scrape import authenticator, constants
+
+
+class CredentialsManager:
+    """Manages the QPS session cookie shared by the QRS and Engine API clients.
+
+    A single NTLM authentication flow is run to get the cookie, which can be
+    optionally cached on disk so that subsequent executions within its
+    lifetime skip the authentication flow. Clients must invalidate the cookie
+    when the server rejects it, and then get a new one.
+
+    Attributes:
+        __cookie_cache_file: The path of the file used to cache the cookie.
+            The cookie is cached only in memory when not set.
+        __cookie_ttl: How long, in seconds, a cookie is considered valid
+            since the last time it was issued or read from the cache.
+        __session_cookie: The current QPS session cookie.
+    """
+    # QPS sessions expire after 30 minutes of inactivity by default, so the
+    # cached cookies are discarded a bit earlier.
+    __DEFAULT_COOKIE_TTL = 25 * 60
+
+    def __init__(self,
+                 server_address,
+                 ad_domain,
+                 username,
+                 password,
+                 cookie_cache_file=None,
+                 cookie_ttl=__DEFAULT_COOKIE_TTL):
+
+        self.__server_address = server_address
+        self.__ad_domain = ad_domain
+        self.__username = username
+        self.__password = password
+        self.__cookie_cache_file = cookie_cache_file
+        self.__cookie_ttl = cookie_ttl
+
+        self.__session_cookie = None
+        # The Engine API client gets the cookie from executor threads.
+        self.__session_cookie_thread_lock = threading.Lock()
+
+    def get_session_cookie(self):
+        """Gets a QPS session cookie, authenticating the user only when there
+        is no valid cookie in memory or in the cache file.
+
+        Returns:
+            A :class:`http.cookiejar.Cookie`, or ``None`` if the
+            authentication fails.
+        """
+        with self.__session_cookie_thread_lock:
+            if not self.__session_cookie:
+                self.__session_cookie = self.__read_cached_cookie()
+            if not self.__session_cookie:
+                self.__session_cookie = self.__authenticate()
+                self.__write_cached_cookie(self.__session_cookie)
+
+            return self.__session_cookie
+
+    def invalidate_session_cookie(self, session_cookie):
+        """Invalidates a cookie rejected by the server.
+
+        The cookie is compared to the current one so that a cookie renewed in
+        the meantime by another client is kept.
+        """
+        with self.__session_cookie_thread_lock:
+            if not session_cookie or not self.__session_cookie or \
+                    session_cookie.value != self.__session_cookie.value:
+                return
+
+            logging.info('QPS session cookie invalidated.')
+            self.__session_cookie = None
+            if self.__cookie_cache_file and \
+                    os.path.isfile(self.__cookie_cache_file):
+                os.remove(self.__cookie_cache_file)
+
+    def __authenticate(self):
+        windows_auth_url = self.__get_windows_authentication_url()
+        session_cookie = authenticator.Authenticator \
+            .get_qps_session_cookie_windows_auth(
+                ad_domain=self.__ad_domain,
+                username=self.__username,
+                password=self.__password,
+                auth_url=windows_auth_url)
+        logging.debug('QPS session cookie issued: %s', session_cookie)
+        return session_cookie
+
+    def __get_windows_authentication_url(self):
+        """Get a Windows Authentication url.
+
+        This method sends an unauthenticated request to a well known endpoint
+        of the Qlik Sense Repository Service API. The expected response has a
+        302 status code and a `Location` header, which is the Windows
+        Authentication url.
+
+        Returns:
+            A string.
+        """
+        url = f'{self.__server_address}/qrs/about?Xrfkey={constants.XRFKEY}'
+
+        # Sets the User-Agent to Windows temporarily to get a Windows
+        # Authentication URL that is required by the NTLM authentication flow.
+        headers = {
+            constants.XRFKEY_HEADER_NAME: constants.XRFKEY,
+            'User-Agent': constants.WINDOWS_USER_AGENT,
+        }
+
+        response = requests.get(url=url,
+                                headers=headers,
+                                allow_redirects=False)
+
+        return sessions.Session().get_redirect_target(response)
+
+    def __read_cached_cookie(self):
+        if not self.__cookie_cache_file or \
+                not os.path.isfile(self.__cookie_cache_file):
+            return
+
+        try:
+            with open(self.__cookie_cache_file) as cache_file:
+                cached_cookie = json.load(cache_file)
+        except ValueError:
+            logging.warning('Invalid QPS session cookie cache file %s.',
+                            self.__cookie_cache_file)
+            return
+
+        if cached_cookie.get('expires', 0) <= time.time():
+            logging.info('Cached QPS session cookie expired.')
+            return
+
+        session_cookie = cookies.create_cookie(
+            name=cached_cookie.get('name'),
+            value=cached_cookie.get('value'),
+            domain=cached_cookie.get('domain'),
+            path=cached_cookie.get('path'))
+        logging.info(
+            'Cached QPS session cookie found: authentication skipped.')
+        # Using the cookie keeps the server session alive, so its expiration
+        # time is extended.
+        self.__write_cached_cookie(session_cookie)
+        return session_cookie
+
+    def __write_cached_cookie(self, session_cookie):
+        if not self.__cookie_cache_file or not session_cookie:
+            return
+
+        # The cookie grants access to the server, so the file is readable by
+        # its owner only.
+        file_descriptor = os.open(self.__cookie_cache_file,
+                                  os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(file_descriptor, 'w') as cache_file:
+            json.dump(
+                {
+                    'name': session_cookie.name,
+                    'value': session_cookie.value,
+                    'domain': session_cookie.domain,
+                    'path': session_cookie.path,
+                    'expires': time.time() + self.__cookie_ttl,
+                }, cache_file)
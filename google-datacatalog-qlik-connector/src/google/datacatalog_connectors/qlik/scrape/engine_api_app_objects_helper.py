@@ -0,0 +1,478 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import logging
+import time
+
+import jmespath
+
+from google.datacatalog_connectors.qlik.scrape import \
+    api_metrics, base_engine_api_helper as base_helper, \
+    engine_api_app_objects_progress, engine_api_apps_scheduler, \
+    websocket_replies_helper
+
+
+class EngineAPIAppObjectsHelper(base_helper.BaseEngineAPIHelper):
+    """Gets the Dimensions, Measures, Sheets, and Visualizations of a given
+    App through a single websocket communication session.
+
+    The App is opened only once and the follow-up requests for all the object
+    types are multiplexed over the same connection, which saves the handshakes
+    and Qlik Engine sessions otherwise required by each object type.
+
+    The Master Items properties are retrieved in bulk by default: a session
+    list object is created for each Master Item type and its layout brings the
+    required properties of all the items at once, so the number of round trips
+    does not grow with the number of items. If the engine does not support the
+    list object of a given type, the helper falls back to getting the
+    interface and then the properties of each item of that type.
+
+    A session is considered stalled when no reply arrives within the idle
+    timeout. It is then resumed by a new session, which only requests the
+    objects that were not received yet, until the App deadline is reached or
+    the attempts are exhausted; the objects gathered so far are returned in
+    such cases, flagged by the ``incomplete`` key so the clients do not
+    mistake them for the whole App.
+
+    Attributes:
+        __bulk_properties: Whether the Master Items properties are retrieved
+            in bulk.
+        __max_attempts: How many sessions are opened to scrape an App, the
+            first one included.
+        __app_timeout: How long, in seconds, all the sessions of an App may
+            take together.
+    """
+    # Keys used to identify the handles.
+    __DOC_HANDLE = 'doc-handle'
+
+    # Methods to be used in the requests.
+    __CREATE_SESSION_OBJECT = 'CreateSessionObject'
+    __GET_DIMENSION = 'GetDimension'
+    __GET_LAYOUT = 'GetLayout'
+    __GET_MEASURE = 'GetMeasure'
+    __GET_OBJECT = 'GetObject'
+    __GET_PROPERTIES = 'GetProperties'
+
+    # Keys used to group the results.
+    __DIMENSIONS = 'dimensions'
+    __INCOMPLETE = 'incomplete'
+    __MEASURES = 'measures'
+    __SHEETS = 'sheets'
+    __VISUALIZATIONS = 'visualizations'
+
+    # Maps the methods whose replies carry results to the expressions used to
+    # extract them.
+    __RESULT_PATHS = {
+        __GET_LAYOUT:
+            jmespath.compile('result.qLayout.*.qItems[]'
+                             '.merge({qInfo: qInfo}, qData || `{}`)'),
+        base_helper.BaseEngineAPIHelper._GET_OBJECTS:
+            base_helper.BaseEngineAPIHelper._SHEETS_RESULT_PATH,
+        __GET_PROPERTIES:
+            jmespath.compile('result.qProp'),
+    }
+
+    # Maps the Qlik object types listed by GetAllInfos to the methods used to
+    # get their interfaces and the keys used to group their properties.
+    __MASTER_ITEM_TYPES = {
+        'dimension': (__GET_DIMENSION, __DIMENSIONS),
+        'measure': (__GET_MEASURE, __MEASURES),
+        'masterobject': (__GET_OBJECT, __VISUALIZATIONS),
+    }
+
+    # Maps the keys used to group the Master Items to the list object
+    # definitions used to get their properties in bulk. The qData paths point
+    # to the properties consumed by the prepare stage, and are read back as
+    # top-level properties of each item.
+    __MASTER_ITEM_LISTS = {
+        __DIMENSIONS: ('qDimensionListDef', 'dimension', {
+            'qDim': '/qDim',
+            'qMetaDef': '/qMetaDef',
+        }),
+        __MEASURES: ('qMeasureListDef', 'measure', {
+            'qMeasure': '/qMeasure',
+            'qMetaDef': '/qMetaDef',
+        }),
+        __VISUALIZATIONS: ('qAppObjectListDef', 'masterobject', {
+            'footnote': '/footnote',
+            'qMetaDef': '/qMetaDef',
+            'subtitle': '/subtitle',
+            'title': '/title',
+            'visualization': '/visualization',
+        }),
+    }
+
+    def __init__(self,
+                 server_address,
+                 auth_cookie,
+                 event_loop=None,
+                 bulk_properties=True,
+                 metrics=None,
+                 max_attempts=3,
+                 app_timeout=600):
+
+        super().__init__(server_address, auth_cookie, event_loop, metrics)
+        self.__bulk_properties = bulk_properties
+        self.__metrics = metrics
+        self.__max_attempts = max(1, max_attempts)
+        self.__app_timeout = app_timeout
+
+    def get_app_objects(self, app_id, timeout=60):
+        return self._run_until_complete(
+            self.get_app_objects_async(app_id, timeout))
+
+    def get_apps_objects(self, app_ids, max_sessions, timeout=60):
+        """Gets the objects of several Apps, holding up to ``max_sessions``
+        communication sessions concurrently.
+
+        Returns:
+            A ``dict`` in which keys are the App ids and values are the same
+            dicts returned by ``get_app_objects``.
+        """
+        return self._run_until_complete(
+            self.get_apps_objects_async(app_ids, max_sessions, timeout))
+
+    async def get_apps_objects_async(self, app_ids, max_sessions, timeout=60):
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(
+            max_sessions, metrics=self.__metrics)
+        return await scheduler.run(
+            app_ids,
+            lambda app_id: self.get_app_objects_async(app_id, timeout))
+
+    async def get_app_objects_async(self, app_id, timeout=60):
+        """Gets the objects of an App, resuming the stalled sessions.
+
+        Args:
+            app_id: The App id.
+            timeout: How long, in seconds, a session may go without receiving
+              any reply before it is considered stalled.
+
+        Returns:
+            A ``dict`` in which keys are the object types and values are
+            lists. If the App could not be fully scraped within the allowed
+            attempts and deadline, the lists hold the objects gathered so far
+            and the ``incomplete`` key is set to ``True``.
+        """
+        progress = engine_api_app_objects_progress.EngineAPIAppObjectsProgress(
+        )
+        deadline = time.monotonic() + self.__app_timeout
+        attempt = 1
+        while True:
+            try:
+                return self.__make_app_objects_dict(
+                    await self.__get_app_objects(app_id, timeout, deadline,
+                                                 progress))
+            except asyncio.TimeoutError:
+                if attempt >= self.__max_attempts \
+                        or time.monotonic() >= deadline:
+                    logging.warning(
+                        'Engine API session of App %s stalled on attempt %d.'
+                        ' Returning the objects gathered so far.', app_id,
+                        attempt)
+                    return self.__make_app_objects_dict(progress.results,
+                                                        complete=False)
+
+                logging.info(
+                    'Engine API session of App %s stalled on attempt %d.'
+                    ' Resuming it...', app_id, attempt)
+                attempt += 1
+                if self.__metrics:
+                    self.__metrics.record_retry(
+                        api_metrics.APIMetrics.ENGINE_API, self._OPEN_DOC,
+                        app_id)
+
+    async def __get_app_objects(self, app_id, timeout, deadline, progress):
+        async with self._connect_websocket(app_id) as websocket:
+            replies_helper = \
+                websocket_replies_helper.WebsocketRepliesHelper()
+
+            await self._start_websocket_communication(websocket, app_id,
+                                                      replies_helper)
+
+            sender = self.__send_get_app_objects_msg
+            receiver = self.__receive_get_app_objects_msg
+            return await self._wait_for_websocket_communication(
+                sender(websocket, replies_helper, progress),
+                receiver(websocket, replies_helper, progress), replies_helper,
+                timeout, deadline)
+
+    async def __receive_get_app_objects_msg(self, websocket, replies_helper,
+                                            progress):
+
+        return await self._receive_grouped_messages(websocket, replies_helper,
+                                                    self.__RESULT_PATHS,
+                                                    progress.results)
+
+    async def __send_get_app_objects_msg(self, websocket, replies_helper,
+                                         progress):
+
+        return await self._send_messages(
+            websocket, replies_helper,
+            functools.partial(self.__send_follow_up_msg_get_app_objects,
+                              progress=progress))
+
+    async def __send_follow_up_msg_get_app_objects(self, websocket,
+                                                   replies_helper, response,
+                                                   progress):
+
+        response_id = response.get('id')
+        if replies_helper.is_method(response_id, self._OPEN_DOC):
+            await self.__handle_open_doc_reply(websocket, replies_helper,
+                                               response, progress)
+            replies_helper.remove_unhandled(response)
+        elif replies_helper.is_method(response_id,
+                                      self.__CREATE_SESSION_OBJECT) \
+                or replies_helper.is_method(response_id, self.__GET_LAYOUT):
+            await self.__handle_master_items_list_reply(
+                websocket, replies_helper, response, progress)
+            replies_helper.remove_unhandled(response)
+        elif response.get('error'):
+            # Errors on single objects should not hold the whole session.
+            logging.warning('Error reply to %s message %d: %s',
+                            replies_helper.get_method(response_id),
+                            response_id, response.get('error'))
+            replies_helper.remove_unhandled(response)
+        elif replies_helper.is_method(response_id, self._GET_ALL_INFOS):
+            await self.__handle_get_all_infos_reply(websocket, replies_helper,
+                                                    response, progress)
+            replies_helper.remove_unhandled(response)
+        elif replies_helper.is_method(response_id, self.__GET_DIMENSION) \
+                or replies_helper.is_method(response_id, self.__GET_MEASURE) \
+                or replies_helper.is_method(response_id, self.__GET_OBJECT):
+            await self.__handle_get_master_item_reply(websocket,
+                                                      replies_helper, response)
+            replies_helper.remove_unhandled(response)
+
+    async def __handle_open_doc_reply(self, websocket, replies_helper,
+                                      response, progress):
+
+        doc_handle = response.get('result').get('qReturn').get('qHandle')
+        replies_helper.set_handle(doc_handle, self.__DOC_HANDLE)
+
+        # Resumed sessions skip the object types already gathered.
+        if not progress.is_complete(self.__SHEETS):
+            get_sheets_req_id = await self._send_get_sheets_message(
+                websocket, doc_handle)
+            replies_helper.add_pending_id(get_sheets_req_id, self._GET_OBJECTS,
+                                          self.__SHEETS)
+
+        if not self.__bulk_properties:
+            get_all_infos_req_id = await self._send_get_all_infos_message(
+                websocket, doc_handle)
+            replies_helper.add_pending_id(get_all_infos_req_id,
+                                          self._GET_ALL_INFOS)
+            return
+
+        result_keys = [
+            result_key for result_key in self.__MASTER_ITEM_LISTS
+            if not progress.is_complete(result_key)
+        ]
+        follow_up_req_ids = await asyncio.gather(*[
+            self.__send_master_items_list_message(websocket, doc_handle,
+                                                  result_key, progress)
+            for result_key in result_keys
+        ])
+        for index, (method, follow_up_req_id) in \
+                enumerate(follow_up_req_ids):
+            replies_helper.add_pending_id(follow_up_req_id, method,
+                                          result_keys[index])
+
+    async def __send_master_items_list_message(self, websocket, doc_handle,
+                                               result_key, progress):
+        """Sends a Create Session Object message for a list of Master Items,
+        or a Get All Infos message if the list is known to be unsupported.
+
+        Returns:
+            A ``tuple`` with the method and the message id.
+        """
+        if progress.is_fallback_key(result_key):
+            return self._GET_ALL_INFOS, await self._send_get_all_infos_message(
+                websocket, doc_handle)
+
+        return self.__CREATE_SESSION_OBJECT, \
+            await self.__send_create_master_items_list_message(
+                websocket, doc_handle, result_key)
+
+    async def __handle_master_items_list_reply(self, websocket, replies_helper,
+                                               response, progress):
+
+        response_id = response.get('id')
+        result_key = replies_helper.get_result_key(response_id)
+        if response.get('error'):
+            logging.info(
+                'Bulk retrieval of %s not supported (%s).'
+                ' Falling back to per-object requests...', result_key,
+                response.get('error').get('message'))
+            progress.add_fallback_key(result_key)
+            doc_handle = replies_helper.get_handle(self.__DOC_HANDLE)
+            follow_up_req_id = await self._send_get_all_infos_message(
+                websocket, doc_handle)
+            # The result key restricts the fallback to the given type.
+            replies_helper.add_pending_id(follow_up_req_id,
+                                          self._GET_ALL_INFOS, result_key)
+        elif replies_helper.is_method(response_id,
+                                      self.__CREATE_SESSION_OBJECT):
+            list_handle = response.get('result').get('qReturn').get('qHandle')
+            follow_up_req_id = await self.__send_get_layout_message(
+                websocket, list_handle)
+            replies_helper.add_pending_id(follow_up_req_id, self.__GET_LAYOUT,
+                                          result_key)
+
+    async def __handle_get_all_infos_reply(self, websocket, replies_helper,
+                                           response, progress):
+
+        all_infos = response.get('result').get('qInfos')
+        doc_handle = replies_helper.get_handle(self.__DOC_HANDLE)
+        # Only the Master Items grouped by the given result key are requested
+        # when falling back from a bulk request; all of them otherwise. The
+        # ones received by previous sessions of the App are skipped.
+        fallback_result_key = replies_helper.get_result_key(response.get('id'))
+        received_ids = progress.get_received_ids()
+        master_items = [
+            (*self.__MASTER_ITEM_TYPES[info.get('qType')], info.get('qId'))
+            for info in all_infos
+            if info.get('qType') in self.__MASTER_ITEM_TYPES and
+            fallback_result_key in (None, self.__MASTER_ITEM_TYPES[info.get(
+                'qType')][1]) and info.get('qId') not in received_ids
+        ]
+        follow_up_req_ids = await asyncio.gather(*[
+            self.__send_get_master_item_message(websocket, doc_handle, method,
+                                                item_id)
+            for method, _, item_id in master_items
+        ])
+        for index, follow_up_req_id in enumerate(follow_up_req_ids):
+            method, result_key, _ = master_items[index]
+            replies_helper.add_pending_id(follow_up_req_id, method, result_key)
+
+    async def __handle_get_master_item_reply(self, websocket, replies_helper,
+                                             response):
+
+        response_id = response.get('id')
+        item_handle = response.get('result').get('qReturn').get('qHandle')
+        follow_up_req_id = await self.__send_get_properties_message(
+            websocket, item_handle)
+        replies_helper.add_pending_id(
+            follow_up_req_id, self.__GET_PROPERTIES,
+            replies_helper.get_result_key(response_id))
+
+    async def __send_create_master_items_list_message(self, websocket,
+                                                      doc_handle, result_key):
+        """Sends a Create Session Object message for a list of Master Items,
+        according to the given result key.
+
+        Returns:
+            The message id.
+        """
+        list_def_name, item_type, item_data = \
+            self.__MASTER_ITEM_LISTS[result_key]
+        message_id = self._generate_message_id()
+        await self._send_message(
+            websocket, {
+                'handle': doc_handle,
+                'method': self.__CREATE_SESSION_OBJECT,
+                'params': {
+                    'qProp': {
+                        'qInfo': {
+                            'qType': f'{item_type}-list',
+                        },
+                        list_def_name: {
+                            'qType': item_type,
+                            'qData': item_data,
+                        },
+                    },
+                },
+                'id': message_id,
+            })
+
+        logging.debug('Create Session Object (type=%s list) message sent: %d',
+                      item_type, message_id)
+        return message_id
+
+    async def __send_get_layout_message(self, websocket, object_handle):
+        """Sends a Get Layout message.
+
+        Returns:
+            The message id.
+        """
+        message_id = self._generate_message_id()
+        await self._send_message(
+            websocket, {
+                'handle': object_handle,
+                'method': self.__GET_LAYOUT,
+                'params': {},
+                'id': message_id,
+            })
+
+        logging.debug('Get Layout message sent: %d', message_id)
+        return message_id
+
+    async def __send_get_master_item_message(self, websocket, doc_handle,
+                                             method, item_id):
+        """Sends a Get Dimension, Get Measure, or Get Object Interface
+        message, according to the given method.
+
+        Returns:
+            The message id.
+        """
+        message_id = self._generate_message_id()
+        await self._send_message(
+            websocket, {
+                'handle': doc_handle,
+                'method': method,
+                'params': {
+                    'qId': item_id,
+                },
+                'id': message_id,
+            })
+
+        logging.debug('%s Interface message sent: %d', method, message_id)
+        return message_id
+
+    async def __send_get_properties_message(self, websocket, item_handle):
+        """Sends a Get Properties message.
+
+        Returns:
+            The message id.
+        """
+        message_id = self._generate_message_id()
+        await self._send_message(
+            websocket, {
+                'handle': item_handle,
+                'method': self.__GET_PROPERTIES,
+                'params': {},
+                'id': message_id,
+            })
+
+        logging.debug('Get Properties message sent: %d', message_id)
+        return message_id
+
+    @classmethod
+    def __make_app_objects_dict(cls, grouped_results, complete=True):
+        app_objects = {
+            cls.__DIMENSIONS:
+                grouped_results.get(cls.__DIMENSIONS) or [],
+            cls.__MEASURES:
+                grouped_results.get(cls.__MEASURES) or [],
+            cls.__SHEETS:
+                grouped_results.get(cls.__SHEETS) or [],
+            cls.__VISUALIZATIONS:
+                grouped_results.get(cls.__VISUALIZATIONS) or [],
+        }
+        if not complete:
+            app_objects[cls.__INCOMPLETE] = True
+        return app_objects
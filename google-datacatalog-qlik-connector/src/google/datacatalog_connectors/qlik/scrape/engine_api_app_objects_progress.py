@@ -0,0 +1,67 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class EngineAPIAppObjectsProgress:
+    """Keeps track of the objects of an App gathered across communication
+    sessions, so a session that stalls can be resumed by a new one that only
+    requests what was not received yet.
+
+    Interface handles are bound to the session that created them, so a new
+    session has to open the App again, but the object types already listed
+    and the Master Items whose properties were already received are skipped.
+
+    Attributes:
+        __results: A ``dict`` in which keys are result keys and values are the
+            lists of objects received so far.
+        __fallback_keys: A ``set`` containing the result keys of the Master
+            Item types that could not be retrieved in bulk, so they are only
+            complete once the properties of each item were received.
+    """
+
+    def __init__(self):
+        self.__results = {}
+        self.__fallback_keys = set()
+
+    @property
+    def results(self):
+        return self.__results
+
+    def add_fallback_key(self, result_key):
+        self.__fallback_keys.add(result_key)
+
+    def is_fallback_key(self, result_key):
+        return result_key in self.__fallback_keys
+
+    def is_complete(self, result_key):
+        """Tells whether all the objects grouped by the given result key were
+        received, which happens when they came in a single list reply.
+        """
+        return result_key in self.__results \
+            and result_key not in self.__fallback_keys
+
+    def get_received_ids(self):
+        """Gets the ids of all the objects received so far.
+
+        Returns:
+            A ``set`` of ``qInfo.qId`` values.
+        """
+        return {
+            item.get('qInfo', {}).get('qId')
+            for items in self.__results.values()
+            for item in items
+            if isinstance(item, dict)
+        }
@@ -0,0 +1,125 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from collections import deque
+import logging
+
+from google.datacatalog_connectors.qlik.scrape import \
+    api_metrics, engine_api_errors
+
+
+class EngineAPIAppsScheduler:
+    """Schedules Engine API scrape sessions for several Apps, running up to a
+    given number of them concurrently in the same event loop.
+
+    Each App scrape opens its own Qlik Engine session, and the engine limits
+    how many sessions a user can hold in parallel. When that limit is hit, the
+    engine sends an ``OnMaxParallelSessionsExceeded`` notification: the
+    scheduler then shrinks its concurrency and requeues the affected App
+    instead of failing the whole workflow.
+
+    Attributes:
+        __max_sessions: The maximum number of concurrent sessions. It may be
+            reduced at runtime, but never below 1.
+        __max_attempts: How many times an App is tried before the
+            ``MaxParallelSessionsExceededError`` is propagated.
+        __retry_delay: The base delay, in seconds, before a requeued App is
+            tried again. It grows linearly with the number of attempts.
+        __metrics: An optional APIMetrics in which the requeued Apps are
+            recorded as retries.
+    """
+    # The method of the session requests that are retried.
+    __OPEN_DOC = 'OpenDoc'
+
+    def __init__(self,
+                 max_sessions,
+                 max_attempts=5,
+                 retry_delay=1,
+                 metrics=None):
+
+        self.__max_sessions = max(1, max_sessions)
+        self.__max_attempts = max_attempts
+        self.__retry_delay = retry_delay
+        self.__metrics = metrics
+
+    @property
+    def max_sessions(self):
+        return self.__max_sessions
+
+    async def run(self, app_ids, scrape_app):
+        """Scrapes the given Apps concurrently.
+
+        Args:
+            app_ids: The ids of the Apps to be scraped.
+            scrape_app: A coroutine function that receives an App id and
+              returns its scraped metadata.
+
+        Returns:
+            A ``dict`` in which keys are the App ids and values are the
+            results of ``scrape_app``.
+        """
+        pending = deque((app_id, 0) for app_id in app_ids)
+        running = {}
+        results = {}
+
+        while pending or running:
+            while pending and len(running) < self.__max_sessions:
+                app_id, attempt = pending.popleft()
+                task = asyncio.ensure_future(
+                    self.__scrape_app(scrape_app, app_id, attempt))
+                running[task] = (app_id, attempt)
+
+            done, _ = await asyncio.wait(running.keys(),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                app_id, attempt = running.pop(task)
+                try:
+                    results[app_id] = task.result()
+                except engine_api_errors.MaxParallelSessionsExceededError:
+                    if attempt + 1 >= self.__max_attempts:
+                        self.__cancel_tasks(running)
+                        raise
+                    self.__shrink_max_sessions(len(running))
+                    logging.warning(
+                        'App %s requeued (%d concurrent sessions allowed'
+                        ' from now on).', app_id, self.__max_sessions)
+                    pending.append((app_id, attempt + 1))
+                    if self.__metrics:
+                        self.__metrics.record_retry(
+                            api_metrics.APIMetrics.ENGINE_API, self.__OPEN_DOC,
+                            app_id)
+                except Exception:
+                    self.__cancel_tasks(running)
+                    raise
+
+        return results
+
+    async def __scrape_app(self, scrape_app, app_id, attempt):
+        if attempt:
+            await asyncio.sleep(self.__retry_delay * attempt)
+        return await scrape_app(app_id)
+
+    def __shrink_max_sessions(self, running_sessions_count):
+        # The engine refused a new session while the other ones were running,
+        # so the number of running sessions is the best guess for the limit.
+        self.__max_sessions = max(
+            1, min(self.__max_sessions - 1, running_sessions_count))
+
+    @classmethod
+    def __cancel_tasks(cls, running):
+        for task in running:
+            task.cancel()
@@ -0,0 +1,108 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import threading
+
+
+class EngineAPIEventLoop:
+    """Owns a single event loop that serves all the Engine API calls of a
+    scrape run.
+
+    The loop runs forever in a background daemon thread, which allows
+    synchronous clients to submit coroutines to it and wait for their results
+    without paying the loop setup cost on each call, while the state kept by
+    the loop, such as the resolved addresses and the open sessions, outlives
+    each call.
+
+    Attributes:
+        __event_loop: The event loop, lazily created on the first call.
+        __thread: The thread in which the event loop runs.
+    """
+
+    def __init__(self):
+        self.__event_loop = None
+        self.__thread = None
+        self.__thread_lock = threading.Lock()
+
+    def run_until_complete(self, coroutine):
+        """Runs a coroutine in the event loop and waits for its result.
+
+        Args:
+            coroutine: The coroutine to be run.
+
+        Returns:
+            The coroutine's result. Its exception, if any, is raised.
+        """
+        event_loop = self.__start()
+        if threading.current_thread() is self.__thread:
+            coroutine.close()
+            raise RuntimeError(
+                'Cannot wait for a coroutine from the event loop thread:'
+                ' await it instead.')
+
+        return asyncio.run_coroutine_threadsafe(coroutine, event_loop).result()
+
+    def close(self):
+        """Stops the event loop, cancels its pending tasks, and waits for the
+        background thread to finish.
+        """
+        with self.__thread_lock:
+            if not self.__event_loop:
+                return
+
+            event_loop = self.__event_loop
+            # The pending tasks belong to the loop thread, so they are
+            # canceled from there, before the loop is stopped.
+            asyncio.run_coroutine_threadsafe(self.__cancel_pending_tasks(),
+                                             event_loop).result()
+            event_loop.call_soon_threadsafe(event_loop.stop)
+            self.__thread.join()
+            event_loop.close()
+
+            self.__event_loop = None
+            self.__thread = None
+
+    def __start(self):
+        with self.__thread_lock:
+            if not self.__event_loop:
+                self.__event_loop = asyncio.new_event_loop()
+                self.__thread = threading.Thread(target=self.__run_forever,
+                                                 args=(self.__event_loop,),
+                                                 name='qlik-engine-api-loop',
+                                                 daemon=True)
+                self.__thread.start()
+
+            return self.__event_loop
+
+    @classmethod
+    async def __cancel_pending_tasks(cls):
+        current_task = asyncio.current_task()
+        pending_tasks = [
+            task for task in asyncio.all_tasks() if task is not current_task
+        ]
+        for task in pending_tasks:
+            task.cancel()
+        if pending_tasks:
+            logging.info('%d pending tasks canceled.', len(pending_tasks))
+            await asyncio.gather(*pending_tasks, return_exceptions=True)
+        await asyncio.get_running_loop().shutdown_asyncgens()
+
+    @classmethod
+    def __run_forever(cls, event_loop):
+        asyncio.set_event_loop(event_loop)
+        event_loop.run_forever()
@@ -15,9 +15,10 @@
 # limitations under the License.
 
 import asyncio
-import json
 import logging
 
+import jmespath
+
 from google.datacatalog_connectors.qlik.scrape import \
     base_engine_api_helper, websocket_replies_helper
 
@@ -30,6 +31,9 @@ class EngineAPIMeasuresHelper(base_engine_api_helper.BaseEngineAPIHelper):
     __GET_MEASURE = 'GetMeasure'
     __GET_PROPERTIES = 'GetProperties'
 
+    # Expression used to extract the results from the replies.
+    __RESULT_PATH = jmespath.compile('result.qProp')
+
     def get_measures(self, app_id, timeout=60):
         try:
             return self._run_until_complete(
@@ -50,15 +54,14 @@ class EngineAPIMeasuresHelper(base_engine_api_helper.BaseEngineAPIHelper):
 
             sender = self.__send_get_measures_msg
             receiver = self.__receive_get_measures_msg
-            return await asyncio.wait_for(
-                self._hold_websocket_communication(
-                    sender(websocket, replies_helper),
-                    receiver(websocket, replies_helper)), timeout)
+            return await self._wait_for_websocket_communication(
+                sender(websocket, replies_helper),
+                receiver(websocket, replies_helper), replies_helper, timeout)
 
     async def __receive_get_measures_msg(self, websocket, replies_helper):
         return await self._receive_messages(websocket, replies_helper,
                                             self.__GET_PROPERTIES,
-                                            'result.qProp')
+                                            self.__RESULT_PATH)
 
     async def __send_get_measures_msg(self, websocket, replies_helper):
         return await self._send_messages(
@@ -122,15 +125,15 @@ class EngineAPIMeasuresHelper(base_engine_api_helper.BaseEngineAPIHelper):
             The message id.
         """
         message_id = self._generate_message_id()
-        await websocket.send(
-            json.dumps({
+        await self._send_message(
+            websocket, {
                 'handle': doc_handle,
                 'method': self.__GET_MEASURE,
                 'params': {
                     'qId': measure_id,
                 },
                 'id': message_id,
-            }))
+            })
 
         logging.debug('Get Measure Interface message sent: %d', message_id)
         return message_id
@@ -142,13 +145,13 @@ class EngineAPIMeasuresHelper(base_engine_api_helper.BaseEngineAPIHelper):
             The message id.
         """
         message_id = self._generate_message_id()
-        await websocket.send(
-            json.dumps({
+        await self._send_message(
+            websocket, {
                 'handle': measure_handle,
                 'method': self.__GET_PROPERTIES,
                 'params': {},
                 'id': message_id,
-            }))
+            })
 
         logging.debug('Get Measure Properties message sent: %d', message_id)
         return message_id
@@ -15,14 +15,13 @@
 # limitations under the License.
 
 import asyncio
-import json
 import logging
 
-from urllib.parse import urlparse
 import websockets
 
 from google.datacatalog_connectors.qlik.scrape import \
-    authenticator, constants, engine_api_dimensions_helper, \
+    api_metrics, constants, engine_api_app_objects_helper, \
+    engine_api_dimensions_helper, engine_api_event_loop, \
     engine_api_measures_helper, engine_api_sheets_helper, \
     engine_api_visualizations_helper
 
@@ -38,7 +37,11 @@ class EngineAPIScraper:
     Websockets use an asynchronous communication channel, but the public
     methods from this class are intended to be called synchronously to keep
     consistency with the overall scrape > prepare > ingest  workflow. The
-    public methods take care of handling the async API calls for their clients.
+    public methods take care of handling the async API calls for their clients,
+    running them in a single event loop that lives as long as the scraper, so
+    the loop setup cost is paid only once per run. The ``*_async`` methods
+    can be awaited by clients that already run in that loop; the ``close``
+    method must be called when the scraper is no longer needed.
 
     Most private coroutines (async def) rely on 'async with' statements.
     They work with an asynchronous context manager and the connection is closed
@@ -46,23 +49,72 @@ class EngineAPIScraper:
 
     Attributes:
         __auth_cookie: An HTTP cookie used to authorize the requests.
+        __credentials_manager: The CredentialsManager that provides the
+            ``__auth_cookie``, which is shared with the QRS API helper.
+        __event_loop: The EngineAPIEventLoop that runs all the async calls.
+        __max_sessions: The maximum number of Engine API sessions that can be
+            held concurrently when scraping several Apps.
+        __metrics: An optional APIMetrics that records the Engine API
+            requests.
     """
+    # The default number of Engine API sessions held concurrently, shared by
+    # the library and the command line interface.
+    DEFAULT_MAX_SESSIONS = 5
+    # The pseudo-method used to record the retried websocket handshakes.
+    __HANDSHAKE = 'Handshake'
+
+    def __init__(self,
+                 server_address,
+                 credentials_manager,
+                 max_sessions=DEFAULT_MAX_SESSIONS,
+                 metrics=None):
 
-    def __init__(self, server_address, ad_domain, username, password):
         self.__server_address = server_address
-        self.__ad_domain = ad_domain
-        self.__username = username
-        self.__password = password
-
-        # The server address starts with an http/https scheme. The below
-        # statement replaces the original scheme with 'wss', which is used for
-        # secure websockets communication.
-        self.__base_api_endpoint = f'wss://{urlparse(server_address).hostname}'
-        self.__common_headers = {
-            constants.XRFKEY_HEADER_NAME: constants.XRFKEY,
-        }
+        self.__credentials_manager = credentials_manager
+        self.__max_sessions = max_sessions
+        self.__metrics = metrics
 
         self.__auth_cookie = None
+        self.__event_loop = engine_api_event_loop.EngineAPIEventLoop()
+
+    def close(self):
+        """Stops the event loop used to run the async calls."""
+        self.__event_loop.close()
+
+    def get_app_objects(self, app_id):
+        """Gets the Dimensions, Measures, Sheets, and Visualizations that
+        belong to the given App, through a single Engine API session.
+
+        Returns:
+            A ``dict`` with the ``dimensions``, ``measures``, ``sheets``, and
+            ``visualizations`` keys, whose values are the same lists returned
+            by the ``get_dimensions``, ``get_measures``, ``get_sheets``, and
+            ``get_visualizations`` methods. The ``incomplete`` key is set to
+            ``True`` if the session stalled before all the objects arrived.
+        """
+        return self.__event_loop.run_until_complete(
+            self.get_app_objects_async(app_id))
+
+    async def get_app_objects_async(self, app_id):
+        return await self.__run_authenticated(
+            lambda: self.__make_app_objects_helper().get_app_objects_async(
+                app_id))
+
+    def get_apps_objects(self, app_ids):
+        """Gets the Dimensions, Measures, Sheets, and Visualizations that
+        belong to the given Apps, scraping several Apps concurrently.
+
+        Returns:
+            A ``dict`` in which keys are the App ids and values are the same
+            dicts returned by the ``get_app_objects`` method.
+        """
+        return self.__event_loop.run_until_complete(
+            self.get_apps_objects_async(app_ids))
+
+    async def get_apps_objects_async(self, app_ids):
+        return await self.__run_authenticated(
+            lambda: self.__make_app_objects_helper().get_apps_objects_async(
+                app_ids, self.__max_sessions))
 
     def get_dimensions(self, app_id):
         """Gets the Dimensions (Master Items) set up to a given App.
@@ -72,7 +124,8 @@ class EngineAPIScraper:
         """
         self.__set_up_auth_cookie()
         return engine_api_dimensions_helper.EngineAPIDimensionsHelper(
-            self.__server_address, self.__auth_cookie).get_dimensions(app_id)
+            self.__server_address, self.__auth_cookie, self.__event_loop,
+            self.__metrics).get_dimensions(app_id)
 
     def get_measures(self, app_id):
         """Gets the Measures (Master Items) set up to a given App.
@@ -82,7 +135,8 @@ class EngineAPIScraper:
         """
         self.__set_up_auth_cookie()
         return engine_api_measures_helper.EngineAPIMeasuresHelper(
-            self.__server_address, self.__auth_cookie).get_measures(app_id)
+            self.__server_address, self.__auth_cookie, self.__event_loop,
+            self.__metrics).get_measures(app_id)
 
     def get_sheets(self, app_id):
         """Gets the Sheets that belong to the given App.
@@ -92,7 +146,8 @@ class EngineAPIScraper:
         """
         self.__set_up_auth_cookie()
         return engine_api_sheets_helper.EngineAPISheetsHelper(
-            self.__server_address, self.__auth_cookie).get_sheets(app_id)
+            self.__server_address, self.__auth_cookie, self.__event_loop,
+            self.__metrics).get_sheets(app_id)
 
     def get_visualizations(self, app_id):
         """Gets the Visualizations (Master Items) set up to a given App.
@@ -102,50 +157,55 @@ class EngineAPIScraper:
         """
         self.__set_up_auth_cookie()
         return engine_api_visualizations_helper.EngineAPIVisualizationsHelper(
+            self.__server_address, self.__auth_cookie, self.__event_loop,
+            self.__metrics).get_visualizations(app_id)
+
+    def __make_app_objects_helper(self):
+        return engine_api_app_objects_helper.EngineAPIAppObjectsHelper(
             self.__server_address,
-            self.__auth_cookie).get_visualizations(app_id)
+            self.__auth_cookie,
+            self.__event_loop,
+            metrics=self.__metrics)
 
     def __set_up_auth_cookie(self):
         if self.__auth_cookie:
             return
 
-        windows_auth_url = asyncio.get_event_loop().run_until_complete(
-            self.__get_windows_authentication_url())
-        self.__auth_cookie = authenticator.Authenticator\
-            .get_qps_session_cookie_windows_auth(
-                ad_domain=self.__ad_domain,
-                username=self.__username,
-                password=self.__password,
-                auth_url=windows_auth_url)
-        logging.debug('QPS session cookie issued for the Engine API: %s',
-                      self.__auth_cookie)
-
-    async def __get_windows_authentication_url(self):
-        """Gets a Windows Authentication url.
-
-        This method sends an unauthenticated request to a well known endpoint
-        of the Qlik Engine JSON API. The expected response has a `loginUri`
-        param, which is the Windows Authentication url.
-        P.S. The endpoint was manually captured from the Engine API Explorer's
-        Execution Logs (https://<qlik-site>/dev-hub/engine-api-explorer).
+        self.__event_loop.run_until_complete(self.__set_up_auth_cookie_async())
 
-        Returns:
-            A string.
+    async def __set_up_auth_cookie_async(self):
+        if self.__auth_cookie:
+            return
+
+        # The NTLM authentication flow relies on blocking HTTP requests, so it
+        # runs in the default executor of the shared event loop, which keeps
+        # the loop responsive.
+        self.__auth_cookie = await asyncio.get_running_loop().run_in_executor(
+            None, self.__credentials_manager.get_session_cookie)
+
+    async def __run_authenticated(self, make_coroutine):
+        """Awaits the coroutine returned by ``make_coroutine`` with a valid
+        session cookie.
+
+        The session cookie may have expired or been issued for a previous
+        execution, so the Engine API rejects the websocket handshake. In this
+        case, the cookie is renewed and a new coroutine is awaited once.
         """
-        uri = f'{self.__base_api_endpoint}/app/?transient=' \
-              f'?Xrfkey={constants.XRFKEY}' \
-              f'&reloadUri={self.__server_address}/dev-hub/engine-api-explorer'
-
-        # Sets the User-Agent to Windows temporarily to get a Windows
-        # Authentication URL that is required by the NTLM authentication flow.
-        headers = self.__common_headers.copy()
-        headers['User-Agent'] = constants.WINDOWS_USER_AGENT
-
-        async with websockets.connect(uri=uri,
-                                      extra_headers=headers) as websocket:
-
-            async for message in websocket:
-                json_message = json.loads(message)
-                params = json_message.get('params')
-                if params:
-                    return params.get('loginUri')
+        await self.__set_up_auth_cookie_async()
+        try:
+            return await make_coroutine()
+        except websockets.exceptions.InvalidStatusCode as e:
+            if e.status_code not in constants.AUTH_ERROR_STATUS_CODES:
+                raise
+
+            logging.info(
+                'QPS session cookie rejected by the Engine API'
+                ' (HTTP %d): re-authenticating...', e.status_code)
+            if self.__metrics:
+                self.__metrics.record_retry(api_metrics.APIMetrics.ENGINE_API,
+                                            self.__HANDSHAKE)
+            self.__credentials_manager.invalidate_session_cookie(
+                self.__auth_cookie)
+            self.__auth_cookie = None
+            await self.__set_up_auth_cookie_async()
+            return await make_coroutine()
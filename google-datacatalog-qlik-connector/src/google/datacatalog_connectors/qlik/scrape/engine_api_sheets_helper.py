@@ -15,7 +15,6 @@
 # limitations under the License.
 
 import asyncio
-import json
 import logging
 
 from google.datacatalog_connectors.qlik.scrape import \
@@ -23,8 +22,6 @@ from google.datacatalog_connectors.qlik.scrape import \
 
 
 class EngineAPISheetsHelper(base_engine_api_helper.BaseEngineAPIHelper):
-    # Methods to be used in the requests.
-    __GET_OBJECTS = 'GetObjects'
 
     def get_sheets(self, app_id, timeout=60):
         try:
@@ -46,14 +43,14 @@ class EngineAPISheetsHelper(base_engine_api_helper.BaseEngineAPIHelper):
 
             sender = self.__send_get_sheets_msg
             receiver = self.__receive_get_sheets_msg
-            return await asyncio.wait_for(
-                self._hold_websocket_communication(
-                    sender(websocket, replies_helper),
-                    receiver(websocket, replies_helper)), timeout)
+            return await self._wait_for_websocket_communication(
+                sender(websocket, replies_helper),
+                receiver(websocket, replies_helper), replies_helper, timeout)
 
     async def __receive_get_sheets_msg(self, websocket, replies_helper):
         return await self._receive_messages(websocket, replies_helper,
-                                            self.__GET_OBJECTS, 'result.qList')
+                                            self._GET_OBJECTS,
+                                            self._SHEETS_RESULT_PATH)
 
     async def __send_get_sheets_msg(self, websocket, replies_helper):
         return await self._send_messages(websocket, replies_helper,
@@ -72,28 +69,6 @@ class EngineAPISheetsHelper(base_engine_api_helper.BaseEngineAPIHelper):
                                       response):
 
         doc_handle = response.get('result').get('qReturn').get('qHandle')
-        follow_up_req_id = await self.__send_get_sheets_message(
+        follow_up_req_id = await self._send_get_sheets_message(
             websocket, doc_handle)
-        replies_helper.add_pending_id(follow_up_req_id, self.__GET_OBJECTS)
-
-    async def __send_get_sheets_message(self, websocket, doc_handle):
-        """Sends a Get Objects message for the sheet type.
-
-        Returns:
-            The message id.
-        """
-        message_id = self._generate_message_id()
-        await websocket.send(
-            json.dumps({
-                'handle': doc_handle,
-                'method': self.__GET_OBJECTS,
-                'params': {
-                    'qOptions': {
-                        'qTypes': ['sheet'],
-                    },
-                },
-                'id': message_id,
-            }))
-
-        logging.debug('Get Objects (type=sheet) message sent: %d', message_id)
-        return message_id
+        replies_helper.add_pending_id(follow_up_req_id, self._GET_OBJECTS)
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import codecs
+import json
+
+
+class JSONStreamDecoder:
+    """Decodes JSON arrays from streamed HTTP responses.
+
+    Decoding the items as the response chunks arrive avoids holding the whole
+    response body and its decoded representation in memory at the same time,
+    which matters for large lists such as the Apps of a busy Qlik hub.
+    """
+    __WHITESPACES = ' \t\n\r'
+    __ITEM_TERMINATORS = __WHITESPACES + ',]'
+
+    # Decoding states: what is expected next in the array.
+    __ARRAY_START = 0
+    __FIRST_ITEM = 1
+    __ITEM = 2
+    __DELIMITER = 3
+
+    @classmethod
+    def iter_array_items(cls, chunks, encoding='utf-8'):
+        """Iterates over the items of a JSON array.
+
+        Args:
+            chunks: An iterable of ``bytes`` or ``str`` that makes up a JSON
+              array, e.g. ``response.iter_content(chunk_size)``.
+            encoding: The encoding used to decode ``bytes`` chunks.
+
+        Returns:
+            A generator of the decoded array items.
+
+        Raises:
+            ValueError: If the chunks do not make up a JSON array.
+        """
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder(encoding)()
+
+        buffer = ''
+        state = cls.__ARRAY_START
+        for chunk, is_last_chunk in cls.__iter_chunks(chunks):
+            if isinstance(chunk, bytes):
+                chunk = text_decoder.decode(chunk, final=is_last_chunk)
+            buffer += chunk
+
+            position = cls.__skip_whitespaces(buffer, 0)
+            while position < len(buffer):
+                char = buffer[position]
+                if state == cls.__ARRAY_START:
+                    cls.__validate_char(char, '[', position)
+                    state = cls.__FIRST_ITEM
+                    position += 1
+                elif state == cls.__DELIMITER:
+                    cls.__validate_char(char, ',]', position)
+                    if char == ']':
+                        return
+                    state = cls.__ITEM
+                    position += 1
+                elif state == cls.__FIRST_ITEM and char == ']':
+                    return
+                else:
+                    try:
+                        item, end = decoder.raw_decode(buffer, position)
+                    except json.JSONDecodeError:
+                        if is_last_chunk:
+                            raise
+                        # The item is not complete yet.
+                        break
+
+                    # Numbers can be split across chunks, e.g. '1' + '.5', so
+                    # an item is accepted only when followed by a delimiter or
+                    # a whitespace.
+                    if not is_last_chunk and (end == len(buffer) or buffer[end]
+                                              not in cls.__ITEM_TERMINATORS):
+                        break
+
+                    yield item
+                    state = cls.__DELIMITER
+                    position = end
+
+                position = cls.__skip_whitespaces(buffer, position)
+
+            buffer = buffer[position:]
+
+        raise ValueError('Invalid JSON array: unexpected end of data.')
+
+    @classmethod
+    def __iter_chunks(cls, chunks):
+        """Flags the last chunk, so buffered data can be flushed."""
+        previous_chunk = None
+        for chunk in chunks:
+            if previous_chunk is not None:
+                yield previous_chunk, False
+            previous_chunk = chunk
+
+        yield previous_chunk if previous_chunk is not None else b'', True
+
+    @classmethod
+    def __validate_char(cls, char, expected_chars, position):
+        if char not in expected_chars:
+            raise ValueError(f'Invalid JSON array: "{char}" found at position'
+                             f' {position} of the current chunk.')
+
+    @classmethod
+    def __skip_whitespaces(cls, buffer, position):
+        while position < len(buffer) and buffer[position] in cls.__WHITESPACES:
+            position += 1
+        return position
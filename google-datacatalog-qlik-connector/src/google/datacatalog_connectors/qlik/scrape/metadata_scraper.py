@@ -17,7 +17,7 @@
 import logging
 
 from google.datacatalog_connectors.qlik.scrape import \
-    engine_api_scraper, repository_services_api_helper
+    credentials_manager, engine_api_scraper, repository_services_api_helper
 
 
 class MetadataScraper:
@@ -25,17 +25,48 @@ class MetadataScraper:
     comprising the interactions between Qlik Sense Proxy Service (QPS), Qlik
     Sense Repository Service (QRS), and Qlik Engine JSON API.
     """
-
-    def __init__(self, server_address, ad_domain, username, password):
+    DEFAULT_MAX_SESSIONS = engine_api_scraper.EngineAPIScraper.\
+        DEFAULT_MAX_SESSIONS
+
+    def __init__(self,
+                 server_address,
+                 ad_domain,
+                 username,
+                 password,
+                 max_sessions=DEFAULT_MAX_SESSIONS,
+                 cookie_cache_file=None,
+                 metrics=None):
+
+        # A single QPS session cookie is shared by the QRS and Engine API
+        # clients, so the user is authenticated only once per execution.
+        self.__credentials_manager = credentials_manager.CredentialsManager(
+            server_address, ad_domain, username, password, cookie_cache_file)
         self.__qrs_api_helper = \
             repository_services_api_helper.RepositoryServicesAPIHelper(
-                server_address, ad_domain, username, password)
+                server_address, self.__credentials_manager, metrics)
         self.__engine_api_scraper = engine_api_scraper.EngineAPIScraper(
-            server_address, ad_domain, username, password)
-
-    def scrape_all_apps(self):
-        self.__log_scrape_start('Scraping all Apps...')
-        apps = self.__qrs_api_helper.get_full_app_list()
+            server_address, self.__credentials_manager, max_sessions, metrics)
+
+    def close(self):
+        """Releases the resources held by the scraper, such as the Engine API
+        event loop.
+        """
+        self.__engine_api_scraper.close()
+
+    def scrape_all_apps(self, published_only=False, stream_id=None):
+        """Scrapes the Apps the current user has access to.
+
+        Args:
+            published_only: Whether only the published Apps are scraped. The
+              filter is applied by the server.
+            stream_id: If set, only the Apps published to the given Stream
+              are scraped.
+        """
+        self.__log_scrape_start('Scraping all %sApps...',
+                                'published ' if published_only else '')
+        apps = list(
+            self.__qrs_api_helper.get_full_app_list(
+                published_only=published_only, stream_id=stream_id))
 
         logging.info('  %s Apps found:', len(apps))
         for app in apps:
@@ -49,7 +80,8 @@ class MetadataScraper:
 
     def scrape_all_custom_property_definitions(self):
         self.__log_scrape_start('Scraping all Custom Property Definitions...')
-        defs = self.__qrs_api_helper.get_full_custom_property_definition_list()
+        defs = list(
+            self.__qrs_api_helper.get_full_custom_property_definition_list())
 
         logging.info('  %s Custom Property Definitions found:', len(defs))
         for defintion in defs:
@@ -60,7 +92,7 @@ class MetadataScraper:
 
     def scrape_all_streams(self):
         self.__log_scrape_start('Scraping all Streams...')
-        streams = self.__qrs_api_helper.get_full_stream_list()
+        streams = list(self.__qrs_api_helper.get_full_stream_list())
 
         logging.info('  %s Streams found:', len(streams))
         for stream in streams:
@@ -68,6 +100,49 @@ class MetadataScraper:
 
         return streams
 
+    def scrape_app_objects(self, app_metadata):
+        """Scrapes the Dimensions, Measures, Sheets, and Visualizations
+        from a given App at once.
+
+        Returns:
+            A ``dict`` with the ``dimensions``, ``measures``, ``sheets``, and
+            ``visualizations`` keys, and the ``incomplete`` key set to
+            ``True`` if the App could not be fully scraped.
+        """
+        self.__log_scrape_start(
+            'Scraping Dimensions, Measures, Sheets, and Visualizations from'
+            ' the "%s" App...', app_metadata.get('name'))
+        app_objects = self.__engine_api_scraper.get_app_objects(
+            app_metadata.get('id'))
+
+        return self.__log_app_objects(app_objects)
+
+    def scrape_apps_objects(self, apps_metadata):
+        """Scrapes the Dimensions, Measures, Sheets, and Visualizations
+        from the given Apps, several Apps at a time.
+
+        Returns:
+            A ``dict`` in which keys are the App ids and values are dicts with
+            the ``dimensions``, ``measures``, ``sheets``, and
+            ``visualizations`` keys, and the ``incomplete`` key set to
+            ``True`` if the App could not be fully scraped.
+        """
+        self.__log_scrape_start(
+            'Scraping Dimensions, Measures, Sheets, and Visualizations from'
+            ' %d Apps...', len(apps_metadata))
+        apps_objects = self.__engine_api_scraper.get_apps_objects(
+            [app_metadata.get('id') for app_metadata in apps_metadata]) or {}
+
+        scraped_apps_objects = {}
+        for app_metadata in apps_metadata:
+            app_id = app_metadata.get('id')
+            logging.info('')
+            logging.info('  "%s" App [%s]:', app_metadata.get('name'), app_id)
+            scraped_apps_objects[app_id] = self.__log_app_objects(
+                apps_objects.get(app_id))
+
+        return scraped_apps_objects
+
     def scrape_dimensions(self, app_metadata):
         self.__log_scrape_start(
             'Scraping Dimensions (Master Items) from the'
@@ -75,11 +150,7 @@ class MetadataScraper:
         dimensions = self.__engine_api_scraper.get_dimensions(
             app_metadata.get('id')) or []
 
-        logging.info('  %s Dimensions found:', len(dimensions))
-        for dimension in dimensions:
-            q_meta_def = dimension.get('qMetaDef')
-            logging.info('    - %s [%s]', q_meta_def.get('title'),
-                         dimension.get('qInfo').get('qId'))
+        self.__log_master_items('Dimensions', dimensions)
 
         return dimensions
 
@@ -90,11 +161,7 @@ class MetadataScraper:
         measures = self.__engine_api_scraper.get_measures(
             app_metadata.get('id')) or []
 
-        logging.info('  %s Measures found:', len(measures))
-        for measure in measures:
-            q_meta_def = measure.get('qMetaDef')
-            logging.info('    - %s [%s]', q_meta_def.get('title'),
-                         measure.get('qInfo').get('qId'))
+        self.__log_master_items('Measures', measures)
 
         return measures
 
@@ -104,13 +171,7 @@ class MetadataScraper:
         sheets = self.__engine_api_scraper.get_sheets(
             app_metadata.get('id')) or []
 
-        logging.info('  %s Sheets found:', len(sheets))
-        for sheet in sheets:
-            q_meta = sheet.get('qMeta')
-            logging.info('    - %s%s [%s]',
-                         '' if q_meta.get('published') else 'NOT PUBLISHED! ',
-                         q_meta.get('title'),
-                         sheet.get('qInfo').get('qId'))
+        self.__log_sheets(sheets)
 
         return sheets
 
@@ -121,14 +182,53 @@ class MetadataScraper:
         visualizations = self.__engine_api_scraper.get_visualizations(
             app_metadata.get('id')) or []
 
-        logging.info('  %s Visualizations found:', len(visualizations))
-        for visualization in visualizations:
-            q_meta_def = visualization.get('qMetaDef')
-            logging.info('    - %s [%s]', q_meta_def.get('title'),
-                         visualization.get('qInfo').get('qId'))
+        self.__log_master_items('Visualizations', visualizations)
 
         return visualizations
 
+    @classmethod
+    def __log_app_objects(cls, app_objects):
+        app_objects = app_objects or {}
+
+        dimensions = app_objects.get('dimensions') or []
+        cls.__log_master_items('Dimensions', dimensions)
+        measures = app_objects.get('measures') or []
+        cls.__log_master_items('Measures', measures)
+        sheets = app_objects.get('sheets') or []
+        cls.__log_sheets(sheets)
+        visualizations = app_objects.get('visualizations') or []
+        cls.__log_master_items('Visualizations', visualizations)
+
+        scraped_app_objects = {
+            'dimensions': dimensions,
+            'measures': measures,
+            'sheets': sheets,
+            'visualizations': visualizations,
+        }
+        # The Engine API session stalled before all the objects arrived.
+        if app_objects.get('incomplete'):
+            logging.warning('  The App objects above are incomplete.')
+            scraped_app_objects['incomplete'] = True
+        return scraped_app_objects
+
+    @classmethod
+    def __log_master_items(cls, items_type, master_items):
+        logging.info('  %s %s found:', len(master_items), items_type)
+        for master_item in master_items:
+            q_meta_def = master_item.get('qMetaDef')
+            logging.info('    - %s [%s]', q_meta_def.get('title'),
+                         master_item.get('qInfo').get('qId'))
+
+    @classmethod
+    def __log_sheets(cls, sheets):
+        logging.info('  %s Sheets found:', len(sheets))
+        for sheet in sheets:
+            q_meta = sheet.get('qMeta')
+            logging.info('    - %s%s [%s]',
+                         '' if q_meta.get('published') else 'NOT PUBLISHED! ',
+                         q_meta.get('title'),
+                         sheet.get('qInfo').get('qId'))
+
     @classmethod
     def __log_scrape_start(cls, message, *args):
         logging.info('')
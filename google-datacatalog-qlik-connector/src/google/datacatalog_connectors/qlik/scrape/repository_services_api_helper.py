@@ -15,10 +15,12 @@
 # limitations under the License.
 
 import logging
-import requests
+from urllib import parse
+
 from requests import sessions
 
-from google.datacatalog_connectors.qlik.scrape import authenticator, constants
+from google.datacatalog_connectors.qlik.scrape import \
+    api_metrics, constants, json_stream_decoder
 
 
 class RepositoryServicesAPIHelper:
@@ -34,16 +36,28 @@ class RepositoryServicesAPIHelper:
     versus condensed objects](https://help.qlik.com/en-US/sense-developer/September2020/Subsystems/RepositoryServiceAPI/Content/Sense_RepositoryServiceAPI/RepositoryServiceAPI-Connect-API-Full-vs-Condensed-Objects.htm)  # noqa E501
     for more information).
 
+    The list endpoints may return large payloads, so the filters are applied
+    by the server whenever possible, and the responses are decoded as they are
+    downloaded: the public methods return iterators that yield one object at a
+    time.
+
     Attributes:
+        __credentials_manager: The CredentialsManager that provides the QPS
+            session cookie, which is shared with the Engine API scraper.
         __http_session: An HTTP session for the QRS RESP API calls.
+        __session_cookie: The QPS session cookie used by the HTTP session.
+        __metrics: An optional APIMetrics that records the requests, tagged
+            by resource path. Their latency is the time elapsed until the
+            response headers arrive, and their size is known once the
+            response body is fully read.
 
     """
+    __RESPONSE_CHUNK_SIZE = 64 * 1024
 
-    def __init__(self, server_address, ad_domain, username, password):
+    def __init__(self, server_address, credentials_manager, metrics=None):
         self.__server_address = server_address
-        self.__ad_domain = ad_domain
-        self.__username = username
-        self.__password = password
+        self.__credentials_manager = credentials_manager
+        self.__metrics = metrics
 
         self.__base_api_endpoint = f'{server_address}/qrs'
         self.__common_headers = {
@@ -53,22 +67,34 @@ class RepositoryServicesAPIHelper:
         }
 
         self.__http_session = None
+        self.__session_cookie = None
 
-    def get_full_app_list(self):
+    def get_full_app_list(self, published_only=False, stream_id=None):
         """Get the list of all Apps that can be opened by the current user,
         via the current proxy.
 
+        Args:
+            published_only: Whether only the published Apps are returned.
+            stream_id: If set, only the Apps published to the given Stream
+              are returned.
+
         Returns:
-            A list of full App metadata objects.
+            An iterator of full App metadata objects.
         """
-        return self.__execute_api_call('app/hublist/full')
+        filters = []
+        if published_only:
+            filters.append('published eq true')
+        if stream_id:
+            filters.append(f'stream.id eq {stream_id}')
+
+        return self.__execute_api_call('app/hublist/full', filters)
 
     def get_full_custom_property_definition_list(self):
         """Get the list of Custom Property Definitions with full metadata from
         a given server.
 
         Returns:
-            A list of full Custom Property Definition metadata objects.
+            An iterator of full Custom Property Definition metadata objects.
         """
         return self.__execute_api_call('custompropertydefinition/full')
 
@@ -76,18 +102,60 @@ class RepositoryServicesAPIHelper:
         """Get the list of Streams with full metadata from a given server.
 
         Returns:
-            A list of full Stream metadata objects.
+            An iterator of full Stream metadata objects.
         """
         return self.__execute_api_call('stream/full')
 
-    def __execute_api_call(self, resource_path):
-        self.__set_up_http_session()
-
+    def __execute_api_call(self, resource_path, filters=None):
         url = f'{self.__base_api_endpoint}/{resource_path}' \
               f'?Xrfkey={constants.XRFKEY}'
-
+        if filters:
+            # QRS filters are made of '<property> <operator> <value>'
+            # clauses, which can be combined with logical operators.
+            url += f'&filter={parse.quote(" and ".join(filters))}'
+
+        response = self.__get(url)
+        if response.status_code in constants.AUTH_ERROR_STATUS_CODES:
+            # The session cookie may have expired or been issued for a
+            # previous execution, so it is renewed and the call retried once.
+            logging.info(
+                'QPS session cookie rejected by the QRS API'
+                ' (HTTP %d): re-authenticating...', response.status_code)
+            response.close()
+            if self.__metrics:
+                self.__metrics.record_retry(api_metrics.APIMetrics.QRS_API,
+                                            resource_path)
+            self.__credentials_manager.invalidate_session_cookie(
+                self.__session_cookie)
+            self.__http_session = None
+            response = self.__get(url)
+
+        reply_bytes = 0
+
+        def iter_chunks():
+            nonlocal reply_bytes
+            for chunk in response.iter_content(self.__RESPONSE_CHUNK_SIZE):
+                reply_bytes += len(chunk)
+                yield chunk
+
+        try:
+            yield from json_stream_decoder.JSONStreamDecoder.iter_array_items(
+                iter_chunks(), response.encoding or 'utf-8')
+        finally:
+            response.close()
+            if self.__metrics:
+                failed = response.status_code >= 400
+                self.__metrics.record_request(api_metrics.APIMetrics.QRS_API,
+                                              resource_path,
+                                              response.elapsed.total_seconds(),
+                                              reply_bytes=reply_bytes,
+                                              error=failed)
+
+    def __get(self, url):
+        self.__set_up_http_session()
         return self.__http_session.get(url=url,
-                                       headers=self.__common_headers).json()
+                                       headers=self.__common_headers,
+                                       stream=True)
 
     def __set_up_http_session(self):
         if self.__http_session:
@@ -95,39 +163,7 @@ class RepositoryServicesAPIHelper:
 
         self.__http_session = sessions.Session()
 
-        windows_auth_url = self.__get_windows_authentication_url(
-            self.__http_session)
-        qps_session_cookie = authenticator.Authenticator \
-            .get_qps_session_cookie_windows_auth(
-                ad_domain=self.__ad_domain,
-                username=self.__username,
-                password=self.__password,
-                auth_url=windows_auth_url)
-
-        self.__http_session.cookies.set_cookie(qps_session_cookie)
-        logging.debug('QPS session cookie issued for the QRS API: %s',
-                      qps_session_cookie)
-
-    def __get_windows_authentication_url(self, session):
-        """Get a Windows Authentication url.
-
-        This method sends an unauthenticated request to a well known endpoint
-        of the Qlik Sense Repository Service API. The expected response has a
-        302 status code and a `Location` header, which is the Windows
-        Authentication url.
-
-        Returns:
-            A string.
-        """
-        url = f'{self.__base_api_endpoint}/about?Xrfkey={constants.XRFKEY}'
-
-        # Sets the User-Agent to Windows temporarily to get a Windows
-        # Authentication URL that is required by the NTLM authentication flow.
-        headers = self.__common_headers.copy()
-        headers['User-Agent'] = constants.WINDOWS_USER_AGENT
-
-        response = requests.get(url=url,
-                                headers=headers,
-                                allow_redirects=False)
-
-        return session.get_redirect_target(response)
+        self.__session_cookie = \
+            self.__credentials_manager.get_session_cookie()
+        if self.__session_cookie:
+            self.__http_session.cookies.set_cookie(self.__session_cookie)
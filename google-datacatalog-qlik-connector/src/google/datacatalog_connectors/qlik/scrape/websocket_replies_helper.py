@@ -15,24 +15,35 @@
 # limitations under the License.
 
 import asyncio
+import time
 
 
 class WebsocketRepliesHelper:
     """Utility class with common features for replies handling over websocket
     communication sessions.
 
+    Sessions may exchange tens of thousands of messages, so all the
+    bookkeeping operations run in constant time.
+
     Attributes:
         __messages_history:
             A ``dict`` containing a full history of the messages known by a
             given ``WebsocketRepliesHelper`` instance, represented as
             ``message-id: method`` items. It is automatically fulfilled when
             pending ids are added to ``__pending_ids``.
+        __result_keys:
+            A ``dict`` containing the keys used to group the results of the
+            messages, represented as ``message-id: result-key`` items. It
+            allows a single communication session to gather results of
+            different kinds, e.g. Dimensions and Measures, even when they are
+            retrieved through the same method.
         __pending_ids:
-            A ``list`` containing the ids of the pending replies, which means
+            A ``set`` containing the ids of the pending replies, which means
             the messages identified by them were sent but not answered yet.
         __unhandled_replies:
-            A ``list`` containing all reply objects that were received but not
-            handled yet.
+            A ``dict`` containing all reply objects that were received but not
+            handled yet, represented as ``message-id: reply`` items. Its
+            insertion order is the order in which the replies were received.
         __new_reply_event:
             A signal used by the receiver to notify the sender on the arrival
             of new replies, so the sender can take actions such as sending
@@ -40,25 +51,56 @@ class WebsocketRepliesHelper:
         __interface_handles:
             A ``dict`` containing the keys and values of the interface handles
             required by a given communication session.
+        __session_metrics:
+            An optional ``EngineSessionMetrics`` that tracks the round trips
+            of the communication session.
+        __last_activity_time:
+            The ``time.monotonic`` value of the latest reply, or of the helper
+            creation if no reply was received yet. It allows the session to be
+            timed out only when the engine stops answering, instead of when a
+            big App takes long to be fully scraped.
     """
 
     def __init__(self):
         self.__messages_history = {}
-        self.__pending_ids = []
-        self.__unhandled_replies = []
+        self.__result_keys = {}
+        self.__pending_ids = set()
+        self.__unhandled_replies = {}
         self.__new_reply_event = asyncio.Event()
         self.__interface_handles = {}
+        self.__session_metrics = None
+        self.__last_activity_time = time.monotonic()
 
-    def add_pending_id(self, message_id, method):
-        self.__pending_ids.append(message_id)
+    def add_pending_id(self, message_id, method, result_key=None):
+        self.__pending_ids.add(message_id)
         self.__messages_history[message_id] = method
+        if result_key:
+            self.__result_keys[message_id] = result_key
+        if self.__session_metrics:
+            self.__session_metrics.message_sent(message_id, method)
 
-    def add_pending_ids(self, message_ids, method):
+    def add_pending_ids(self, message_ids, method, result_key=None):
         for response_id in message_ids:
-            self.add_pending_id(response_id, method)
+            self.add_pending_id(response_id, method, result_key)
 
     def remove_pending_id(self, message_id):
-        self.__pending_ids.remove(message_id)
+        self.__pending_ids.discard(message_id)
+
+    def record_reply(self, message_id, reply_bytes, error=False):
+        self.__last_activity_time = time.monotonic()
+        if self.__session_metrics:
+            self.__session_metrics.reply_received(message_id, reply_bytes,
+                                                  error)
+
+    def record_timeout(self):
+        if self.__session_metrics:
+            self.__session_metrics.timed_out()
+
+    def get_last_activity_time(self):
+        return self.__last_activity_time
+
+    def set_session_metrics(self, session_metrics):
+        self.__session_metrics = session_metrics
 
     def is_pending(self, message_id, method):
         return message_id in self.__pending_ids and self.is_method(
@@ -67,14 +109,26 @@ class WebsocketRepliesHelper:
     def is_method(self, message_id, method):
         return method == self.__messages_history.get(message_id)
 
+    def get_method(self, message_id):
+        return self.__messages_history.get(message_id)
+
+    def get_result_key(self, message_id):
+        return self.__result_keys.get(message_id)
+
     def add_unhandled(self, reply):
-        self.__unhandled_replies.append(reply)
+        self.__unhandled_replies[reply.get('id')] = reply
 
     def remove_unhandled(self, reply):
-        self.__unhandled_replies.remove(reply)
+        self.__unhandled_replies.pop(reply.get('id'), None)
 
     def get_all_unhandled(self):
-        return self.__unhandled_replies
+        """Gets the replies that were received but not handled yet.
+
+        Returns:
+            A snapshot ``list``, which means replies can be removed while the
+            returned list is being iterated.
+        """
+        return list(self.__unhandled_replies.values())
 
     def were_all_processed(self):
         return not self.__pending_ids and not self.__unhandled_replies
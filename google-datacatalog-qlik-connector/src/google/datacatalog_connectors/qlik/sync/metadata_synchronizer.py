@@ -14,29 +14,96 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
+import functools
 import logging
 import re
 
+from google.cloud import datacatalog
 from google.datacatalog_connectors.commons import cleanup, ingest
+from google.datacatalog_connectors.commons import \
+    prepare as commons_prepare
 
 from google.datacatalog_connectors.qlik import prepare, scrape
 from google.datacatalog_connectors.qlik.prepare import constants
+from google.datacatalog_connectors.qlik.sync import \
+    metrics_sinks, shard_manifests, state_store, sync_pipeline, \
+    tag_template_registry
 
 
 class MetadataSynchronizer:
     __ENTRY_GROUP_ID = 'qlik'
     __SPECIFIED_SYSTEM = 'qlik'
     __TAG_TEMPLATE_NAME_PATTERN = r'^(.+?)/tagTemplates/(?P<id>.+?)$'
-
-    def __init__(self, qlik_server_address, qlik_ad_domain, qlik_username,
-                 qlik_password, datacatalog_project_id,
-                 datacatalog_location_id):
+    # How many scraped Streams may wait to be prepared, and prepared Streams
+    # to be ingested, in pipelined mode.
+    __PIPELINE_QUEUE_SIZE = 2
+
+    def __init__(self,
+                 qlik_server_address,
+                 qlik_ad_domain,
+                 qlik_username,
+                 qlik_password,
+                 datacatalog_project_id,
+                 datacatalog_location_id,
+                 qlik_max_sessions=scrape.MetadataScraper.DEFAULT_MAX_SESSIONS,
+                 state_file=None,
+                 qlik_cookie_cache_file=None,
+                 pipelined=False,
+                 metrics_file=None,
+                 prometheus_textfile=None,
+                 shard_index=0,
+                 shard_count=1,
+                 shard_manifest_dir=None,
+                 shard_coordinator=False,
+                 tag_template_cache_file=None,
+                 prepare_workers=None):
 
         self.__project_id = datacatalog_project_id
         self.__location_id = datacatalog_location_id
+        self.__pipelined = pipelined
+
+        # Sharding is optional: when set, each process synchronizes a subset
+        # of the Streams and writes a manifest, and a coordinator process
+        # handles the steps that require the whole set of entries.
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f'Invalid shard index {shard_index} for'
+                             f' {shard_count} shards.')
+        if (shard_count > 1 or shard_coordinator) and not shard_manifest_dir:
+            raise ValueError('A shard manifest directory is required to run'
+                             ' sharded synchronizations.')
+        self.__shard_index = shard_index
+        self.__shard_count = shard_count
+        self.__shard_coordinator = shard_coordinator
+        self.__shard_manifests = shard_manifests.ShardManifests(
+            shard_manifest_dir, shard_count) if shard_manifest_dir else None
+
+        # The state store is optional: when not set, all the Apps are scraped
+        # on each run.
+        self.__state_store = state_store.StateStore(
+            state_file) if state_file else None
+
+        # The API metrics are always recorded and summarized at the end of
+        # each run; the sinks are optional.
+        self.__api_metrics = scrape.APIMetrics()
+        self.__metrics_sinks = []
+        if metrics_file:
+            self.__metrics_sinks.append(
+                metrics_sinks.JSONFileMetricsSink(metrics_file))
+        if prometheus_textfile:
+            self.__metrics_sinks.append(
+                metrics_sinks.PrometheusTextfileMetricsSink(
+                    prometheus_textfile))
+
+        # Each Tag Template is ingested at most once per run. The cache file
+        # is optional: when set, the unchanged ones are not ingested again
+        # across runs.
+        self.__tag_template_registry = \
+            tag_template_registry.TagTemplateRegistry(tag_template_cache_file)
 
         self.__metadata_scraper = scrape.MetadataScraper(
-            qlik_server_address, qlik_ad_domain, qlik_username, qlik_password)
+            qlik_server_address, qlik_ad_domain, qlik_username, qlik_password,
+            qlik_max_sessions, qlik_cookie_cache_file, self.__api_metrics)
 
         self.__tag_template_factory = prepare.DataCatalogTagTemplateFactory(
             project_id=datacatalog_project_id,
@@ -51,21 +118,45 @@ class MetadataSynchronizer:
             user_specified_system=self.__SPECIFIED_SYSTEM,
             site_url=self.__site_url)
 
+        # The process pool is optional: when not set, the Streams are
+        # prepared one after the other in the current process.
+        self.__prepare_workers = prepare_workers
+
     def run(self):
         """Coordinates a full scrape > prepare > ingest process."""
-
+        try:
+            if self.__shard_coordinator:
+                self.__run_coordinator()
+            elif self.__pipelined:
+                self.__run_pipelined()
+            else:
+                self.__run_sequential()
+            self.__tag_template_registry.save()
+        finally:
+            # The metrics are also reported on failures, when they are most
+            # helpful to find out what went wrong.
+            self.__report_api_metrics()
+
+    def __run_sequential(self):
+        """Coordinates a scrape > prepare > ingest process in which each stage
+        handles all the metadata before the next one starts.
+        """
         # Scrape metadata from the Qlik server.
         logging.info('')
         logging.info('===> Scraping Qlik Sense metadata...')
 
-        logging.info('')
-        logging.info('Objects to be scraped: Custom Property Definitions')
-        custom_property_defs = self.__scrape_custom_property_definitions()
+        try:
+            logging.info('')
+            logging.info('Objects to be scraped: Custom Property Definitions')
+            custom_property_defs = \
+                self.__scrape_custom_property_definitions()
 
-        logging.info('')
-        logging.info('Objects to be scraped:'
-                     ' Streams, Apps, Dimensions, Measures, and Sheets')
-        streams = self.__scrape_streams()
+            logging.info('')
+            logging.info('Objects to be scraped:'
+                         ' Streams, Apps, Dimensions, Measures, and Sheets')
+            streams = self.__scrape_streams()
+        finally:
+            self.__metadata_scraper.close()
         logging.info('==== DONE ========================================')
 
         # Prepare: convert Qlik metadata into Data Catalog entities model.
@@ -78,29 +169,296 @@ class MetadataSynchronizer:
 
         assembled_entries_dict = self.__make_assembled_entries_dict(
             custom_property_defs, streams, tag_templates_dict)
+        # The flat list is shared by the steps that handle all the entries at
+        # once.
+        all_assembled_entries = self.__flatten_assembled_entries_dict(
+            assembled_entries_dict)
         logging.info('==== DONE ========================================')
 
         # Data Catalog entry relationships mapping.
         logging.info('')
         logging.info('===> Mapping Data Catalog entry relationships...')
 
-        self.__map_datacatalog_relationships(assembled_entries_dict)
+        self.__map_datacatalog_relationships(all_assembled_entries)
+        logging.info('==== DONE ========================================')
+
+        # Data Catalog clean up: delete obsolete data. Shards leave it to the
+        # coordinator, which knows the entries of all the shards.
+        if not self.__is_shard():
+            logging.info('')
+            logging.info('===> Deleting Data Catalog obsolete metadata...')
+
+            self.__delete_obsolete_entries(all_assembled_entries)
+            logging.info('==== DONE ========================================')
+
+        # Ingest metadata into Data Catalog.
+        logging.info('')
+        logging.info('===> Synchronizing Qlik :: Data Catalog metadata...')
+
+        self.__ingest_metadata(assembled_entries_dict, tag_templates_dict)
         logging.info('==== DONE ========================================')
 
+        if self.__is_shard():
+            self.__write_shard_manifest(streams, all_assembled_entries)
+
+    def __run_pipelined(self):
+        """Coordinates a scrape > prepare > ingest process in which each
+        Stream is prepared and ingested as soon as it is scraped.
+
+        Scraping the Apps of a Stream overlaps with preparing and ingesting
+        the previous ones, and the raw metadata of a Stream are released once
+        it is prepared. Obsolete entries are deleted after all the Streams
+        are ingested, as this step requires the whole set of entries.
+        """
+        metadata_ingestor = ingest.DataCatalogMetadataIngestor(
+            self.__project_id, self.__location_id, self.__ENTRY_GROUP_ID)
+
+        logging.info('')
+        logging.info('===> Synchronizing Qlik :: Data Catalog metadata'
+                     ' in pipelined mode...')
+
+        try:
+            logging.info('')
+            logging.info('Objects to be scraped: Custom Property Definitions')
+            custom_property_defs = \
+                self.__scrape_custom_property_definitions()
+
+            tag_templates_dict = self.__make_tag_templates_dict(
+                custom_property_defs)
+            custom_property_defs_assembled_entries_dict = \
+                self.__make_assembled_entries_dict(
+                    custom_property_defs, [], tag_templates_dict)
+            custom_property_defs_assembled_entries = \
+                self.__flatten_assembled_entries_dict(
+                    custom_property_defs_assembled_entries_dict)
+            # Shards leave the Custom Property Definitions to the
+            # coordinator.
+            synced_entries_count = 0 if self.__is_shard() else \
+                self.__ingest_custom_property_defs_metadata(
+                    custom_property_defs_assembled_entries_dict,
+                    tag_templates_dict, metadata_ingestor)
+
+            with contextlib.ExitStack() as stack:
+                # The worker processes are started before the pipeline
+                # threads, so they are not forked while those are running.
+                prepare_pool = self.__make_prepare_pool(tag_templates_dict)
+                queue_size = self.__PIPELINE_QUEUE_SIZE
+                if prepare_pool:
+                    stack.enter_context(prepare_pool)
+                    # Streams are submitted to the pool by a stage and
+                    # collected by the next one, so the Streams queued in
+                    # between are prepared at the same time.
+                    prepare_stages = (
+                        functools.partial(self.__submit_stream_metadata,
+                                          prepare_pool),
+                        functools.partial(
+                            self.__collect_stream_metadata,
+                            custom_property_defs_assembled_entries,
+                            prepare_pool),
+                    )
+                    queue_size = max(queue_size, self.__prepare_workers)
+                else:
+                    prepare_stages = (functools.partial(
+                        self.__prepare_stream_metadata,
+                        custom_property_defs_assembled_entries,
+                        tag_templates_dict),)
+                stages = prepare_stages + (functools.partial(
+                    self.__ingest_stream_metadata, tag_templates_dict,
+                    metadata_ingestor),)
+                pipeline = stack.enter_context(
+                    sync_pipeline.SyncPipeline(stages, queue_size))
+                logging.info('')
+                logging.info('Objects to be scraped:'
+                             ' Streams, Apps, Dimensions, Measures, and'
+                             ' Sheets')
+                all_streams, _ = self.__scrape_streams_and_apps()
+                for stream in all_streams:
+                    self.__scrape_apps_objects(stream.get('apps') or [])
+                    pipeline.put(stream)
+                self.__save_state()
+        finally:
+            self.__metadata_scraper.close()
+
+        all_assembled_entries = list(custom_property_defs_assembled_entries)
+        for _, assembled_entries in pipeline.results:
+            all_assembled_entries.extend(assembled_entries)
+            synced_entries_count += len(assembled_entries)
+
+        logging.info('')
+        logging.info('==== %d entries successfully synchronized!',
+                     synced_entries_count)
+        logging.info('==== DONE ========================================')
+
+        if self.__is_shard():
+            self.__write_shard_manifest(all_streams, all_assembled_entries)
+            return
+
         # Data Catalog clean up: delete obsolete data.
         logging.info('')
         logging.info('===> Deleting Data Catalog obsolete metadata...')
 
-        self.__delete_obsolete_entries(assembled_entries_dict)
+        self.__delete_obsolete_entries(all_assembled_entries)
         logging.info('==== DONE ========================================')
 
-        # Ingest metadata into Data Catalog.
+    def __run_coordinator(self):
+        """Coordinates the steps of a sharded synchronization that are run
+        only once, after all the shards are done: ingesting the Tag Templates
+        and Custom Property Definitions, and deleting obsolete metadata based
+        on the entries listed by the shard manifests.
+
+        The relationships of the Streams and their nested assets only refer
+        to each other and to Custom Property Definitions, so they were mapped
+        by the shards.
+        """
         logging.info('')
-        logging.info('===> Synchronizing Qlik :: Data Catalog metadata...')
+        logging.info('===> Coordinating a sharded Qlik :: Data Catalog'
+                     ' synchronization...')
 
-        self.__ingest_metadata(assembled_entries_dict, tag_templates_dict)
+        try:
+            logging.info('')
+            logging.info('Objects to be scraped: Custom Property Definitions')
+            custom_property_defs = \
+                self.__scrape_custom_property_definitions()
+        finally:
+            self.__metadata_scraper.close()
+
+        # Nothing is changed unless all the shards are done.
+        shard_entry_names = self.__shard_manifests.read_entry_names(
+            self.__site_url)
+
+        tag_templates_dict = self.__make_tag_templates_dict(
+            custom_property_defs)
+        custom_property_defs_assembled_entries = \
+            self.__flatten_assembled_entries_dict(
+                self.__make_assembled_entries_dict(custom_property_defs, [],
+                                                   tag_templates_dict))
+        self.__map_datacatalog_relationships(
+            custom_property_defs_assembled_entries)
+
+        logging.info('')
+        logging.info(
+            '==== %d Tag Templates and %d Custom Property Definition entries'
+            ' to be ingested...', len(tag_templates_dict),
+            len(custom_property_defs_assembled_entries))
+        # All the Tag Templates are ingested at once, instead of only the
+        # required ones, as the coordinator runs once for all the shards.
+        self.__ingest_assembled_entries(
+            custom_property_defs_assembled_entries, tag_templates_dict,
+            ingest.DataCatalogMetadataIngestor(self.__project_id,
+                                               self.__location_id,
+                                               self.__ENTRY_GROUP_ID))
+        logging.info('==== DONE ========================================')
+
+        # Data Catalog clean up: delete obsolete data.
+        logging.info('')
+        logging.info('===> Deleting Data Catalog obsolete metadata...')
+
+        self.__delete_obsolete_entries(
+            custom_property_defs_assembled_entries +
+            self.__make_assembled_entries_from_names(shard_entry_names))
+        self.__shard_manifests.clear()
+        logging.info('==== DONE ========================================')
+
+    def __is_shard(self):
+        return self.__shard_count > 1 and not self.__shard_coordinator
+
+    def __is_in_shard(self, stream_id):
+        return self.__shard_index == shard_manifests.ShardManifests\
+            .get_shard_index(stream_id, self.__shard_count)
+
+    def __write_shard_manifest(self, streams, all_assembled_entries):
+        stream_ids = [stream.get('id') for stream in streams]
+        entry_names = [
+            assembled_entry.entry.name
+            for assembled_entry in all_assembled_entries
+        ]
+        self.__shard_manifests.write(self.__shard_index, self.__site_url,
+                                     stream_ids, entry_names)
+
+    @classmethod
+    def __make_assembled_entries_from_names(cls, entry_names):
+        # Only the names are required to find out the obsolete entries.
+        assembled_entries = []
+        for entry_name in sorted(entry_names):
+            entry = datacatalog.Entry()
+            entry.name = entry_name
+            assembled_entries.append(
+                commons_prepare.AssembledEntryData(
+                    entry_name.split('/')[-1], entry))
+
+        return assembled_entries
+
+    def __report_api_metrics(self):
+        logging.info('')
+        logging.info('===> Qlik API metrics...')
+
+        self.__api_metrics.log_summary()
+        series = self.__api_metrics.get_series()
+        for sink in self.__metrics_sinks:
+            try:
+                sink.write(series)
+            except OSError:
+                logging.warning('Failed to write the Qlik API metrics.',
+                                exc_info=True)
         logging.info('==== DONE ========================================')
 
+    def __prepare_stream_metadata(self, custom_property_defs_assembled_entries,
+                                  tag_templates_dict, stream_metadata):
+        """Makes Data Catalog entries and tags for a Stream and its nested
+        assets, in pipelined mode.
+
+        :return: A ``tuple`` with the Stream id and its assembled entries.
+        """
+        assembled_entries = self.__assembled_entry_factory\
+            .make_assembled_entries_for_stream(
+                stream_metadata, tag_templates_dict)
+        return self.__finish_stream_preparation(
+            custom_property_defs_assembled_entries, stream_metadata,
+            assembled_entries)
+
+    @classmethod
+    def __submit_stream_metadata(cls, prepare_pool, stream_metadata):
+        """Sends a Stream to a worker of the prepare pool, in pipelined mode,
+        without waiting for its entries and tags, which keeps the CPU-bound
+        work away from the scrape and ingest stages.
+
+        :return: A ``tuple`` with the Stream metadata and the pending result.
+        """
+        return stream_metadata, \
+            prepare_pool.submit_assembled_entries_for_stream(stream_metadata)
+
+    def __collect_stream_metadata(self, custom_property_defs_assembled_entries,
+                                  prepare_pool, submitted_stream):
+        """Waits for the Data Catalog entries and tags of a Stream submitted
+        to the prepare pool, in pipelined mode.
+
+        :return: A ``tuple`` with the Stream id and its assembled entries.
+        """
+        stream_metadata, async_result = submitted_stream
+        return self.__finish_stream_preparation(
+            custom_property_defs_assembled_entries, stream_metadata,
+            prepare_pool.get_assembled_entries(async_result))
+
+    def __finish_stream_preparation(self,
+                                    custom_property_defs_assembled_entries,
+                                    stream_metadata, assembled_entries):
+        """Maps the relationships of a Stream assembled entries.
+
+        The nested assets only refer to each other, to their Stream, and to
+        Custom Property Definitions, so the relationships can be mapped for
+        each Stream separately.
+
+        :return: A ``tuple`` with the Stream id and its assembled entries.
+        """
+        self.__map_datacatalog_relationships(
+            custom_property_defs_assembled_entries + assembled_entries)
+
+        # The raw metadata, which include the Engine API payloads, are no
+        # longer needed.
+        stream_metadata.pop('apps', None)
+
+        return stream_metadata.get('id'), assembled_entries
+
     def __scrape_custom_property_definitions(self):
         """Scrapes metadata from all the Custom Property Definitions the
         current user has access to.
@@ -118,103 +476,152 @@ class MetadataSynchronizer:
 
         :return: A ``list`` of Stream metadata.
         """
-        all_streams = self.__metadata_scraper.scrape_all_streams()
-        all_apps = self.__metadata_scraper.scrape_all_apps()
-
-        # Not being published means the app is a work in progress, so it can be
-        # skipped.
-        published_apps = [app for app in all_apps if app.get('published')]
-
-        for app in published_apps:
-            # The below fields are not available in the scrape apps API
-            # response, so they are injected into the returned metadata object
-            # to turn further processing more efficient.
-            app['dimensions'] = self.__scrape_dimensions(app)
-            app['measures'] = self.__scrape_measures(app)
-            app['visualizations'] = self.__scrape_visualizations(app)
-            app['sheets'] = self.__scrape_published_sheets(app)
-
-        self.__assemble_streams_metadata_from_flat_lists(
-            all_streams, published_apps)
+        all_streams, published_apps = self.__scrape_streams_and_apps()
+        self.__scrape_apps_objects(published_apps)
+        self.__save_state()
 
         return all_streams
 
-    def __scrape_dimensions(self, app):
-        """Scrapes metadata from the Dimensions the current user has access to
-        within the given App.
+    def __scrape_streams_and_apps(self):
+        """Scrapes metadata from all the Streams and published Apps the
+        current user has access to, leaving the App objects such as Sheets
+        out.
 
-        :return: A ``list`` of dimension metadata.
+        :return: A ``tuple`` with the ``list`` of Stream metadata, in which
+            the Apps are nested, and the flat ``list`` of App metadata.
         """
-        dimensions = self.__metadata_scraper.scrape_dimensions(app)
-        # The 'app' field is not available in the scrape dimensions API
-        # response, so it is injected into the returned metadata object to turn
-        # further processing more efficient.
-        for dimension in dimensions:
-            dimension['app'] = {
-                'id': app.get('id'),
-                'name': app.get('name'),
-            }
-
-        return dimensions
+        all_streams = self.__metadata_scraper.scrape_all_streams()
+        # Not being published means the app is a work in progress, so it can be
+        # skipped. The filter is applied by the server to save bandwidth.
+        published_apps = self.__metadata_scraper.scrape_all_apps(
+            published_only=True)
 
-    def __scrape_measures(self, app):
-        """Scrapes metadata from the Measures the current user has access to
-        within the given App.
+        self.__assemble_streams_metadata_from_flat_lists(
+            all_streams, published_apps)
 
-        :return: A ``list`` of measure metadata.
+        if self.__is_shard():
+            # Whole Streams are assigned to the shards, so the relationships
+            # of their nested assets can be mapped by a single shard.
+            all_streams = [
+                stream for stream in all_streams
+                if self.__is_in_shard(stream.get('id'))
+            ]
+            published_apps = [
+                app for app in published_apps
+                if self.__is_in_shard(app.get('stream').get('id'))
+            ]
+            logging.info('%d Streams and %d Apps assigned to shard %d of %d.',
+                         len(all_streams), len(published_apps),
+                         self.__shard_index, self.__shard_count)
+
+        return all_streams, published_apps
+
+    def __scrape_apps_objects(self, apps):
+        """Scrapes metadata from the Dimensions, Measures, Visualizations, and
+        published Sheets the current user has access to within the given Apps.
+
+        The objects of each App are scraped at once, in a single Engine API
+        session, and several Apps are scraped concurrently. They are injected
+        into the given App metadata objects.
+
+        When a state store is available, the Apps that did not change since
+        the last run reuse the stored objects instead of being scraped.
         """
-        measures = self.__metadata_scraper.scrape_measures(app)
-        # The 'app' field is not available in the scrape measures API
-        # response, so it is injected into the returned metadata object to turn
-        # further processing more efficient.
-        for measure in measures:
-            measure['app'] = {
-                'id': app.get('id'),
-                'name': app.get('name'),
-            }
-
-        return measures
-
-    def __scrape_visualizations(self, app):
-        """Scrapes metadata from the Visualizations the current user has access
-        to within the given App.
+        apps_objects = {}
+        apps_to_scrape = []
+        for app in apps:
+            stored_app_objects = self.__get_stored_app_objects(app)
+            if stored_app_objects is None:
+                apps_to_scrape.append(app)
+            else:
+                apps_objects[app.get('id')] = stored_app_objects
+
+        if self.__state_store:
+            logging.info(
+                '%d of %d Apps did not change since the last run:'
+                ' their stored objects will be reused.', len(apps_objects),
+                len(apps))
+
+        if apps_to_scrape:
+            scraped_apps_objects = \
+                self.__metadata_scraper.scrape_apps_objects(apps_to_scrape)
+            self.__store_apps_objects(apps_to_scrape, scraped_apps_objects)
+            apps_objects.update(scraped_apps_objects)
+
+        for app in apps:
+            self.__add_app_objects(app, apps_objects.get(app.get('id')))
+
+    def __save_state(self):
+        if self.__state_store:
+            self.__state_store.save()
+
+    def __get_stored_app_objects(self, app):
+        if not self.__state_store:
+            return None
+
+        return self.__state_store.get_app_objects(
+            app.get('id'), self.__make_app_fingerprint(app))
+
+    def __store_apps_objects(self, apps, apps_objects):
+        if not self.__state_store:
+            return
+
+        for app in apps:
+            app_objects = apps_objects.get(app.get('id'))
+            # Partial payloads, left by Engine API sessions that stalled until
+            # the attempts or the App deadline ran out, are not stored, so
+            # such Apps are scraped again next time. Empty ones are not stored
+            # either, to be on the safe side.
+            if not app_objects or app_objects.get('incomplete') \
+                    or not any(app_objects.values()):
+                continue
+            self.__state_store.set_app_objects(
+                app.get('id'), self.__make_app_fingerprint(app), app_objects)
 
-        :return: A ``list`` of visualization metadata.
-        """
-        visualizations = self.__metadata_scraper.scrape_visualizations(app)
-        # The 'app' field is not available in the scrape visualizations API
-        # response, so it is injected into the returned metadata object to turn
+    @classmethod
+    def __make_app_fingerprint(cls, app):
+        # Any change to the App objects updates the modification date. Reloads
+        # and publications are also taken into account, to be on the safe
+        # side.
+        return '|'.join([
+            str(app.get('modifiedDate')),
+            str(app.get('lastReloadTime')),
+            str(app.get('publishTime')),
+        ])
+
+    def __add_app_objects(self, app, app_objects):
+        # The below fields are not available in the scrape apps API response,
+        # so they are injected into the returned metadata object to turn
         # further processing more efficient.
-        for visualization in visualizations:
-            visualization['app'] = {
-                'id': app.get('id'),
-                'name': app.get('name'),
-            }
-
-        return visualizations
+        app['dimensions'] = self.__add_app_info(app_objects.get('dimensions'),
+                                                app)
+        app['measures'] = self.__add_app_info(app_objects.get('measures'), app)
+        app['visualizations'] = self.__add_app_info(
+            app_objects.get('visualizations'), app)
+        app['sheets'] = self.__add_app_info(
+            self.__filter_published_sheets(app_objects.get('sheets')), app)
 
-    def __scrape_published_sheets(self, app):
-        """Scrapes metadata from all the published Sheets the current user has
-        access to within the given App.
-
-        :return: A ``list`` of sheet metadata.
-        """
-        sheets = self.__metadata_scraper.scrape_sheets(app)
+    @classmethod
+    def __filter_published_sheets(cls, sheets):
         # Not being published means the sheet is a work in progress, so it can
-        # be skipped.
-        published_sheets = [
+        # be skipped. The Engine API helpers already drop such Sheets, but App
+        # objects loaded from a state file may have been stored before.
+        return [
             sheet for sheet in sheets if sheet.get('qMeta').get('published')
         ]
-        # The 'app' field is not available in the scrape sheets API response,
-        # so it is injected into the returned metadata object to turn further
+
+    @classmethod
+    def __add_app_info(cls, app_objects, app):
+        # The 'app' field is not available in the Engine API responses, so it
+        # is injected into the returned metadata objects to turn further
         # processing more efficient.
-        for sheet in published_sheets:
-            sheet['app'] = {
+        for app_object in app_objects:
+            app_object['app'] = {
                 'id': app.get('id'),
                 'name': app.get('name'),
             }
 
-        return published_sheets
+        return app_objects
 
     @classmethod
     def __assemble_streams_metadata_from_flat_lists(cls, all_streams,
@@ -301,6 +708,21 @@ class MetadataSynchronizer:
                     .make_assembled_entry_for_custom_property_def(
                         property_def_metadata, property_def_tag_template)]
 
+        if not streams_metadata:
+            return assembled_entries
+
+        prepare_pool = self.__make_prepare_pool(tag_templates_dict)
+        if prepare_pool:
+            with prepare_pool:
+                # The results keep the order of the Streams.
+                streams_assembled_entries = prepare_pool\
+                    .make_assembled_entries_for_streams(streams_metadata)
+                for stream_metadata, stream_assembled_entries in zip(
+                        streams_metadata, streams_assembled_entries):
+                    assembled_entries[stream_metadata.get('id')] = \
+                        stream_assembled_entries
+            return assembled_entries
+
         for stream_metadata in streams_metadata:
             assembled_entries[stream_metadata.get('id')] = \
                 self.__assembled_entry_factory\
@@ -309,20 +731,33 @@ class MetadataSynchronizer:
 
         return assembled_entries
 
+    def __make_prepare_pool(self, tag_templates_dict):
+        if not self.__prepare_workers:
+            return None
+
+        return prepare.AssembledEntryProcessPool(
+            workers=self.__prepare_workers,
+            tag_templates_dict=tag_templates_dict,
+            project_id=self.__project_id,
+            location_id=self.__location_id,
+            entry_group_id=self.__ENTRY_GROUP_ID,
+            user_specified_system=self.__SPECIFIED_SYSTEM,
+            site_url=self.__site_url)
+
     @classmethod
-    def __map_datacatalog_relationships(cls, assembled_entries_dict):
+    def __flatten_assembled_entries_dict(cls, assembled_entries_dict):
         all_assembled_entries = []
         for assembled_entries_data in assembled_entries_dict.values():
             all_assembled_entries.extend(assembled_entries_data)
 
+        return all_assembled_entries
+
+    @classmethod
+    def __map_datacatalog_relationships(cls, all_assembled_entries):
         prepare.EntryRelationshipMapper().fulfill_tag_fields(
             all_assembled_entries)
 
-    def __delete_obsolete_entries(self, new_assembled_entries_dict):
-        all_assembled_entries = []
-        for assembled_entry_data in new_assembled_entries_dict.values():
-            all_assembled_entries.extend(assembled_entry_data)
-
+    def __delete_obsolete_entries(self, all_assembled_entries):
         cleanup.DataCatalogMetadataCleaner(
             self.__project_id, self.__location_id, self.__ENTRY_GROUP_ID). \
             delete_obsolete_metadata(
@@ -338,8 +773,10 @@ class MetadataSynchronizer:
             len(entries) for entries in assembled_entries_dict.values())
         logging.info('==== %d entries to be synchronized!', entries_count)
 
-        synced_entries_count = self.__ingest_custom_property_defs_metadata(
-            assembled_entries_dict, tag_templates_dict, metadata_ingestor)
+        # Shards leave the Custom Property Definitions to the coordinator.
+        synced_entries_count = 0 if self.__is_shard() else \
+            self.__ingest_custom_property_defs_metadata(
+                assembled_entries_dict, tag_templates_dict, metadata_ingestor)
         synced_entries_count += self.__ingest_streams_metadata(
             assembled_entries_dict, tag_templates_dict, metadata_ingestor)
 
@@ -371,8 +808,9 @@ class MetadataSynchronizer:
 
         required_templates_dict = self.__filter_required_tag_templates(
             custom_property_defs_assembled_entries, tag_templates_dict)
-        metadata_ingestor.ingest_metadata(
-            custom_property_defs_assembled_entries, required_templates_dict)
+        self.__ingest_assembled_entries(custom_property_defs_assembled_entries,
+                                        required_templates_dict,
+                                        metadata_ingestor)
 
         return custom_property_defs_entries_count
 
@@ -386,21 +824,44 @@ class MetadataSynchronizer:
                 stream_entries_dict[stream_id] = assembled_entries
 
         synced_entries_count = 0
-        for stream_id, assembled_entries in stream_entries_dict.items():
-            asset_entries_count = len(assembled_entries)
+        for stream_entries in stream_entries_dict.items():
+            _, assembled_entries = self.__ingest_stream_metadata(
+                tag_templates_dict, metadata_ingestor, stream_entries)
+            synced_entries_count += len(assembled_entries)
 
-            logging.info('')
-            logging.info(
-                '==== The Stream identified by "%s" and its nested assets'
-                ' comprise %d entries.', stream_id, asset_entries_count)
+        return synced_entries_count
 
-            required_templates_dict = self.__filter_required_tag_templates(
-                assembled_entries, tag_templates_dict)
-            metadata_ingestor.ingest_metadata(assembled_entries,
-                                              required_templates_dict)
-            synced_entries_count += asset_entries_count
+    def __ingest_stream_metadata(self, tag_templates_dict, metadata_ingestor,
+                                 stream_entries):
+        """Ingests the entries of a Stream and its nested assets.
 
-        return synced_entries_count
+        :return: The given ``tuple`` of Stream id and assembled entries.
+        """
+        stream_id, assembled_entries = stream_entries
+
+        logging.info('')
+        logging.info(
+            '==== The Stream identified by "%s" and its nested assets'
+            ' comprise %d entries.', stream_id, len(assembled_entries))
+
+        required_templates_dict = self.__filter_required_tag_templates(
+            assembled_entries, tag_templates_dict)
+        self.__ingest_assembled_entries(assembled_entries,
+                                        required_templates_dict,
+                                        metadata_ingestor)
+
+        return stream_entries
+
+    def __ingest_assembled_entries(self, assembled_entries, tag_templates_dict,
+                                   metadata_ingestor):
+        """Ingests the given Entries and their Tags, along with the given
+        Tag Templates that were not ensured to exist yet.
+        """
+        templates_to_ingest = self.__tag_template_registry\
+            .filter_templates_to_ingest(tag_templates_dict)
+        metadata_ingestor.ingest_metadata(assembled_entries,
+                                          templates_to_ingest)
+        self.__tag_template_registry.mark_ingested(templates_to_ingest)
 
     def __filter_required_tag_templates(self, assembled_entries,
                                         tag_templates_dict):
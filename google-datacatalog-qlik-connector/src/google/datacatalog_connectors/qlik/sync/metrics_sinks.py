@@ -0,0 +1,120 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import abc
+import json
+import os
+
+
+class MetricsSink(abc.ABC):
+    """The base class for the destinations of the API metrics recorded
+    during a synchronization run.
+    """
+
+    @abc.abstractmethod
+    def write(self, series):
+        """Writes the metrics.
+
+        Args:
+            series: The ``list`` returned by ``APIMetrics.get_series``.
+        """
+        pass
+
+    @classmethod
+    def _replace_file(cls, file_path, content):
+        temp_file_path = f'{file_path}.tmp'
+        with open(temp_file_path, 'w') as metrics_file:
+            metrics_file.write(content)
+        # Replacing the file in a single step prevents readers, such as the
+        # Prometheus node exporter, from seeing partially written files.
+        os.replace(temp_file_path, file_path)
+
+
+class JSONFileMetricsSink(MetricsSink):
+    """Writes the metrics to a JSON file, as a list of series."""
+
+    def __init__(self, file_path):
+        self.__file_path = file_path
+
+    def write(self, series):
+        self._replace_file(self.__file_path, json.dumps({'series': series}))
+
+
+class PrometheusTextfileMetricsSink(MetricsSink):
+    """Writes the metrics to a file in the Prometheus text-based exposition
+    format, to be collected by the node exporter textfile collector.
+    """
+    __PREFIX = 'qlik_api'
+
+    # Maps the counters of the series to the metric names and help texts.
+    __COUNTERS = (
+        ('requests', 'requests_total', 'Requests that got a reply.'),
+        ('errors', 'errors_total', 'Requests that got an error reply.'),
+        ('timeouts', 'timeouts_total',
+         'Requests that did not get a reply in time.'),
+        ('retries', 'retries_total', 'Requests sent again after a failure.'),
+        ('reply_bytes', 'reply_bytes_total', 'Size of the replies.'),
+    )
+
+    def __init__(self, file_path):
+        self.__file_path = file_path
+
+    def write(self, series):
+        lines = []
+        for counter, name, help_text in self.__COUNTERS:
+            self.__add_metric_header(lines, name, 'counter', help_text)
+            for values in series:
+                lines.append(f'{self.__PREFIX}_{name}'
+                             f'{self.__format_labels(values)}'
+                             f' {values[counter]}')
+
+        name = 'request_duration_seconds'
+        self.__add_metric_header(lines, name, 'histogram',
+                                 'Round-trip time of the requests.')
+        for values in series:
+            for upper_bound, count in values['latency_buckets']:
+                labels = self.__format_labels(values, le=upper_bound)
+                lines.append(f'{self.__PREFIX}_{name}_bucket{labels} {count}')
+            labels = self.__format_labels(values)
+            lines.append(f'{self.__PREFIX}_{name}_sum{labels}'
+                         f' {values["latency_sum"]}')
+            lines.append(f'{self.__PREFIX}_{name}_count{labels}'
+                         f' {values["requests"]}')
+
+        self._replace_file(self.__file_path, '\n'.join(lines) + '\n')
+
+    def __add_metric_header(self, lines, name, metric_type, help_text):
+        lines.append(f'# HELP {self.__PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {self.__PREFIX}_{name} {metric_type}')
+
+    @classmethod
+    def __format_labels(cls, values, **extra_labels):
+        labels = {
+            'api': values['api'],
+            'method': values['method'],
+            'app_id': values['app_id'],
+            **extra_labels
+        }
+        formatted_labels = ','.join(
+            f'{key}="{cls.__escape_label_value(value)}"'
+            for key, value in labels.items())
+        return f'{{{formatted_labels}}}'
+
+    @classmethod
+    def __escape_label_value(cls, value):
+        return str(value).replace('\\',
+                                  '\\\\').replace('"',
+                                                  '\\"').replace('\n', '\\n')
@@ -0,0 +1,121 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import zlib
+
+
+class ShardManifests:
+    """Reads and writes the manifests of sharded synchronization runs.
+
+    Several connector processes may split the Streams of a Qlik site among
+    them, each one scraping and ingesting a stable, hash-based subset of the
+    Streams and their Apps. Each shard writes a manifest listing the entries
+    it synchronized, and a final coordinator run reads all of them to delete
+    the obsolete entries only once, as this step requires the whole set of
+    entries.
+
+    Attributes:
+        __dir_path: The path of the directory shared by the shards and the
+            coordinator.
+        __shard_count: The number of shards.
+    """
+    # Bump on changes to the manifests structure, so the coordinator does not
+    # rely on manifests written by incompatible shards.
+    __FORMAT_VERSION = 1
+
+    def __init__(self, dir_path, shard_count):
+        self.__dir_path = dir_path
+        self.__shard_count = shard_count
+
+    @classmethod
+    def get_shard_index(cls, asset_id, shard_count):
+        """Gets the index of the shard a given asset belongs to.
+
+        CRC32 is used instead of the built-in ``hash``, which is salted per
+        process for strings, so all the shards agree on the assignment and
+        it does not change across runs.
+        """
+        return zlib.crc32(asset_id.encode('utf-8')) % shard_count
+
+    def write(self, shard_index, site_url, stream_ids, entry_names):
+        file_path = self.__make_file_path(shard_index)
+        os.makedirs(self.__dir_path, exist_ok=True)
+
+        temp_file_path = f'{file_path}.tmp'
+        with open(temp_file_path, 'w') as manifest_file:
+            json.dump(
+                {
+                    'version': self.__FORMAT_VERSION,
+                    'shardIndex': shard_index,
+                    'shardCount': self.__shard_count,
+                    'siteUrl': site_url,
+                    'streamIds': sorted(stream_ids),
+                    'entryNames': sorted(entry_names),
+                }, manifest_file)
+        # Replacing the file in a single step prevents the coordinator from
+        # reading partially written manifests.
+        os.replace(temp_file_path, file_path)
+        logging.info('Manifest of shard %d of %d saved to %s.', shard_index,
+                     self.__shard_count, file_path)
+
+    def read_entry_names(self, site_url):
+        """Reads the names of the entries synchronized by all the shards.
+
+        Returns:
+            A ``set`` of entry names.
+
+        Raises:
+            ValueError: If the manifest of any shard is missing or does not
+              match the current site and number of shards, which means the
+              entries of some Streams are unknown.
+        """
+        entry_names = set()
+        for shard_index in range(self.__shard_count):
+            manifest = self.__read(shard_index)
+            if manifest.get('version') != self.__FORMAT_VERSION \
+                    or manifest.get('shardCount') != self.__shard_count \
+                    or manifest.get('siteUrl') != site_url:
+                raise ValueError(
+                    f'The manifest of shard {shard_index} does not match'
+                    f' {self.__shard_count} shards of {site_url}.')
+            entry_names.update(manifest.get('entryNames') or [])
+
+        return entry_names
+
+    def clear(self):
+        """Deletes the manifests, so they are not used by further runs."""
+        for shard_index in range(self.__shard_count):
+            file_path = self.__make_file_path(shard_index)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def __read(self, shard_index):
+        file_path = self.__make_file_path(shard_index)
+        try:
+            with open(file_path) as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError) as e:
+            raise ValueError(
+                f'The manifest of shard {shard_index} could not be read from'
+                f' {file_path}: did the shard finish?') from e
+
+    def __make_file_path(self, shard_index):
+        return os.path.join(
+            self.__dir_path,
+            f'shard-{shard_index}-of-{self.__shard_count}.json')
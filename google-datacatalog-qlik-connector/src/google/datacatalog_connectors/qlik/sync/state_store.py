@@ -0,0 +1,103 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import json
+import logging
+import os
+
+
+class StateStore:
+    """Keeps local state across synchronization runs in a JSON file.
+
+    The state consists of the Engine API payloads, i.e. the Dimensions,
+    Measures, Sheets, and Visualizations, scraped from each App along with a
+    fingerprint of the App at scrape time. An App whose fingerprint did not
+    change since the last run can reuse its payload instead of being scraped
+    again.
+
+    Attributes:
+        __file_path: The path of the JSON file.
+        __apps: A ``dict`` containing the state of the Apps known by the
+            previous run, represented as ``app-id: state`` items. It is
+            loaded from the file.
+        __next_apps: A ``dict`` containing the state of the Apps handled by
+            the current run, which replaces the file content on ``save``.
+    """
+    # Bump on changes to the payloads structure, so the existing files are
+    # ignored instead of feeding incompatible payloads to the prepare stage.
+    __FORMAT_VERSION = 1
+
+    def __init__(self, file_path):
+        self.__file_path = file_path
+        self.__apps = self.__load()
+        self.__next_apps = {}
+
+    def get_app_objects(self, app_id, fingerprint):
+        """Gets the payload stored for a given App.
+
+        Returns:
+            The stored payload if the given fingerprint matches the stored
+            one; ``None`` otherwise.
+        """
+        app_state = self.__apps.get(app_id)
+        if not app_state or app_state.get('fingerprint') != fingerprint:
+            return None
+
+        self.__next_apps[app_id] = app_state
+        return copy.deepcopy(app_state.get('objects'))
+
+    def set_app_objects(self, app_id, fingerprint, app_objects):
+        self.__next_apps[app_id] = {
+            'fingerprint': fingerprint,
+            'objects': copy.deepcopy(app_objects),
+        }
+
+    def save(self):
+        """Writes the state of the Apps handled by the current run to the
+        file. Apps that were not handled are dropped.
+        """
+        temp_file_path = f'{self.__file_path}.tmp'
+        with open(temp_file_path, 'w') as state_file:
+            json.dump(
+                {
+                    'version': self.__FORMAT_VERSION,
+                    'apps': self.__next_apps,
+                }, state_file)
+        # Replacing the file in a single step prevents partially written
+        # files in case of failures.
+        os.replace(temp_file_path, self.__file_path)
+        logging.info('State of %d Apps saved to %s.', len(self.__next_apps),
+                     self.__file_path)
+
+    def __load(self):
+        if not os.path.isfile(self.__file_path):
+            return {}
+
+        try:
+            with open(self.__file_path) as state_file:
+                state = json.load(state_file)
+        except ValueError:
+            logging.warning('Invalid state file %s: it will be overwritten.',
+                            self.__file_path)
+            return {}
+
+        if state.get('version') != self.__FORMAT_VERSION:
+            logging.info('Outdated state file %s: it will be overwritten.',
+                         self.__file_path)
+            return {}
+
+        return state.get('apps') or {}
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import queue
+import threading
+
+
+class SyncPipeline:
+    """Runs the stages of a synchronization workflow concurrently.
+
+    Each stage is a function that processes the items produced by the
+    previous one. Stages run in their own worker threads, connected by
+    bounded queues, so the producer, e.g. the scrape step, blocks instead of
+    piling up items when the downstream stages are slower.
+
+    The pipeline is a context manager: exiting it waits for the workers to
+    process all the items and re-raises the first error raised by a stage.
+    After an error, the remaining items are discarded and ``put`` raises the
+    error as well, so the producer stops early.
+
+    Attributes:
+        __stages: The stage functions. Each one receives an item and returns
+            the item to be passed to the next stage.
+        __queues: The input queue of each stage.
+        __results: The items returned by the last stage, in order.
+        __error: The first exception raised by a stage, if any.
+    """
+    # Marks the end of the items in a queue.
+    __END_OF_ITEMS = object()
+
+    def __init__(self, stages, queue_size=1):
+        self.__stages = stages
+        self.__queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.__workers = [
+            threading.Thread(target=self.__run_stage,
+                             args=(index,),
+                             name=f'qlik-sync-pipeline-stage-{index}',
+                             daemon=True) for index in range(len(stages))
+        ]
+        self.__results = []
+        self.__error = None
+        self.__error_lock = threading.Lock()
+
+    def __enter__(self):
+        for worker in self.__workers:
+            worker.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            # Stops the workers as soon as possible: they discard the items
+            # that are still queued.
+            self.__set_error(exc_value)
+
+        self.__queues[0].put(self.__END_OF_ITEMS)
+        for worker in self.__workers:
+            worker.join()
+
+        if not exc_type and self.__error:
+            raise self.__error
+
+    @property
+    def results(self):
+        """The items returned by the last stage. They are complete once the
+        pipeline exits.
+        """
+        return self.__results
+
+    def put(self, item):
+        """Sends an item to the first stage, blocking while its queue is
+        full.
+
+        Raises:
+            Exception: The error raised by a stage, if any.
+        """
+        if self.__error:
+            raise self.__error
+
+        self.__queues[0].put(item)
+
+    def __run_stage(self, index):
+        stage = self.__stages[index]
+        input_queue = self.__queues[index]
+        output_queue = self.__queues[index + 1] \
+            if index + 1 < len(self.__queues) else None
+
+        while True:
+            item = input_queue.get()
+            if item is self.__END_OF_ITEMS:
+                break
+            if self.__error:
+                continue
+
+            try:
+                result = stage(item)
+            except Exception as e:
+                logging.error('Sync pipeline stage %d failed: %s', index, e)
+                self.__set_error(e)
+                continue
+
+            if output_queue:
+                output_queue.put(result)
+            else:
+                self.__results.append(result)
+
+        if output_queue:
+            output_queue.put(self.__END_OF_ITEMS)
+
+    def __set_error(self, error):
+        with self.__error_lock:
+            if not self.__error:
+                self.__error = error
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+
+from google.cloud import datacatalog
+
+
+class TagTemplateRegistry:
+    """Keeps track of the Tag Templates ensured to exist in Data Catalog, so
+    each one is sent to the ingestor at most once per run.
+
+    Sites with hundreds of Custom Property choice values require hundreds of
+    Tag Templates, and most of them are shared by the entries of several
+    Streams. An optional JSON file keeps a content hash of each Tag Template
+    across runs, so the unchanged ones skip the Data Catalog round trips
+    entirely.
+
+    Attributes:
+        __cache_file_path: The optional path of the JSON file.
+        __known_hashes: A ``dict`` containing the content hashes of the Tag
+            Templates known to exist, represented as ``name: hash`` items. It
+            is loaded from the file, if any, and updated on each ingestion.
+        __ingested_names: A ``set`` containing the names of the Tag
+            Templates ensured to exist by the current run.
+    """
+    # Bump on changes to the hashes, so the existing files are ignored
+    # instead of skipping templates that may not exist.
+    __FORMAT_VERSION = 1
+
+    def __init__(self, cache_file_path=None):
+        self.__cache_file_path = cache_file_path
+        self.__known_hashes = self.__load() if cache_file_path else {}
+        self.__ingested_names = set()
+
+    def filter_templates_to_ingest(self, tag_templates_dict):
+        """Filters the Tag Templates that still have to be ingested, i.e. the
+        ones neither ingested by the current run nor known to exist with the
+        same content since a previous run.
+
+        Returns:
+            A ``dict`` with the same structure as the given one.
+        """
+        templates_to_ingest = {}
+        for template_id, tag_template in tag_templates_dict.items():
+            if tag_template.name in self.__ingested_names:
+                continue
+            if self.__known_hashes.get(tag_template.name) == \
+                    self.__hash(tag_template):
+                self.__ingested_names.add(tag_template.name)
+                continue
+            templates_to_ingest[template_id] = tag_template
+
+        return templates_to_ingest
+
+    def mark_ingested(self, tag_templates_dict):
+        """Records the given Tag Templates as existing in Data Catalog. To be
+        called once they are successfully ingested.
+        """
+        for tag_template in tag_templates_dict.values():
+            self.__ingested_names.add(tag_template.name)
+            self.__known_hashes[tag_template.name] = self.__hash(tag_template)
+
+    def save(self):
+        if not self.__cache_file_path:
+            return
+
+        temp_file_path = f'{self.__cache_file_path}.tmp'
+        with open(temp_file_path, 'w') as cache_file:
+            json.dump(
+                {
+                    'version': self.__FORMAT_VERSION,
+                    'templates': self.__known_hashes,
+                }, cache_file)
+        # Replacing the file in a single step prevents partially written
+        # files in case of failures.
+        os.replace(temp_file_path, self.__cache_file_path)
+        logging.info('Hashes of %d Tag Templates saved to %s.',
+                     len(self.__known_hashes), self.__cache_file_path)
+
+    @classmethod
+    def __hash(cls, tag_template):
+        # Deterministic serialization sorts the fields map, so the same
+        # content always yields the same hash.
+        return hashlib.sha256(
+            datacatalog.TagTemplate.pb(tag_template).SerializeToString(
+                deterministic=True)).hexdigest()
+
+    def __load(self):
+        if not os.path.isfile(self.__cache_file_path):
+            return {}
+
+        try:
+            with open(self.__cache_file_path) as cache_file:
+                cache = json.load(cache_file)
+        except ValueError:
+            logging.warning(
+                'Invalid Tag Template cache file %s: it will be overwritten.',
+                self.__cache_file_path)
+            return {}
+
+        if cache.get('version') != self.__FORMAT_VERSION:
+            logging.info(
+                'Outdated Tag Template cache file %s: it will be overwritten.',
+                self.__cache_file_path)
+            return {}
+
+        return cache.get('templates') or {}
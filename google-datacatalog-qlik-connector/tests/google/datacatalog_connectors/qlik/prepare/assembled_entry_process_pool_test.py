@@ -0,0 +1,189 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import unittest
+from unittest import mock
+
+from google.cloud import datacatalog
+
+from google.datacatalog_connectors.qlik import prepare
+from google.datacatalog_connectors.qlik.prepare import constants
+
+__PREPARE_PACKAGE = 'google.datacatalog_connectors.qlik.prepare'
+_POOL_MODULE = f'{__PREPARE_PACKAGE}.assembled_entry_process_pool'
+
+
+class AssembledEntryProcessPoolTest(unittest.TestCase):
+    __FACTORY_ARGS = {
+        'project_id': 'test-project',
+        'location_id': 'test-location',
+        'entry_group_id': 'test-entry-group',
+        'user_specified_system': 'test-system',
+        'site_url': 'https://test.server.com',
+    }
+    __TIMESTAMP = '2019-09-12T16:30:00.005Z'
+
+    def setUp(self):
+        tag_template_factory = prepare.DataCatalogTagTemplateFactory(
+            'test-project', 'test-location')
+        self.__tag_templates_dict = {
+            constants.TAG_TEMPLATE_ID_APP:
+                tag_template_factory.make_tag_template_for_app(),
+            constants.TAG_TEMPLATE_ID_SHEET:
+                tag_template_factory.make_tag_template_for_sheet(),
+            constants.TAG_TEMPLATE_ID_STREAM:
+                tag_template_factory.make_tag_template_for_stream(),
+        }
+
+    def test_make_assembled_entries_for_streams_should_match_factory(self):
+        streams_metadata = [
+            self.__make_stream_metadata(f'stream-{i}') for i in range(3)
+        ]
+
+        with prepare.AssembledEntryProcessPool(
+                2, self.__tag_templates_dict,
+                **self.__FACTORY_ARGS) as process_pool:
+            streams_assembled_entries = list(
+                process_pool.make_assembled_entries_for_streams(
+                    streams_metadata))
+
+        factory = prepare.AssembledEntryFactory(**self.__FACTORY_ARGS)
+        self.assertEqual(3, len(streams_assembled_entries))
+        for stream_metadata, assembled_entries in zip(
+                streams_metadata, streams_assembled_entries):
+            self.__assert_same_assembled_entries(
+                factory.make_assembled_entries_for_stream(
+                    stream_metadata, self.__tag_templates_dict),
+                assembled_entries)
+
+    def test_submit_assembled_entries_for_stream_should_match_factory(self):
+        stream_metadata = self.__make_stream_metadata('stream-1')
+
+        with prepare.AssembledEntryProcessPool(
+                1, self.__tag_templates_dict,
+                **self.__FACTORY_ARGS) as process_pool:
+            assembled_entries = process_pool.get_assembled_entries(
+                process_pool.submit_assembled_entries_for_stream(
+                    stream_metadata))
+
+        factory = prepare.AssembledEntryFactory(**self.__FACTORY_ARGS)
+        self.__assert_same_assembled_entries(
+            factory.make_assembled_entries_for_stream(
+                stream_metadata, self.__tag_templates_dict), assembled_entries)
+
+    def test_submit_assembled_entries_for_stream_should_overlap_tasks(self):
+        # Each task waits for the other one, so they only succeed if they run
+        # at the same time. The worker processes are forked, so they inherit
+        # the patched factory.
+        barrier = multiprocessing.Barrier(2, timeout=10)
+        with mock.patch(
+                f'{_POOL_MODULE}.assembled_entry_factory'
+                '.AssembledEntryFactory',
+                lambda *args: _BarrierAssembledEntryFactory(barrier)):
+            with prepare.AssembledEntryProcessPool(
+                    2, self.__tag_templates_dict,
+                    **self.__FACTORY_ARGS) as process_pool:
+                async_results = [
+                    process_pool.submit_assembled_entries_for_stream(
+                        self.__make_stream_metadata(f'stream-{i}'))
+                    for i in range(2)
+                ]
+                streams_assembled_entries = [
+                    process_pool.get_assembled_entries(async_result)
+                    for async_result in async_results
+                ]
+
+        self.assertEqual([[], []], streams_assembled_entries)
+
+    def test_exit_on_error_should_stop_workers(self):
+        with self.assertRaises(ValueError):
+            with prepare.AssembledEntryProcessPool(1,
+                                                   self.__tag_templates_dict,
+                                                   **self.__FACTORY_ARGS):
+                raise ValueError()
+
+    def test_worker_functions_should_make_serialized_assembled_entries(self):
+        # The workers run in other processes, so they are also called here
+        # directly.
+        process_pool = prepare.AssembledEntryProcessPool(
+            1, self.__tag_templates_dict, **self.__FACTORY_ARGS)
+        serialized_tag_templates = {
+            template_id: datacatalog.TagTemplate.serialize(tag_template)
+            for template_id, tag_template in self.__tag_templates_dict.items()
+        }
+        process_pool._init_worker(tuple(self.__FACTORY_ARGS.values()),
+                                  serialized_tag_templates)
+
+        serialized_assembled_entries = \
+            process_pool._make_serialized_assembled_entries(
+                self.__make_stream_metadata('stream-1'))
+
+        self.assertEqual(3, len(serialized_assembled_entries))
+        entry_id, entry, tags = serialized_assembled_entries[0]
+        self.assertEqual('qlik_str_stream_1', entry_id)
+        self.assertEqual('Stream stream-1',
+                         datacatalog.Entry.deserialize(entry).display_name)
+        self.assertEqual(1, len(tags))
+
+    def __assert_same_assembled_entries(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for expected_entry, actual_entry in zip(expected, actual):
+            self.assertEqual(expected_entry.entry_id, actual_entry.entry_id)
+            self.assertEqual(expected_entry.entry, actual_entry.entry)
+            self.assertEqual(expected_entry.tags, actual_entry.tags)
+
+    @classmethod
+    def __make_stream_metadata(cls, stream_id):
+        app_metadata = {
+            'id': f'{stream_id}-app',
+            'name': f'App {stream_id}',
+            'createdDate': cls.__TIMESTAMP,
+            'modifiedDate': cls.__TIMESTAMP,
+            'stream': {
+                'id': stream_id,
+            },
+        }
+        app_metadata['sheets'] = [{
+            'qInfo': {
+                'qId': f'{stream_id}-sheet',
+            },
+            'qMeta': {
+                'title': f'Sheet {stream_id}',
+                'createdDate': cls.__TIMESTAMP,
+                'modifiedDate': cls.__TIMESTAMP,
+            },
+            'app': app_metadata,
+        }]
+        return {
+            'id': stream_id,
+            'name': f'Stream {stream_id}',
+            'createdDate': cls.__TIMESTAMP,
+            'modifiedDate': cls.__TIMESTAMP,
+            'apps': [app_metadata],
+        }
+
+
+class _BarrierAssembledEntryFactory:
+    """Waits for the other workers before making no assembled entries."""
+
+    def __init__(self, barrier):
+        self.__barrier = barrier
+
+    def make_assembled_entries_for_stream(self, stream_metadata,
+                                          tag_templates_dict):
+        self.__barrier.wait()
+        return []
@@ -197,6 +197,29 @@ class EntryRelationshipMapperTest(unittest.TestCase):
             'fake_entries/test-app',
             visualization_tag.fields['app_entry'].string_value)
 
+    def test_fulfill_tag_fields_should_skip_missing_related_entries(self):
+        definition_id = 'test-definition'
+        definition_entry = self.__make_fake_entry(
+            definition_id, 'custom_property_definition')
+        definition_tag = self.__make_fake_tag(string_fields=(('id',
+                                                              definition_id),))
+
+        app_id = 'test-app'
+        app_entry = self.__make_fake_entry(app_id, 'app')
+        string_fields = ('id', app_id), ('stream_id', 'missing-stream')
+        app_tag = self.__make_fake_tag(string_fields=string_fields)
+
+        definition_assembled_entry = commons_prepare.AssembledEntryData(
+            definition_id, definition_entry, [definition_tag])
+        app_assembled_entry = commons_prepare.AssembledEntryData(
+            app_id, app_entry, [app_tag])
+
+        prepare.EntryRelationshipMapper().fulfill_tag_fields(
+            [definition_assembled_entry, app_assembled_entry])
+
+        self.assertNotIn('stream_entry', app_tag.fields)
+        self.assertEqual(['id'], list(definition_tag.fields))
+
     @classmethod
     def __make_fake_entry(cls, entry_id, entry_type):
         entry = datacatalog.Entry()
@@ -51,6 +51,34 @@ class Qlik2DataCatalogCliTest(unittest.TestCase):
                 'test-username', '--qlik-password', 'test-password'
             ])
 
+    def test_parse_args_invalid_prepare_workers_should_raise_system_exit(self):
+        self.assertRaises(
+            SystemExit, qlik2datacatalog_cli.Qlik2DataCatalogCli._parse_args, [
+                '--qlik-server', 'test-server', '--qlik-username',
+                'test-username', '--qlik-password', 'test-password',
+                '--datacatalog-project-id', 'dc-project-id',
+                '--prepare-workers', '0'
+            ])
+
+    def test_parse_args_invalid_shard_index_should_raise_system_exit(self):
+        self.assertRaises(
+            SystemExit, qlik2datacatalog_cli.Qlik2DataCatalogCli._parse_args, [
+                '--qlik-server', 'test-server', '--qlik-username',
+                'test-username', '--qlik-password', 'test-password',
+                '--datacatalog-project-id', 'dc-project-id', '--shard-count',
+                '2', '--shard-index', '2', '--shard-manifest-dir', 'manifests'
+            ])
+
+    def test_parse_args_shards_missing_manifest_dir_should_raise_system_exit(
+            self):
+        self.assertRaises(
+            SystemExit, qlik2datacatalog_cli.Qlik2DataCatalogCli._parse_args, [
+                '--qlik-server', 'test-server', '--qlik-username',
+                'test-username', '--qlik-password', 'test-password',
+                '--datacatalog-project-id', 'dc-project-id', '--shard-count',
+                '2'
+            ])
+
     @mock.patch('google.datacatalog_connectors.qlik.sync.MetadataSynchronizer')
     def test_run_should_call_synchronizer(self, mock_metadata_synchonizer):
         qlik2datacatalog_cli.Qlik2DataCatalogCli.run([
@@ -65,7 +93,19 @@ class Qlik2DataCatalogCliTest(unittest.TestCase):
             qlik_username='test-username',
             qlik_password='test-password',
             datacatalog_project_id='dc-project-id',
-            datacatalog_location_id='us')
+            datacatalog_location_id='us',
+            qlik_max_sessions=5,
+            state_file=None,
+            qlik_cookie_cache_file=None,
+            pipelined=False,
+            metrics_file=None,
+            prometheus_textfile=None,
+            shard_index=0,
+            shard_count=1,
+            shard_manifest_dir=None,
+            shard_coordinator=False,
+            tag_template_cache_file=None,
+            prepare_workers=None)
 
         synchonizer = mock_metadata_synchonizer.return_value
         synchonizer.run.assert_called_once()
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.qlik.scrape import api_metrics
+
+
+class APIMetricsTest(unittest.TestCase):
+    __ENGINE_API = api_metrics.APIMetrics.ENGINE_API
+    __QRS_API = api_metrics.APIMetrics.QRS_API
+
+    def setUp(self):
+        self.__metrics = api_metrics.APIMetrics()
+
+    def test_record_request_should_aggregate_values_by_tags(self):
+        self.__metrics.record_request(self.__ENGINE_API,
+                                      'GetProperties',
+                                      0.02,
+                                      reply_bytes=100,
+                                      app_id='app-id')
+        self.__metrics.record_request(self.__ENGINE_API,
+                                      'GetProperties',
+                                      0.2,
+                                      reply_bytes=50,
+                                      app_id='app-id',
+                                      error=True)
+
+        series = self.__metrics.get_series()
+
+        self.assertEqual(1, len(series))
+        values = series[0]
+        self.assertEqual('engine', values['api'])
+        self.assertEqual('GetProperties', values['method'])
+        self.assertEqual('app-id', values['app_id'])
+        self.assertEqual(2, values['requests'])
+        self.assertEqual(1, values['errors'])
+        self.assertEqual(150, values['reply_bytes'])
+        self.assertAlmostEqual(0.22, values['latency_sum'])
+
+    def test_get_series_should_return_cumulative_latency_buckets(self):
+        for latency in (0.001, 0.005, 0.02, 120):
+            self.__metrics.record_request(self.__QRS_API, 'stream/full',
+                                          latency)
+
+        buckets = dict((str(upper_bound), count) for upper_bound, count in
+                       self.__metrics.get_series()[0]['latency_buckets'])
+
+        # Upper bounds are inclusive.
+        self.assertEqual(2, buckets['0.005'])
+        self.assertEqual(2, buckets['0.01'])
+        self.assertEqual(3, buckets['0.025'])
+        self.assertEqual(3, buckets['60'])
+        self.assertEqual(4, buckets['+Inf'])
+
+    def test_get_series_should_sort_series_and_tag_missing_app_ids(self):
+        self.__metrics.record_retry(self.__QRS_API, 'stream/full')
+        self.__metrics.record_timeout(self.__ENGINE_API, 'GetLayout', 'app-2')
+        self.__metrics.record_timeout(self.__ENGINE_API, 'GetLayout', 'app-1')
+
+        series = self.__metrics.get_series()
+
+        self.assertEqual([('engine', 'GetLayout', 'app-1'),
+                          ('engine', 'GetLayout', 'app-2'),
+                          ('qrs', 'stream/full', '')],
+                         [(values['api'], values['method'], values['app_id'])
+                          for values in series])
+        self.assertEqual(1, series[0]['timeouts'])
+        self.assertEqual(1, series[2]['retries'])
+        self.assertEqual(0, series[2]['requests'])
+
+    def test_get_series_should_return_snapshot(self):
+        self.__metrics.record_request(self.__QRS_API, 'stream/full', 0.1)
+        series = self.__metrics.get_series()
+
+        self.__metrics.record_request(self.__QRS_API, 'stream/full', 0.1)
+
+        self.assertEqual(1, series[0]['requests'])
+
+    def test_log_summary_should_log_methods_and_slowest_apps(self):
+        self.__metrics.record_request(self.__ENGINE_API,
+                                      'GetLayout',
+                                      1,
+                                      app_id='app-1')
+        self.__metrics.record_request(self.__ENGINE_API,
+                                      'GetLayout',
+                                      3,
+                                      app_id='app-2')
+        self.__metrics.record_request(self.__QRS_API, 'stream/full', 0.5)
+
+        with self.assertLogs(level='INFO') as logs:
+            self.__metrics.log_summary(slowest_apps_count=1)
+
+        output = '\n'.join(logs.output)
+        self.assertRegex(output, r'engine +GetLayout +2 ')
+        self.assertRegex(output, r'qrs +stream/full +1 ')
+        self.assertIn('app-2: 3.0 s, 1 requests', output)
+        self.assertNotIn('app-1:', output)
+
+
+class EngineSessionMetricsTest(unittest.TestCase):
+    __SCRAPE_PACKAGE = 'google.datacatalog_connectors.qlik.scrape'
+    __METRICS_MODULE = f'{__SCRAPE_PACKAGE}.api_metrics'
+
+    def setUp(self):
+        self.__metrics = mock.MagicMock()
+        self.__session_metrics = api_metrics.EngineSessionMetrics(
+            self.__metrics, 'app-id')
+
+    @mock.patch(f'{__METRICS_MODULE}.time.perf_counter')
+    def test_reply_received_should_record_round_trip(self, mock_perf_counter):
+        mock_perf_counter.side_effect = [10, 10.5]
+
+        self.__session_metrics.message_sent(1, 'GetProperties')
+        self.__session_metrics.reply_received(1, 200, True)
+
+        self.__metrics.record_request.assert_called_once_with('engine',
+                                                              'GetProperties',
+                                                              0.5,
+                                                              reply_bytes=200,
+                                                              app_id='app-id',
+                                                              error=True)
+
+    def test_reply_received_should_ignore_unknown_messages(self):
+        self.__session_metrics.reply_received(1, 200)
+        self.__metrics.record_request.assert_not_called()
+
+    def test_timed_out_should_record_messages_waiting_for_replies(self):
+        self.__session_metrics.message_sent(1, 'OpenDoc')
+        self.__session_metrics.message_sent(2, 'GetLayout')
+        self.__session_metrics.message_sent(3, 'GetLayout')
+        self.__session_metrics.reply_received(1, 200)
+
+        self.__session_metrics.timed_out()
+        self.__session_metrics.timed_out()
+
+        self.assertEqual([
+            mock.call('engine', 'GetLayout', 'app-id'),
+            mock.call('engine', 'GetLayout', 'app-id'),
+        ], self.__metrics.record_timeout.call_args_list)
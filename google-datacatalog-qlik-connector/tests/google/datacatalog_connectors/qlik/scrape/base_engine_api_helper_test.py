@@ -15,11 +15,15 @@
 # limitations under the License.
 
 import asyncio
+import json
+import time
 import unittest
 from unittest import mock
 
+import jmespath
+
 from google.datacatalog_connectors.qlik.scrape import \
-    base_engine_api_helper, constants
+    base_engine_api_helper, constants, websocket_replies_helper
 
 from . import scrape_ops_mocks
 
@@ -42,6 +46,15 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
         self.assertIsNotNone(attrs['_BaseEngineAPIHelper__common_headers'])
         self.assertEqual(0, attrs['_BaseEngineAPIHelper__messages_counter'])
 
+    def test_constructor_should_keep_plain_http_scheme_and_port(self):
+        helper = base_engine_api_helper.BaseEngineAPIHelper(
+            server_address='http://localhost:8080',
+            auth_cookie=mock.MagicMock())
+
+        self.assertEqual(
+            'ws://localhost:8080',
+            helper.__dict__['_BaseEngineAPIHelper__base_api_endpoint'])
+
     @mock.patch(f'{__HELPER_MODULE}.websockets.connect',
                 new_callable=scrape_ops_mocks.AsyncContextManager)
     def test_connect_websocket_should_use_cookie(self, mock_websocket):
@@ -67,10 +80,39 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
 
     def test_run_until_complete_should_stop_on_timeout(self):
 
-        self.assertRaises(
-            asyncio.TimeoutError,
-            base_engine_api_helper.BaseEngineAPIHelper._run_until_complete,
-            asyncio.wait_for(asyncio.sleep(0.5), timeout=0.25))
+        self.assertRaises(asyncio.TimeoutError,
+                          self.__helper._run_until_complete,
+                          asyncio.wait_for(asyncio.sleep(0.5), timeout=0.25))
+
+    def test_run_until_complete_should_use_shared_event_loop_if_set(self):
+        event_loop = mock.MagicMock()
+        event_loop.run_until_complete.return_value = 'result'
+        helper = base_engine_api_helper.BaseEngineAPIHelper(
+            server_address='https://test-server',
+            auth_cookie=mock.MagicMock(),
+            event_loop=event_loop)
+
+        self.assertEqual('result', helper._run_until_complete('coroutine'))
+        event_loop.run_until_complete.assert_called_once_with('coroutine')
+
+    def test_hold_websocket_communication_should_cancel_receiver_on_error(
+            self):
+
+        async def failing_sender():
+            raise ValueError
+
+        async def hold_communication():
+            receiver = asyncio.ensure_future(asyncio.sleep(10))
+            try:
+                await base_engine_api_helper.BaseEngineAPIHelper\
+                    ._hold_websocket_communication(failing_sender(), receiver)
+            finally:
+                await asyncio.sleep(0)
+                self.assertTrue(receiver.cancelled())
+
+        self.assertRaises(ValueError,
+                          asyncio.new_event_loop().run_until_complete,
+                          hold_communication())
 
     @mock.patch(f'{__HELPER_CLASS}._generate_message_id')
     @mock.patch(f'{__HELPER_MODULE}.websockets.connect',
@@ -89,6 +131,82 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
         mock_replies_helper.add_pending_id.assert_called_once_with(
             10, 'OpenDoc')
 
+    @mock.patch(f'{__HELPER_MODULE}.websockets.connect',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_start_websocket_communication_should_track_session_metrics(
+            self, mock_websocket):
+
+        metrics = mock.MagicMock()
+        helper = base_engine_api_helper.BaseEngineAPIHelper(
+            'https://test-server', mock.MagicMock(), metrics=metrics)
+        replies_helper = websocket_replies_helper.WebsocketRepliesHelper()
+
+        asyncio.new_event_loop().run_until_complete(
+            helper._start_websocket_communication(mock_websocket, 'app-id',
+                                                  replies_helper))
+
+        metrics.start_engine_session.assert_called_once_with('app-id')
+        session_metrics = metrics.start_engine_session.return_value
+        session_metrics.message_sent.assert_called_once_with(1, 'OpenDoc')
+
+    def test_wait_for_websocket_communication_should_record_timeout(self):
+
+        async def sender():
+            await asyncio.sleep(10)
+
+        async def receiver():
+            await asyncio.sleep(10)
+
+        replies_helper = mock.MagicMock()
+        replies_helper.get_last_activity_time.return_value = time.monotonic()
+
+        self.assertRaises(
+            asyncio.TimeoutError,
+            asyncio.new_event_loop().run_until_complete,
+            base_engine_api_helper.BaseEngineAPIHelper.
+            _wait_for_websocket_communication(sender(), receiver(),
+                                              replies_helper, 0.01))
+        replies_helper.record_timeout.assert_called_once()
+
+    def test_wait_for_websocket_communication_should_reset_idle_timeout(self):
+        replies_helper = websocket_replies_helper.WebsocketRepliesHelper()
+
+        async def sender():
+            pass
+
+        async def receiver():
+            # Takes longer than the idle timeout, but keeps receiving replies.
+            for message_id in range(10):
+                await asyncio.sleep(0.02)
+                replies_helper.record_reply(message_id, 10)
+            return 'results'
+
+        results = asyncio.new_event_loop().run_until_complete(
+            base_engine_api_helper.BaseEngineAPIHelper.
+            _wait_for_websocket_communication(sender(), receiver(),
+                                              replies_helper, 0.1))
+
+        self.assertEqual('results', results)
+
+    def test_wait_for_websocket_communication_should_stop_on_deadline(self):
+        replies_helper = websocket_replies_helper.WebsocketRepliesHelper()
+
+        async def sender():
+            pass
+
+        async def receiver():
+            while True:
+                await asyncio.sleep(0.02)
+                replies_helper.record_reply(1, 10)
+
+        self.assertRaises(
+            asyncio.TimeoutError,
+            asyncio.new_event_loop().run_until_complete,
+            base_engine_api_helper.BaseEngineAPIHelper.
+            _wait_for_websocket_communication(sender(), receiver(),
+                                              replies_helper, 0.1,
+                                              time.monotonic() + 0.2))
+
     @mock.patch(f'{__HELPER_CLASS}._connect_websocket',
                 new_callable=scrape_ops_mocks.AsyncContextManager)
     def test_receive_messages_should_process_lists(self, mock_websocket):
@@ -109,7 +227,8 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
 
         results = asyncio.new_event_loop().run_until_complete(
             base_engine_api_helper.BaseEngineAPIHelper._receive_messages(
-                websocket_ctx, mock_replies_helper, 'Test', 'result.list'))
+                websocket_ctx, mock_replies_helper, 'Test',
+                jmespath.compile('result.list')))
 
         self.assertEqual(1, len(results))
         self.assertEqual('test-id', results[0]['id'])
@@ -134,11 +253,92 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
 
         results = asyncio.new_event_loop().run_until_complete(
             base_engine_api_helper.BaseEngineAPIHelper._receive_messages(
-                websocket_ctx, mock_replies_helper, 'Test', 'result'))
+                websocket_ctx, mock_replies_helper, 'Test',
+                jmespath.compile('result')))
 
         self.assertEqual(1, len(results))
         self.assertEqual('test-id', results[0]['id'])
 
+    @mock.patch(f'{__HELPER_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_receive_grouped_messages_should_group_results_by_key(
+            self, mock_websocket):
+
+        replies_helper = websocket_replies_helper.WebsocketRepliesHelper()
+        replies_helper.add_pending_id(1, 'GetProperties', 'dimensions')
+        replies_helper.add_pending_id(2, 'GetProperties', 'measures')
+        replies_helper.add_pending_id(3, 'GetObjects', 'sheets')
+        replies_helper.add_pending_id(4, 'GetDimension', 'dimensions')
+        replies_helper.add_pending_id(5, 'GetProperties', 'measures')
+
+        incoming_messages = [
+            {
+                'method': 'OnConnected',
+            },
+            {
+                'id': 1,
+                'result': {
+                    'qProp': {
+                        'id': 'dimension-id',
+                    },
+                },
+            },
+            {
+                'id': 2,
+                'result': {
+                    'qProp': {
+                        'id': 'measure-id',
+                    },
+                },
+            },
+            {
+                'id': 3,
+                'result': {
+                    'qList': [{
+                        'id': 'sheet-id',
+                    }],
+                },
+            },
+            {
+                'id': 4,
+                'result': {
+                    'qReturn': {
+                        'qHandle': 1,
+                    },
+                },
+            },
+            {
+                'id': 5,
+                'error': {
+                    'message': 'Invalid handle',
+                },
+            },
+        ]
+
+        websocket_ctx = mock_websocket.return_value.__enter__.return_value
+        websocket_ctx.set_data(incoming_messages, stop_itr_on_no_data=True)
+
+        result_paths = {
+            'GetObjects': jmespath.compile('result.qList'),
+            'GetProperties': jmespath.compile('result.qProp'),
+        }
+        helper_class = base_engine_api_helper.BaseEngineAPIHelper
+        results = asyncio.new_event_loop().run_until_complete(
+            helper_class._receive_grouped_messages(websocket_ctx,
+                                                   replies_helper,
+                                                   result_paths))
+
+        self.assertEqual(3, len(results))
+        self.assertEqual('dimension-id', results['dimensions'][0]['id'])
+        self.assertEqual(1, len(results['measures']))
+        self.assertEqual('measure-id', results['measures'][0]['id'])
+        self.assertEqual('sheet-id', results['sheets'][0]['id'])
+        # Replies that do not carry results are left for the sender.
+        unhandled_ids = [
+            reply['id'] for reply in replies_helper.get_all_unhandled()
+        ]
+        self.assertEqual([4, 5], unhandled_ids)
+
     @mock.patch(f'{__HELPER_CLASS}'
                 f'._BaseEngineAPIHelper__handle_generic_api_message')
     @mock.patch(f'{__HELPER_CLASS}._connect_websocket',
@@ -155,7 +355,8 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
 
         asyncio.new_event_loop().run_until_complete(
             base_engine_api_helper.BaseEngineAPIHelper._receive_messages(
-                websocket_ctx, mock.MagicMock(), 'Test', 'result.test'))
+                websocket_ctx, mock.MagicMock(), 'Test',
+                jmespath.compile('result.test')))
 
         mock_handle_response.assert_called_once_with(
             {'method': 'OnTestMethod'})
@@ -178,10 +379,53 @@ class BaseEngineAPIHelperTest(unittest.TestCase):
         try:
             asyncio.new_event_loop().run_until_complete(
                 base_engine_api_helper.BaseEngineAPIHelper._receive_messages(
-                    websocket_ctx, mock.MagicMock(), 'Test', 'result.test'))
+                    websocket_ctx, mock.MagicMock(), 'Test',
+                    jmespath.compile('result.test')))
         except Exception as e:
             self.assertEqual('Test message', str(e))
 
+    @mock.patch(f'{__HELPER_MODULE}.websockets.connect',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_send_messages_should_clear_notification_already_set(
+            self, mock_websocket):
+
+        mock_replies_helper = mock.MagicMock()
+        mock_replies_helper.were_all_processed.side_effect = \
+            [False, False, True]
+        mock_replies_helper.is_there_reply_notification.return_value = True
+        mock_replies_helper.get_all_unhandled.return_value = []
+
+        asyncio.new_event_loop().run_until_complete(
+            base_engine_api_helper.BaseEngineAPIHelper._send_messages(
+                mock_websocket, mock_replies_helper, mock.MagicMock()))
+
+        mock_replies_helper.wait_for_replies.assert_not_called()
+        self.assertEqual(
+            2, mock_replies_helper.clear_reply_notifications.call_count)
+
+    def test_send_message_should_encode_message_as_text(self):
+        sent_messages = []
+
+        async def send(message):
+            sent_messages.append(message)
+
+        websocket = mock.MagicMock()
+        websocket.send = send
+
+        asyncio.new_event_loop().run_until_complete(
+            base_engine_api_helper.BaseEngineAPIHelper._send_message(
+                websocket, {
+                    'id': 1,
+                    'method': 'GetProperties',
+                }))
+
+        self.assertEqual(1, len(sent_messages))
+        self.assertIsInstance(sent_messages[0], str)
+        self.assertEqual({
+            'id': 1,
+            'method': 'GetProperties',
+        }, json.loads(sent_messages[0]))
+
     @mock.patch(f'{__HELPER_CLASS}._generate_message_id')
     @mock.patch(f'{__HELPER_MODULE}.websockets.connect',
                 new_callable=scrape_ops_mocks.AsyncContextManager)
@@ -0,0 +1,193 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.qlik.scrape import \
+    constants, credentials_manager
+
+from . import scrape_ops_mocks
+
+
+class CredentialsManagerTest(unittest.TestCase):
+    __SCRAPE_PACKAGE = 'google.datacatalog_connectors.qlik.scrape'
+    __MANAGER_MODULE = f'{__SCRAPE_PACKAGE}.credentials_manager'
+
+    def setUp(self):
+        requests_get_patcher = mock.patch(
+            f'{self.__MANAGER_MODULE}.requests.get')
+        self.__mock_requests_get = requests_get_patcher.start()
+        self.addCleanup(requests_get_patcher.stop)
+
+        get_qps_session_cookie_patcher = mock.patch(
+            f'{self.__MANAGER_MODULE}.authenticator.Authenticator'
+            f'.get_qps_session_cookie_windows_auth')
+        self.__mock_get_qps_session_cookie = \
+            get_qps_session_cookie_patcher.start()
+        self.addCleanup(get_qps_session_cookie_patcher.stop)
+
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__cache_file = os.path.join(self.__temp_dir.name, 'cookie.json')
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def test_get_session_cookie_should_authenticate_user(self):
+
+        fake_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        self.__mock_requests_get.return_value = \
+            scrape_ops_mocks.FakeResponseWithHeader(
+                'location', 'redirect-url', True)
+        self.__mock_get_qps_session_cookie.return_value = fake_cookie
+
+        manager = self.__make_manager()
+
+        self.assertEqual(fake_cookie, manager.get_session_cookie())
+        self.__mock_requests_get.assert_called_once_with(
+            url=f'test-server/qrs/about?Xrfkey={constants.XRFKEY}',
+            headers={
+                constants.XRFKEY_HEADER_NAME: constants.XRFKEY,
+                'User-Agent': 'Windows',
+            },
+            allow_redirects=False)
+        self.__mock_get_qps_session_cookie.assert_called_once_with(
+            ad_domain='test-domain',
+            username='test-username',
+            password='test-password',
+            auth_url='redirect-url')
+
+    def test_get_session_cookie_should_reuse_cookie_in_memory(self):
+
+        self.__mock_get_qps_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        manager = self.__make_manager()
+        manager.get_session_cookie()
+        manager.get_session_cookie()
+
+        self.__mock_get_qps_session_cookie.assert_called_once()
+
+    def test_get_session_cookie_should_reuse_cached_cookie_across_instances(
+            self):
+
+        self.__mock_get_qps_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        self.__make_manager(self.__cache_file).get_session_cookie()
+        session_cookie = self.__make_manager(
+            self.__cache_file).get_session_cookie()
+
+        self.__mock_get_qps_session_cookie.assert_called_once()
+        self.assertEqual('X-Qlik-Session', session_cookie.name)
+        self.assertEqual('Test cookie', session_cookie.value)
+        self.assertEqual('localhost', session_cookie.domain)
+        self.assertEqual('/', session_cookie.path)
+
+    def test_get_session_cookie_should_restrict_cache_file_permissions(self):
+
+        self.__mock_get_qps_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        self.__make_manager(self.__cache_file).get_session_cookie()
+
+        self.assertEqual(0o600,
+                         stat.S_IMODE(os.stat(self.__cache_file).st_mode))
+
+    def test_get_session_cookie_should_authenticate_on_expired_cached_cookie(
+            self):
+
+        self.__write_cache_file(expires=time.time() - 1)
+        self.__mock_get_qps_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        self.__make_manager(self.__cache_file).get_session_cookie()
+
+        self.__mock_get_qps_session_cookie.assert_called_once()
+
+    def test_get_session_cookie_should_authenticate_on_invalid_cache_file(
+            self):
+
+        with open(self.__cache_file, 'w') as cache_file:
+            cache_file.write('invalid')
+        self.__mock_get_qps_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        self.__make_manager(self.__cache_file).get_session_cookie()
+
+        self.__mock_get_qps_session_cookie.assert_called_once()
+
+    def test_get_session_cookie_should_not_cache_failed_authentication(self):
+
+        self.__mock_get_qps_session_cookie.return_value = None
+
+        manager = self.__make_manager(self.__cache_file)
+
+        self.assertIsNone(manager.get_session_cookie())
+        self.assertFalse(os.path.exists(self.__cache_file))
+
+    def test_invalidate_session_cookie_should_discard_cached_cookie(self):
+
+        self.__mock_get_qps_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        manager = self.__make_manager(self.__cache_file)
+        manager.invalidate_session_cookie(manager.get_session_cookie())
+
+        self.assertFalse(os.path.exists(self.__cache_file))
+        manager.get_session_cookie()
+        self.assertEqual(2, self.__mock_get_qps_session_cookie.call_count)
+
+    def test_invalidate_session_cookie_should_keep_renewed_cookie(self):
+
+        renewed_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        self.__mock_get_qps_session_cookie.return_value = renewed_cookie
+
+        expired_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        expired_cookie.value = 'Expired cookie'
+
+        manager = self.__make_manager(self.__cache_file)
+        manager.get_session_cookie()
+        manager.invalidate_session_cookie(expired_cookie)
+
+        self.assertTrue(os.path.exists(self.__cache_file))
+        self.assertEqual(renewed_cookie, manager.get_session_cookie())
+        self.__mock_get_qps_session_cookie.assert_called_once()
+
+    @classmethod
+    def __make_manager(cls, cookie_cache_file=None):
+        return credentials_manager.CredentialsManager(
+            server_address='test-server',
+            ad_domain='test-domain',
+            username='test-username',
+            password='test-password',
+            cookie_cache_file=cookie_cache_file)
+
+    def __write_cache_file(self, expires):
+        with open(self.__cache_file, 'w') as cache_file:
+            json.dump(
+                {
+                    'name': 'X-Qlik-Session',
+                    'value': 'Cached cookie',
+                    'domain': 'localhost',
+                    'path': '/',
+                    'expires': expires,
+                }, cache_file)
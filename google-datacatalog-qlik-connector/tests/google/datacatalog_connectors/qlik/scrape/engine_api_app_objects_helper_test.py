@@ -0,0 +1,544 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.qlik.scrape import \
+    engine_api_app_objects_helper
+
+from . import scrape_ops_mocks
+
+
+class EngineAPIAppObjectsHelperTest(unittest.TestCase):
+    __SCRAPE_PACKAGE = 'google.datacatalog_connectors.qlik.scrape'
+    __BASE_CLASS = f'{__SCRAPE_PACKAGE}.base_engine_api_helper' \
+                   f'.BaseEngineAPIHelper'
+    __HELPER_CLASS = f'{__SCRAPE_PACKAGE}.engine_api_app_objects_helper' \
+                     f'.EngineAPIAppObjectsHelper'
+
+    def setUp(self):
+        self.__helper = engine_api_app_objects_helper\
+            .EngineAPIAppObjectsHelper(
+                server_address='https://test-server',
+                auth_cookie=mock.MagicMock())
+        self.__per_object_helper = engine_api_app_objects_helper\
+            .EngineAPIAppObjectsHelper(
+                server_address='https://test-server',
+                auth_cookie=mock.MagicMock(),
+                bulk_properties=False)
+
+    @mock.patch(f'{__HELPER_CLASS}._EngineAPIAppObjectsHelper'
+                f'__get_app_objects')
+    def test_get_app_objects_should_raise_unknown_exception(
+            self, mock_get_app_objects):
+
+        mock_get_app_objects.side_effect = Exception
+        self.assertRaises(Exception, self.__helper.get_app_objects, 'app_id')
+
+    @mock.patch(f'{__HELPER_CLASS}._EngineAPIAppObjectsHelper'
+                f'__get_app_objects')
+    def test_get_app_objects_should_return_empty_lists_on_timeout(
+            self, mock_get_app_objects):
+
+        mock_get_app_objects.side_effect = asyncio.TimeoutError
+        app_objects = self.__helper.get_app_objects('app-id')
+
+        self.assertEqual(
+            {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': [],
+                'incomplete': True,
+            }, app_objects)
+        # The stalled session is resumed up to the default max attempts.
+        self.assertEqual(3, mock_get_app_objects.call_count)
+
+    @mock.patch(f'{__HELPER_CLASS}._EngineAPIAppObjectsHelper'
+                f'__get_app_objects')
+    def test_get_app_objects_should_not_resume_after_deadline(
+            self, mock_get_app_objects):
+
+        helper = engine_api_app_objects_helper.EngineAPIAppObjectsHelper(
+            server_address='https://test-server',
+            auth_cookie=mock.MagicMock(),
+            app_timeout=0)
+        mock_get_app_objects.side_effect = asyncio.TimeoutError
+        helper.get_app_objects('app-id')
+
+        mock_get_app_objects.assert_called_once()
+
+    @mock.patch(f'{__HELPER_CLASS}._EngineAPIAppObjectsHelper'
+                f'__get_app_objects')
+    def test_get_apps_objects_should_return_objects_by_app_id(
+            self, mock_get_app_objects):
+
+        async def get_app_objects(app_id, *args):
+            return {'dimensions': [{'app': app_id}]}
+
+        mock_get_app_objects.side_effect = get_app_objects
+        apps_objects = self.__helper.get_apps_objects(['app-1', 'app-2'], 2)
+
+        self.assertEqual(2, len(apps_objects))
+        self.assertEqual([{
+            'app': 'app-1'
+        }], apps_objects['app-1']['dimensions'])
+        self.assertEqual([], apps_objects['app-1']['sheets'])
+        self.assertEqual([{
+            'app': 'app-2'
+        }], apps_objects['app-2']['dimensions'])
+
+    @mock.patch(f'{__HELPER_CLASS}._EngineAPIAppObjectsHelper'
+                f'__get_app_objects')
+    def test_get_apps_objects_should_raise_unknown_exception(
+            self, mock_get_app_objects):
+
+        mock_get_app_objects.side_effect = ValueError
+        self.assertRaises(ValueError, self.__helper.get_apps_objects,
+                          ['app-1', 'app-2'], 2)
+
+    # BaseEngineAPIHelper._hold_websocket_communication is purposefully not
+    # mocked in the below test cases in order to simulate full send/reply
+    # scenarios with replies representing an App with objects of all supported
+    # types sharing the same websocket.
+    @mock.patch(f'{__BASE_CLASS}._generate_message_id')
+    @mock.patch(f'{__BASE_CLASS}._send_get_all_infos_message')
+    @mock.patch(f'{__BASE_CLASS}._BaseEngineAPIHelper__send_open_doc_message')
+    @mock.patch(f'{__BASE_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_get_app_objects_should_get_master_items_in_bulk(
+            self, mock_websocket, mock_send_open_doc, mock_send_get_all_infos,
+            mock_generate_message_id):
+
+        mock_send_open_doc.return_value = asyncio.sleep(delay=0, result=1)
+        mock_generate_message_id.side_effect = [2, 3, 4, 5, 6, 7, 8]
+
+        websocket_ctx = mock_websocket.return_value.__enter__.return_value
+        websocket_ctx.set_itr_break(0.1)
+        websocket_ctx.set_data([
+            self.__make_handle_reply(1, 1),
+            self.__make_sheets_reply(2),
+            self.__make_handle_reply(3, 2),
+            self.__make_handle_reply(4, 3),
+            self.__make_handle_reply(5, 4),
+            self.__make_list_layout_reply(6, 'qDimensionList', 'dimension-id',
+                                          {'qDim': {}}),
+            self.__make_list_layout_reply(7, 'qMeasureList', 'measure-id',
+                                          {'qMeasure': {}}),
+            self.__make_list_layout_reply(8, 'qAppObjectList',
+                                          'visualization-id',
+                                          {'visualization': 'barchart'}),
+        ])
+
+        app_objects = self.__helper.get_app_objects('app-id')
+
+        self.assertEqual([{
+            'qInfo': {
+                'qId': 'dimension-id'
+            },
+            'qMetaDef': {},
+            'qDim': {},
+        }], app_objects['dimensions'])
+        self.assertEqual('measure-id',
+                         app_objects['measures'][0]['qInfo']['qId'])
+        # Only the published Sheets are kept, without the Sheet cells.
+        self.assertEqual(1, len(app_objects['sheets']))
+        sheet = app_objects['sheets'][0]
+        self.assertEqual('sheet-id', sheet['qInfo']['qId'])
+        self.assertEqual('Sheet', sheet['qMeta']['title'])
+        self.assertNotIn('privileges', sheet['qMeta'])
+        self.assertNotIn('qData', sheet)
+        self.assertEqual('barchart',
+                         app_objects['visualizations'][0]['visualization'])
+
+        # No per-object requests are needed: 1 Get Objects message for the
+        # sheets, plus 1 Create Session Object and 1 Get Layout message for
+        # each Master Item type.
+        mock_send_get_all_infos.assert_not_called()
+        self.assertEqual(7, mock_generate_message_id.call_count)
+
+    @mock.patch(f'{__BASE_CLASS}._generate_message_id')
+    @mock.patch(f'{__BASE_CLASS}._send_get_all_infos_message')
+    @mock.patch(f'{__BASE_CLASS}._BaseEngineAPIHelper__send_open_doc_message')
+    @mock.patch(f'{__BASE_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_get_app_objects_should_fall_back_to_per_object_requests(
+            self, mock_websocket, mock_send_open_doc, mock_send_get_all_infos,
+            mock_generate_message_id):
+
+        mock_send_open_doc.return_value = asyncio.sleep(delay=0, result=1)
+        mock_send_get_all_infos.return_value = asyncio.sleep(delay=0, result=9)
+        mock_generate_message_id.side_effect = [2, 3, 4, 5, 6, 7, 10, 11, 12]
+
+        websocket_ctx = mock_websocket.return_value.__enter__.return_value
+        websocket_ctx.set_itr_break(0.1)
+        websocket_ctx.set_data([
+            self.__make_handle_reply(1, 1),
+            self.__make_sheets_reply(2),
+            self.__make_handle_reply(3, 2),
+            self.__make_handle_reply(4, 3),
+            {
+                'id': 5,
+                'error': {
+                    'code': -1,
+                    'message': 'Unsupported',
+                },
+            },
+            self.__make_list_layout_reply(6, 'qDimensionList', 'dimension-id',
+                                          {'qDim': {}}),
+            self.__make_list_layout_reply(7, 'qMeasureList', 'measure-id',
+                                          {'qMeasure': {}}),
+            {
+                'id': 9,
+                'result': {
+                    'qInfos': [{
+                        'qId': 'dimension-id',
+                        'qType': 'dimension'
+                    }, {
+                        'qId': 'visualization-id',
+                        'qType': 'masterobject'
+                    }, {
+                        'qId': 'broken-visualization-id',
+                        'qType': 'masterobject'
+                    }],
+                },
+            },
+            self.__make_handle_reply(10, 5),
+            {
+                'id': 11,
+                'error': {
+                    'code': 2,
+                    'message': 'Invalid handle',
+                },
+            },
+            self.__make_properties_reply(12, 'visualization-id'),
+        ])
+
+        app_objects = self.__helper.get_app_objects('app-id')
+
+        # Dimensions are not requested again on fallback.
+        self.assertEqual(1, len(app_objects['dimensions']))
+        self.assertEqual(1, len(app_objects['measures']))
+        self.assertEqual(1, len(app_objects['sheets']))
+        self.assertEqual(1, len(app_objects['visualizations']))
+        self.assertEqual('visualization-id',
+                         app_objects['visualizations'][0]['qInfo']['qId'])
+        mock_send_get_all_infos.assert_called_once()
+
+    @mock.patch(f'{__BASE_CLASS}._generate_message_id')
+    @mock.patch(f'{__BASE_CLASS}._send_get_all_infos_message')
+    @mock.patch(f'{__BASE_CLASS}._BaseEngineAPIHelper__send_open_doc_message')
+    @mock.patch(f'{__BASE_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_get_app_objects_should_get_master_items_per_object_if_set(
+            self, mock_websocket, mock_send_open_doc, mock_send_get_all_infos,
+            mock_generate_message_id):
+
+        mock_send_open_doc.return_value = asyncio.sleep(delay=0, result=1)
+        mock_send_get_all_infos.return_value = asyncio.sleep(delay=0, result=2)
+        mock_generate_message_id.side_effect = [3, 4, 5, 6, 7, 8, 9]
+
+        websocket_ctx = mock_websocket.return_value.__enter__.return_value
+        websocket_ctx.set_itr_break(0.1)
+        websocket_ctx.set_data([
+            self.__make_handle_reply(1, 1),
+            {
+                'id': 2,
+                'result': {
+                    'qInfos': [{
+                        'qId': 'dimension-id',
+                        'qType': 'dimension'
+                    }, {
+                        'qId': 'measure-id',
+                        'qType': 'measure'
+                    }, {
+                        'qId': 'visualization-id',
+                        'qType': 'masterobject'
+                    }, {
+                        'qId': 'sheet-id',
+                        'qType': 'sheet'
+                    }],
+                },
+            },
+            self.__make_sheets_reply(3),
+            self.__make_handle_reply(4, 2),
+            self.__make_handle_reply(5, 3),
+            self.__make_handle_reply(6, 4),
+            self.__make_properties_reply(7, 'dimension-id'),
+            self.__make_properties_reply(8, 'measure-id'),
+            self.__make_properties_reply(9, 'visualization-id'),
+        ])
+
+        app_objects = self.__per_object_helper.get_app_objects('app-id')
+
+        self.assertEqual(1, len(app_objects['dimensions']))
+        self.assertEqual('dimension-id',
+                         app_objects['dimensions'][0]['qInfo']['qId'])
+        self.assertEqual(1, len(app_objects['measures']))
+        self.assertEqual('measure-id',
+                         app_objects['measures'][0]['qInfo']['qId'])
+        self.assertEqual(1, len(app_objects['sheets']))
+        self.assertEqual('sheet-id', app_objects['sheets'][0]['qInfo']['qId'])
+        self.assertEqual(1, len(app_objects['visualizations']))
+        self.assertEqual('visualization-id',
+                         app_objects['visualizations'][0]['qInfo']['qId'])
+
+        # The App is opened only once for all the object types.
+        mock_send_open_doc.assert_called_once()
+        mock_send_get_all_infos.assert_called_once()
+        mock_websocket.assert_called_once()
+
+    @mock.patch(f'{__BASE_CLASS}._generate_message_id')
+    @mock.patch(f'{__BASE_CLASS}._send_get_all_infos_message')
+    @mock.patch(f'{__BASE_CLASS}._BaseEngineAPIHelper__send_open_doc_message')
+    @mock.patch(f'{__BASE_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_get_app_objects_per_object_should_return_empty_lists_on_none_available(  # noqa E510
+            self, mock_websocket, mock_send_open_doc, mock_send_get_all_infos,
+            mock_generate_message_id):
+
+        mock_send_open_doc.return_value = asyncio.sleep(delay=0, result=1)
+        mock_send_get_all_infos.return_value = asyncio.sleep(delay=0, result=2)
+        mock_generate_message_id.return_value = 3
+
+        websocket_ctx = mock_websocket.return_value.__enter__.return_value
+        websocket_ctx.set_itr_break(0.1)
+        websocket_ctx.set_data([
+            self.__make_handle_reply(1, 1),
+            {
+                'id': 2,
+                'result': {
+                    'qInfos': [],
+                },
+            },
+            {
+                'id': 3,
+                'result': {
+                    'qList': [],
+                },
+            },
+        ])
+
+        app_objects = self.__per_object_helper.get_app_objects('app-id')
+
+        self.assertEqual(
+            {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': [],
+            }, app_objects)
+
+    @mock.patch(f'{__BASE_CLASS}._generate_message_id')
+    @mock.patch(f'{__BASE_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_get_app_objects_should_resume_stalled_session(
+            self, mock_websocket, mock_generate_message_id):
+
+        metrics = mock.MagicMock()
+        helper = engine_api_app_objects_helper.EngineAPIAppObjectsHelper(
+            server_address='https://test-server',
+            auth_cookie=mock.MagicMock(),
+            metrics=metrics)
+
+        # The ids of the second session follow the ones of the first session,
+        # so re-requesting any object that was already received would break
+        # the sequence of replies.
+        mock_generate_message_id.side_effect = range(1, 19)
+
+        stalled_websocket = scrape_ops_mocks.AsyncContextManager()
+        stalled_websocket_ctx = stalled_websocket.__enter__.return_value
+        stalled_websocket_ctx.set_itr_break(0.02)
+        stalled_websocket_ctx.set_data([
+            self.__make_handle_reply(1, 1),
+            self.__make_sheets_reply(2),
+            self.__make_handle_reply(3, 2),
+            self.__make_handle_reply(4, 3),
+            {
+                'id': 5,
+                'error': {
+                    'code': -1,
+                    'message': 'Unsupported',
+                },
+            },
+            self.__make_list_layout_reply(6, 'qDimensionList', 'dimension-id',
+                                          {'qDim': {}}),
+            # The measures layout (7) never arrives.
+            self.__make_all_infos_reply(8, 'visualization-1',
+                                        'visualization-2'),
+            self.__make_handle_reply(9, 4),
+            self.__make_handle_reply(10, 5),
+            self.__make_properties_reply(11, 'visualization-1'),
+            # The visualization-2 properties (12) never arrive.
+        ])
+
+        resumed_websocket = scrape_ops_mocks.AsyncContextManager()
+        resumed_websocket_ctx = resumed_websocket.__enter__.return_value
+        resumed_websocket_ctx.set_itr_break(0.02)
+        resumed_websocket_ctx.set_data([
+            self.__make_handle_reply(13, 1),
+            self.__make_handle_reply(14, 2),
+            self.__make_all_infos_reply(15, 'visualization-1',
+                                        'visualization-2'),
+            self.__make_list_layout_reply(16, 'qMeasureList', 'measure-id',
+                                          {'qMeasure': {}}),
+            self.__make_handle_reply(17, 3),
+            self.__make_properties_reply(18, 'visualization-2'),
+        ])
+
+        mock_websocket.side_effect = [stalled_websocket, resumed_websocket]
+
+        app_objects = helper.get_app_objects('app-id', timeout=0.25)
+
+        self.assertEqual(1, len(app_objects['dimensions']))
+        self.assertEqual('measure-id',
+                         app_objects['measures'][0]['qInfo']['qId'])
+        self.assertEqual(1, len(app_objects['sheets']))
+        self.assertEqual(
+            ['visualization-1', 'visualization-2'],
+            [item['qInfo']['qId'] for item in app_objects['visualizations']])
+        self.assertNotIn('incomplete', app_objects)
+        self.assertEqual(2, mock_websocket.call_count)
+        self.assertEqual(18, mock_generate_message_id.call_count)
+        metrics.record_retry.assert_called_once_with('engine', 'OpenDoc',
+                                                     'app-id')
+
+    @mock.patch(f'{__BASE_CLASS}._generate_message_id')
+    @mock.patch(f'{__BASE_CLASS}._connect_websocket',
+                new_callable=scrape_ops_mocks.AsyncContextManager)
+    def test_get_app_objects_should_return_partial_results_on_stalled_session(
+            self, mock_websocket, mock_generate_message_id):
+
+        helper = engine_api_app_objects_helper.EngineAPIAppObjectsHelper(
+            server_address='https://test-server',
+            auth_cookie=mock.MagicMock(),
+            max_attempts=1)
+
+        mock_generate_message_id.side_effect = range(1, 8)
+
+        websocket_ctx = mock_websocket.return_value.__enter__.return_value
+        websocket_ctx.set_itr_break(0.02)
+        websocket_ctx.set_data([
+            self.__make_handle_reply(1, 1),
+            self.__make_sheets_reply(2),
+            self.__make_handle_reply(3, 2),
+            self.__make_list_layout_reply(6, 'qDimensionList', 'dimension-id',
+                                          {'qDim': {}}),
+        ])
+
+        app_objects = helper.get_app_objects('app-id', timeout=0.25)
+
+        self.assertEqual(1, len(app_objects['dimensions']))
+        self.assertEqual([], app_objects['measures'])
+        self.assertEqual(1, len(app_objects['sheets']))
+        self.assertEqual([], app_objects['visualizations'])
+        self.assertTrue(app_objects['incomplete'])
+        mock_websocket.assert_called_once()
+
+    @classmethod
+    def __make_all_infos_reply(cls, message_id, *visualization_ids):
+        return {
+            'id': message_id,
+            'result': {
+                'qInfos': [{
+                    'qId': visualization_id,
+                    'qType': 'masterobject'
+                } for visualization_id in visualization_ids],
+            },
+        }
+
+    @classmethod
+    def __make_handle_reply(cls, message_id, handle):
+        return {
+            'id': message_id,
+            'result': {
+                'qReturn': {
+                    'qHandle': handle,
+                },
+            },
+        }
+
+    @classmethod
+    def __make_sheets_reply(cls, message_id):
+        return {
+            'id': message_id,
+            'result': {
+                'qList': [{
+                    'qInfo': {
+                        'qId': 'sheet-id',
+                        'qType': 'sheet',
+                    },
+                    'qMeta': {
+                        'title': 'Sheet',
+                        'published': True,
+                        'privileges': ['read'],
+                    },
+                    'qData': {
+                        'cells': [{
+                            'name': 'cell-id',
+                        }],
+                    },
+                }, {
+                    'qInfo': {
+                        'qId': 'wip-sheet-id',
+                        'qType': 'sheet',
+                    },
+                    'qMeta': {
+                        'title': 'WIP Sheet',
+                        'published': False,
+                    },
+                }],
+            },
+        }
+
+    @classmethod
+    def __make_list_layout_reply(cls, message_id, list_name, object_id,
+                                 object_data):
+        object_data['qMetaDef'] = {}
+        return {
+            'id': message_id,
+            'result': {
+                'qLayout': {
+                    'qInfo': {
+                        'qId': f'{list_name}-id',
+                    },
+                    list_name: {
+                        'qItems': [{
+                            'qInfo': {
+                                'qId': object_id,
+                            },
+                            'qMeta': {},
+                            'qData': object_data,
+                        }],
+                    },
+                },
+            },
+        }
+
+    @classmethod
+    def __make_properties_reply(cls, message_id, object_id):
+        return {
+            'id': message_id,
+            'result': {
+                'qProp': {
+                    'qInfo': {
+                        'qId': object_id,
+                    },
+                },
+            },
+        }
@@ -0,0 +1,59 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from google.datacatalog_connectors.qlik.scrape import \
+    engine_api_app_objects_progress
+
+
+class EngineAPIAppObjectsProgressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__progress = \
+            engine_api_app_objects_progress.EngineAPIAppObjectsProgress()
+
+    def test_is_complete_should_consider_listed_keys(self):
+        self.__progress.results['sheets'] = []
+
+        self.assertTrue(self.__progress.is_complete('sheets'))
+        self.assertFalse(self.__progress.is_complete('dimensions'))
+
+    def test_is_complete_should_not_consider_fallback_keys(self):
+        self.__progress.results['dimensions'] = [{
+            'qInfo': {
+                'qId': 'dimension-id'
+            },
+        }]
+        self.__progress.add_fallback_key('dimensions')
+
+        self.assertTrue(self.__progress.is_fallback_key('dimensions'))
+        self.assertFalse(self.__progress.is_complete('dimensions'))
+
+    def test_get_received_ids_should_return_ids_of_all_types(self):
+        self.__progress.results['dimensions'] = [{
+            'qInfo': {
+                'qId': 'dimension-id'
+            },
+        }]
+        self.__progress.results['measures'] = [{
+            'qInfo': {
+                'qId': 'measure-id'
+            },
+        }, None]
+
+        self.assertEqual({'dimension-id', 'measure-id'},
+                         self.__progress.get_received_ids())
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.qlik.scrape import \
+    engine_api_apps_scheduler, engine_api_errors
+
+
+class EngineAPIAppsSchedulerTest(unittest.TestCase):
+
+    def test_run_should_return_results_by_app_id(self):
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(2)
+
+        async def scrape_app(app_id):
+            return f'{app_id}-metadata'
+
+        results = self.__run(
+            scheduler.run(['app-1', 'app-2', 'app-3'], scrape_app))
+
+        self.assertEqual(
+            {
+                'app-1': 'app-1-metadata',
+                'app-2': 'app-2-metadata',
+                'app-3': 'app-3-metadata',
+            }, results)
+
+    def test_run_should_not_exceed_max_sessions(self):
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(2)
+        sessions = {'current': 0, 'max': 0}
+
+        async def scrape_app(app_id):
+            sessions['current'] += 1
+            sessions['max'] = max(sessions['max'], sessions['current'])
+            await asyncio.sleep(0)
+            sessions['current'] -= 1
+
+        self.__run(
+            scheduler.run(['app-1', 'app-2', 'app-3', 'app-4'], scrape_app))
+
+        self.assertEqual(2, sessions['max'])
+
+    def test_run_should_shrink_max_sessions_and_requeue_app(self):
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(
+            3, retry_delay=0)
+        attempts = []
+
+        async def scrape_app(app_id):
+            attempts.append(app_id)
+            if app_id == 'app-3' and attempts.count(app_id) == 1:
+                raise engine_api_errors.MaxParallelSessionsExceededError
+            # Keep the other sessions running while the error is handled.
+            await asyncio.sleep(0.05)
+            return app_id
+
+        results = self.__run(
+            scheduler.run(['app-1', 'app-2', 'app-3'], scrape_app))
+
+        self.assertEqual(3, len(results))
+        self.assertEqual('app-3', results['app-3'])
+        self.assertEqual(2, attempts.count('app-3'))
+        self.assertEqual(2, scheduler.max_sessions)
+
+    def test_run_should_record_requeued_app_as_retry(self):
+        metrics = mock.MagicMock()
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(
+            2, retry_delay=0, metrics=metrics)
+        attempts = []
+
+        async def scrape_app(app_id):
+            attempts.append(app_id)
+            if len(attempts) == 1:
+                raise engine_api_errors.MaxParallelSessionsExceededError
+
+        self.__run(scheduler.run(['app-1'], scrape_app))
+
+        metrics.record_retry.assert_called_once_with('engine', 'OpenDoc',
+                                                     'app-1')
+
+    def test_run_should_raise_on_max_attempts_exceeded(self):
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(
+            2, max_attempts=2, retry_delay=0)
+
+        async def scrape_app(app_id):
+            raise engine_api_errors.MaxParallelSessionsExceededError
+
+        self.assertRaises(engine_api_errors.MaxParallelSessionsExceededError,
+                          self.__run, scheduler.run(['app-1'], scrape_app))
+        self.assertEqual(1, scheduler.max_sessions)
+
+    def test_run_should_cancel_running_sessions_on_unknown_exception(self):
+        scheduler = engine_api_apps_scheduler.EngineAPIAppsScheduler(2)
+        cancelled = []
+
+        async def scrape_app(app_id):
+            if app_id == 'app-1':
+                raise ValueError
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(app_id)
+                raise
+
+        async def run():
+            try:
+                await scheduler.run(['app-1', 'app-2'], scrape_app)
+            finally:
+                # Give the cancelled tasks a chance to handle the error.
+                await asyncio.sleep(0)
+
+        self.assertRaises(ValueError, self.__run, run())
+        self.assertEqual(['app-2'], cancelled)
+
+    @classmethod
+    def __run(cls, coroutine):
+        event_loop = asyncio.new_event_loop()
+        try:
+            return event_loop.run_until_complete(coroutine)
+        finally:
+            event_loop.close()
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import unittest
+
+from google.datacatalog_connectors.qlik.scrape import engine_api_event_loop
+
+
+class EngineAPIEventLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__event_loop = engine_api_event_loop.EngineAPIEventLoop()
+
+    def tearDown(self):
+        self.__event_loop.close()
+
+    def test_constructor_should_not_start_event_loop(self):
+        attrs = self.__event_loop.__dict__
+        self.assertIsNone(attrs['_EngineAPIEventLoop__event_loop'])
+        self.assertIsNone(attrs['_EngineAPIEventLoop__thread'])
+
+    def test_run_until_complete_should_return_coroutine_result(self):
+        self.assertEqual(
+            'result',
+            self.__event_loop.run_until_complete(
+                asyncio.sleep(0, result='result')))
+
+    def test_run_until_complete_should_raise_coroutine_exception(self):
+
+        async def fail():
+            raise ValueError
+
+        self.assertRaises(ValueError, self.__event_loop.run_until_complete,
+                          fail())
+
+    def test_run_until_complete_should_reuse_event_loop_and_thread(self):
+
+        async def get_loop_and_thread():
+            return asyncio.get_event_loop(), threading.current_thread()
+
+        first_run = self.__event_loop.run_until_complete(get_loop_and_thread())
+        second_run = self.__event_loop.run_until_complete(
+            get_loop_and_thread())
+
+        self.assertEqual(first_run, second_run)
+        self.assertIsNot(threading.current_thread(), first_run[1])
+
+    def test_run_until_complete_should_refuse_calls_from_event_loop_thread(
+            self):
+
+        async def run_nested():
+            self.__event_loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertRaises(RuntimeError, self.__event_loop.run_until_complete,
+                          run_nested())
+
+    def test_close_should_stop_event_loop_and_cancel_pending_tasks(self):
+        long_running_task = self.__event_loop.run_until_complete(
+            self.__make_task(asyncio.sleep(10)))
+        attrs = self.__event_loop.__dict__
+        thread = attrs['_EngineAPIEventLoop__thread']
+
+        self.__event_loop.close()
+
+        self.assertTrue(long_running_task.cancelled())
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(attrs['_EngineAPIEventLoop__event_loop'])
+
+    def test_close_should_cancel_pending_tasks_in_event_loop_thread(self):
+        cleanup_threads = []
+
+        async def sleep_and_clean_up():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                await asyncio.sleep(0)
+                cleanup_threads.append(threading.current_thread())
+
+        self.__event_loop.run_until_complete(
+            self.__make_task(sleep_and_clean_up()))
+        thread = self.__event_loop.__dict__['_EngineAPIEventLoop__thread']
+
+        self.__event_loop.close()
+
+        self.assertEqual([thread], cleanup_threads)
+
+    def test_close_should_allow_event_loop_restart(self):
+        self.__event_loop.run_until_complete(asyncio.sleep(0))
+        self.__event_loop.close()
+
+        self.assertEqual(
+            'result',
+            self.__event_loop.run_until_complete(
+                asyncio.sleep(0, result='result')))
+
+    @classmethod
+    async def __make_task(cls, coroutine):
+        return asyncio.ensure_future(coroutine)
@@ -18,8 +18,9 @@ import asyncio
 import unittest
 from unittest import mock
 
-from google.datacatalog_connectors.qlik.scrape import \
-    constants, engine_api_scraper
+import websockets
+
+from google.datacatalog_connectors.qlik.scrape import engine_api_scraper
 
 from . import scrape_ops_mocks
 
@@ -30,29 +31,77 @@ class EngineAPIScraperTest(unittest.TestCase):
     __SCRAPER_CLASS = f'{__SCRAPER_MODULE}.EngineAPIScraper'
 
     def setUp(self):
+        self.__credentials_manager = mock.MagicMock()
         self.__scraper = engine_api_scraper.EngineAPIScraper(
             server_address='https://test-server',
-            ad_domain='test-domain',
-            username='test-username',
-            password='test-password')
+            credentials_manager=self.__credentials_manager,
+            max_sessions=3)
+
+    def tearDown(self):
+        self.__scraper.close()
 
     def test_constructor_should_set_instance_attributes(self):
         attrs = self.__scraper.__dict__
 
         self.assertEqual('https://test-server',
                          attrs['_EngineAPIScraper__server_address'])
-        self.assertEqual('test-domain', attrs['_EngineAPIScraper__ad_domain'])
-        self.assertEqual('test-username', attrs['_EngineAPIScraper__username'])
-        self.assertEqual('test-password', attrs['_EngineAPIScraper__password'])
-
-        self.assertEqual('wss://test-server',
-                         attrs['_EngineAPIScraper__base_api_endpoint'])
-        self.assertIsNotNone(attrs['_EngineAPIScraper__common_headers'])
+        self.assertEqual(self.__credentials_manager,
+                         attrs['_EngineAPIScraper__credentials_manager'])
+        self.assertEqual(3, attrs['_EngineAPIScraper__max_sessions'])
 
     def test_constructor_should_not_set_auth_related_attributes(self):
         attrs = self.__scraper.__dict__
         self.assertIsNone(attrs['_EngineAPIScraper__auth_cookie'])
 
+    def test_get_sheets_should_reuse_the_event_loop_across_calls(self):
+        attrs = self.__scraper.__dict__
+        attrs['_EngineAPIScraper__auth_cookie'] = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
+
+        event_loops = []
+
+        async def get_sheets(*args):
+            event_loops.append(asyncio.get_event_loop())
+            return []
+
+        with mock.patch(
+                f'{self.__SCRAPER_MODULE}.engine_api_sheets_helper'
+                f'.EngineAPISheetsHelper._EngineAPISheetsHelper__get_sheets',
+                get_sheets):
+            self.__scraper.get_sheets('app-1')
+            self.__scraper.get_sheets('app-2')
+
+        self.assertEqual(2, len(event_loops))
+        self.assertIs(event_loops[0], event_loops[1])
+
+    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_app_objects_helper'
+                f'.EngineAPIAppObjectsHelper.get_app_objects_async')
+    @mock.patch(
+        f'{__SCRAPER_CLASS}._EngineAPIScraper__set_up_auth_cookie_async')
+    def test_get_app_objects_should_authenticate_user_beforehand(
+            self, mock_set_up_cookie, mock_get_app_objects):
+
+        mock_set_up_cookie.return_value = asyncio.sleep(0)
+        mock_get_app_objects.return_value = asyncio.sleep(0, result={})
+
+        self.assertEqual({}, self.__scraper.get_app_objects('app-id'))
+        mock_set_up_cookie.assert_called_once()
+        mock_get_app_objects.assert_called_once_with('app-id')
+
+    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_app_objects_helper'
+                f'.EngineAPIAppObjectsHelper.get_apps_objects_async')
+    @mock.patch(
+        f'{__SCRAPER_CLASS}._EngineAPIScraper__set_up_auth_cookie_async')
+    def test_get_apps_objects_should_authenticate_user_beforehand(
+            self, mock_set_up_cookie, mock_get_apps_objects):
+
+        mock_set_up_cookie.return_value = asyncio.sleep(0)
+        mock_get_apps_objects.return_value = asyncio.sleep(0, result={})
+
+        self.assertEqual({}, self.__scraper.get_apps_objects(['app-id']))
+        mock_set_up_cookie.assert_called_once()
+        mock_get_apps_objects.assert_called_once_with(['app-id'], 3)
+
     @mock.patch(f'{__SCRAPER_MODULE}.engine_api_dimensions_helper'
                 f'.EngineAPIDimensionsHelper.get_dimensions',
                 lambda *args: None)
@@ -93,36 +142,25 @@ class EngineAPIScraperTest(unittest.TestCase):
 
     @mock.patch(f'{__SCRAPER_MODULE}.engine_api_sheets_helper'
                 f'.EngineAPISheetsHelper.get_sheets', lambda *args: None)
-    @mock.patch(f'{__SCRAPER_MODULE}.authenticator.Authenticator'
-                f'.get_qps_session_cookie_windows_auth')
-    @mock.patch(f'{__SCRAPER_CLASS}'
-                f'._EngineAPIScraper__get_windows_authentication_url')
-    def test_set_up_auth_cookie_should_authenticate_and_set_instance_cookie(
-            self, mock_get_auth_url, mock_get_qps_session_cookie):
-
-        mock_get_auth_url.return_value = asyncio.sleep(0)
+    def test_set_up_auth_cookie_should_get_cookie_from_credentials_manager(
+            self):
 
         fake_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
-        mock_get_qps_session_cookie.return_value = fake_cookie
+        self.__credentials_manager.get_session_cookie.return_value = \
+            fake_cookie
 
         # Call a public method to trigger the authentication workflow.
         self.__scraper.get_sheets('app-id')
 
-        mock_get_qps_session_cookie.assert_called_once()
+        self.__credentials_manager.get_session_cookie.assert_called_once()
 
         attrs = self.__scraper.__dict__
         self.assertEqual(fake_cookie, attrs['_EngineAPIScraper__auth_cookie'])
 
     @mock.patch(f'{__SCRAPER_MODULE}.engine_api_sheets_helper'
                 f'.EngineAPISheetsHelper.get_sheets', lambda *args: None)
-    @mock.patch(f'{__SCRAPER_MODULE}.authenticator.Authenticator'
-                f'.get_qps_session_cookie_windows_auth')
-    @mock.patch(f'{__SCRAPER_CLASS}'
-                f'._EngineAPIScraper__get_windows_authentication_url')
     def test_set_up_auth_cookie_should_skip_authentication_on_available_cookie(
-            self, mock_get_auth_url, mock_get_qps_session_cookie):
-
-        mock_get_auth_url.return_value = asyncio.sleep(0)
+            self):
 
         attrs = self.__scraper.__dict__
         attrs['_EngineAPIScraper__auth_cookie'] = \
@@ -131,57 +169,45 @@ class EngineAPIScraperTest(unittest.TestCase):
         # Call a public method to trigger the authentication workflow.
         self.__scraper.get_sheets('app-id')
 
-        mock_get_qps_session_cookie.assert_not_called()
+        self.__credentials_manager.get_session_cookie.assert_not_called()
 
-    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_sheets_helper'
-                f'.EngineAPISheetsHelper.get_sheets', lambda *args: None)
-    @mock.patch(f'{__SCRAPER_MODULE}.authenticator.Authenticator'
-                f'.get_qps_session_cookie_windows_auth',
-                lambda *args, **kwargs: None)
-    @mock.patch(f'{__SCRAPE_PACKAGE}.engine_api_scraper.websockets.connect',
-                new_callable=scrape_ops_mocks.AsyncContextManager)
-    def test_get_windows_authentication_url_should_pass_appropriate_auth_args(
-            self, mock_websocket):
+    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_app_objects_helper'
+                f'.EngineAPIAppObjectsHelper.get_apps_objects_async')
+    def test_get_apps_objects_should_reauthenticate_on_rejected_cookie(
+            self, mock_get_apps_objects):
 
-        mock_websocket.return_value.__enter__.return_value.set_data(
-            [], stop_itr_on_no_data=True)
+        expired_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        renewed_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        self.__credentials_manager.get_session_cookie.side_effect = [
+            expired_cookie, renewed_cookie
+        ]
+        mock_get_apps_objects.side_effect = [
+            websockets.exceptions.InvalidStatusCode(401),
+            asyncio.sleep(0, result={'app-id': {}}),
+        ]
 
-        # Call a public method to trigger the authentication workflow.
-        self.__scraper.get_sheets('app-id')
+        self.assertEqual({'app-id': {}},
+                         self.__scraper.get_apps_objects(['app-id']))
+
+        self.__credentials_manager.invalidate_session_cookie \
+            .assert_called_once_with(expired_cookie)
+        self.assertEqual(2, mock_get_apps_objects.call_count)
 
         attrs = self.__scraper.__dict__
-        extra_headers = attrs['_EngineAPIScraper__common_headers'].copy()
-        extra_headers['User-Agent'] = 'Windows'
+        self.assertEqual(renewed_cookie,
+                         attrs['_EngineAPIScraper__auth_cookie'])
 
-        expected_ws_call_args = mock.call(
-            uri=f'wss://test-server/app/?transient=?Xrfkey={constants.XRFKEY}'
-            f'&reloadUri=https://test-server/dev-hub/engine-api-explorer',
-            extra_headers=extra_headers)
-        actual_ws_call_args = mock_websocket.call_args_list[0]
-        self.assertEqual(expected_ws_call_args, actual_ws_call_args)
+    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_app_objects_helper'
+                f'.EngineAPIAppObjectsHelper.get_app_objects_async')
+    def test_get_app_objects_should_not_reauthenticate_on_other_errors(
+            self, mock_get_app_objects):
 
-    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_sheets_helper'
-                f'.EngineAPISheetsHelper.get_sheets', lambda *args: None)
-    @mock.patch(f'{__SCRAPER_MODULE}.authenticator.Authenticator'
-                f'.get_qps_session_cookie_windows_auth')
-    @mock.patch(f'{__SCRAPE_PACKAGE}.engine_api_scraper.websockets.connect',
-                new_callable=scrape_ops_mocks.AsyncContextManager)
-    def test_get_windows_authentication_url_should_return_login_uri(
-            self, mock_websocket, mock_get_qps_session_cookie):
-
-        mock_websocket.return_value.__enter__.return_value.set_data([
-            {
-                'params': {
-                    'loginUri': 'redirect-url'
-                }
-            },
-        ])
+        mock_get_app_objects.side_effect = \
+            websockets.exceptions.InvalidStatusCode(500)
 
-        # Call a public method to trigger the authentication workflow.
-        self.__scraper.get_sheets('app-id')
+        self.assertRaises(websockets.exceptions.InvalidStatusCode,
+                          self.__scraper.get_app_objects, 'app-id')
 
-        mock_get_qps_session_cookie.assert_called_once_with(
-            ad_domain='test-domain',
-            username='test-username',
-            password='test-password',
-            auth_url='redirect-url')
+        self.__credentials_manager.invalidate_session_cookie \
+            .assert_not_called()
+        mock_get_app_objects.assert_called_once()
@@ -88,6 +88,24 @@ class EngineAPISheetsHelperTest(unittest.TestCase):
                         'qInfo': {
                             'qId': 'sheet-id',
                         },
+                        'qMeta': {
+                            'published': True,
+                            'owner': {
+                                'userId': 'test-user',
+                                'userDirectory': 'test-dir',
+                                'name': 'Test User',
+                            },
+                        },
+                        'qData': {
+                            'cells': [],
+                        },
+                    }, {
+                        'qInfo': {
+                            'qId': 'wip-sheet-id',
+                        },
+                        'qMeta': {
+                            'published': False,
+                        },
                     }],
                 },
             },
@@ -95,8 +113,12 @@ class EngineAPISheetsHelperTest(unittest.TestCase):
 
         sheets = self.__helper.get_sheets('app-id')
 
+        # Only the published Sheets are kept, without the unused fields.
         self.assertEqual(1, len(sheets))
         self.assertEqual('sheet-id', sheets[0].get('qInfo').get('qId'))
+        self.assertEqual('Test User',
+                         sheets[0].get('qMeta').get('owner').get('name'))
+        self.assertNotIn('qData', sheets[0])
         mock_send_open_doc.assert_called_once()
 
     # BaseEngineAPIHelper._hold_websocket_communication is purposefully not
@@ -0,0 +1,105 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import json
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.qlik.scrape import json_codec
+
+
+def _is_installed(module_name):
+    try:
+        importlib.import_module(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+class JSONCodecTest(unittest.TestCase):
+    __SCRAPE_PACKAGE = 'google.datacatalog_connectors.qlik.scrape'
+    __CODEC_MODULE = f'{__SCRAPE_PACKAGE}.json_codec'
+
+    __MESSAGE = {
+        'jsonrpc': '2.0',
+        'id': 1,
+        'result': {
+            'qProp': {
+                'qInfo': {
+                    'qId': 'dimension-id',
+                },
+                'title': 'Título',
+            },
+        },
+    }
+
+    @mock.patch(f'{__CODEC_MODULE}.importlib.import_module')
+    def test_constructor_should_prefer_fastest_installed_backend(
+            self, mock_import_module):
+
+        ujson_module = mock.MagicMock()
+
+        def import_module(name):
+            if name != 'ujson':
+                raise ImportError
+            return ujson_module
+
+        mock_import_module.side_effect = import_module
+
+        codec = json_codec.JSONCodec()
+
+        self.assertEqual('ujson', codec.backend)
+        self.assertEqual(['orjson', 'ujson'], [
+            call_args[0][0] for call_args in mock_import_module.call_args_list
+        ])
+
+    @mock.patch(f'{__CODEC_MODULE}.importlib.import_module')
+    def test_constructor_should_fall_back_to_standard_json(
+            self, mock_import_module):
+
+        mock_import_module.side_effect = ImportError
+
+        codec = json_codec.JSONCodec()
+
+        self.assertEqual('json', codec.backend)
+        self.assertEqual(self.__MESSAGE,
+                         codec.loads(codec.dumps(self.__MESSAGE)))
+
+    def test_constructor_should_raise_on_unsupported_backend(self):
+        self.assertRaises(ValueError, json_codec.JSONCodec, 'simplejson')
+
+    def test_default_codec_should_be_set(self):
+        self.assertIn(json_codec.default_codec.backend,
+                      json_codec.JSONCodec.BACKENDS)
+
+    def test_json_backend_should_round_trip_messages(self):
+        self.__assert_round_trip(json_codec.JSONCodec('json'))
+
+    @unittest.skipUnless(_is_installed('orjson'), 'orjson is not installed')
+    def test_orjson_backend_should_round_trip_messages(self):
+        self.__assert_round_trip(json_codec.JSONCodec('orjson'))
+
+    @unittest.skipUnless(_is_installed('ujson'), 'ujson is not installed')
+    def test_ujson_backend_should_round_trip_messages(self):
+        self.__assert_round_trip(json_codec.JSONCodec('ujson'))
+
+    def __assert_round_trip(self, codec):
+        message = codec.dumps(self.__MESSAGE)
+        # Text frames are expected by the Engine API.
+        self.assertIsInstance(message, str)
+        self.assertEqual(self.__MESSAGE, json.loads(message))
+        self.assertEqual(self.__MESSAGE, codec.loads(message))
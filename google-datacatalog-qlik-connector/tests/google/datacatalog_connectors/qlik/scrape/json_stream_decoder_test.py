@@ -0,0 +1,86 @@
+#!/usr/bin/python
+#
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+
+from google.datacatalog_connectors.qlik.scrape import json_stream_decoder
+
+
+class JSONStreamDecoderTest(unittest.TestCase):
+
+    def test_iter_array_items_should_decode_items_split_across_chunks(self):
+        items = [{
+            'id': f'app-{index}',
+            'name': 'Ação' * index
+        } for index in range(10)]
+        items.extend([12345, 1.5, True, None, 'text', []])
+        content = json.dumps(items, ensure_ascii=False).encode('utf-8')
+
+        for chunk_size in (1, 2, 3, 7, 64, len(content)):
+            chunks = [
+                content[start:start + chunk_size]
+                for start in range(0, len(content), chunk_size)
+            ]
+            self.assertEqual(
+                items,
+                list(
+                    json_stream_decoder.JSONStreamDecoder.iter_array_items(
+                        chunks)))
+
+    def test_iter_array_items_should_yield_items_before_the_end_of_data(self):
+        chunks = iter([b'[{"id": "app-1"},', b' {"id": "app-2"}', b']'])
+
+        items = json_stream_decoder.JSONStreamDecoder.iter_array_items(chunks)
+
+        self.assertEqual({'id': 'app-1'}, next(items))
+        # The decoder looks one chunk ahead to detect the end of data.
+        self.assertEqual([b']'], list(chunks))
+
+    def test_iter_array_items_should_decode_str_chunks(self):
+        self.assertEqual(
+            [12, 'a'],
+            list(
+                json_stream_decoder.JSONStreamDecoder.iter_array_items(
+                    ['[1', '2, "', 'a"]'])))
+
+    def test_iter_array_items_should_decode_empty_array(self):
+        self.assertEqual(
+            [],
+            list(
+                json_stream_decoder.JSONStreamDecoder.iter_array_items(
+                    [b' [ ', b' ]\n'])))
+
+    def test_iter_array_items_should_raise_on_not_array_content(self):
+        self.assertRaises(
+            ValueError, list,
+            json_stream_decoder.JSONStreamDecoder.iter_array_items([b'{}']))
+
+    def test_iter_array_items_should_raise_on_missing_delimiter(self):
+        self.assertRaises(
+            ValueError, list,
+            json_stream_decoder.JSONStreamDecoder.iter_array_items([b'[1 2]']))
+
+    def test_iter_array_items_should_raise_on_truncated_content(self):
+        self.assertRaises(
+            ValueError, list,
+            json_stream_decoder.JSONStreamDecoder.iter_array_items(
+                [b'[{"id": ']))
+
+    def test_iter_array_items_should_raise_on_no_content(self):
+        self.assertRaises(
+            ValueError, list,
+            json_stream_decoder.JSONStreamDecoder.iter_array_items([]))
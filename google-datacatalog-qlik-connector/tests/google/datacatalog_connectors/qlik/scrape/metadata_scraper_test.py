@@ -38,6 +38,59 @@ class MetadataScraperTest(unittest.TestCase):
         self.assertIsNotNone(attrs['_MetadataScraper__qrs_api_helper'])
         self.assertIsNotNone(attrs['_MetadataScraper__engine_api_scraper'])
 
+    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_scraper.EngineAPIScraper')
+    @mock.patch(f'{__SCRAPER_MODULE}.repository_services_api_helper'
+                f'.RepositoryServicesAPIHelper')
+    @mock.patch(f'{__SCRAPER_MODULE}.credentials_manager.CredentialsManager')
+    def test_constructor_should_share_credentials_manager_between_clients(
+            self, mock_credentials_manager, mock_qrs_api_helper,
+            mock_engine_api_scraper):
+
+        metrics = scrape.APIMetrics()
+        scrape.MetadataScraper(server_address='test-server',
+                               ad_domain='test-domain',
+                               username='test-username',
+                               password='test-password',
+                               max_sessions=2,
+                               cookie_cache_file='cookie.json',
+                               metrics=metrics)
+
+        mock_credentials_manager.assert_called_once_with(
+            'test-server', 'test-domain', 'test-username', 'test-password',
+            'cookie.json')
+        credentials_manager = mock_credentials_manager.return_value
+        mock_qrs_api_helper.assert_called_once_with('test-server',
+                                                    credentials_manager,
+                                                    metrics)
+        mock_engine_api_scraper.assert_called_once_with(
+            'test-server', credentials_manager, 2, metrics)
+
+    @mock.patch(f'{__SCRAPER_MODULE}.engine_api_scraper.EngineAPIScraper')
+    @mock.patch(f'{__SCRAPER_MODULE}.repository_services_api_helper'
+                f'.RepositoryServicesAPIHelper')
+    @mock.patch(f'{__SCRAPER_MODULE}.credentials_manager.CredentialsManager')
+    def test_constructor_should_use_default_max_sessions(
+            self, mock_credentials_manager, mock_qrs_api_helper,
+            mock_engine_api_scraper):
+
+        scrape.MetadataScraper(server_address='test-server',
+                               ad_domain='test-domain',
+                               username='test-username',
+                               password='test-password')
+
+        mock_engine_api_scraper.assert_called_once_with(
+            'test-server', mock_credentials_manager.return_value,
+            scrape.MetadataScraper.DEFAULT_MAX_SESSIONS, None)
+        self.assertGreater(scrape.MetadataScraper.DEFAULT_MAX_SESSIONS, 1)
+
+    def test_close_should_close_engine_api_scraper(self):
+        attrs = self.__scraper.__dict__
+        engine_api_scraper = attrs['_MetadataScraper__engine_api_scraper']
+
+        self.__scraper.close()
+
+        engine_api_scraper.close.assert_called_once()
+
     def test_scrape_all_apps_should_return_list_on_success(self):
         attrs = self.__scraper.__dict__
         qrs_api_helper = attrs['_MetadataScraper__qrs_api_helper']
@@ -46,13 +99,26 @@ class MetadataScraperTest(unittest.TestCase):
             'id': 'app-id',
         }]
 
-        qrs_api_helper.get_full_app_list.return_value = apps_metadata
+        qrs_api_helper.get_full_app_list.return_value = iter(apps_metadata)
 
         apps = self.__scraper.scrape_all_apps()
 
         self.assertEqual(1, len(apps))
         self.assertEqual('app-id', apps[0].get('id'))
-        qrs_api_helper.get_full_app_list.assert_called_once()
+        qrs_api_helper.get_full_app_list.assert_called_once_with(
+            published_only=False, stream_id=None)
+
+    def test_scrape_all_apps_should_pass_filters_to_qrs_api_helper(self):
+        attrs = self.__scraper.__dict__
+        qrs_api_helper = attrs['_MetadataScraper__qrs_api_helper']
+
+        qrs_api_helper.get_full_app_list.return_value = iter([])
+
+        self.__scraper.scrape_all_apps(published_only=True,
+                                       stream_id='stream-id')
+
+        qrs_api_helper.get_full_app_list.assert_called_once_with(
+            published_only=True, stream_id='stream-id')
 
     def test_scrape_all_custom_property_definitions_should_return_list_on_success(  # noqa E510
             self):
@@ -92,6 +158,130 @@ class MetadataScraperTest(unittest.TestCase):
         self.assertEqual('stream-id', streams[0].get('id'))
         qrs_api_helper.get_full_stream_list.assert_called_once()
 
+    def test_scrape_app_objects_should_return_dict_on_success(self):
+        attrs = self.__scraper.__dict__
+        engine_api_scraper = attrs['_MetadataScraper__engine_api_scraper']
+
+        engine_api_scraper.get_app_objects.return_value = {
+            'dimensions': [{
+                'qInfo': {
+                    'qId': 'dimension-id',
+                },
+                'qMetaDef': {},
+            }],
+            'measures': [{
+                'qInfo': {
+                    'qId': 'measure-id',
+                },
+                'qMetaDef': {},
+            }],
+            'sheets': [{
+                'qInfo': {
+                    'qId': 'sheet-id',
+                },
+                'qMeta': {},
+            }],
+            'visualizations': [{
+                'qInfo': {
+                    'qId': 'visualization-id',
+                },
+                'qMetaDef': {},
+            }],
+        }
+
+        app_objects = self.__scraper.scrape_app_objects({'id': 'app-id'})
+
+        self.assertEqual('dimension-id',
+                         app_objects['dimensions'][0]['qInfo']['qId'])
+        self.assertEqual('measure-id',
+                         app_objects['measures'][0]['qInfo']['qId'])
+        self.assertEqual('sheet-id', app_objects['sheets'][0]['qInfo']['qId'])
+        self.assertEqual('visualization-id',
+                         app_objects['visualizations'][0]['qInfo']['qId'])
+        engine_api_scraper.get_app_objects.assert_called_once_with('app-id')
+
+    def test_scrape_app_objects_should_return_empty_lists_on_no_server_response(  # noqa E510
+            self):
+
+        attrs = self.__scraper.__dict__
+        engine_api_scraper = attrs['_MetadataScraper__engine_api_scraper']
+
+        engine_api_scraper.get_app_objects.return_value = None
+
+        app_objects = self.__scraper.scrape_app_objects({'id': 'app-id'})
+
+        self.assertEqual(
+            {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': [],
+            }, app_objects)
+
+    def test_scrape_apps_objects_should_return_dict_by_app_id_on_success(self):
+
+        attrs = self.__scraper.__dict__
+        engine_api_scraper = attrs['_MetadataScraper__engine_api_scraper']
+
+        engine_api_scraper.get_apps_objects.return_value = {
+            'app-1': {
+                'sheets': [{
+                    'qInfo': {
+                        'qId': 'sheet-id',
+                    },
+                    'qMeta': {},
+                }],
+            },
+        }
+
+        apps_objects = self.__scraper.scrape_apps_objects([{
+            'id': 'app-1'
+        }, {
+            'id': 'app-2'
+        }])
+
+        self.assertEqual('sheet-id',
+                         apps_objects['app-1']['sheets'][0]['qInfo']['qId'])
+        self.assertEqual([], apps_objects['app-1']['dimensions'])
+        self.assertEqual(
+            {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': [],
+            }, apps_objects['app-2'])
+        engine_api_scraper.get_apps_objects.assert_called_once_with(
+            ['app-1', 'app-2'])
+
+    def test_scrape_apps_objects_should_keep_incomplete_flag(self):
+        attrs = self.__scraper.__dict__
+        engine_api_scraper = attrs['_MetadataScraper__engine_api_scraper']
+
+        engine_api_scraper.get_apps_objects.return_value = {
+            'app-1': {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': [],
+                'incomplete': True,
+            },
+            'app-2': {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': [],
+            },
+        }
+
+        apps_objects = self.__scraper.scrape_apps_objects([{
+            'id': 'app-1'
+        }, {
+            'id': 'app-2'
+        }])
+
+        self.assertTrue(apps_objects['app-1']['incomplete'])
+        self.assertNotIn('incomplete', apps_objects['app-2'])
+
     def test_scrape_dimensions_should_return_list_on_success(self):
         attrs = self.__scraper.__dict__
         engine_api_scraper = attrs['_MetadataScraper__engine_api_scraper']
@@ -28,24 +28,20 @@ class RepositoryServicesAPIHelperTest(unittest.TestCase):
     __HELPER_MODULE = f'{__SCRAPE_PACKAGE}.repository_services_api_helper'
 
     def setUp(self):
+        self.__credentials_manager = mock.MagicMock()
         self.__helper = \
             repository_services_api_helper.RepositoryServicesAPIHelper(
                 server_address='test-server',
-                ad_domain='test-domain',
-                username='test-username',
-                password='test-password')
+                credentials_manager=self.__credentials_manager)
 
     def test_constructor_should_set_instance_attributes(self):
         attrs = self.__helper.__dict__
 
         self.assertEqual('test-server',
                          attrs['_RepositoryServicesAPIHelper__server_address'])
-        self.assertEqual('test-domain',
-                         attrs['_RepositoryServicesAPIHelper__ad_domain'])
-        self.assertEqual('test-username',
-                         attrs['_RepositoryServicesAPIHelper__username'])
-        self.assertEqual('test-password',
-                         attrs['_RepositoryServicesAPIHelper__password'])
+        self.assertEqual(
+            self.__credentials_manager,
+            attrs['_RepositoryServicesAPIHelper__credentials_manager'])
 
         self.assertEqual(
             'test-server/qrs',
@@ -58,46 +54,73 @@ class RepositoryServicesAPIHelperTest(unittest.TestCase):
         self.assertIsNone(attrs['_RepositoryServicesAPIHelper__http_session'])
 
     @mock.patch(f'{__HELPER_MODULE}.sessions.Session.get')
-    @mock.patch(f'{__HELPER_MODULE}.requests')
-    @mock.patch(f'{__HELPER_MODULE}.authenticator.Authenticator')
     def test_scrape_operations_should_authenticate_user_beforehand(
-            self, mock_authenticator, mock_requests, mock_session_get):
-
-        fake_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+            self, mock_session_get):
 
-        mock_requests.get.return_value = \
-            scrape_ops_mocks.FakeResponseWithHeader(
-                'location', 'redirect-url', True)
-        mock_authenticator.get_qps_session_cookie_windows_auth.return_value = \
-            fake_cookie
+        self.__credentials_manager.get_session_cookie.return_value = \
+            scrape_ops_mocks.FakeQPSSessionCookie()
         mock_session_get.return_value = \
             scrape_ops_mocks.FakeResponseWithContent('[]')
 
         # Call a public method to trigger the authentication workflow.
-        self.__helper.get_full_stream_list()
+        list(self.__helper.get_full_stream_list())
 
-        attrs = self.__helper.__dict__
-        headers = attrs['_RepositoryServicesAPIHelper__common_headers'].copy()
-        headers['User-Agent'] = 'Windows'
-        mock_requests.get.assert_called_with(
-            url=f'test-server/qrs/about?Xrfkey={constants.XRFKEY}',
-            headers=headers,
-            allow_redirects=False)
-
-        mock_authenticator.get_qps_session_cookie_windows_auth \
-            .assert_called_once()
-        mock_authenticator.get_qps_session_cookie_windows_auth \
-            .assert_called_with(
-                ad_domain='test-domain',
-                username='test-username',
-                password='test-password',
-                auth_url='redirect-url')
+        self.__credentials_manager.get_session_cookie.assert_called_once()
 
+        attrs = self.__helper.__dict__
         http_session = attrs['_RepositoryServicesAPIHelper__http_session']
         self.assertIsNotNone(http_session)
         self.assertEqual('Test cookie',
                          http_session.cookies.get('X-Qlik-Session'))
 
+    @mock.patch(f'{__HELPER_MODULE}.sessions.Session.get')
+    def test_scrape_operations_should_reauthenticate_on_rejected_cookie(
+            self, mock_session_get):
+
+        expired_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        renewed_cookie = scrape_ops_mocks.FakeQPSSessionCookie()
+        renewed_cookie.value = 'Renewed cookie'
+        self.__credentials_manager.get_session_cookie.side_effect = [
+            expired_cookie, renewed_cookie
+        ]
+        mock_session_get.side_effect = [
+            scrape_ops_mocks.FakeResponseWithContent('{}', 401),
+            scrape_ops_mocks.FakeResponseWithContent(
+                '[{\"id\": \"stream-id\"}]'),
+        ]
+
+        streams = list(self.__helper.get_full_stream_list())
+
+        self.assertEqual('stream-id', streams[0].get('id'))
+        self.__credentials_manager.invalidate_session_cookie \
+            .assert_called_once_with(expired_cookie)
+        self.assertEqual(2, mock_session_get.call_count)
+
+        attrs = self.__helper.__dict__
+        http_session = attrs['_RepositoryServicesAPIHelper__http_session']
+        self.assertEqual('Renewed cookie',
+                         http_session.cookies.get('X-Qlik-Session'))
+
+    @mock.patch(f'{__HELPER_MODULE}.sessions.Session.get')
+    def test_scrape_operations_should_record_metrics(self, mock_session_get):
+        metrics = mock.MagicMock()
+        helper = repository_services_api_helper.RepositoryServicesAPIHelper(
+            'test-server', self.__credentials_manager, metrics)
+        mock_session_get.side_effect = [
+            scrape_ops_mocks.FakeResponseWithContent('{}', 401),
+            scrape_ops_mocks.FakeResponseWithContent(
+                '[{\"id\": \"stream-id\"}]'),
+        ]
+
+        list(helper.get_full_stream_list())
+
+        metrics.record_retry.assert_called_once_with('qrs', 'stream/full')
+        metrics.record_request.assert_called_once_with('qrs',
+                                                       'stream/full',
+                                                       0.02,
+                                                       reply_bytes=21,
+                                                       error=False)
+
     @mock.patch(f'{__HELPER_MODULE}.sessions.Session')
     def test_get_full_app_list_should_return_list_on_success(
             self, mock_session):
@@ -108,14 +131,14 @@ class RepositoryServicesAPIHelperTest(unittest.TestCase):
         attrs = self.__helper.__dict__
         attrs['_RepositoryServicesAPIHelper__http_session'] = mock_session
 
-        apps = self.__helper.get_full_app_list()
+        apps = list(self.__helper.get_full_app_list())
 
         self.assertEqual(1, len(apps))
         self.assertEqual('app-id', apps[0].get('id'))
         mock_session.get.assert_called_once_with(
             url=f'test-server/qrs/app/hublist/full?Xrfkey={constants.XRFKEY}',
             headers=attrs['_RepositoryServicesAPIHelper__common_headers'],
-        )
+            stream=True)
 
     @mock.patch(f'{__HELPER_MODULE}.sessions.Session')
     def test_get_full_custom_property_definition_list_should_return_list_on_success(  # noqa E510
@@ -128,8 +151,8 @@ class RepositoryServicesAPIHelperTest(unittest.TestCase):
         attrs = self.__helper.__dict__
         attrs['_RepositoryServicesAPIHelper__http_session'] = mock_session
 
-        custom_property_defs = \
-            self.__helper.get_full_custom_property_definition_list()
+        custom_property_defs = list(
+            self.__helper.get_full_custom_property_definition_list())
 
         self.assertEqual(1, len(custom_property_defs))
         self.assertEqual('custom-property-definition-id',
@@ -138,7 +161,7 @@ class RepositoryServicesAPIHelperTest(unittest.TestCase):
             url=f'test-server/qrs'
             f'/custompropertydefinition/full?Xrfkey={constants.XRFKEY}',
             headers=attrs['_RepositoryServicesAPIHelper__common_headers'],
-        )
+            stream=True)
 
     @mock.patch(f'{__HELPER_MODULE}.sessions.Session')
     def test_get_full_stream_list_should_return_list_on_success(
@@ -151,11 +174,51 @@ class RepositoryServicesAPIHelperTest(unittest.TestCase):
         attrs = self.__helper.__dict__
         attrs['_RepositoryServicesAPIHelper__http_session'] = mock_session
 
-        streams = self.__helper.get_full_stream_list()
+        streams = list(self.__helper.get_full_stream_list())
 
         self.assertEqual(1, len(streams))
         self.assertEqual('stream-id', streams[0].get('id'))
         mock_session.get.assert_called_once_with(
             url=f'test-server/qrs/stream/full?Xrfkey={constants.XRFKEY}',
             headers=attrs['_RepositoryServicesAPIHelper__common_headers'],
-        )
+            stream=True)
+
+    @mock.patch(f'{__HELPER_MODULE}.sessions.Session')
+    def test_get_full_app_list_should_push_filters_to_server(
+            self, mock_session):
+
+        mock_session.get.return_value = \
+            scrape_ops_mocks.FakeResponseWithContent('[]')
+
+        attrs = self.__helper.__dict__
+        attrs['_RepositoryServicesAPIHelper__http_session'] = mock_session
+
+        list(
+            self.__helper.get_full_app_list(published_only=True,
+                                            stream_id='stream-id'))
+
+        mock_session.get.assert_called_once_with(
+            url=f'test-server/qrs/app/hublist/full?Xrfkey={constants.XRFKEY}'
+            f'&filter=published%20eq%20true'
+            f'%20and%20stream.id%20eq%20stream-id',
+            headers=attrs['_RepositoryServicesAPIHelper__common_headers'],
+            stream=True)
+
+    @mock.patch(f'{__HELPER_MODULE}.sessions.Session')
+    def test_get_full_app_list_should_decode_response_in_chunks(
+            self, mock_session):
+
+        response = scrape_ops_mocks.FakeResponseWithContent(
+            '[{"id": "app-1"}, {"id": "app-2"}]')
+        mock_session.get.return_value = response
+
+        attrs = self.__helper.__dict__
+        attrs['_RepositoryServicesAPIHelper__http_session'] = mock_session
+        attrs['_RepositoryServicesAPIHelper__RESPONSE_CHUNK_SIZE'] = 4
+
+        apps = self.__helper.get_full_app_list()
+
+        self.assertEqual({'id': 'app-1'}, next(apps))
+        self.assertFalse(response.closed)
+        self.assertEqual([{'id': 'app-2'}], list(apps))
+        self.assertTrue(response.closed)
@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import asyncio
+import datetime
 import json
 from unittest import mock
 
@@ -36,12 +37,24 @@ class FakeQPSSessionCookie:
 # ============== #
 class FakeResponseWithContent:
 
-    def __init__(self, content):
+    def __init__(self, content, status_code=200):
         self.__content = content
+        self.status_code = status_code
+        self.encoding = 'utf-8'
+        self.elapsed = datetime.timedelta(milliseconds=20)
+        self.closed = False
 
     def json(self):
         return json.loads(self.__content)
 
+    def iter_content(self, chunk_size):
+        content = self.__content.encode(self.encoding)
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
 
 class FakeResponseWithCookies:
 
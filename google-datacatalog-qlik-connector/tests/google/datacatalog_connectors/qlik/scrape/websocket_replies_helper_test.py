@@ -0,0 +1,98 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import unittest
+from unittest import mock
+
+from google.datacatalog_connectors.qlik.scrape import websocket_replies_helper
+
+
+class WebsocketRepliesHelperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__helper = websocket_replies_helper.WebsocketRepliesHelper()
+
+    def test_add_pending_ids_should_record_method_and_result_key(self):
+        self.__helper.add_pending_ids([1, 2], 'GetProperties', 'dimensions')
+
+        self.assertTrue(self.__helper.is_pending(1, 'GetProperties'))
+        self.assertTrue(self.__helper.is_pending(2, 'GetProperties'))
+        self.assertFalse(self.__helper.is_pending(1, 'GetObject'))
+        self.assertEqual('GetProperties', self.__helper.get_method(2))
+        self.assertEqual('dimensions', self.__helper.get_result_key(2))
+
+    def test_remove_pending_id_should_keep_messages_history(self):
+        self.__helper.add_pending_id(1, 'OpenDoc')
+
+        self.__helper.remove_pending_id(1)
+        # Removing an unknown id is a no-op.
+        self.__helper.remove_pending_id(2)
+
+        self.assertFalse(self.__helper.is_pending(1, 'OpenDoc'))
+        self.assertTrue(self.__helper.is_method(1, 'OpenDoc'))
+        self.assertTrue(self.__helper.were_all_processed())
+
+    def test_get_all_unhandled_should_allow_removal_while_iterating(self):
+        replies = [{'id': message_id} for message_id in range(1, 4)]
+        for reply in replies:
+            self.__helper.add_unhandled(reply)
+
+        for reply in self.__helper.get_all_unhandled():
+            self.__helper.remove_unhandled(reply)
+
+        self.assertEqual([], self.__helper.get_all_unhandled())
+        self.assertTrue(self.__helper.were_all_processed())
+
+    def test_get_all_unhandled_should_keep_arrival_order(self):
+        self.__helper.add_unhandled({'id': 3})
+        self.__helper.add_unhandled({'id': 1})
+        self.__helper.add_unhandled({'id': 2})
+        self.__helper.remove_unhandled({'id': 1})
+
+        self.assertEqual([{
+            'id': 3
+        }, {
+            'id': 2
+        }], self.__helper.get_all_unhandled())
+        self.assertFalse(self.__helper.were_all_processed())
+
+    def test_session_metrics_should_track_messages_round_trips(self):
+        session_metrics = mock.MagicMock()
+        self.__helper.set_session_metrics(session_metrics)
+
+        self.__helper.add_pending_id(1, 'OpenDoc')
+        self.__helper.record_reply(1, 100, True)
+        self.__helper.record_timeout()
+
+        session_metrics.message_sent.assert_called_once_with(1, 'OpenDoc')
+        session_metrics.reply_received.assert_called_once_with(1, 100, True)
+        session_metrics.timed_out.assert_called_once()
+
+    def test_session_metrics_should_be_optional(self):
+        self.__helper.add_pending_id(1, 'OpenDoc')
+        self.__helper.record_reply(1, 100)
+        self.__helper.record_timeout()
+
+        self.assertTrue(self.__helper.is_pending(1, 'OpenDoc'))
+
+    def test_record_reply_should_update_last_activity_time(self):
+        creation_time = self.__helper.get_last_activity_time()
+        time.sleep(0.01)
+        self.__helper.record_reply(1, 100)
+
+        self.assertGreater(self.__helper.get_last_activity_time(),
+                           creation_time)
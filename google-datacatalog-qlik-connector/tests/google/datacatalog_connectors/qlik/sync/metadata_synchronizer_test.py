@@ -69,6 +69,7 @@ class MetadataSynchronizerTest(unittest.TestCase):
 
         scraper.scrape_all_custom_property_definitions.assert_called_once()
         scraper.scrape_all_streams.assert_called_once()
+        scraper.close.assert_called_once()
 
         cleaner = mock_cleaner.return_value
         cleaner.delete_obsolete_metadata.assert_called_once()
@@ -76,6 +77,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         ingestor = mock_ingestor.return_value
         ingestor.ingest_metadata.assert_not_called()
 
+    def test_run_scrape_error_should_close_scraper(self):
+        scraper = self.__synchronizer.__dict__[
+            '_MetadataSynchronizer__metadata_scraper']
+        scraper.scrape_all_streams.side_effect = ValueError
+
+        self.assertRaises(ValueError, self.__synchronizer.run)
+        scraper.close.assert_called_once()
+
     @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
     @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner')
     @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper')
@@ -209,6 +218,41 @@ class MetadataSynchronizerTest(unittest.TestCase):
         self.assertEqual(1, len(templates_dict_call_arg))
         self.assertTrue('qlik_stream_metadata' in templates_dict_call_arg)
 
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_streams_should_ingest_shared_template_once(
+            self, mock_ingestor):
+
+        attrs = self.__synchronizer.__dict__
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+
+        scraper.scrape_all_streams.return_value = [{
+            'id': 'stream-1'
+        }, {
+            'id': 'stream-2'
+        }]
+        fake_tag = self.__make_fake_tag('projects/test-project-id'
+                                        '/locations/test-location-id'
+                                        '/tagTemplates/qlik_stream_metadata')
+        assembled_entry_factory.make_assembled_entries_for_stream\
+            .side_effect = lambda stream, *args: [prepare.AssembledEntryData(
+                stream.get('id'), self.__make_fake_entry('stream'),
+                [fake_tag])]
+
+        self.__synchronizer.run()
+
+        ingest_metadata_calls = \
+            mock_ingestor.return_value.ingest_metadata.call_args_list
+        self.assertEqual(2, len(ingest_metadata_calls))
+        self.assertEqual(['qlik_stream_metadata'],
+                         list(ingest_metadata_calls[0][0][1]))
+        self.assertEqual({}, ingest_metadata_calls[1][0][1])
+
     @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor',
                 lambda *args: mock.MagicMock())
     @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
@@ -224,10 +268,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
         scraper.scrape_all_apps.return_value = \
             [self.__make_fake_published_app()]
-        scraper.scrape_dimensions.return_value = []
-        scraper.scrape_measures.return_value = []
-        scraper.scrape_visualizations.return_value = []
-        scraper.scrape_sheets.return_value = []
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [],
+                'measures': [],
+                'visualizations': [],
+                'sheets': [],
+            },
+        }
 
         self.__synchronizer.run()
 
@@ -251,6 +299,200 @@ class MetadataSynchronizerTest(unittest.TestCase):
             .make_assembled_entries_for_stream.call_args[0]
         self.assertEqual(expected_make_assembled_entries_call_arg,
                          actual_call_args[0])
+        scraper.scrape_apps_objects.assert_called_once()
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_unchanged_app_should_reuse_stored_objects(self):
+        attrs = self.__synchronizer.__dict__
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+        store = mock.MagicMock()
+        attrs['_MetadataSynchronizer__state_store'] = store
+
+        published_app = self.__make_fake_published_app()
+        published_app['modifiedDate'] = '2021-01-01T00:00:00.000Z'
+        scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
+        scraper.scrape_all_apps.return_value = [published_app]
+        store.get_app_objects.return_value = {
+            'dimensions': [self.__make_fake_dimension()],
+            'measures': [],
+            'visualizations': [],
+            'sheets': [],
+        }
+
+        self.__synchronizer.run()
+
+        scraper.scrape_apps_objects.assert_not_called()
+        store.get_app_objects.assert_called_once_with(
+            'test-app', '2021-01-01T00:00:00.000Z|None|None')
+        store.save.assert_called_once()
+        actual_call_args = assembled_entry_factory\
+            .make_assembled_entries_for_stream.call_args[0]
+        app_metadata = actual_call_args[0]['apps'][0]
+        self.assertEqual(1, len(app_metadata['dimensions']))
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_changed_app_should_scrape_and_store_objects(self):
+        attrs = self.__synchronizer.__dict__
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        store = mock.MagicMock()
+        attrs['_MetadataSynchronizer__state_store'] = store
+
+        empty_app = self.__make_fake_published_app()
+        empty_app['id'] = 'empty-app'
+        scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
+        scraper.scrape_all_apps.return_value = [
+            self.__make_fake_published_app(), empty_app
+        ]
+        store.get_app_objects.return_value = None
+        app_objects = {
+            'dimensions': [self.__make_fake_dimension()],
+            'measures': [],
+            'visualizations': [],
+            'sheets': [],
+        }
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': app_objects,
+            'empty-app': {
+                'dimensions': [],
+                'measures': [],
+                'visualizations': [],
+                'sheets': [],
+            },
+        }
+
+        self.__synchronizer.run()
+
+        scraper.scrape_apps_objects.assert_called_once()
+        # Empty payloads are not stored.
+        store.set_app_objects.assert_called_once_with('test-app',
+                                                      'None|None|None',
+                                                      app_objects)
+        store.save.assert_called_once()
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_stalled_app_should_not_store_incomplete_objects(self):
+        attrs = self.__synchronizer.__dict__
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+        store = mock.MagicMock()
+        attrs['_MetadataSynchronizer__state_store'] = store
+
+        scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
+        scraper.scrape_all_apps.return_value = [
+            self.__make_fake_published_app()
+        ]
+        store.get_app_objects.return_value = None
+        # The Engine API session stalled after the Dimensions arrived.
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [self.__make_fake_dimension()],
+                'measures': [],
+                'visualizations': [],
+                'sheets': [],
+                'incomplete': True,
+            },
+        }
+
+        self.__synchronizer.run()
+
+        store.set_app_objects.assert_not_called()
+        store.save.assert_called_once()
+        # The objects gathered so far are still synchronized in this run.
+        actual_call_args = assembled_entry_factory\
+            .make_assembled_entries_for_stream.call_args[0]
+        app_metadata = actual_call_args[0]['apps'][0]
+        self.assertEqual(1, len(app_metadata['dimensions']))
+
+    @mock.patch(f'{__SYNCR_MODULE}.state_store.StateStore')
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.AssembledEntryFactory',
+                lambda *args, **kwargs: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.scrape.MetadataScraper',
+                lambda *args, **kwargs: mock.MagicMock())
+    def test_constructor_should_set_state_store_if_state_file_provided(
+            self, mock_state_store):
+
+        synchronizer = sync.MetadataSynchronizer(
+            qlik_server_address='test-server',
+            qlik_ad_domain='test-domain',
+            qlik_username='test-username',
+            qlik_password='test-password',
+            datacatalog_project_id='test-project-id',
+            datacatalog_location_id='test-location-id',
+            state_file='state.json')
+
+        mock_state_store.assert_called_once_with('state.json')
+        self.assertEqual(
+            mock_state_store.return_value,
+            synchronizer.__dict__['_MetadataSynchronizer__state_store'])
+
+    @mock.patch(f'{__SYNCR_MODULE}.metrics_sinks'
+                f'.PrometheusTextfileMetricsSink')
+    @mock.patch(f'{__SYNCR_MODULE}.metrics_sinks.JSONFileMetricsSink')
+    @mock.patch(f'{__SYNCR_MODULE}.scrape.MetadataScraper')
+    def test_run_should_pass_metrics_to_scraper_and_write_them_to_sinks(
+            self, mock_scraper, mock_json_sink, mock_prometheus_sink):
+
+        synchronizer = sync.MetadataSynchronizer(
+            qlik_server_address='test-server',
+            qlik_ad_domain='test-domain',
+            qlik_username='test-username',
+            qlik_password='test-password',
+            datacatalog_project_id='test-project-id',
+            datacatalog_location_id='test-location-id',
+            metrics_file='metrics.json',
+            prometheus_textfile='qlik.prom')
+
+        metrics = synchronizer.__dict__['_MetadataSynchronizer__api_metrics']
+        self.assertEqual(metrics, mock_scraper.call_args[0][-1])
+        mock_json_sink.assert_called_once_with('metrics.json')
+        mock_prometheus_sink.assert_called_once_with('qlik.prom')
+
+        # The metrics are written even when the run fails.
+        mock_scraper.return_value.scrape_all_streams.side_effect = ValueError
+        metrics.record_request('qrs', 'stream/full', 0.1)
+        self.assertRaises(ValueError, synchronizer.run)
+
+        mock_json_sink.return_value.write.assert_called_once_with(
+            metrics.get_series())
+        mock_prometheus_sink.return_value.write.assert_called_once_with(
+            metrics.get_series())
+
+    @mock.patch(f'{__SYNCR_MODULE}.metrics_sinks.JSONFileMetricsSink')
+    @mock.patch(f'{__SYNCR_MODULE}.scrape.MetadataScraper')
+    def test_run_should_not_fail_on_metrics_sink_error(self, mock_scraper,
+                                                       mock_json_sink):
+
+        synchronizer = sync.MetadataSynchronizer(
+            qlik_server_address='test-server',
+            qlik_ad_domain='test-domain',
+            qlik_username='test-username',
+            qlik_password='test-password',
+            datacatalog_project_id='test-project-id',
+            datacatalog_location_id='test-location-id',
+            metrics_file='metrics.json')
+        mock_scraper.return_value.scrape_all_streams.side_effect = ValueError
+        mock_json_sink.return_value.write.side_effect = OSError
+
+        # The original error is propagated.
+        self.assertRaises(ValueError, synchronizer.run)
 
     @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor',
                 lambda *args: mock.MagicMock())
@@ -265,7 +507,8 @@ class MetadataSynchronizerTest(unittest.TestCase):
             '_MetadataSynchronizer__assembled_entry_factory']
 
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
-        scraper.scrape_all_apps.return_value = [self.__make_fake_wip_app()]
+        # Not published Apps are filtered out by the server.
+        scraper.scrape_all_apps.return_value = []
         assembled_entry_factory.make_assembled_entries_for_stream\
             .return_value = [
                 prepare.AssembledEntryData(
@@ -274,6 +517,9 @@ class MetadataSynchronizerTest(unittest.TestCase):
 
         self.__synchronizer.run()
 
+        scraper.scrape_all_apps.assert_called_once_with(published_only=True)
+        scraper.scrape_apps_objects.assert_not_called()
+
         expected_make_assembled_entries_call_arg = {
             'id': 'test-stream',
         }
@@ -298,10 +544,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
         scraper.scrape_all_apps.return_value = \
             [self.__make_fake_published_app()]
-        scraper.scrape_dimensions.return_value = [self.__make_fake_dimension()]
-        scraper.scrape_measures.return_value = []
-        scraper.scrape_visualizations.return_value = []
-        scraper.scrape_sheets.return_value = []
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [self.__make_fake_dimension()],
+                'measures': [],
+                'visualizations': [],
+                'sheets': [],
+            },
+        }
 
         self.__synchronizer.run()
 
@@ -351,10 +601,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
         scraper.scrape_all_apps.return_value = \
             [self.__make_fake_published_app()]
-        scraper.scrape_dimensions.return_value = []
-        scraper.scrape_measures.return_value = [self.__make_fake_measure()]
-        scraper.scrape_visualizations.return_value = []
-        scraper.scrape_sheets.return_value = []
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [],
+                'measures': [self.__make_fake_measure()],
+                'visualizations': [],
+                'sheets': [],
+            },
+        }
 
         self.__synchronizer.run()
 
@@ -404,12 +658,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
         scraper.scrape_all_apps.return_value = \
             [self.__make_fake_published_app()]
-        scraper.scrape_dimensions.return_value = []
-        scraper.scrape_measures.return_value = []
-        scraper.scrape_visualizations.return_value = [
-            self.__make_fake_visualization()
-        ]
-        scraper.scrape_sheets.return_value = []
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [],
+                'measures': [],
+                'visualizations': [self.__make_fake_visualization()],
+                'sheets': [],
+            },
+        }
 
         self.__synchronizer.run()
 
@@ -458,12 +714,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
         scraper.scrape_all_apps.return_value = \
             [self.__make_fake_published_app()]
-        scraper.scrape_dimensions.return_value = []
-        scraper.scrape_measures.return_value = []
-        scraper.scrape_visualizations.return_value = []
-        scraper.scrape_sheets.return_value = [
-            self.__make_fake_published_sheet()
-        ]
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [],
+                'measures': [],
+                'visualizations': [],
+                'sheets': [self.__make_fake_published_sheet()],
+            },
+        }
 
         self.__synchronizer.run()
 
@@ -518,10 +776,14 @@ class MetadataSynchronizerTest(unittest.TestCase):
         scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
         scraper.scrape_all_apps.return_value = \
             [self.__make_fake_published_app()]
-        scraper.scrape_dimensions.return_value = []
-        scraper.scrape_measures.return_value = []
-        scraper.scrape_visualizations.return_value = []
-        scraper.scrape_sheets.return_value = [self.__make_fake_wip_sheet()]
+        scraper.scrape_apps_objects.return_value = {
+            'test-app': {
+                'dimensions': [],
+                'measures': [],
+                'visualizations': [],
+                'sheets': [self.__make_fake_wip_sheet()],
+            },
+        }
 
         self.__synchronizer.run()
 
@@ -546,6 +808,355 @@ class MetadataSynchronizerTest(unittest.TestCase):
         self.assertEqual(expected_make_assembled_entries_call_arg,
                          actual_call_args[0])
 
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner')
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper')
+    def test_run_pipelined_should_ingest_each_stream_and_clean_up_at_the_end(
+            self, mock_mapper, mock_cleaner, mock_ingestor):
+
+        attrs = self.__synchronizer.__dict__
+        attrs['_MetadataSynchronizer__pipelined'] = True
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+
+        custom_property_def_entry = prepare.AssembledEntryData(
+            'test-def', self.__make_fake_entry('custom_property_definition'),
+            [])
+        streams = [{'id': 'stream-1'}, {'id': 'stream-2'}]
+        apps = [{
+            'id': 'app-1',
+            'stream': streams[0]
+        }, {
+            'id': 'app-2',
+            'stream': streams[1]
+        }]
+
+        scraper.scrape_all_custom_property_definitions.return_value = [{
+            'id': 'test-def'
+        }]
+        scraper.scrape_all_streams.return_value = streams
+        scraper.scrape_all_apps.return_value = apps
+        scraper.scrape_apps_objects.side_effect = lambda stream_apps: {
+            app.get('id'): {
+                'dimensions': [],
+                'measures': [],
+                'sheets': [],
+                'visualizations': []
+            } for app in stream_apps
+        }
+        assembled_entry_factory.make_assembled_entry_for_custom_property_def\
+            .return_value = custom_property_def_entry
+        assembled_entry_factory.make_assembled_entries_for_stream\
+            .side_effect = lambda stream, *args: [prepare.AssembledEntryData(
+                stream.get('id'), self.__make_fake_entry('stream'), [])]
+
+        self.__synchronizer.run()
+
+        self.assertEqual(2, scraper.scrape_apps_objects.call_count)
+        scraper.scrape_apps_objects.assert_any_call([apps[0]])
+        scraper.scrape_apps_objects.assert_any_call([apps[1]])
+        scraper.close.assert_called_once()
+
+        # The raw metadata are released once prepared.
+        self.assertEqual([{'id': 'stream-1'}, {'id': 'stream-2'}], streams)
+
+        mapper = mock_mapper.return_value
+        self.assertEqual(2, mapper.fulfill_tag_fields.call_count)
+        self.assertIn(custom_property_def_entry,
+                      mapper.fulfill_tag_fields.call_args[0][0])
+
+        ingestor = mock_ingestor.return_value
+        ingested_entry_ids = [
+            call[0][0][0].entry_id
+            for call in ingestor.ingest_metadata.call_args_list
+        ]
+        self.assertEqual(['test-def', 'stream-1', 'stream-2'],
+                         ingested_entry_ids)
+
+        cleaner = mock_cleaner.return_value
+        cleaner.delete_obsolete_metadata.assert_called_once()
+        cleaned_up_entry_ids = [
+            assembled_entry.entry_id for assembled_entry in
+            cleaner.delete_obsolete_metadata.call_args[0][0]
+        ]
+        self.assertEqual(['test-def', 'stream-1', 'stream-2'],
+                         cleaned_up_entry_ids)
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner')
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_pipelined_should_not_clean_up_on_prepare_error(
+            self, mock_cleaner, mock_ingestor):
+
+        attrs = self.__synchronizer.__dict__
+        attrs['_MetadataSynchronizer__pipelined'] = True
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+
+        scraper.scrape_all_streams.return_value = [self.__make_fake_stream()]
+        assembled_entry_factory.make_assembled_entries_for_stream\
+            .side_effect = ValueError('test-error')
+
+        self.assertRaises(ValueError, self.__synchronizer.run)
+
+        scraper.close.assert_called_once()
+        mock_ingestor.return_value.ingest_metadata.assert_not_called()
+        mock_cleaner.return_value.delete_obsolete_metadata.assert_not_called()
+
+    def test_constructor_should_require_manifest_dir_for_shards(self):
+        self.assertRaises(ValueError,
+                          sync.MetadataSynchronizer,
+                          qlik_server_address='test-server',
+                          qlik_ad_domain='test-domain',
+                          qlik_username='test-username',
+                          qlik_password='test-password',
+                          datacatalog_project_id='test-project-id',
+                          datacatalog_location_id='test-location-id',
+                          shard_count=2)
+
+    def test_constructor_should_validate_shard_index(self):
+        self.assertRaises(ValueError,
+                          sync.MetadataSynchronizer,
+                          qlik_server_address='test-server',
+                          qlik_ad_domain='test-domain',
+                          qlik_username='test-username',
+                          qlik_password='test-password',
+                          datacatalog_project_id='test-project-id',
+                          datacatalog_location_id='test-location-id',
+                          shard_index=2,
+                          shard_count=2,
+                          shard_manifest_dir='manifests')
+
+    @mock.patch(f'{__SYNCR_MODULE}.shard_manifests.ShardManifests.write')
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner')
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_shard_should_sync_assigned_streams_and_write_manifest(
+            self, mock_cleaner, mock_ingestor, mock_write_manifest):
+
+        for pipelined in (False, True):
+            synchronizer = self.__make_sharded_synchronizer(
+                shard_index=1, pipelined=pipelined)
+            attrs = synchronizer.__dict__
+            scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+            assembled_entry_factory = attrs[
+                '_MetadataSynchronizer__assembled_entry_factory']
+
+            # stream-4 belongs to shard 0 and stream-8 to shard 1.
+            streams = [{'id': 'stream-4'}, {'id': 'stream-8'}]
+            apps = [{
+                'id': 'app-1',
+                'stream': streams[0]
+            }, {
+                'id': 'app-2',
+                'stream': streams[1]
+            }]
+            scraper.scrape_all_custom_property_definitions.return_value = [{
+                'id': 'test-def'
+            }]
+            scraper.scrape_all_streams.return_value = streams
+            scraper.scrape_all_apps.return_value = apps
+            scraper.scrape_apps_objects.side_effect = lambda shard_apps: {
+                app.get('id'): {
+                    'dimensions': [],
+                    'measures': [],
+                    'sheets': [],
+                    'visualizations': []
+                } for app in shard_apps
+            }
+            assembled_entry_factory\
+                .make_assembled_entry_for_custom_property_def.return_value = \
+                prepare.AssembledEntryData(
+                    'test-def',
+                    self.__make_fake_entry('custom_property_definition'), [])
+            assembled_entry_factory.make_assembled_entries_for_stream\
+                .side_effect = lambda stream, *args: [
+                    prepare.AssembledEntryData(
+                        stream.get('id'), self.__make_fake_entry('stream'),
+                        [])
+                ]
+
+            synchronizer.run()
+
+            scraper.scrape_apps_objects.assert_called_once_with([apps[1]])
+            ingestor = mock_ingestor.return_value
+            ingested_entry_ids = [
+                call[0][0][0].entry_id
+                for call in ingestor.ingest_metadata.call_args_list
+            ]
+            self.assertEqual(['stream-8'], ingested_entry_ids)
+            mock_cleaner.return_value.delete_obsolete_metadata\
+                .assert_not_called()
+
+            manifest_args = mock_write_manifest.call_args[0]
+            self.assertEqual(1, manifest_args[0])
+            self.assertEqual('test-server', manifest_args[1])
+            self.assertEqual(['stream-8'], manifest_args[2])
+
+            mock_ingestor.reset_mock()
+            mock_write_manifest.reset_mock()
+
+    @mock.patch(f'{__SYNCR_MODULE}.shard_manifests.ShardManifests.clear')
+    @mock.patch(f'{__SYNCR_MODULE}.shard_manifests.ShardManifests'
+                f'.read_entry_names')
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner')
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    def test_run_coordinator_should_ingest_templates_and_clean_up(
+            self, mock_cleaner, mock_ingestor, mock_read_entry_names,
+            mock_clear_manifests):
+
+        synchronizer = self.__make_sharded_synchronizer(shard_coordinator=True)
+        attrs = synchronizer.__dict__
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+
+        scraper.scrape_all_custom_property_definitions.return_value = [{
+            'id': 'test-def'
+        }]
+        assembled_entry_factory.make_assembled_entry_for_custom_property_def\
+            .return_value = prepare.AssembledEntryData(
+                'test-def',
+                self.__make_fake_entry('custom_property_definition'), [])
+        mock_read_entry_names.return_value = {
+            'entries/stream-8', 'entries/stream-4'
+        }
+
+        synchronizer.run()
+
+        scraper.scrape_all_streams.assert_not_called()
+        scraper.close.assert_called_once()
+
+        ingestor = mock_ingestor.return_value
+        ingestor.ingest_metadata.assert_called_once()
+        ingested_entries, ingested_templates = \
+            ingestor.ingest_metadata.call_args[0]
+        self.assertEqual(['test-def'],
+                         [entry.entry_id for entry in ingested_entries])
+        # All the Tag Templates are ingested.
+        self.assertEqual(7, len(ingested_templates))
+
+        cleaner = mock_cleaner.return_value
+        cleaned_up_entry_ids = [
+            assembled_entry.entry_id for assembled_entry in
+            cleaner.delete_obsolete_metadata.call_args[0][0]
+        ]
+        self.assertEqual(['test-def', 'stream-4', 'stream-8'],
+                         cleaned_up_entry_ids)
+        mock_clear_manifests.assert_called_once()
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner')
+    def test_run_coordinator_should_not_change_anything_on_missing_manifest(
+            self, mock_cleaner, mock_ingestor):
+
+        synchronizer = self.__make_sharded_synchronizer(
+            shard_coordinator=True, shard_manifest_dir='missing-manifests')
+
+        self.assertRaises(ValueError, synchronizer.run)
+
+        mock_ingestor.return_value.ingest_metadata.assert_not_called()
+        mock_cleaner.return_value.delete_obsolete_metadata.assert_not_called()
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor')
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.AssembledEntryProcessPool')
+    def test_run_prepare_workers_should_use_process_pool(
+            self, mock_process_pool, mock_ingestor):
+
+        attrs = self.__synchronizer.__dict__
+        attrs['_MetadataSynchronizer__prepare_workers'] = 2
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+
+        scraper.scrape_all_streams.return_value = [{
+            'id': 'stream-1'
+        }, {
+            'id': 'stream-2'
+        }]
+        process_pool = mock_process_pool.return_value
+        process_pool.make_assembled_entries_for_streams.side_effect = \
+            lambda streams: ([prepare.AssembledEntryData(
+                stream.get('id'), self.__make_fake_entry('stream'), [])]
+                for stream in streams)
+
+        self.__synchronizer.run()
+
+        self.assertEqual(2, mock_process_pool.call_args[1]['workers'])
+        process_pool.__exit__.assert_called_once()
+        assembled_entry_factory.make_assembled_entries_for_stream\
+            .assert_not_called()
+
+        ingestor = mock_ingestor.return_value
+        ingested_entry_ids = [
+            call[0][0][0].entry_id
+            for call in ingestor.ingest_metadata.call_args_list
+        ]
+        self.assertEqual(['stream-1', 'stream-2'], ingested_entry_ids)
+
+    @mock.patch(f'{__SYNCR_MODULE}.ingest.DataCatalogMetadataIngestor',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.cleanup.DataCatalogMetadataCleaner',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.EntryRelationshipMapper',
+                lambda *args: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.AssembledEntryProcessPool')
+    def test_run_pipelined_prepare_workers_should_use_process_pool(
+            self, mock_process_pool):
+
+        attrs = self.__synchronizer.__dict__
+        attrs['_MetadataSynchronizer__pipelined'] = True
+        attrs['_MetadataSynchronizer__prepare_workers'] = 2
+        scraper = attrs['_MetadataSynchronizer__metadata_scraper']
+        assembled_entry_factory = attrs[
+            '_MetadataSynchronizer__assembled_entry_factory']
+
+        scraper.scrape_all_streams.return_value = [{'id': 'stream-1'}]
+        scraper.scrape_all_apps.return_value = []
+        process_pool = mock_process_pool.return_value
+        process_pool.submit_assembled_entries_for_stream.side_effect = \
+            lambda stream: stream.get('id')
+        process_pool.get_assembled_entries.side_effect = \
+            lambda stream_id: [prepare.AssembledEntryData(
+                stream_id, self.__make_fake_entry('stream'), [])]
+
+        self.__synchronizer.run()
+
+        process_pool.__enter__.assert_called_once()
+        process_pool.__exit__.assert_called_once()
+        process_pool.submit_assembled_entries_for_stream\
+            .assert_called_once()
+        process_pool.get_assembled_entries.assert_called_once_with('stream-1')
+        assembled_entry_factory.make_assembled_entries_for_stream\
+            .assert_not_called()
+
+    @classmethod
+    @mock.patch(f'{__SYNCR_MODULE}.prepare.AssembledEntryFactory',
+                lambda *args, **kwargs: mock.MagicMock())
+    @mock.patch(f'{__SYNCR_MODULE}.scrape.MetadataScraper',
+                lambda *args, **kwargs: mock.MagicMock())
+    def __make_sharded_synchronizer(cls, **kwargs):
+        kwargs.setdefault('shard_count', 2)
+        kwargs.setdefault('shard_manifest_dir', 'manifests')
+        return sync.MetadataSynchronizer(
+            qlik_server_address='test-server',
+            qlik_ad_domain='test-domain',
+            qlik_username='test-username',
+            qlik_password='test-password',
+            datacatalog_project_id='test-project-id',
+            datacatalog_location_id='test-location-id',
+            **kwargs)
+
     @classmethod
     def __make_fake_stream(cls):
         return {
@@ -560,13 +1171,6 @@ class MetadataSynchronizerTest(unittest.TestCase):
             'stream': cls.__make_fake_stream(),
         }
 
-    @classmethod
-    def __make_fake_wip_app(cls):
-        return {
-            'id': 'test-app',
-            'published': False,
-        }
-
     @classmethod
     def __make_fake_dimension(cls):
         return {
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from google.datacatalog_connectors.qlik.sync import metrics_sinks
+
+
+class MetricsSinksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__series = [{
+            'api': 'engine',
+            'method': 'GetProperties',
+            'app_id': 'app-"1"',
+            'requests': 3,
+            'errors': 1,
+            'timeouts': 2,
+            'retries': 0,
+            'reply_bytes': 300,
+            'latency_sum': 0.25,
+            'latency_buckets': [[0.1, 2], [1, 3], ['+Inf', 3]],
+        }]
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def test_json_file_sink_should_write_series(self):
+        file_path = os.path.join(self.__temp_dir.name, 'metrics.json')
+
+        metrics_sinks.JSONFileMetricsSink(file_path).write(self.__series)
+
+        with open(file_path) as metrics_file:
+            self.assertEqual({'series': self.__series},
+                             json.load(metrics_file))
+        self.assertEqual(['metrics.json'], os.listdir(self.__temp_dir.name))
+
+    def test_prometheus_textfile_sink_should_write_counters_and_histogram(
+            self):
+
+        file_path = os.path.join(self.__temp_dir.name, 'qlik.prom')
+
+        metrics_sinks.PrometheusTextfileMetricsSink(file_path).write(
+            self.__series)
+
+        with open(file_path) as metrics_file:
+            lines = metrics_file.read().splitlines()
+
+        labels = 'api="engine",method="GetProperties",app_id="app-\\"1\\""'
+        self.assertIn('# TYPE qlik_api_requests_total counter', lines)
+        self.assertIn(f'qlik_api_requests_total{{{labels}}} 3', lines)
+        self.assertIn(f'qlik_api_errors_total{{{labels}}} 1', lines)
+        self.assertIn(f'qlik_api_timeouts_total{{{labels}}} 2', lines)
+        self.assertIn(f'qlik_api_reply_bytes_total{{{labels}}} 300', lines)
+        self.assertIn('# TYPE qlik_api_request_duration_seconds histogram',
+                      lines)
+        self.assertIn(
+            f'qlik_api_request_duration_seconds_bucket'
+            f'{{{labels},le="0.1"}} 2', lines)
+        self.assertIn(
+            f'qlik_api_request_duration_seconds_bucket'
+            f'{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(
+            f'qlik_api_request_duration_seconds_sum{{{labels}}} 0.25', lines)
+        self.assertIn(f'qlik_api_request_duration_seconds_count{{{labels}}} 3',
+                      lines)
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from google.datacatalog_connectors.qlik.sync import shard_manifests
+
+
+class ShardManifestsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__dir_path = os.path.join(self.__temp_dir.name, 'manifests')
+        self.__manifests = shard_manifests.ShardManifests(self.__dir_path, 2)
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def test_get_shard_index_should_be_stable_and_in_range(self):
+        shard_indexes = [
+            shard_manifests.ShardManifests.get_shard_index(
+                f'stream-{index}', 2) for index in range(4, 12)
+        ]
+
+        self.assertEqual([0, 0, 0, 0, 1, 1, 1, 1], shard_indexes)
+
+    def test_read_entry_names_should_merge_all_manifests(self):
+        self.__manifests.write(0, 'test-server', ['stream-4'],
+                               ['entries/stream-4', 'entries/app-1'])
+        self.__manifests.write(1, 'test-server', ['stream-8'],
+                               ['entries/stream-8'])
+
+        self.assertEqual(
+            {'entries/stream-4', 'entries/app-1', 'entries/stream-8'},
+            self.__manifests.read_entry_names('test-server'))
+
+    def test_read_entry_names_should_raise_on_missing_manifest(self):
+        self.__manifests.write(0, 'test-server', ['stream-4'],
+                               ['entries/stream-4'])
+
+        self.assertRaises(ValueError, self.__manifests.read_entry_names,
+                          'test-server')
+
+    def test_read_entry_names_should_raise_on_shard_count_mismatch(self):
+        shard_manifests.ShardManifests(self.__dir_path,
+                                       3).write(0, 'test-server', [], [])
+        os.replace(os.path.join(self.__dir_path, 'shard-0-of-3.json'),
+                   os.path.join(self.__dir_path, 'shard-0-of-2.json'))
+        self.__manifests.write(1, 'test-server', [], [])
+
+        self.assertRaises(ValueError, self.__manifests.read_entry_names,
+                          'test-server')
+
+    def test_read_entry_names_should_raise_on_site_mismatch(self):
+        self.__manifests.write(0, 'test-server', [], [])
+        self.__manifests.write(1, 'other-server', [], [])
+
+        self.assertRaises(ValueError, self.__manifests.read_entry_names,
+                          'test-server')
+
+    def test_write_should_sort_ids_and_names(self):
+        self.__manifests.write(1, 'test-server', ['stream-9', 'stream-8'],
+                               ['entries/b', 'entries/a'])
+
+        with open(os.path.join(self.__dir_path,
+                               'shard-1-of-2.json')) as manifest_file:
+            manifest = json.load(manifest_file)
+
+        self.assertEqual(1, manifest['shardIndex'])
+        self.assertEqual(2, manifest['shardCount'])
+        self.assertEqual(['stream-8', 'stream-9'], manifest['streamIds'])
+        self.assertEqual(['entries/a', 'entries/b'], manifest['entryNames'])
+
+    def test_clear_should_delete_manifests(self):
+        self.__manifests.write(0, 'test-server', [], [])
+
+        self.__manifests.clear()
+
+        self.assertEqual([], os.listdir(self.__dir_path))
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from google.datacatalog_connectors.qlik.sync import state_store
+
+
+class StateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__file_path = os.path.join(self.__temp_dir.name, 'state.json')
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def test_get_app_objects_should_return_none_on_missing_file(self):
+        store = state_store.StateStore(self.__file_path)
+        self.assertIsNone(store.get_app_objects('app-id', 'fingerprint'))
+
+    def test_get_app_objects_should_return_saved_objects(self):
+        store = state_store.StateStore(self.__file_path)
+        store.set_app_objects('app-id', 'fingerprint', {'sheets': [{}]})
+        store.save()
+
+        store = state_store.StateStore(self.__file_path)
+
+        self.assertEqual({'sheets': [{}]},
+                         store.get_app_objects('app-id', 'fingerprint'))
+
+    def test_get_app_objects_should_return_none_on_fingerprint_mismatch(self):
+        store = state_store.StateStore(self.__file_path)
+        store.set_app_objects('app-id', 'fingerprint', {'sheets': [{}]})
+        store.save()
+
+        store = state_store.StateStore(self.__file_path)
+
+        self.assertIsNone(store.get_app_objects('app-id', 'new-fingerprint'))
+
+    def test_set_app_objects_should_not_keep_references(self):
+        app_objects = {'sheets': [{}]}
+        store = state_store.StateStore(self.__file_path)
+        store.set_app_objects('app-id', 'fingerprint', app_objects)
+        app_objects['sheets'][0]['app'] = 'changed after set'
+        store.save()
+
+        store = state_store.StateStore(self.__file_path)
+
+        self.assertEqual({'sheets': [{}]},
+                         store.get_app_objects('app-id', 'fingerprint'))
+
+    def test_save_should_keep_only_the_apps_handled_by_the_run(self):
+        store = state_store.StateStore(self.__file_path)
+        store.set_app_objects('app-1', 'fingerprint', {'sheets': [{}]})
+        store.set_app_objects('app-2', 'fingerprint', {'sheets': [{}]})
+        store.save()
+
+        store = state_store.StateStore(self.__file_path)
+        store.get_app_objects('app-1', 'fingerprint')
+        store.save()
+
+        store = state_store.StateStore(self.__file_path)
+        self.assertIsNotNone(store.get_app_objects('app-1', 'fingerprint'))
+        self.assertIsNone(store.get_app_objects('app-2', 'fingerprint'))
+
+    def test_constructor_should_ignore_invalid_file(self):
+        with open(self.__file_path, 'w') as state_file:
+            state_file.write('{invalid')
+
+        store = state_store.StateStore(self.__file_path)
+
+        self.assertIsNone(store.get_app_objects('app-id', 'fingerprint'))
+
+    def test_constructor_should_ignore_outdated_file(self):
+        with open(self.__file_path, 'w') as state_file:
+            json.dump(
+                {
+                    'version': 0,
+                    'apps': {
+                        'app-id': {
+                            'fingerprint': 'fingerprint',
+                            'objects': {},
+                        },
+                    },
+                }, state_file)
+
+        store = state_store.StateStore(self.__file_path)
+
+        self.assertIsNone(store.get_app_objects('app-id', 'fingerprint'))
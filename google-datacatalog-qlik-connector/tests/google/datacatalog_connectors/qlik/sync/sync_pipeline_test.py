@@ -0,0 +1,119 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from google.datacatalog_connectors.qlik.sync import sync_pipeline
+
+
+class SyncPipelineTest(unittest.TestCase):
+
+    def test_pipeline_should_run_items_through_all_stages_in_order(self):
+        stages = (lambda item: item * 2, lambda item: item + 1)
+
+        with sync_pipeline.SyncPipeline(stages) as pipeline:
+            for item in range(10):
+                pipeline.put(item)
+
+        self.assertEqual([item * 2 + 1 for item in range(10)],
+                         pipeline.results)
+
+    def test_pipeline_should_run_stages_in_worker_threads(self):
+        thread_names = []
+
+        def stage(item):
+            thread_names.append(threading.current_thread().name)
+            return item
+
+        with sync_pipeline.SyncPipeline((stage, stage)) as pipeline:
+            pipeline.put('item')
+
+        self.assertEqual(
+            ['qlik-sync-pipeline-stage-0', 'qlik-sync-pipeline-stage-1'],
+            thread_names)
+
+    def test_pipeline_should_overlap_producer_and_stages(self):
+        first_item_processed = threading.Event()
+
+        def stage(item):
+            first_item_processed.set()
+            return item
+
+        with sync_pipeline.SyncPipeline((stage,)) as pipeline:
+            pipeline.put('item-1')
+            # The producer goes on while the stage processes the first item.
+            self.assertTrue(first_item_processed.wait(timeout=5))
+            pipeline.put('item-2')
+
+        self.assertEqual(['item-1', 'item-2'], pipeline.results)
+
+    def test_pipeline_should_raise_stage_error_on_exit(self):
+        processed_items = []
+
+        def failing_stage(item):
+            if item == 1:
+                raise ValueError('test-error')
+            return item
+
+        def stage(item):
+            processed_items.append(item)
+            return item
+
+        def run_pipeline():
+            stages = (failing_stage, stage)
+            with sync_pipeline.SyncPipeline(stages) as pipeline:
+                pipeline.put(0)
+                pipeline.put(1)
+
+        self.assertRaises(ValueError, run_pipeline)
+        self.assertEqual([0], processed_items)
+
+    def test_put_should_raise_stage_error(self):
+        stage_failed = threading.Event()
+
+        def failing_stage(item):
+            stage_failed.set()
+            raise ValueError('test-error')
+
+        with self.assertRaises(ValueError):
+            with sync_pipeline.SyncPipeline((failing_stage,)) as pipeline:
+                pipeline.put('item-1')
+                stage_failed.wait(timeout=5)
+                # Gives the worker thread the chance to record the error.
+                for _ in range(100):
+                    pipeline.put('item')
+
+    def test_pipeline_should_discard_items_on_producer_error(self):
+        processed_items = []
+        release_stage = threading.Event()
+
+        def stage(item):
+            release_stage.wait(timeout=5)
+            processed_items.append(item)
+            return item
+
+        with self.assertRaises(KeyError):
+            with sync_pipeline.SyncPipeline((stage,),
+                                            queue_size=5) as pipeline:
+                pipeline.put('item-1')
+                pipeline.put('item-2')
+                pipeline.put('item-3')
+                # Releases the stage after the pipeline gets the error.
+                threading.Timer(0.1, release_stage.set).start()
+                raise KeyError('test-error')
+
+        self.assertLessEqual(len(processed_items), 1)
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from google.cloud import datacatalog
+
+from google.datacatalog_connectors.qlik.sync import tag_template_registry
+
+
+class TagTemplateRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__temp_dir = tempfile.TemporaryDirectory()
+        self.__file_path = os.path.join(self.__temp_dir.name, 'templates.json')
+
+    def tearDown(self):
+        self.__temp_dir.cleanup()
+
+    def test_filter_templates_to_ingest_should_skip_ingested_templates(self):
+        registry = tag_template_registry.TagTemplateRegistry()
+        templates_dict = {
+            'template-1': self.__make_tag_template('template-1'),
+            'template-2': self.__make_tag_template('template-2'),
+        }
+
+        registry.mark_ingested(
+            registry.filter_templates_to_ingest(
+                {'template-1': templates_dict['template-1']}))
+
+        self.assertEqual(
+            ['template-2'],
+            list(registry.filter_templates_to_ingest(templates_dict)))
+
+    def test_filter_templates_to_ingest_should_skip_cached_templates(self):
+        registry = tag_template_registry.TagTemplateRegistry(self.__file_path)
+        registry.mark_ingested(
+            {'template-1': self.__make_tag_template('template-1')})
+        registry.save()
+
+        registry = tag_template_registry.TagTemplateRegistry(self.__file_path)
+
+        self.assertEqual(
+            {},
+            registry.filter_templates_to_ingest(
+                {'template-1': self.__make_tag_template('template-1')}))
+
+    def test_filter_templates_to_ingest_should_keep_changed_templates(self):
+        registry = tag_template_registry.TagTemplateRegistry(self.__file_path)
+        registry.mark_ingested(
+            {'template-1': self.__make_tag_template('template-1')})
+        registry.save()
+
+        registry = tag_template_registry.TagTemplateRegistry(self.__file_path)
+        changed_template = self.__make_tag_template('template-1')
+        changed_template.display_name = 'Changed'
+
+        self.assertEqual(['template-1'],
+                         list(
+                             registry.filter_templates_to_ingest(
+                                 {'template-1': changed_template})))
+
+    def test_constructor_should_ignore_invalid_cache_file(self):
+        with open(self.__file_path, 'w') as cache_file:
+            cache_file.write('invalid')
+
+        registry = tag_template_registry.TagTemplateRegistry(self.__file_path)
+
+        self.assertEqual(
+            ['template-1'],
+            list(
+                registry.filter_templates_to_ingest(
+                    {'template-1': self.__make_tag_template('template-1')})))
+
+    def test_constructor_should_ignore_outdated_cache_file(self):
+        with open(self.__file_path, 'w') as cache_file:
+            cache_file.write('{"version": 0, "templates": {}}')
+
+        registry = tag_template_registry.TagTemplateRegistry(self.__file_path)
+
+        self.assertEqual(
+            1,
+            len(
+                registry.filter_templates_to_ingest(
+                    {'template-1': self.__make_tag_template('template-1')})))
+
+    def test_save_should_do_nothing_without_cache_file(self):
+        registry = tag_template_registry.TagTemplateRegistry()
+        registry.mark_ingested(
+            {'template-1': self.__make_tag_template('template-1')})
+        registry.save()
+
+        self.assertEqual([], os.listdir(self.__temp_dir.name))
+
+    @classmethod
+    def __make_tag_template(cls, template_id):
+        tag_template = datacatalog.TagTemplate()
+        tag_template.name = f'projects/p/locations/l/tagTemplates/' \
+                            f'{template_id}'
+        tag_template.display_name = template_id
+
+        field = datacatalog.TagTemplateField()
+        field.type.primitive_type = \
+            datacatalog.FieldType.PrimitiveType.STRING
+        tag_template.fields['id'] = field
+        tag_template.fields['name'] = field
+
+        return tag_template
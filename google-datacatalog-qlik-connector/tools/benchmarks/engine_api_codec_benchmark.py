@@ -0,0 +1,211 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measures how many Engine API frames per second the receive loop decodes and
+how many messages per second the senders encode, comparing the standard
+``json`` module plus JMESPath expressions parsed on each reply (the former
+workflow) with each JSON codec backend installed plus precompiled
+expressions.
+
+The frames are synthetic replies shaped like the ones of a real session:
+Master Items properties, Sheets lists, and session list object layouts.
+
+Usage:
+    python engine_api_codec_benchmark.py [--frames 100000] [--items 20]
+"""
+
+import argparse
+import importlib
+import json
+import time
+
+import jmespath
+
+from google.datacatalog_connectors.qlik.scrape import json_codec
+
+__DEFAULT_FRAMES_COUNT = 100000
+__DEFAULT_ITEMS_COUNT = 20
+
+__LAYOUT_PATH = 'result.qLayout.*.qItems[]' \
+                '.merge({qInfo: qInfo}, qData || `{}`)'
+__LIST_PATH = 'result.qList'
+__PROPERTIES_PATH = 'result.qProp'
+
+
+def __make_properties(object_id, object_type):
+    return {
+        'qInfo': {
+            'qId': object_id,
+            'qType': object_type,
+        },
+        'qMetaDef': {
+            'title': f'Título {object_id}',
+            'description': 'Synthetic object used by the codec benchmark',
+            'tags': ['benchmark', object_type],
+        },
+        'qDim': {
+            'qFieldDefs': [f'Field {object_id}'],
+            'qFieldLabels': [''],
+            'title': object_id,
+        },
+    }
+
+
+def __make_frames(frames_count, items_count):
+    """Makes frames that cycle through the reply kinds of a session.
+
+    Returns:
+        A ``list`` of ``(frame, result_path)`` tuples.
+    """
+    templates = [
+        ({
+            'jsonrpc': '2.0',
+            'result': {
+                'qProp': __make_properties('dimension-0', 'dimension'),
+            },
+        }, __PROPERTIES_PATH),
+        ({
+            'jsonrpc': '2.0',
+            'result': {
+                'qList': [
+                    __make_properties(f'sheet-{index}', 'sheet')
+                    for index in range(items_count)
+                ],
+            },
+        }, __LIST_PATH),
+        ({
+            'jsonrpc': '2.0',
+            'result': {
+                'qLayout': {
+                    'qDimensionList': {
+                        'qItems': [{
+                            'qInfo': {
+                                'qId': f'dimension-{index}',
+                                'qType': 'dimension',
+                            },
+                            'qData':
+                                __make_properties(f'dimension-{index}',
+                                                  'dimension'),
+                        } for index in range(items_count)],
+                    },
+                },
+            },
+        }, __LAYOUT_PATH),
+    ]
+
+    frames = []
+    for frame_id in range(1, frames_count + 1):
+        message, result_path = templates[frame_id % len(templates)]
+        message['id'] = frame_id
+        frames.append((json.dumps(message), result_path))
+    return frames
+
+
+def __decode_parsing_paths(frames):
+    for frame, result_path in frames:
+        jmespath.search(result_path, json.loads(frame))
+
+
+def __decode_compiled(frames, codec):
+    compiled_paths = {
+        result_path: jmespath.compile(result_path) for _, result_path in frames
+    }
+    frames = [
+        (frame, compiled_paths[result_path]) for frame, result_path in frames
+    ]
+
+    start = time.perf_counter()
+    for frame, result_path in frames:
+        result_path.search(codec.loads(frame))
+    return time.perf_counter() - start
+
+
+def __encode(messages, dumps):
+    start = time.perf_counter()
+    for message in messages:
+        dumps(message)
+    return time.perf_counter() - start
+
+
+def __make_messages(messages_count):
+    return [{
+        'handle': message_id % 10,
+        'method': 'GetProperties',
+        'params': {},
+        'id': message_id,
+    } for message_id in range(messages_count)]
+
+
+def __installed_backends():
+    backends = []
+    for backend in json_codec.JSONCodec.BACKENDS:
+        try:
+            importlib.import_module(backend)
+        except ImportError:
+            continue
+        backends.append(backend)
+    return backends
+
+
+def __run(frames_count, items_count):
+    frames = __make_frames(frames_count, items_count)
+    messages = __make_messages(frames_count)
+    print(f'{frames_count} frames, {items_count} items per list reply')
+
+    start = time.perf_counter()
+    __decode_parsing_paths(frames)
+    baseline_decode = time.perf_counter() - start
+    baseline_encode = __encode(messages, json.dumps)
+
+    print(f'{"workflow":>23} {"frames/s":>12} {"speedup":>8}'
+          f' {"messages/s":>12} {"speedup":>8}')
+    __print_row('json + parsed paths', frames_count, baseline_decode,
+                baseline_decode, baseline_encode, baseline_encode)
+    for backend in __installed_backends():
+        codec = json_codec.JSONCodec(backend)
+        __print_row(f'{backend} + compiled paths', frames_count,
+                    __decode_compiled(frames, codec), baseline_decode,
+                    __encode(messages, codec.dumps), baseline_encode)
+
+
+def __print_row(workflow, count, decode_time, baseline_decode, encode_time,
+                baseline_encode):
+    print(f'{workflow:>23} {count / decode_time:>12.0f}'
+          f' {baseline_decode / decode_time:>7.2f}x'
+          f' {count / encode_time:>12.0f}'
+          f' {baseline_encode / encode_time:>7.2f}x')
+
+
+def __parse_args():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark for the Engine API messages encoding'
+        ' and decoding, comparing the JSON codec backends installed.')
+
+    parser.add_argument('--frames',
+                        help='Number of frames to decode and messages to'
+                        ' encode',
+                        type=int,
+                        default=__DEFAULT_FRAMES_COUNT)
+    parser.add_argument('--items',
+                        help='Number of items of each list reply',
+                        type=int,
+                        default=__DEFAULT_ITEMS_COUNT)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = __parse_args()
+    __run(args.frames, args.items)
@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measures the Engine API scraper throughput against a local fake Qlik
+server (see ``fake_qlik_server.py``), so performance regressions show up
+without a real Qlik Sense site.
+
+The synthetic hub is scraped once for each given number of concurrent
+sessions, through the same ``EngineAPIScraper.get_apps_objects`` method used
+by the connector. The scraped objects are checked against the hub, and the
+throughput is reported in Apps and Engine API messages (requests + replies)
+per second.
+
+Usage:
+    python engine_api_scraper_benchmark.py [--apps 200] [--objects 20] \
+        [--latency-ms 5] [--max-sessions 1 5 10] [--no-bulk] \
+        [--min-apps-per-second 0]
+
+The process exits with status 1 if any run is slower than
+``--min-apps-per-second``, so the benchmark can gate CI pipelines.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from google.datacatalog_connectors.qlik.scrape import \
+    credentials_manager, engine_api_scraper
+
+import fake_qlik_server
+
+__DEFAULT_APPS_COUNT = 200
+__DEFAULT_OBJECTS_COUNT = 20
+__DEFAULT_LATENCY_MS = 5
+__DEFAULT_MAX_SESSIONS = [1, 5, 10]
+
+__OBJECT_TYPES = ('dimensions', 'measures', 'sheets', 'visualizations')
+
+
+def __scrape(server, app_ids, max_sessions):
+    credentials = credentials_manager.CredentialsManager(
+        server.address, '.', 'benchmark', 'benchmark')
+    scraper = engine_api_scraper.EngineAPIScraper(server.address, credentials,
+                                                  max_sessions)
+    try:
+        # Authentication is not part of the measured workflow.
+        credentials.get_session_cookie()
+        server.reset_stats()
+
+        start = time.perf_counter()
+        apps_objects = scraper.get_apps_objects(app_ids)
+        elapsed = time.perf_counter() - start
+    finally:
+        scraper.close()
+
+    return apps_objects, elapsed
+
+
+def __validate(apps_objects, app_ids, objects_count):
+    for app_id in app_ids:
+        app_objects = apps_objects.get(app_id) or {}
+        for object_type in __OBJECT_TYPES:
+            scraped_count = len(app_objects.get(object_type) or [])
+            if scraped_count != objects_count:
+                raise AssertionError(
+                    f'{scraped_count} {object_type} scraped from {app_id};'
+                    f' {objects_count} expected.')
+
+
+def __run(args):
+    hub = fake_qlik_server.SyntheticHub(1, args.apps, args.objects)
+    server = fake_qlik_server.FakeQlikServer(
+        hub, latency=args.latency_ms / 1000,
+        bulk_supported=not args.no_bulk).start()
+
+    app_ids = [app.get('id') for app in hub.apps]
+    slow_runs_count = 0
+
+    print(f'{args.apps} Apps, {args.objects} objects of each type per App,'
+          f' {args.latency_ms} ms latency,'
+          f' {"per-object" if args.no_bulk else "bulk"} properties')
+    print(f'{"sessions":>10} {"seconds":>10} {"messages":>10}'
+          f' {"apps/s":>10} {"messages/s":>12}')
+    try:
+        for max_sessions in args.max_sessions:
+            apps_objects, elapsed = __scrape(server, app_ids, max_sessions)
+            __validate(apps_objects, app_ids, args.objects)
+
+            messages_count = \
+                server.received_messages_count + server.sent_messages_count
+            apps_per_second = len(app_ids) / elapsed
+            print(f'{max_sessions:>10} {elapsed:>10.3f} {messages_count:>10}'
+                  f' {apps_per_second:>10.1f}'
+                  f' {messages_count / elapsed:>12.1f}')
+
+            if apps_per_second < args.min_apps_per_second:
+                slow_runs_count += 1
+    finally:
+        server.stop()
+
+    return slow_runs_count
+
+
+def __parse_args():
+    parser = argparse.ArgumentParser(
+        description='Throughput benchmark for the Engine API scraper, run'
+        ' against a local fake Qlik server.')
+
+    parser.add_argument('--apps',
+                        help='Number of Apps to be scraped',
+                        type=int,
+                        default=__DEFAULT_APPS_COUNT)
+    parser.add_argument('--objects',
+                        help='Number of Dimensions, Measures,'
+                        ' Visualizations, and Sheets per App',
+                        type=int,
+                        default=__DEFAULT_OBJECTS_COUNT)
+    parser.add_argument('--latency-ms',
+                        help='Latency added to each Engine API reply',
+                        type=float,
+                        default=__DEFAULT_LATENCY_MS)
+    parser.add_argument('--max-sessions',
+                        help='Numbers of concurrent Engine API sessions to'
+                        ' be benchmarked',
+                        type=int,
+                        nargs='+',
+                        default=__DEFAULT_MAX_SESSIONS)
+    parser.add_argument('--no-bulk',
+                        help='Make the server reject the session list'
+                        ' objects, so the Master Items properties are'
+                        ' scraped one by one',
+                        action='store_true')
+    parser.add_argument('--min-apps-per-second',
+                        help='Minimum throughput expected from each run',
+                        type=float,
+                        default=0)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(1 if __run(__parse_args()) else 0)
@@ -0,0 +1,161 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Maps the relationships of synthetic assembled entries, to check the cost
+of the prepare stage relationship mapping grows linearly with the number of
+entries.
+
+The synthetic site is made of Streams with a fixed number of Apps each, and
+Apps with a fixed number of Dimensions, Measures, Sheets, and Visualizations.
+All the Streams and Apps refer to a Custom Property Definition.
+
+Usage:
+    python entry_relationship_mapper_benchmark.py [--entries 1000000]
+        [--steps 4] [--objects-per-app 20]
+"""
+
+import argparse
+import gc
+import time
+
+from google.cloud import datacatalog
+from google.datacatalog_connectors.commons import \
+    prepare as commons_prepare
+
+from google.datacatalog_connectors.qlik import prepare
+from google.datacatalog_connectors.qlik.prepare import constants
+
+__DEFAULT_ENTRIES_COUNT = 1000000
+__DEFAULT_STEPS = 4
+__DEFAULT_OBJECTS_PER_APP = 20
+
+__APPS_PER_STREAM = 10
+__CUSTOM_PROPERTY_DEFINITIONS_COUNT = 10
+
+__OBJECT_TYPES = (
+    constants.USER_SPECIFIED_TYPE_DIMENSION,
+    constants.USER_SPECIFIED_TYPE_MEASURE,
+    constants.USER_SPECIFIED_TYPE_SHEET,
+    constants.USER_SPECIFIED_TYPE_VISUALIZATION,
+)
+
+
+def __make_assembled_entry(asset_type, asset_id, **related_ids):
+    entry = datacatalog.Entry()
+    entry.name = f'projects/p/locations/l/entryGroups/qlik/entries/{asset_id}'
+    entry.user_specified_type = asset_type
+
+    tag = datacatalog.Tag()
+    for field_id, value in (('id', asset_id), *related_ids.items()):
+        field = datacatalog.TagField()
+        field.string_value = value
+        tag.fields[field_id] = field
+
+    return commons_prepare.AssembledEntryData(asset_id, entry, [tag])
+
+
+def __make_assembled_entries(entries_count, objects_per_app):
+    assembled_entries = [
+        __make_assembled_entry(
+            constants.USER_SPECIFIED_TYPE_CUSTOM_PROPERTY_DEFINITION,
+            f'definition-{index}')
+        for index in range(__CUSTOM_PROPERTY_DEFINITIONS_COUNT)
+    ]
+
+    app_index = 0
+    while len(assembled_entries) < entries_count:
+        definition_id = \
+            f'definition-{app_index % __CUSTOM_PROPERTY_DEFINITIONS_COUNT}'
+        stream_id = f'stream-{app_index // __APPS_PER_STREAM}'
+        if app_index % __APPS_PER_STREAM == 0:
+            assembled_entries.append(
+                __make_assembled_entry(constants.USER_SPECIFIED_TYPE_STREAM,
+                                       stream_id,
+                                       property_definition_id=definition_id))
+
+        app_id = f'app-{app_index}'
+        assembled_entries.append(
+            __make_assembled_entry(constants.USER_SPECIFIED_TYPE_APP,
+                                   app_id,
+                                   property_definition_id=definition_id,
+                                   stream_id=stream_id))
+        for object_index in range(objects_per_app):
+            assembled_entries.append(
+                __make_assembled_entry(__OBJECT_TYPES[object_index %
+                                                      len(__OBJECT_TYPES)],
+                                       f'{app_id}-object-{object_index}',
+                                       app_id=app_id))
+        app_index += 1
+
+    return assembled_entries[:entries_count]
+
+
+def __map_relationships(assembled_entries):
+    # Keeps the garbage collector from charging the allocations made while
+    # building the entries to the mapping.
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        prepare.EntryRelationshipMapper().fulfill_tag_fields(assembled_entries)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def __run(entries_count, steps, objects_per_app):
+    print(f'{"entries":>10} {"seconds":>10} {"us/entry":>10}')
+    for step in reversed(range(steps)):
+        step_entries_count = entries_count // 2**step
+        assembled_entries = __make_assembled_entries(step_entries_count,
+                                                     objects_per_app)
+        elapsed = __map_relationships(assembled_entries)
+
+        # Spot check: the last entry is an App object or an App, and both
+        # refer to a related entry once mapped.
+        last_tag = assembled_entries[-1].tags[0]
+        assert any(field_id.endswith('_entry') for field_id in last_tag.fields)
+
+        print(f'{step_entries_count:>10} {elapsed:>10.3f}'
+              f' {elapsed / step_entries_count * 1e6:>10.2f}')
+
+
+def __parse_args():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark for the Entry relationship mapping.'
+        ' The time per entry is expected to stay roughly constant as the'
+        ' number of entries grows.')
+
+    parser.add_argument('--entries',
+                        help='Number of entries of the largest site',
+                        type=int,
+                        default=__DEFAULT_ENTRIES_COUNT)
+    parser.add_argument('--steps',
+                        help='Number of sites to map, each one twice as large'
+                        ' as the previous one',
+                        type=int,
+                        default=__DEFAULT_STEPS)
+    parser.add_argument('--objects-per-app',
+                        help='Number of Dimensions, Measures, Sheets, and'
+                        ' Visualizations of each App',
+                        type=int,
+                        default=__DEFAULT_OBJECTS_PER_APP)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = __parse_args()
+    __run(args.entries, args.steps, args.objects_per_app)
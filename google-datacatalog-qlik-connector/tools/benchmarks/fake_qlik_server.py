@@ -0,0 +1,606 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A local stand-in for a Qlik Sense site, used to measure the scrapers'
+performance without a real server.
+
+It serves, on a single port as the Qlik Sense Proxy Service does:
+- a websockets Qlik Engine JSON API endpoint (``/app/<app-id>``) that
+  understands the OpenDoc, GetObjects, CreateSessionObject, GetLayout,
+  GetAllInfos, GetDimension, GetMeasure, GetObject, and GetProperties methods;
+- a Qlik Sense Repository Service (QRS) stub with the ``about``,
+  ``app/hublist/full``, ``stream/full``, and
+  ``custompropertydefinition/full`` endpoints, the former redirecting to an
+  authentication endpoint that issues session cookies.
+
+The served metadata belong to a synthetic hub with configurable numbers of
+Streams, Apps, and objects per App. A configurable latency is added to each
+Engine API reply; replies to concurrent requests are delayed concurrently, as
+a real engine would handle them.
+
+Usage:
+    python fake_qlik_server.py [--port 8080] [--streams 10] [--apps 100] \
+        [--objects 20] [--latency-ms 5] [--no-bulk]
+
+Then run the connector with ``--qlik-server http://localhost:8080``.
+"""
+
+import argparse
+import asyncio
+import http
+import json
+import threading
+from urllib import parse
+import uuid
+
+import websockets
+
+SESSION_COOKIE_NAME = 'X-Qlik-Session'
+
+__DEFAULT_PORT = 8080
+__DEFAULT_STREAMS_COUNT = 10
+__DEFAULT_APPS_COUNT = 100
+__DEFAULT_OBJECTS_COUNT = 20
+__DEFAULT_LATENCY_MS = 5
+
+
+class SyntheticHub:
+    """Generates the metadata of a Qlik hub in which each App holds the same
+    number of Dimensions, Measures, Visualizations, and Sheets.
+    """
+
+    def __init__(self, streams_count, apps_count, objects_count):
+        self.streams = [{
+            'id': f'stream-{index}',
+            'name': f'Stream {index}',
+            'createdDate': '2021-01-01T00:00:00.000Z',
+            'modifiedDate': '2021-01-01T00:00:00.000Z',
+            'owner': self.__make_owner(),
+            'customProperties': [],
+            'tags': [],
+        } for index in range(max(1, streams_count))]
+
+        self.apps = [
+            self.__make_app(index, self.streams[index % len(self.streams)])
+            for index in range(apps_count)
+        ]
+        self.objects_count = objects_count
+
+        self.__apps_dict = {app.get('id'): app for app in self.apps}
+
+    def get_app(self, app_id):
+        return self.__apps_dict.get(app_id)
+
+    def make_app_objects(self, app_id):
+        """Makes the properties of the objects of a given App.
+
+        Returns:
+            A ``dict`` in which keys are the object ids and values are their
+            properties, as returned by the GetProperties method.
+        """
+        objects = {}
+        for index in range(self.objects_count):
+            for properties in (
+                    self.__make_dimension(app_id, index),
+                    self.__make_measure(app_id, index),
+                    self.__make_visualization(app_id, index),
+                    self.__make_sheet(app_id, index),
+            ):
+                objects[properties['qInfo']['qId']] = properties
+
+        return objects
+
+    @classmethod
+    def __make_app(cls, index, stream):
+        return {
+            'id': f'app-{index}',
+            'name': f'App {index}',
+            'description': f'Synthetic App {index}',
+            'createdDate': '2021-01-01T00:00:00.000Z',
+            'modifiedDate': '2021-01-02T00:00:00.000Z',
+            'lastReloadTime': '2021-01-03T00:00:00.000Z',
+            'publishTime': '2021-01-04T00:00:00.000Z',
+            'published': True,
+            'fileSize': 1024,
+            'owner': cls.__make_owner(),
+            'stream': {
+                'id': stream.get('id'),
+                'name': stream.get('name'),
+            },
+            'customProperties': [],
+            'tags': [],
+        }
+
+    @classmethod
+    def __make_owner(cls):
+        return {
+            'id': 'owner-id',
+            'userId': 'owner',
+            'userDirectory': 'SYNTHETIC',
+            'name': 'Owner',
+        }
+
+    @classmethod
+    def __make_meta_def(cls, title):
+        return {'title': title, 'description': f'{title} description'}
+
+    @classmethod
+    def __make_dimension(cls, app_id, index):
+        title = f'Dimension {index}'
+        return {
+            'qInfo': {
+                'qId': f'{app_id}-dimension-{index}',
+                'qType': 'dimension',
+            },
+            'qDim': {
+                'qGrouping': 'N',
+                'qFieldDefs': [f'Field{index}'],
+                'qFieldLabels': [title],
+                'title': title,
+            },
+            'qMetaDef': cls.__make_meta_def(title),
+        }
+
+    @classmethod
+    def __make_measure(cls, app_id, index):
+        title = f'Measure {index}'
+        return {
+            'qInfo': {
+                'qId': f'{app_id}-measure-{index}',
+                'qType': 'measure',
+            },
+            'qMeasure': {
+                'qLabel': title,
+                'qDef': f'Sum(Field{index})',
+                'qGrouping': 'N',
+                'qExpressions': [],
+            },
+            'qMetaDef': cls.__make_meta_def(title),
+        }
+
+    @classmethod
+    def __make_visualization(cls, app_id, index):
+        title = f'Visualization {index}'
+        return {
+            'qInfo': {
+                'qId': f'{app_id}-masterobject-{index}',
+                'qType': 'masterobject',
+            },
+            'qMetaDef': cls.__make_meta_def(title),
+            'title': title,
+            'subtitle': '',
+            'footnote': '',
+            'visualization': 'barchart',
+        }
+
+    @classmethod
+    def __make_sheet(cls, app_id, index):
+        title = f'Sheet {index}'
+        return {
+            'qInfo': {
+                'qId': f'{app_id}-sheet-{index}',
+                'qType': 'sheet',
+            },
+            'qMeta': {
+                'title': title,
+                'description': f'{title} description',
+                'published': True,
+                'approved': False,
+                'owner': {
+                    'id': 'owner-id',
+                    'name': 'Owner',
+                },
+                'createdDate': '2021-01-01T00:00:00.000Z',
+                'modifiedDate': '2021-01-02T00:00:00.000Z',
+                'publishTime': '2021-01-04T00:00:00.000Z',
+            },
+            'qData': {},
+        }
+
+
+class _EngineSession:
+    """Replies to the Engine API requests of a websocket session, which is
+    bound to an App.
+    """
+    __DOC_HANDLE = 1
+
+    # Maps the interface methods to the Master Item types they accept.
+    __INTERFACE_METHODS = {
+        'GetDimension': 'dimension',
+        'GetMeasure': 'measure',
+        'GetObject': 'masterobject',
+    }
+
+    def __init__(self, hub, app_id, bulk_supported):
+        self.__hub = hub
+        self.__app_id = app_id
+        self.__bulk_supported = bulk_supported
+        self.__objects = None
+        # Maps handles to the objects they refer to: an object id, or a list
+        # object definition.
+        self.__handles = {}
+        self.__next_handle = self.__DOC_HANDLE + 1
+
+    def reply(self, request):
+        method = request.get('method')
+        handler = {
+            'OpenDoc': self.__open_doc,
+            'GetObjects': self.__get_objects,
+            'CreateSessionObject': self.__create_session_object,
+            'GetLayout': self.__get_layout,
+            'GetAllInfos': self.__get_all_infos,
+            'GetProperties': self.__get_properties,
+        }.get(method)
+        if not handler and method in self.__INTERFACE_METHODS:
+            handler = self.__get_interface
+
+        try:
+            if not handler:
+                raise _EngineError(-32601, f'Method not found: {method}')
+            result = handler(request)
+        except _EngineError as e:
+            return {
+                'jsonrpc': '2.0',
+                'id': request.get('id'),
+                'error': {
+                    'code': e.code,
+                    'parameter': '',
+                    'message': e.message,
+                },
+            }
+
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+    def __open_doc(self, request):
+        if not self.__hub.get_app(self.__app_id) or \
+                request.get('params') != [self.__app_id]:
+            raise _EngineError(1002, 'App invalid')
+
+        self.__objects = self.__hub.make_app_objects(self.__app_id)
+        return self.__make_return(self.__DOC_HANDLE, 'Doc', self.__app_id)
+
+    def __get_objects(self, request):
+        self.__validate_doc_handle(request)
+        types = request.get('params').get('qOptions').get('qTypes')
+        return {
+            'qList': [
+                properties for properties in self.__objects.values()
+                if properties['qInfo']['qType'] in types
+            ]
+        }
+
+    def __create_session_object(self, request):
+        self.__validate_doc_handle(request)
+        if not self.__bulk_supported:
+            raise _EngineError(2, 'Invalid object type')
+
+        properties = request.get('params').get('qProp')
+        list_def_name = next(key for key in properties if key.endswith('Def'))
+        handle = self.__add_handle((list_def_name, properties[list_def_name]))
+        return self.__make_return(handle, properties['qInfo']['qType'],
+                                  str(uuid.uuid4()))
+
+    def __get_layout(self, request):
+        list_def_name, list_def = self.__get_handle_target(request)
+
+        items = []
+        for properties in self.__objects.values():
+            if properties['qInfo']['qType'] != list_def.get('qType'):
+                continue
+            items.append({
+                'qInfo': properties['qInfo'],
+                'qData': {
+                    key: self.__resolve_json_pointer(properties, pointer)
+                    for key, pointer in (list_def.get('qData') or {}).items()
+                },
+            })
+
+        # qDimensionListDef > qDimensionList, and so on.
+        return {'qLayout': {list_def_name[:-3]: {'qItems': items}}}
+
+    def __get_all_infos(self, request):
+        self.__validate_doc_handle(request)
+        return {
+            'qInfos': [
+                properties['qInfo'] for properties in self.__objects.values()
+            ]
+        }
+
+    def __get_interface(self, request):
+        self.__validate_doc_handle(request)
+        object_id = request.get('params').get('qId')
+        properties = self.__objects.get(object_id)
+        if not properties or properties['qInfo']['qType'] != \
+                self.__INTERFACE_METHODS[request.get('method')]:
+            raise _EngineError(-32602, 'Invalid Params')
+
+        handle = self.__add_handle(object_id)
+        return self.__make_return(handle, properties['qInfo']['qType'],
+                                  object_id)
+
+    def __get_properties(self, request):
+        return {'qProp': self.__objects[self.__get_handle_target(request)]}
+
+    def __validate_doc_handle(self, request):
+        if self.__objects is None or \
+                request.get('handle') != self.__DOC_HANDLE:
+            raise _EngineError(-32602, 'Invalid handle')
+
+    def __add_handle(self, target):
+        handle = self.__next_handle
+        self.__next_handle += 1
+        self.__handles[handle] = target
+        return handle
+
+    def __get_handle_target(self, request):
+        target = self.__handles.get(request.get('handle'))
+        if target is None:
+            raise _EngineError(-32602, 'Invalid handle')
+        return target
+
+    @classmethod
+    def __make_return(cls, handle, object_type, generic_id):
+        return {
+            'qReturn': {
+                'qType': object_type,
+                'qHandle': handle,
+                'qGenericId': generic_id,
+            }
+        }
+
+    @classmethod
+    def __resolve_json_pointer(cls, properties, pointer):
+        value = properties
+        for token in pointer.strip('/').split('/'):
+            value = value.get(token) if isinstance(value, dict) else None
+        return value
+
+
+class _EngineError(Exception):
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FakeQlikServer:
+    """Serves the synthetic hub from a background thread.
+
+    Attributes:
+        received_messages_count: The number of Engine API requests received
+            since the last ``reset_stats`` call.
+        sent_messages_count: The number of Engine API replies and
+            notifications sent since the last ``reset_stats`` call.
+    """
+
+    def __init__(self,
+                 hub,
+                 host='localhost',
+                 port=0,
+                 latency=0,
+                 bulk_supported=True):
+
+        self.__hub = hub
+        self.__host = host
+        self.__port = port
+        self.__latency = latency
+        self.__bulk_supported = bulk_supported
+
+        self.__session_cookies = set()
+        self.__event_loop = None
+        self.__server = None
+        self.__thread = None
+        self.reset_stats()
+
+    @property
+    def address(self):
+        return f'http://{self.__host}:{self.__port}'
+
+    def reset_stats(self):
+        self.received_messages_count = 0
+        self.sent_messages_count = 0
+
+    def start(self):
+        """Starts serving, and returns when the server is ready."""
+        self.__event_loop = asyncio.new_event_loop()
+        self.__server = self.__event_loop.run_until_complete(
+            websockets.serve(self.__handle_engine_session,
+                             self.__host,
+                             self.__port,
+                             loop=self.__event_loop,
+                             process_request=self.__process_http_request,
+                             max_size=None))
+        # Gets the actual port when an ephemeral one is requested.
+        self.__port = self.__server.sockets[0].getsockname()[1]
+
+        self.__thread = threading.Thread(target=self.__event_loop.run_forever,
+                                         name='fake-qlik-server',
+                                         daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.__close_server(),
+                                         self.__event_loop).result()
+        self.__event_loop.call_soon_threadsafe(self.__event_loop.stop)
+        self.__thread.join()
+        self.__event_loop.close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self.__thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+    async def __close_server(self):
+        self.__server.close()
+        await self.__server.wait_closed()
+
+    async def __process_http_request(self, path, request_headers):
+        """Answers the QRS and authentication requests, and checks the
+        session cookie of the Engine API websocket handshakes.
+
+        Returns:
+            An HTTP response as a ``(status, headers, body)`` tuple, or
+            ``None`` to go on with the websocket handshake.
+        """
+        url = parse.urlsplit(path)
+        query = parse.parse_qs(url.query)
+
+        if url.path == '/qrs/about' and not self.__is_authenticated(
+                request_headers):
+            return http.HTTPStatus.FOUND, [
+                ('Location', f'{self.address}/windows_authentication/')
+            ], b''
+
+        if url.path == '/windows_authentication/':
+            session_cookie = str(uuid.uuid4())
+            self.__session_cookies.add(session_cookie)
+            return http.HTTPStatus.OK, [
+                ('Set-Cookie',
+                 f'{SESSION_COOKIE_NAME}={session_cookie}; Path=/; HttpOnly')
+            ], b''
+
+        if not self.__is_authenticated(request_headers):
+            return http.HTTPStatus.UNAUTHORIZED, [], b''
+
+        if url.path.startswith('/app/'):
+            return None
+
+        qrs_resources = {
+            '/qrs/about':
+                lambda: {
+                    'buildVersion': 'synthetic'
+                },
+            '/qrs/app/hublist/full':
+                lambda: self.__filter_apps(query.get('filter', [''])[0]),
+            '/qrs/custompropertydefinition/full':
+                lambda: [],
+            '/qrs/stream/full':
+                lambda: self.__hub.streams,
+        }
+        make_resource = qrs_resources.get(url.path)
+        if not make_resource:
+            return http.HTTPStatus.NOT_FOUND, [], b''
+
+        return http.HTTPStatus.OK, [
+            ('Content-Type', 'application/json; charset=utf-8')
+        ], json.dumps(make_resource()).encode('utf-8')
+
+    def __is_authenticated(self, request_headers):
+        cookies = request_headers.get('Cookie') or ''
+        return any(cookie.strip() == f'{SESSION_COOKIE_NAME}={session_cookie}'
+                   for cookie in cookies.split(';')
+                   for session_cookie in self.__session_cookies)
+
+    def __filter_apps(self, query_filter):
+        # Supports 'published eq true' and 'stream.id eq <id>' clauses,
+        # combined with 'and', which are the ones sent by the connector.
+        apps = self.__hub.apps
+        for clause in filter(None, query_filter.split(' and ')):
+            field, _, value = clause.split(' ', 2)
+            if field == 'published':
+                apps = [app for app in apps if app.get('published')]
+            elif field == 'stream.id':
+                apps = [
+                    app for app in apps if app.get('stream').get('id') == value
+                ]
+        return apps
+
+    async def __handle_engine_session(self, websocket, path):
+        app_id = parse.urlsplit(path).path.rsplit('/', 1)[-1]
+        session = _EngineSession(self.__hub, app_id, self.__bulk_supported)
+
+        await self.__send(
+            websocket, {
+                'jsonrpc': '2.0',
+                'method': 'OnConnected',
+                'params': {
+                    'qSessionState': 'SESSION_CREATED'
+                },
+            })
+
+        reply_tasks = set()
+        try:
+            async for message in websocket:
+                self.received_messages_count += 1
+                reply_task = asyncio.ensure_future(
+                    self.__reply(websocket, session, json.loads(message)))
+                reply_tasks.add(reply_task)
+                reply_task.add_done_callback(reply_tasks.discard)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for reply_task in reply_tasks:
+                reply_task.cancel()
+
+    async def __reply(self, websocket, session, request):
+        if self.__latency:
+            await asyncio.sleep(self.__latency)
+        try:
+            await self.__send(websocket, session.reply(request))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def __send(self, websocket, message):
+        await websocket.send(json.dumps(message))
+        self.sent_messages_count += 1
+
+
+def __parse_args():
+    parser = argparse.ArgumentParser(
+        description='Local stand-in for a Qlik Sense site, serving a'
+        ' synthetic hub through the Engine JSON API and a QRS stub.')
+
+    parser.add_argument('--port',
+                        help='Port to listen on',
+                        type=int,
+                        default=__DEFAULT_PORT)
+    parser.add_argument('--streams',
+                        help='Number of Streams',
+                        type=int,
+                        default=__DEFAULT_STREAMS_COUNT)
+    parser.add_argument('--apps',
+                        help='Number of Apps',
+                        type=int,
+                        default=__DEFAULT_APPS_COUNT)
+    parser.add_argument('--objects',
+                        help='Number of Dimensions, Measures,'
+                        ' Visualizations, and Sheets per App',
+                        type=int,
+                        default=__DEFAULT_OBJECTS_COUNT)
+    parser.add_argument('--latency-ms',
+                        help='Latency added to each Engine API reply',
+                        type=float,
+                        default=__DEFAULT_LATENCY_MS)
+    parser.add_argument('--no-bulk',
+                        help='Reject the session list objects used to get'
+                        ' the Master Items in bulk',
+                        action='store_true')
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = __parse_args()
+    server = FakeQlikServer(SyntheticHub(args.streams, args.apps,
+                                         args.objects),
+                            port=args.port,
+                            latency=args.latency_ms / 1000,
+                            bulk_supported=not args.no_bulk)
+    print(f'Serving {args.apps} Apps at {server.address}...')
+    server.serve_forever()
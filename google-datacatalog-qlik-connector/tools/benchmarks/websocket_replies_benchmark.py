@@ -0,0 +1,166 @@
+#!/usr/bin/python
+#
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Replays synthetic Engine API sessions through the websocket replies
+handling workflow, to check its cost grows linearly with the number of
+messages.
+
+Each session simulates an App with N master items: N interface replies that
+are handled by the message sender, and N properties replies that are
+gathered by the message receiver. Replies to the interface and properties
+messages of each item are interleaved.
+
+Usage:
+    python websocket_replies_benchmark.py [--messages 50000] [--steps 4]
+"""
+
+import argparse
+import asyncio
+from collections import deque
+import json
+import time
+
+import jmespath
+
+from google.datacatalog_connectors.qlik.scrape import \
+    base_engine_api_helper, websocket_replies_helper
+
+__DEFAULT_MESSAGES_COUNT = 50000
+__DEFAULT_STEPS = 4
+
+__GET_OBJECT = 'GetObject'
+__GET_PROPERTIES = 'GetProperties'
+
+__RESULT_PATH = jmespath.compile('result.qProp')
+
+
+class _ReplayWebsocket:
+    """Replays pre-built messages as an async iterator, the same way
+    ``websockets`` client protocols deliver incoming messages.
+    """
+
+    def __init__(self, messages):
+        self.__messages = deque(messages)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.__messages:
+            raise StopAsyncIteration
+        # Yields control to the sender, as a network read would do.
+        await asyncio.sleep(0)
+        return self.__messages.popleft()
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+def __make_session(items_count):
+    replies_helper = websocket_replies_helper.WebsocketRepliesHelper()
+    # All the interface messages are sent at once, right after the Get All
+    # Infos reply, so their ids are pending before any properties message id.
+    interface_reply_ids = range(1, items_count + 1)
+    properties_reply_ids = range(items_count + 1, 2 * items_count + 1)
+    replies_helper.add_pending_ids(interface_reply_ids, __GET_OBJECT)
+    replies_helper.add_pending_ids(properties_reply_ids, __GET_PROPERTIES)
+
+    messages = []
+    for index in range(items_count):
+        interface_reply_id = interface_reply_ids[index]
+        properties_reply_id = properties_reply_ids[index]
+        messages.append(
+            json.dumps({
+                'id': interface_reply_id,
+                'result': {
+                    'qReturn': {
+                        'qHandle': index
+                    }
+                }
+            }))
+        messages.append(
+            json.dumps({
+                'id': properties_reply_id,
+                'result': {
+                    'qProp': {
+                        'qInfo': {
+                            'qId': f'item-{index}'
+                        }
+                    }
+                }
+            }))
+
+    return replies_helper, _ReplayWebsocket(messages)
+
+
+async def __handle_reply(websocket, replies_helper, reply):
+    replies_helper.remove_unhandled(reply)
+
+
+async def __replay_session(items_count):
+    helper_class = base_engine_api_helper.BaseEngineAPIHelper
+    replies_helper, websocket = __make_session(items_count)
+
+    start = time.perf_counter()
+    results = await helper_class._hold_websocket_communication(
+        helper_class._send_messages(websocket, replies_helper, __handle_reply),
+        helper_class._receive_messages(websocket, replies_helper,
+                                       __GET_PROPERTIES, __RESULT_PATH))
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == items_count
+    assert replies_helper.were_all_processed()
+    return elapsed
+
+
+def __run(messages_count, steps):
+    print(f'{"messages":>10} {"seconds":>10} {"us/message":>12}')
+    event_loop = asyncio.new_event_loop()
+    try:
+        for step in reversed(range(steps)):
+            step_messages_count = messages_count // 2**step
+            elapsed = event_loop.run_until_complete(
+                __replay_session(step_messages_count // 2))
+            print(f'{step_messages_count:>10} {elapsed:>10.3f}'
+                  f' {elapsed / step_messages_count * 1e6:>12.2f}')
+    finally:
+        event_loop.close()
+
+
+def __parse_args():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark for the Engine API websocket replies'
+        ' handling workflow. The time per message is expected to stay'
+        ' roughly constant as the number of messages grows.')
+
+    parser.add_argument('--messages',
+                        help='Number of messages of the largest session',
+                        type=int,
+                        default=__DEFAULT_MESSAGES_COUNT)
+    parser.add_argument('--steps',
+                        help='Number of sessions to replay, each one twice as'
+                        ' large as the previous one',
+                        type=int,
+                        default=__DEFAULT_STEPS)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = __parse_args()
+    __run(args.messages, args.steps)